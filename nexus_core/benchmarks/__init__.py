@@ -0,0 +1,6 @@
+"""
+離線、可重現的熱路徑基準測試。
+
+案例定義於 `benchmarks.cases`，固定資料與資料層替身位於 `benchmarks.fixtures`，
+量測與基準線比對位於 `benchmarks.harness`；以 `python -m benchmarks` 執行。
+"""
@@ -0,0 +1,122 @@
+"""
+離線基準測試 CLI。
+
+    python -m benchmarks                         # 執行全部案例並列出結果
+    python -m benchmarks --only max_pain gex_walls
+    python -m benchmarks --output results.json --baseline benchmarks/baseline.json
+    python -m benchmarks --save-baseline         # 以本次結果覆寫基準線
+
+與基準線比對時，任一指標退步超過 --threshold 即以結束碼 1 結束，方便接進 CI。
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import Optional, Sequence
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.cases import CASES
+from benchmarks.harness import BenchmarkReport, BenchmarkResult, compare, run_cases
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+console = Console(soft_wrap=True)
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "--only", nargs="+", choices=sorted(CASES), help="只執行指定案例"
+    )
+    parser.add_argument("--list", action="store_true", help="列出所有案例後結束")
+    parser.add_argument(
+        "--iterations-scale",
+        type=float,
+        default=1.0,
+        help="迭代次數倍率 (例如 0.2 供快速冒煙測試)",
+    )
+    parser.add_argument("--output", type=Path, help="將結果寫成 JSON")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=DEFAULT_BASELINE,
+        help="比對用基準線 JSON (檔案不存在時略過比對)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.30,
+        help="視為退步的變動比例 (0.30 = 30%%)",
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="以本次結果覆寫 --baseline"
+    )
+    parser.add_argument("--verbose", action="store_true", help="顯示程式日誌")
+    return parser.parse_args(argv)
+
+
+def _print_result(result: BenchmarkResult) -> None:
+    console.print(
+        f"[cyan]{result.name:<22}[/cyan] {result.ops_per_sec:>10,.1f} ops/s  "
+        f"p50 {result.p50_ms:>9.2f} ms  p99 {result.p99_ms:>9.2f} ms  "
+        f"peak {result.peak_memory_kib:>9,.0f} KiB"
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _parse_args(argv)
+    if args.list:
+        for case in CASES.values():
+            console.print(f"[cyan]{case.name:<22}[/cyan] {case.description}")
+        return 0
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    selected = [CASES[name] for name in (args.only or CASES)]
+    report = run_cases(selected, args.iterations_scale, on_result=_print_result)
+
+    if args.output:
+        report.save(args.output)
+        console.print(f"結果已寫入 {args.output}")
+
+    if args.save_baseline:
+        if args.baseline.exists() and args.only:
+            merged = BenchmarkReport.load(args.baseline)
+            merged.results.update(report.results)
+            merged.meta = report.meta
+            report = merged
+        report.save(args.baseline)
+        console.print(f"基準線已更新: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        return 0
+
+    baseline = BenchmarkReport.load(args.baseline)
+    regressions = compare(report.results, baseline.results, args.threshold)
+    table = Table(title=f"與基準線比對 (門檻 {args.threshold:.0%})")
+    table.add_column("案例", style="cyan")
+    table.add_column("指標")
+    table.add_column("基準線", justify="right")
+    table.add_column("本次", justify="right")
+    table.add_column("變動", justify="right", style="red")
+    for reg in regressions:
+        table.add_row(
+            reg.name,
+            reg.metric,
+            f"{reg.baseline:,.2f}",
+            f"{reg.current:,.2f}",
+            f"{reg.change_pct:+.1f}%",
+        )
+    if regressions:
+        console.print(table)
+        return 1
+    console.print("[green]✅ 未偵測到超過門檻的效能退步[/green]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,475 @@
+"""
+benchmarks/cases.py
+
+熱路徑基準測試案例註冊表。
+
+每個案例都在 `block_network()` 之下執行，資料層由 `FixtureMarketData` 取代，
+需要資料庫的案例使用 `fixture_database()` 建立的暫存 SQLite。
+"""
+
+import copy
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import market_time
+from benchmarks.fixtures import (
+    SYMBOLS,
+    FixtureMarketData,
+    block_network,
+    fixture_database,
+    gex_profile,
+    option_chain_frames,
+    option_expiries,
+    quarterly_fundamentals,
+    radar_result,
+    seed_hot_query_tables,
+)
+from benchmarks.harness import BenchmarkCase, CaseFactory
+
+CASES: dict[str, BenchmarkCase] = {}
+
+# 心跳 / 全站掃描案例的訂閱規模
+SCAN_USERS = 20
+HEARTBEAT_USERS = 50
+WRITE_QUEUE_BATCH = 200
+# MTF 批次確認：合成訊號爆量 (每檔標的在同一輪出現多筆交叉訊號)
+MTF_BURST_SYMBOLS = 60
+MTF_SIGNALS_PER_SYMBOL = 4
+# DDP 巡檢：已存財報的合成標的數
+DDP_SCAN_SYMBOLS = 500
+# 機會成本候選排名：固定使用者數，比較不同去重標的數下的每輪成本
+ROLLOVER_USERS = 200
+ROLLOVER_UNIQUE_SYMBOLS = (40, 160)
+# 熱路徑索引：每張熱表的合成列數、使用者數與每輪抽樣查詢的使用者數
+HOT_QUERY_ROWS = 100_000
+HOT_QUERY_USERS = 1_000
+HOT_QUERY_SAMPLE_USERS = 10
+# 暗池明細：日內成交帶的總筆數與每輪新到的筆數
+DARKPOOL_TAPE_PRINTS = 20_000
+DARKPOOL_TAPE_BATCH = 250
+
+
+def benchmark(
+    name: str,
+    description: str,
+    iterations: int = 30,
+    warmup: int = 2,
+    ops_per_iteration: int = 1,
+) -> Callable[[CaseFactory], CaseFactory]:
+    def decorator(factory: CaseFactory) -> CaseFactory:
+        CASES[name] = BenchmarkCase(
+            name=name,
+            factory=factory,
+            description=description,
+            iterations=iterations,
+            warmup=warmup,
+            ops_per_iteration=ops_per_iteration,
+        )
+        return factory
+
+    return decorator
+
+
+@benchmark(
+    "analyze_symbol",
+    "strategy.analyze_symbol 逐一分析 8 檔標的 (指標、選擇權鏈、Greeks、風控過濾)",
+    iterations=20,
+    ops_per_iteration=len(SYMBOLS),
+)
+@asynccontextmanager
+async def analyze_symbol_case() -> AsyncIterator[Callable[[], Any]]:
+    from market_analysis import strategy
+
+    market = FixtureMarketData()
+    with block_network(), market.patched():
+        df_spy = await market.get_spy_history_df()
+        spy_price = float(df_spy["Close"].iloc[-1])
+
+        async def run() -> None:
+            for sym in SYMBOLS:
+                await strategy.analyze_symbol(
+                    sym, 0.0, df_spy, spy_price, vix_spot=market.vix
+                )
+
+        yield run
+
+
+@benchmark(
+    "run_market_scan",
+    f"TradingService.run_market_scan：{SCAN_USERS} 位使用者、8 檔去重標的",
+    iterations=5,
+    warmup=1,
+)
+@asynccontextmanager
+async def run_market_scan_case() -> AsyncIterator[Callable[[], Any]]:
+    from services.trading_service import TradingService
+
+    market = FixtureMarketData()
+    with (
+        block_network(),
+        fixture_database(range(1, SCAN_USERS + 1)),
+        market.patched(),
+    ):
+        service = TradingService(MagicMock())
+
+        async def run() -> None:
+            await service.run_market_scan(is_auto=True)
+
+        yield run
+
+
+@benchmark(
+    "heartbeat_three_pass",
+    f"自選心跳三階段 (篩選 → 去重抓取 → 個人化推播)：{HEARTBEAT_USERS} 位使用者",
+    iterations=10,
+    warmup=1,
+)
+@asynccontextmanager
+async def heartbeat_case() -> AsyncIterator[Callable[[], Any]]:
+    import database
+    from cogs.trading.heartbeat import dispatch_watchlist_heartbeat
+
+    market = FixtureMarketData()
+    radar = {sym: radar_result(sym) for sym in SYMBOLS}
+
+    class _TerminalCog:
+        async def _fetch_sym_radar_data_slow(self, sym: str) -> Any:
+            return copy.deepcopy(radar[sym])
+
+    terminal = _TerminalCog()
+    bot = SimpleNamespace(
+        get_cog=lambda name: terminal if name == "UnifiedTerminalCog" else None,
+        queue_dm=AsyncMock(),
+    )
+    with (
+        block_network(),
+        fixture_database(range(1, HEARTBEAT_USERS + 1)),
+        market.patched(),
+        patch("services.edge_cache_client.sync_watchlist_symbols", new=AsyncMock()),
+    ):
+        watchlists = database.get_all_watchlist()
+
+        async def run() -> None:
+            await dispatch_watchlist_heartbeat(bot, watchlists)
+
+        yield run
+
+
+@benchmark(
+    "mtf_batch_confirm",
+    f"confirm_mtf_trends：{MTF_BURST_SYMBOLS} 檔 × {MTF_SIGNALS_PER_SYMBOL} 筆交叉訊號爆量 (冷快取，共用價格矩陣)",
+    iterations=30,
+    ops_per_iteration=MTF_BURST_SYMBOLS * MTF_SIGNALS_PER_SYMBOL,
+)
+@asynccontextmanager
+async def mtf_batch_case() -> AsyncIterator[Callable[[], Any]]:
+    from services import alert_filter
+
+    market = FixtureMarketData()
+    signals = [
+        (
+            f"SYN{i:03d}",
+            {"type": "CROSSOVER", "direction": "BULLISH" if j % 2 else "BEARISH"},
+        )
+        for j in range(MTF_SIGNALS_PER_SYMBOL)
+        for i in range(MTF_BURST_SYMBOLS)
+    ]
+    with block_network(), market.patched():
+
+        async def run() -> None:
+            alert_filter.clear_anchor_cache()
+            await alert_filter.confirm_mtf_trends(signals)
+
+        yield run
+        alert_filter.clear_anchor_cache()
+
+
+@benchmark(
+    "ddp_scan_500",
+    f"DDPInspector.run_scan：{DDP_SCAN_SYMBOLS} 檔已存財報標的 (有界併發，零 yfinance 請求)",
+    iterations=5,
+    warmup=1,
+    ops_per_iteration=DDP_SCAN_SYMBOLS,
+)
+@asynccontextmanager
+async def ddp_scan_case() -> AsyncIterator[Callable[[], Any]]:
+    import time
+
+    from market_analysis.ddp_inspector import DDPInspector
+    from services.fundamentals_store import (
+        Fundamentals,
+        to_row,
+        fundamentals_store,
+        fiscal_period_of,
+    )
+    from database.fundamentals import save_fundamentals
+
+    market = FixtureMarketData()
+    symbols = [f"SYN{i:03d}" for i in range(DDP_SCAN_SYMBOLS)]
+    inspector = DDPInspector()
+    with block_network(), market.patched(), fixture_database([1]):
+        now = time.time()
+        for sym in symbols:
+            info, income, cashflow = quarterly_fundamentals(sym)
+            save_fundamentals(
+                to_row(
+                    Fundamentals(
+                        sym, fiscal_period_of(income), info, income, cashflow, now, now
+                    )
+                )
+            )
+
+        async def run() -> None:
+            # 每輪都從資料庫批次載入，量測冷記憶體下的整批掃描
+            fundamentals_store.clear()
+            await inspector.run_scan(symbols)
+            assert fundamentals_store.network_fetches == 0
+
+        yield run
+        fundamentals_store.clear()
+
+
+def _rollover_ranking_case(unique_symbols: int) -> CaseFactory:
+    @asynccontextmanager
+    async def case() -> AsyncIterator[Callable[[], Any]]:
+        from database.calendar_cache import save_earnings_cache
+        from database.market_cache import save_market_cache
+        from market_analysis.dynamic_rollover import DynamicRolloverEngine
+
+        market = FixtureMarketData()
+        pool = [f"SYN{i:03d}" for i in range(unique_symbols)]
+        engine = DynamicRolloverEngine()
+        users = range(1, ROLLOVER_USERS + 1)
+        with block_network(), fixture_database(list(users), pool):
+            for i, sym in enumerate(pool):
+                spot = market.spot(sym)
+                save_market_cache(
+                    sym,
+                    spot * 0.98,
+                    spot * 0.95,
+                    spot * (1.03 + 0.001 * (i % 60)),
+                    reference_spot_price=spot,
+                )
+                save_earnings_cache(sym, (date.today().replace(day=1)).isoformat())
+            radar = {sym: radar_result(sym) for sym in pool[:8]}
+
+            def run() -> None:
+                ranking = engine.build_rollover_ranking(set(pool[:4]), radar)
+                for uid in users:
+                    engine._find_best_rollover_target(
+                        uid, exclude_symbols=set(pool[:2]), ranking=ranking
+                    )
+
+            yield run
+
+    return case
+
+
+for _unique in ROLLOVER_UNIQUE_SYMBOLS:
+    benchmark(
+        f"rollover_ranking_{_unique}",
+        f"機會成本候選排名：{ROLLOVER_USERS} 位使用者、{_unique} 檔去重自選標的 (每輪建表一次 + 逐使用者 top-k)",
+        iterations=20,
+        ops_per_iteration=ROLLOVER_USERS,
+    )(_rollover_ranking_case(_unique))
+
+
+@benchmark(
+    "max_pain",
+    "Max Pain (OI 與成交量加權) 於 8 檔標的 × 4 個到期日的完整選擇權鏈",
+    iterations=30,
+    ops_per_iteration=len(SYMBOLS) * 4 * 2,
+)
+@asynccontextmanager
+async def max_pain_case() -> AsyncIterator[Callable[[], Any]]:
+    from market_analysis.sentiment.max_pain import _calculate_max_pain_with_weights
+    from services.market_data_service import OptionChainData
+
+    market = FixtureMarketData()
+    chains = []
+    for sym in SYMBOLS:
+        spot = market.spot(sym)
+        for expiry in option_expiries()[:4]:
+            calls, puts = option_chain_frames(sym, expiry, spot)
+            chains.append(
+                (OptionChainData(calls, puts, {"regularMarketPrice": spot}), spot)
+            )
+
+    def run() -> None:
+        for chain, spot in chains:
+            _calculate_max_pain_with_weights(chain, "openInterest", spot)
+            _calculate_max_pain_with_weights(chain, "volume", spot)
+
+    with block_network():
+        yield run
+
+
+@benchmark(
+    "gex_walls",
+    "GEX：Put 側 Gamma 牆、Gamma Flip 估算與支撐/壓力牆掃描 (8 檔標的)",
+    iterations=30,
+    ops_per_iteration=len(SYMBOLS),
+)
+@asynccontextmanager
+async def gex_case() -> AsyncIterator[Callable[[], Any]]:
+    from market_analysis.chain_arrays import max_gamma_wall
+    from market_analysis.dynamic_rollover.structural_signals import _scan_gex_walls
+    from market_analysis.index_microstructure import estimate_symbol_gamma_flip
+
+    market = FixtureMarketData()
+    expiry = option_expiries()[2]
+    today = datetime.now(market_time.ny_tz).date()
+    t_years = max((date.fromisoformat(expiry) - today).days, 1) / 365.0
+    inputs = []
+    for sym in SYMBOLS:
+        spot = market.spot(sym)
+        _, puts = option_chain_frames(sym, expiry, spot)
+        inputs.append((sym, spot, puts, gex_profile(sym, spot)))
+
+    def run() -> None:
+        for sym, spot, puts, profile in inputs:
+            max_gamma_wall(puts, spot, t_years, 0.005)
+            estimate_symbol_gamma_flip(profile, spot)
+            _scan_gex_walls(sym, {"gex_profile": profile})
+
+    with block_network():
+        yield run
+
+
+@benchmark(
+    "ansi_radar_panel",
+    "build_radar_scan_embed：8 檔標的的 ANSI 雷達面板渲染與分頁",
+    iterations=30,
+)
+@asynccontextmanager
+async def ansi_panel_case() -> AsyncIterator[Callable[[], Any]]:
+    from cogs.embed_builders.market_embeds import build_radar_scan_embed
+
+    results = [radar_result(sym) for sym in SYMBOLS]
+    with block_network(), fixture_database([1]):
+
+        def run() -> None:
+            build_radar_scan_embed(copy.deepcopy(results), "WATCHLIST", 1)
+
+        yield run
+
+
+@benchmark(
+    "sqlite_write_queue",
+    f"DatabaseWriteQueue：每輪併發送出 {WRITE_QUEUE_BATCH} 筆 kv_cache 寫入",
+    iterations=20,
+    ops_per_iteration=WRITE_QUEUE_BATCH,
+)
+@asynccontextmanager
+async def write_queue_case() -> AsyncIterator[Callable[[], Any]]:
+    import asyncio
+
+    from database.connection import DatabaseWriteQueue
+
+    query = "INSERT OR REPLACE INTO kv_cache (key, value) VALUES (?, ?)"
+    with block_network(), fixture_database([1]):
+        DatabaseWriteQueue.initialize(asyncio.get_running_loop())
+        try:
+
+            async def run() -> None:
+                await asyncio.gather(
+                    *(
+                        DatabaseWriteQueue.put_task(
+                            "sql", (query, (f"bench_{i}", str(i)))
+                        )
+                        for i in range(WRITE_QUEUE_BATCH)
+                    )
+                )
+
+            yield run
+        finally:
+            await DatabaseWriteQueue.stop_worker()
+
+
+def _hot_query_case(indexed: bool) -> CaseFactory:
+    @asynccontextmanager
+    async def case() -> AsyncIterator[Callable[[], Any]]:
+        import re
+        import sqlite3
+
+        import database
+        from database.notifications import get_pending_notifications
+        from database.migrations import v072_add_hot_path_indexes as v072
+
+        sample = [
+            u * (HOT_QUERY_USERS // HOT_QUERY_SAMPLE_USERS)
+            for u in range(1, HOT_QUERY_SAMPLE_USERS + 1)
+        ]
+        with block_network(), fixture_database(sample) as db_path:
+            seed_hot_query_tables(db_path, HOT_QUERY_ROWS, HOT_QUERY_USERS)
+            if not indexed:
+                # 還原到 V071 的索引配置 (只有 active_orders(user_id) 單欄索引)
+                with sqlite3.connect(db_path) as conn:
+                    for name in re.findall(
+                        r"CREATE INDEX IF NOT EXISTS (\w+)", v072.sql
+                    ):
+                        conn.execute(f"DROP INDEX {name}")
+                    conn.execute(
+                        "CREATE INDEX idx_active_orders_user ON active_orders(user_id)"
+                    )
+
+            def run() -> None:
+                database.get_all_open_virtual_trades()
+                get_pending_notifications(limit=50)
+                for uid in sample:
+                    database.get_open_virtual_trades(uid)
+                    database.get_all_virtual_trades(uid)
+                    database.get_user_active_orders(uid)
+                    database.get_hedge_history(uid)
+                    database.get_full_user_context(uid)
+                    database.get_market_cache(f"SYN{uid:05d}")
+
+            yield run
+
+    return case
+
+
+for _indexed, _suffix in ((True, ""), (False, "_unindexed")):
+    benchmark(
+        f"hot_queries_100k{_suffix}",
+        f"熱路徑查詢 ({'V072 複合索引' if _indexed else 'V071 索引配置'})：6 張熱表各 "
+        f"{HOT_QUERY_ROWS:,} 列，全站開倉 / 待發通知 + {HOT_QUERY_SAMPLE_USERS} 位使用者的逐人查詢",
+        iterations=10,
+        ops_per_iteration=2 + 6 * HOT_QUERY_SAMPLE_USERS,
+    )(_hot_query_case(_indexed))
+
+
+@benchmark(
+    "darkpool_tape_20k",
+    f"暗池明細：{DARKPOOL_TAPE_PRINTS:,} 筆成交的日內帶，每輪新到 {DARKPOOL_TAPE_BATCH} 筆後重算過濾、偏斜度、POC 與 DIX 式彙總",
+    iterations=30,
+)
+@asynccontextmanager
+async def darkpool_tape_case() -> AsyncIterator[Callable[[], Any]]:
+    import numpy as np
+
+    from market_analysis.dark_pool_engine import DarkPoolTapeCache, TapeOffset
+
+    rng = np.random.default_rng(20)
+    spot = FixtureMarketData().spot("NVDA")
+    prices = np.round(spot * (1 + rng.normal(0, 0.02, DARKPOOL_TAPE_PRINTS)), 2)
+    volumes = rng.integers(5_000, 800_000, DARKPOOL_TAPE_PRINTS)
+    tape = [
+        {"price": float(p), "volume": int(v), "premium": float(p * v)}
+        for p, v in zip(prices, volumes)
+    ]
+    cache = DarkPoolTapeCache()
+    start = DARKPOOL_TAPE_PRINTS - DARKPOOL_TAPE_BATCH * 40
+    cache.analyze("NVDA", tape[:start], spot, watermark=TapeOffset("NVDA", start))
+    arrived = [start]
+
+    def run() -> None:
+        end = min(arrived[0] + DARKPOOL_TAPE_BATCH, DARKPOOL_TAPE_PRINTS)
+        cache.analyze("NVDA", tape[:end], spot, watermark=TapeOffset("NVDA", end))
+        arrived[0] = end
+
+    with block_network():
+        yield run
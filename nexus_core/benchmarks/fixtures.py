@@ -0,0 +1,544 @@
+"""
+benchmarks/fixtures.py
+
+離線基準測試使用的固定資料與資料層替身。
+
+所有 K 線、選擇權鏈與雷達結果都由「標的代號 → 固定亂數種子」決定性產生，
+同一版本的程式碼在任何機器上都拿到完全相同的輸入，結果差異只反映程式本身
+的效能變化。`FixtureMarketData` 以相同簽名取代 `services.market_data_service`
+的公開抓取函式；`block_network()` 則讓任何漏網的外部連線立即失敗，而不是
+默默等待逾時。
+"""
+
+import math
+import socket
+import tempfile
+import zlib
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterator, Optional, Sequence
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+import market_time
+from config import RISK_FREE_RATE
+
+SYMBOLS = ("AAPL", "MSFT", "NVDA", "AMD", "TSLA", "META", "GOOGL", "AMZN")
+ETF_SYMBOLS = frozenset({"SPY", "QQQ", "IWM", "XLK", "XLY", "XLC", "SMH"})
+
+# 各標的的起始價位，讓履約價間距與價格尺度接近真實市場
+_BASE_PRICES = {
+    "SPY": 560.0,
+    "QQQ": 480.0,
+    "AAPL": 225.0,
+    "MSFT": 430.0,
+    "NVDA": 120.0,
+    "AMD": 155.0,
+    "TSLA": 240.0,
+    "META": 560.0,
+    "GOOGL": 165.0,
+    "AMZN": 185.0,
+}
+
+_PERIOD_BARS = {"5d": 5, "1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504}
+_INTRADAY_BARS_PER_DAY = {"1h": 7, "30m": 13, "15m": 26, "5m": 78}
+
+
+def _seed(*parts: str) -> int:
+    return zlib.crc32("|".join(parts).encode("utf-8"))
+
+
+def _last_session_close() -> datetime:
+    today = datetime.now(market_time.ny_tz).date()
+    day = today - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return datetime(day.year, day.month, day.day, 16, 0, tzinfo=market_time.ny_tz)
+
+
+def _period_days(period: str) -> int:
+    if period in _PERIOD_BARS:
+        return _PERIOD_BARS[period]
+    if period.endswith("d") and period[:-1].isdigit():
+        return int(period[:-1])
+    return 252
+
+
+def ohlcv_frame(symbol: str, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+    """產生決定性的 OHLCV 框架 (幾何隨機漫步 + 日內振幅)，索引為紐約時區。"""
+    days = _period_days(period)
+    per_day = _INTRADAY_BARS_PER_DAY.get(interval, 1)
+    n = max(days * per_day, 2)
+    rng = np.random.default_rng(_seed(symbol.upper(), "ohlcv", interval))
+    sigma = 0.012 / np.sqrt(per_day)
+    base = _BASE_PRICES.get(symbol.upper(), 100.0)
+    close = base * np.exp(np.cumsum(rng.normal(0.0003 / per_day, sigma, n)))
+    # 最後一段緩升，讓各標的 (含 SPY) 站上 20MA，分析流程能走完整條路徑
+    ramp = min(n, 25 * per_day)
+    close[-ramp:] *= np.linspace(1.0, 1.08, ramp)
+    close *= base / close[-1]
+    high = close * (1 + rng.uniform(0.0, 1.5 * sigma, n))
+    low = close * (1 - rng.uniform(0.0, 1.5 * sigma, n))
+    open_ = np.clip(close * (1 + rng.normal(0, sigma / 2, n)), low, high)
+    volume = rng.integers(2_000_000, 40_000_000, n) // per_day
+
+    end = _last_session_close()
+    if per_day == 1:
+        index = pd.bdate_range(end=end.date(), periods=n, tz=market_time.ny_tz)
+    else:
+        freq = {"1h": "h", "30m": "30min", "15m": "15min", "5m": "5min"}[interval]
+        index = pd.date_range(end=end, periods=n, freq=freq)
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=index,
+    )
+
+
+def option_expiries(today: Optional[date] = None, weeks: int = 10) -> list[str]:
+    """未來數週的週五到期日，加上三個較遠的月選到期日。"""
+    today = today or datetime.now(market_time.ny_tz).date()
+    friday = today + timedelta(days=(4 - today.weekday()) % 7 or 7)
+    expiries = [friday + timedelta(weeks=i) for i in range(weeks)]
+    expiries += [friday + timedelta(weeks=w) for w in (13, 17, 26)]
+    return [d.isoformat() for d in expiries]
+
+
+_erf = np.vectorize(math.erf, otypes=[float])
+
+
+def _ndtr(x: np.ndarray) -> np.ndarray:
+    return np.asarray(0.5 * (1.0 + _erf(x / math.sqrt(2.0))))
+
+
+def _bsm_price(
+    kind: str, spot: float, strikes: np.ndarray, t: float, ivs: np.ndarray
+) -> np.ndarray:
+    sqrt_t = np.sqrt(t)
+    d1 = (np.log(spot / strikes) + (RISK_FREE_RATE + 0.5 * ivs**2) * t) / (ivs * sqrt_t)
+    d2 = d1 - ivs * sqrt_t
+    disc = np.exp(-RISK_FREE_RATE * t)
+    if kind == "c":
+        return np.asarray(spot * _ndtr(d1) - strikes * disc * _ndtr(d2))
+    return np.asarray(strikes * disc * _ndtr(-d2) - spot * _ndtr(-d1))
+
+
+def option_chain_frames(
+    symbol: str, expiry: str, spot: float
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """以波動率微笑與 BSM 定價產生 yfinance 格式的 calls / puts 框架。"""
+    expiry_date = date.fromisoformat(expiry)
+    today = datetime.now(market_time.ny_tz).date()
+    t = max((expiry_date - today).days, 1) / 365.0
+    step = 1.0 if spot < 150 else 2.5 if spot < 400 else 5.0
+    strikes = np.arange(
+        np.floor(spot * 0.6 / step) * step, spot * 1.4 + step, step, dtype=np.float64
+    )
+    moneyness = np.log(strikes / spot)
+    rng = np.random.default_rng(_seed(symbol.upper(), "chain", expiry))
+    atm_iv = 0.30 + 0.2 * (_seed(symbol.upper()) % 100) / 100.0
+    frames = []
+    for kind in ("c", "p"):
+        skew = -0.35 if kind == "p" else -0.15
+        ivs = np.clip(atm_iv + skew * moneyness + 1.2 * moneyness**2, 0.05, 3.0)
+        mid = np.maximum(_bsm_price(kind, spot, strikes, t, ivs), 0.01)
+        spread = np.maximum(mid * 0.04, 0.01)
+        distance = np.abs(moneyness)
+        oi = (rng.integers(50, 20_000, len(strikes)) * np.exp(-8 * distance)).astype(
+            np.int64
+        )
+        volume = (oi * rng.uniform(0.02, 0.6, len(strikes))).astype(np.int64)
+        itm = strikes < spot if kind == "c" else strikes > spot
+        frames.append(
+            pd.DataFrame(
+                {
+                    "contractSymbol": [
+                        f"{symbol}{expiry_date:%y%m%d}{kind.upper()}{int(k * 1000):08d}"
+                        for k in strikes
+                    ],
+                    "lastTradeDate": pd.Timestamp(_last_session_close()),
+                    "strike": strikes,
+                    "lastPrice": mid,
+                    "bid": mid - spread / 2,
+                    "ask": mid + spread / 2,
+                    "change": 0.0,
+                    "percentChange": 0.0,
+                    "volume": volume.astype(np.float64),
+                    "openInterest": oi.astype(np.float64),
+                    "impliedVolatility": ivs,
+                    "inTheMoney": itm,
+                    "contractSize": "REGULAR",
+                    "currency": "USD",
+                }
+            )
+        )
+    return frames[0], frames[1]
+
+
+def quarterly_fundamentals(
+    symbol: str, quarters: int = 6
+) -> tuple[dict[str, Any], pd.DataFrame, pd.DataFrame]:
+    """
+    yfinance 格式的 (info, quarterly_income_stmt, quarterly_cashflow)。
+
+    欄位為季末日期 (由新到舊)，最新一期為上一個已結束的季度；EPS 成長率與
+    本益比由種子決定，讓一部分標的通過 DDP 條件、其餘在不同關卡被淘汰。
+    """
+    rng = np.random.default_rng(_seed(symbol.upper(), "fundamentals"))
+    today = datetime.now(market_time.ny_tz).date()
+    ends = pd.date_range(end=today, periods=quarters + 1, freq="QE")[-quarters:][::-1]
+    growth = rng.uniform(-0.05, 0.08)
+    scale = np.power(1.0 + growth, -np.arange(quarters, dtype=np.float64))
+    revenue = rng.uniform(2e8, 5e10) * scale * rng.uniform(0.97, 1.03, quarters)
+    margin = rng.uniform(0.05, 0.35)
+    eps = rng.uniform(0.3, 4.0) * scale * rng.uniform(0.95, 1.05, quarters)
+    income = pd.DataFrame(
+        [eps, revenue, revenue * margin],
+        index=["Diluted EPS", "Total Revenue", "Operating Income"],
+        columns=ends,
+    )
+    cashflow = pd.DataFrame(
+        [revenue * rng.uniform(-0.05, 0.3)],
+        index=["Operating Cash Flow"],
+        columns=ends,
+    )
+    price = ohlcv_frame(symbol, "1mo")["Close"].iloc[-1]
+    trailing_eps = float(eps[:4].sum())
+    info: dict[str, Any] = {
+        "sector": "Energy" if rng.uniform() < 0.08 else "Technology",
+        "longName": f"{symbol.upper()} Holdings",
+        "trailingEps": trailing_eps,
+        "trailingPE": float(price / trailing_eps),
+        "currentPrice": float(price),
+    }
+    if rng.uniform() < 0.7:
+        info["forwardPE"] = info["trailingPE"] * rng.uniform(0.7, 1.1)
+    if rng.uniform() < 0.6:
+        info["fiveYearAvgPE"] = info["trailingPE"] * rng.uniform(0.9, 1.8)
+    return info, income, cashflow
+
+
+def gex_profile(symbol: str, spot: float) -> dict[str, float]:
+    """履約價 → GEX 曝險值 (edge scraper 回傳格式)，正負交錯形成牆位與翻轉點。"""
+    rng = np.random.default_rng(_seed(symbol.upper(), "gex"))
+    step = 1.0 if spot < 150 else 2.5 if spot < 400 else 5.0
+    strikes = np.arange(
+        np.floor(spot * 0.8 / step) * step, spot * 1.2 + step, step, dtype=np.float64
+    )
+    shape = np.tanh((strikes - spot * 0.98) / (spot * 0.03))
+    values = shape * rng.uniform(1e6, 4e7, len(strikes))
+    return {f"{k:.2f}": float(v) for k, v in zip(strikes, values)}
+
+
+def radar_result(symbol: str) -> dict[str, Any]:
+    """心跳第二階段 `_fetch_sym_radar_data_slow` 的回傳格式。"""
+    frame = ohlcv_frame(symbol)
+    price = float(frame["Close"].iloc[-1])
+    prev = float(frame["Close"].iloc[-2])
+    rng = np.random.default_rng(_seed(symbol.upper(), "radar"))
+    profile = gex_profile(symbol, price)
+    strikes = sorted(float(k) for k in profile)
+    put_wall = max((k for k in strikes if k < price), default=price * 0.95)
+    call_wall = min((k for k in strikes if k > price * 1.03), default=price * 1.05)
+    em = price * 0.04
+    return {
+        "symbol": symbol,
+        "quote": {
+            "c": price,
+            "pc": prev,
+            "dp": (price / prev - 1) * 100,
+            "h": float(frame["High"].iloc[-1]),
+            "l": float(frame["Low"].iloc[-1]),
+        },
+        "iv_metrics": {
+            "iv_rank": float(rng.uniform(5, 95)),
+            "expected_move_weekly": em,
+            "expected_move_lower": price - em,
+            "expected_move_upper": price + em,
+            "iv_term_structure_status": "Contango",
+            "term_structure_ratio": 0.92,
+        },
+        "dte_er": int(rng.integers(3, 60)),
+        "skew": float(rng.normal(1.0, 0.2)),
+        "skew_percentile": float(rng.uniform(0, 100)),
+        "max_pain": {"max_pain": round(price * 0.98, 2), "distance_pct": 0.02},
+        "uoa": [
+            {"action": "BTO", "type": "CALL", "strike": call_wall, "premium": 1.2e6}
+        ],
+        "gex_profile_data": {
+            "put_wall": put_wall,
+            "call_wall": call_wall,
+            "gamma_flip": price * 0.98,
+            "zero_gamma": price * 0.98,
+            "net_gex": float(sum(profile.values())),
+            "gex_profile": profile,
+        },
+        "psq_result": {
+            "is_squeezing": bool(rng.integers(0, 2)),
+            "momentum": float(rng.normal(0, 2)),
+            "momentum_value": float(rng.normal(0, 2)),
+            "signal_direction": "🟢",
+        },
+        "vp_data": {"hvn": price * 0.97, "lvn": price * 1.02},
+        "vol_data": {
+            "current_volume": float(frame["Volume"].iloc[-1]),
+            "avg_volume_20": float(frame["Volume"].iloc[-20:].mean()),
+        },
+        "dp_poc": price * 0.99,
+        "month_max_pains": [],
+        "volume_pcr": 0.85,
+        "put_wall_gex": 2.5e7,
+    }
+
+
+class FixtureMarketData:
+    """`services.market_data_service` 公開抓取函式的離線替身 (相同簽名)。"""
+
+    def __init__(self, vix: float = 18.0) -> None:
+        self.vix = vix
+        self._frames: dict[tuple[str, str, str], pd.DataFrame] = {}
+        self._chains: dict[tuple[str, str], tuple[pd.DataFrame, pd.DataFrame]] = {}
+
+    def _frame(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        key = (symbol.upper(), period, interval)
+        if key not in self._frames:
+            self._frames[key] = ohlcv_frame(symbol, period, interval)
+        return self._frames[key]
+
+    def spot(self, symbol: str) -> float:
+        return float(self._frame(symbol, "1y", "1d")["Close"].iloc[-1])
+
+    async def get_quote(self, symbol: str) -> dict[str, Any]:
+        frame = self._frame(symbol, "1y", "1d")
+        close, prev = float(frame["Close"].iloc[-1]), float(frame["Close"].iloc[-2])
+        return {
+            "c": close,
+            "d": close - prev,
+            "dp": (close / prev - 1) * 100,
+            "h": float(frame["High"].iloc[-1]),
+            "l": float(frame["Low"].iloc[-1]),
+            "o": float(frame["Open"].iloc[-1]),
+            "pc": prev,
+        }
+
+    async def is_etf(self, symbol: str) -> bool:
+        return symbol.upper() in ETF_SYMBOLS
+
+    async def get_history_df(
+        self,
+        symbol: str,
+        period: str = "1y",
+        interval: str = "1d",
+        force_refresh: bool = False,
+    ) -> pd.DataFrame:
+        return self._frame(symbol, period, interval).copy()
+
+    async def get_spy_history_df(
+        self, period: str = "1y", interval: str = "1d", retries: int = 3
+    ) -> pd.DataFrame:
+        return self._frame("SPY", period, interval).copy()
+
+    async def get_macro_environment(self) -> dict[str, float]:
+        return {"vix": self.vix, "oil": 75.0, "vix_change": 0.0}
+
+    async def get_dividend_yield(self, symbol: str) -> float:
+        return 0.005
+
+    async def get_all_option_expiries(self, symbol: str) -> list[str]:
+        return option_expiries()
+
+    async def get_option_chain(
+        self, symbol: str, expiry: str, prune_pct: Optional[float] = 0.1
+    ) -> Any:
+        from services.market_data_service import OptionChainData
+
+        key = (symbol.upper(), expiry)
+        spot = self.spot(symbol)
+        if key not in self._chains:
+            self._chains[key] = option_chain_frames(symbol, expiry, spot)
+        calls, puts = (df.copy() for df in self._chains[key])
+        if prune_pct is not None:
+            lower, upper = spot * (1.0 - prune_pct), spot * (1.0 + prune_pct)
+            calls = calls[(calls["strike"] >= lower) & (calls["strike"] <= upper)]
+            puts = puts[(puts["strike"] >= lower) & (puts["strike"] <= upper)]
+        return OptionChainData(
+            calls=calls, puts=puts, underlying={"regularMarketPrice": spot}
+        )
+
+    async def get_sma(self, symbol: str, window: int = 200) -> Optional[float]:
+        close = self._frame(symbol, "1y", "1d")["Close"]
+        return float(close.iloc[-window:].mean())
+
+    async def get_ema(self, symbol: str, window: int = 21) -> Optional[float]:
+        close = self._frame(symbol, "1y", "1d")["Close"]
+        return float(close.ewm(span=window, adjust=False).mean().iloc[-1])
+
+    async def get_vix_term_structure(self) -> dict[str, Any]:
+        return {
+            "vts_ratio": 0.9,
+            "vts_state": "CONTANGO",
+            "vix_front": self.vix,
+            "vix_back": self.vix / 0.9,
+            "is_valid": True,
+        }
+
+    async def get_vix_zscores(self) -> dict[str, float]:
+        return {"zscore_30": 0.0, "zscore_60": 0.0}
+
+    async def get_symbol_earnings(self, symbol: str) -> Any:
+        from services.calendar_service import EarningsEvent
+
+        offset = 20 + _seed(symbol.upper(), "earnings") % 60
+        day = datetime.now(market_time.ny_tz).date() + timedelta(days=offset)
+        return EarningsEvent(
+            symbol=symbol.upper(), date=day.isoformat(), tte_hours=offset * 24.0
+        )
+
+    async def fetch_recent_news(self, symbol: str, limit: int = 5) -> str:
+        return f"{symbol}: 無重大新聞 (benchmark fixture)"
+
+    _SERVICE_FUNCTIONS = (
+        "get_quote",
+        "is_etf",
+        "get_history_df",
+        "get_spy_history_df",
+        "get_macro_environment",
+        "get_dividend_yield",
+        "get_all_option_expiries",
+        "get_option_chain",
+        "get_sma",
+        "get_ema",
+        "get_vix_term_structure",
+        "get_vix_zscores",
+    )
+
+    @contextmanager
+    def patched(self) -> Iterator["FixtureMarketData"]:
+        """在區塊內以此物件取代資料層 (行情、財報行事曆、新聞)。"""
+        with ExitStack() as stack:
+            for name in self._SERVICE_FUNCTIONS:
+                stack.enter_context(
+                    patch(f"services.market_data_service.{name}", getattr(self, name))
+                )
+            stack.enter_context(
+                patch(
+                    "services.calendar_service.calendar_service.get_symbol_earnings",
+                    self.get_symbol_earnings,
+                )
+            )
+            stack.enter_context(
+                patch("services.news_service.fetch_recent_news", self.fetch_recent_news)
+            )
+            yield self
+
+
+class NetworkBlockedError(OSError):
+    """基準測試期間嘗試對外連線。"""
+
+
+@contextmanager
+def block_network() -> Iterator[None]:
+    """拒絕所有 DNS 解析與 socket 連線，確保基準測試完全離線。"""
+
+    def _refuse(*_args: Any, **_kwargs: Any) -> Any:
+        raise NetworkBlockedError("benchmarks run offline; network access refused")
+
+    with (
+        patch.object(socket, "getaddrinfo", _refuse),
+        patch.object(socket, "create_connection", _refuse),
+        patch.object(socket.socket, "connect", _refuse),
+        patch.object(socket.socket, "connect_ex", _refuse),
+    ):
+        yield
+
+
+@contextmanager
+def fixture_database(
+    user_ids: Sequence[int], symbols: Sequence[str] = SYMBOLS
+) -> Iterator[Path]:
+    """
+    在暫存目錄建立已遷移的 SQLite 資料庫，並為每位使用者寫入設定、
+    自選清單與心跳訂閱；區塊結束後整個目錄一併刪除。
+    """
+    import database
+
+    with tempfile.TemporaryDirectory(prefix="nexus-bench-") as tmp:
+        db_path = Path(tmp) / "bench.db"
+        with patch("config.DB_NAME", str(db_path)):
+            database.init_db()
+            for offset, uid in enumerate(user_ids):
+                database.upsert_user_config(uid, capital=100_000.0, risk_limit=15.0)
+                database.set_user_notification_setting(uid, "heartbeat_watchlist", True)
+                # 每位使用者訂閱一段輪轉的標的子集，讓去重後的標的數小於訂閱總數
+                for i in range(max(len(symbols) // 2, 1)):
+                    database.add_watchlist_symbol(
+                        uid, symbols[(offset + i) % len(symbols)]
+                    )
+            yield db_path
+
+
+def seed_hot_query_tables(db_path: Path, rows: int, users: int) -> None:
+    """
+    為熱路徑查詢灌入合成資料：虛擬交易、委託單、market_cache、待發通知、
+    避險歷史與資產各 `rows` 筆，平均分散在 `users` 位使用者上。
+    """
+    import sqlite3
+
+    t0 = datetime(2026, 1, 5, 14, 30)
+
+    def ts(i: int) -> str:
+        return (t0 + timedelta(seconds=i * 7)).strftime("%Y-%m-%d %H:%M:%S")
+
+    expiries = sorted(set(option_expiries(date(2026, 1, 5), weeks=20)))
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executemany(
+            "INSERT INTO virtual_trades (user_id, symbol, opt_type, strike, expiry, "
+            "entry_price, quantity, status, opened_at) "
+            "VALUES (?, ?, 'put', 100.0, '2026-03-20', 1.5, 1, ?, ?)",
+            (
+                # 約 3% 的部位仍在場上，其餘已平倉或轉倉
+                (
+                    i % users + 1,
+                    f"SYN{i % 500:03d}",
+                    "OPEN" if i % 33 == 0 else "CLOSED",
+                    ts(i),
+                )
+                for i in range(rows)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO active_orders (user_id, symbol, quantity, order_type, "
+            "validity, created_at) VALUES (?, ?, 1, 'LIMIT', 'GTC_90', ?)",
+            ((i % users + 1, f"SYN{i % 500:03d}", ts(i)) for i in range(rows)),
+        )
+        conn.executemany(
+            "INSERT INTO market_cache (symbol, expiry, max_pain, updated_at) "
+            "VALUES (?, ?, 100.0, ?)",
+            (
+                (f"SYN{i // len(expiries):05d}", expiries[i % len(expiries)], ts(i))
+                for i in range(rows)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO pending_notifications (user_id, content, created_at) "
+            "VALUES (?, 'bench', ?)",
+            ((i % users + 1, ts(rows - i)) for i in range(rows)),
+        )
+        conn.executemany(
+            "INSERT INTO hedge_history (user_id, date) VALUES (?, ?)",
+            ((i % users + 1, ts(i)[:10]) for i in range(rows)),
+        )
+        conn.executemany(
+            "INSERT INTO assets (user_id, symbol, context_type, metadata) "
+            "VALUES (?, ?, ?, '{\"weighted_delta\": 0.3}')",
+            (
+                (i % users + 1, f"AST{i:06d}", ("WATCH", "TRADE", "HOLDING")[i % 3])
+                for i in range(rows)
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,224 @@
+"""
+benchmarks/harness.py
+
+基準測試量測與基準線比對。
+
+每個案例以 async context manager 工廠註冊：進入時完成準備 (資料層替身、暫存
+資料庫、背景 worker)，產出一個同步或非同步的可呼叫物件，量測只計算該物件
+本身。計時迭代與記憶體量測分開進行，避免 tracemalloc 的額外成本灌水延遲；
+峰值記憶體只取量測區段內新配置的部分。
+"""
+
+import asyncio
+import inspect
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from contextlib import AbstractAsyncContextManager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+CaseFactory = Callable[[], AbstractAsyncContextManager[Callable[[], Any]]]
+
+# 越低越好 / 越高越好 的指標；比對基準線時依方向判斷是否退步
+LOWER_IS_BETTER = ("p50_ms", "p99_ms", "peak_memory_kib")
+HIGHER_IS_BETTER = ("ops_per_sec",)
+DEFAULT_METRICS = ("p50_ms", "ops_per_sec", "peak_memory_kib")
+
+# 絕對變化低於此值視為量測雜訊 (次毫秒級案例與小額配置的比例波動很大)
+_NOISE_FLOOR = {"p50_ms": 0.05, "p99_ms": 0.05, "peak_memory_kib": 64.0}
+
+# 記憶體量測只需少量迭代即可取得穩定峰值
+_MEMORY_ITERATIONS = 3
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    name: str
+    factory: CaseFactory
+    description: str = ""
+    iterations: int = 30
+    warmup: int = 2
+    ops_per_iteration: int = 1
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    ops_per_sec: float
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    peak_memory_kib: float
+
+    @classmethod
+    def from_samples(
+        cls,
+        name: str,
+        samples: list[float],
+        peak_bytes: int,
+        ops_per_iteration: int = 1,
+    ) -> "BenchmarkResult":
+        total = sum(samples)
+        ordered = sorted(samples)
+        return cls(
+            name=name,
+            iterations=len(samples),
+            ops_per_sec=(len(samples) * ops_per_iteration / total) if total else 0.0,
+            mean_ms=statistics.fmean(samples) * 1000,
+            p50_ms=percentile(ordered, 50) * 1000,
+            p99_ms=percentile(ordered, 99) * 1000,
+            peak_memory_kib=peak_bytes / 1024,
+        )
+
+
+@dataclass
+class Regression:
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change_pct(self) -> float:
+        if self.baseline == 0:
+            return float("inf")
+        return (self.current / self.baseline - 1.0) * 100.0
+
+
+@dataclass
+class BenchmarkReport:
+    results: dict[str, BenchmarkResult]
+    meta: dict[str, Any] = field(default_factory=dict)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "meta": self.meta,
+            "results": {name: asdict(res) for name, res in self.results.items()},
+        }
+
+    def save(self, path: Path) -> None:
+        path.write_text(
+            json.dumps(self.to_json(), indent=2, ensure_ascii=False) + "\n",
+            encoding="utf-8",
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "BenchmarkReport":
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        return cls(
+            results={
+                name: BenchmarkResult(**values)
+                for name, values in raw.get("results", {}).items()
+            },
+            meta=raw.get("meta", {}),
+        )
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """線性內插百分位數 (與 numpy 預設相同)；`ordered` 需已排序。"""
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+async def _call(fn: Callable[[], Any]) -> Any:
+    result = fn()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def measure_async(
+    case: BenchmarkCase, iterations: Optional[int] = None
+) -> BenchmarkResult:
+    """在目前的事件迴圈內執行單一案例：暖機 → 計時迭代 → 記憶體迭代。"""
+    count = max(iterations if iterations is not None else case.iterations, 1)
+    async with case.factory() as fn:
+        for _ in range(case.warmup):
+            await _call(fn)
+
+        samples = []
+        for _ in range(count):
+            started = time.perf_counter()
+            await _call(fn)
+            samples.append(time.perf_counter() - started)
+
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            for _ in range(min(count, _MEMORY_ITERATIONS)):
+                await _call(fn)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+    return BenchmarkResult.from_samples(
+        case.name, samples, max(peak - baseline, 0), case.ops_per_iteration
+    )
+
+
+def measure(case: BenchmarkCase, iterations: Optional[int] = None) -> BenchmarkResult:
+    """每個案例使用獨立的事件迴圈，避免背景任務跨案例殘留。"""
+    return asyncio.run(measure_async(case, iterations))
+
+
+def run_cases(
+    cases: Iterable[BenchmarkCase],
+    iterations_scale: float = 1.0,
+    on_result: Optional[Callable[[BenchmarkResult], None]] = None,
+) -> BenchmarkReport:
+    results: dict[str, BenchmarkResult] = {}
+    for case in cases:
+        result = measure(case, max(int(case.iterations * iterations_scale), 1))
+        results[case.name] = result
+        if on_result is not None:
+            on_result(result)
+    meta = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "iterations_scale": iterations_scale,
+    }
+    return BenchmarkReport(results=results, meta=meta)
+
+
+def compare(
+    current: Mapping[str, BenchmarkResult],
+    baseline: Mapping[str, BenchmarkResult],
+    threshold: float = 0.30,
+    metrics: Iterable[str] = DEFAULT_METRICS,
+) -> list[Regression]:
+    """
+    與基準線逐項比對；任一指標往壞的方向變動超過 `threshold` (比例，0.30 = 30%)
+    即視為退步。只比對兩邊都有的案例，新增或移除的案例不算退步。
+    """
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in metrics:
+            old, new = float(getattr(base, metric)), float(getattr(result, metric))
+            if metric in HIGHER_IS_BETTER:
+                worse = old > 0 and new < old / (1.0 + threshold)
+            else:
+                worse = new > old * (1.0 + threshold) and new - old > _NOISE_FLOOR.get(
+                    metric, 0.0
+                )
+            if worse:
+                regressions.append(Regression(name, metric, old, new))
+    return regressions
@@ -5,6 +5,7 @@ from discord.ext import commands
 import asyncio
 import os
 import json
+import time
 import uuid
 from typing import Optional, Dict, cast
 import database
@@ -20,12 +21,27 @@ from database.notifications import (
     delete_notification,
     get_pending_count,
 )
+from services.latency_monitor import STAGE_DISCORD_SEND, latency_registry
 
 logger = logging.getLogger(__name__)
 
 DISCORD_CONTENT_LIMIT = 2000
 DISCORD_EMBED_DESCRIPTION_LIMIT = 4000
 
+# setup_hook 依此順序載入的 Cog
+EXTENSIONS = (
+    "cogs.unified_terminal",
+    "cogs.terminal",
+    "cogs.trading",
+    "cogs.analyst_agent",
+    "cogs.intelligence",
+    "cogs.sentiment",
+    "cogs.hedging",
+    "cogs.calendar",
+    "cogs.order_ui",
+    "cogs.cc_recovery",
+)
+
 
 def _split_plain_text(text: str, max_len: int) -> list[str]:
     """依邊界切分文字，盡量保留換行與空白結構。"""
@@ -195,25 +211,25 @@ class NexusBot(commands.Bot):
         # 2. 喚醒發送工人
         self.message_signal.set()
 
+    async def load_extensions(self, timings: Optional[Dict[str, float]] = None) -> None:
+        """依序載入所有 Cog；提供 `timings` 時記錄每個 Cog 的載入秒數 (啟動剖析用)。"""
+        for name in EXTENSIONS:
+            started = time.perf_counter()
+            await self.load_extension(name)
+            if timings is not None:
+                timings[name] = time.perf_counter() - started
+
     async def setup_hook(self) -> None:
         if self._setup_done:
             return
         self._setup_done = True
 
-        await self.load_extension("cogs.unified_terminal")
-        await self.load_extension("cogs.terminal")
-        await self.load_extension("cogs.trading")
-        await self.load_extension("cogs.analyst_agent")
-        await self.load_extension("cogs.intelligence")
-        await self.load_extension("cogs.sentiment")
-        await self.load_extension("cogs.hedging")
-        await self.load_extension("cogs.calendar")
-        await self.load_extension("cogs.order_ui")
-        await self.load_extension("cogs.cc_recovery")
+        await self.load_extensions()
 
         # 啟動背景任務與服務
         self.loop.create_task(self._message_worker())
         self.loop.create_task(self._health_worker())
+        await self._start_latency_monitoring()
 
         # 建立 leader-only 服務，但延後到 leader acquisition 才 start (blue/green 安全)
         try:
@@ -243,6 +259,21 @@ class NexusBot(commands.Bot):
         except Exception as e:
             logger.error(f"❌ 同步指令失敗: {e}")
 
+    async def _start_latency_monitoring(self) -> None:
+        """啟動事件迴圈延遲取樣 / 阻塞看門狗，以及 (設定 port 時) 本機文字指標端點。"""
+        import config
+        from services.latency_monitor import LoopLagMonitor, start_metrics_server
+
+        self.loop_monitor = LoopLagMonitor()
+        self.loop_monitor.start()
+        if config.METRICS_HTTP_PORT:
+            try:
+                self.metrics_server = await start_metrics_server(
+                    config.METRICS_HTTP_HOST, config.METRICS_HTTP_PORT
+                )
+            except OSError as e:
+                logger.error(f"❌ 延遲指標端點啟動失敗: {e}")
+
     async def on_ready(self) -> None:
         if self._has_notified_ready:
             logger.info("Bot 已重連，跳過啟動通知。")
@@ -403,6 +434,11 @@ class NexusBot(commands.Bot):
         except Exception:
             pass
 
+        if hasattr(self, "loop_monitor"):
+            self.loop_monitor.stop()
+        if hasattr(self, "metrics_server"):
+            self.metrics_server.close()
+
     async def _leader_lock_loop(self) -> None:
         """Maintain a SQLite leader lease to support Swarm start-first blue/green deploy."""
         ttl = int(os.getenv("NEXUS_LEADER_LOCK_TTL", "30"))
@@ -449,8 +485,6 @@ class NexusBot(commands.Bot):
 
     async def _health_worker(self) -> None:
         """定期更新健康狀態檔案，讓 Docker 能夠識別機器人的健康度。"""
-        import time
-
         # 啟動時立即寫入一次，確保 Docker Healthcheck 不會太快判定失敗
         try:
             with open("/tmp/bot_healthy", "w") as f:
@@ -557,12 +591,13 @@ class NexusBot(commands.Bot):
                         else:
                             message_chunks = [None]
 
-                        for index, chunk in enumerate(message_chunks):
-                            await user.send(
-                                content=chunk or None,
-                                embed=embed if index == 0 else None,  # type: ignore
-                                view=view if (index == 0 and view) else None,  # type: ignore
-                            )
+                        with latency_registry.span(STAGE_DISCORD_SEND):
+                            for index, chunk in enumerate(message_chunks):
+                                await user.send(
+                                    content=chunk or None,
+                                    embed=embed if index == 0 else None,  # type: ignore
+                                    view=view if (index == 0 and view) else None,  # type: ignore
+                                )
                         # 發送成功才從資料庫刪除
                         await asyncio.to_thread(delete_notification, notif_id)
                 except discord.Forbidden as e:
@@ -139,6 +139,64 @@ def settings(ctx: Any, capital: Any, risk_limit: Any, alert_mode: Any):  # type:
     console.print(table)
 
 
+@sys_group.command(name="bench-calendar")
+@click.option(
+    "--iterations", default=2000, show_default=True, help="每項量測的呼叫次數"
+)
+def bench_calendar(iterations: int) -> None:
+    """量測交易時段查詢的單次成本 (逐次查詢行事曆 vs 預展開交易日表)"""
+    import time as _time
+    from datetime import datetime, timedelta
+
+    import market_time
+
+    def _per_schedule_is_open() -> bool:
+        # 舊版 is_market_open：每次呼叫都以 pandas 查詢當日行事曆
+        now_ny = datetime.now(market_time.ny_tz)
+        schedule = market_time.nyse_calendar.schedule(
+            start_date=now_ny.date(), end_date=now_ny.date()
+        )
+        if schedule.empty:
+            return False
+        row = schedule.iloc[0]
+        market_open = row["market_open"].tz_convert(market_time.ny_tz)
+        market_close = row["market_close"].tz_convert(market_time.ny_tz)
+        return bool(market_open <= now_ny <= market_close)
+
+    def _per_schedule_next_open() -> Any:
+        now = datetime.now(market_time.ny_tz)
+        schedule = market_time.nyse_calendar.schedule(
+            start_date=now.date(), end_date=now.date() + timedelta(days=14)
+        )
+        for _, row in schedule.iterrows():
+            target = row["market_open"].tz_convert(market_time.ny_tz)
+            if target > now:
+                return target
+        return None
+
+    cal = market_time.session_calendar
+    cal.is_open()  # 先展開交易日表，不計入量測
+    cases = [
+        ("is_market_open (每次查詢)", _per_schedule_is_open, max(1, iterations // 20)),
+        ("is_market_open (交易日表)", cal.is_open, iterations),
+        ("next_open (每次查詢)", _per_schedule_next_open, max(1, iterations // 20)),
+        ("next_open (交易日表)", cal.next_open, iterations),
+        ("phase (交易日表)", cal.phase, iterations),
+    ]
+
+    table = Table(title="⏱️ 交易時段查詢 micro-benchmark")
+    table.add_column("查詢", style="cyan")
+    table.add_column("呼叫次數", justify="right")
+    table.add_column("每次耗時 (µs)", style="magenta", justify="right")
+    for label, fn, n in cases:
+        start = _time.perf_counter()
+        for _ in range(n):
+            fn()
+        elapsed = _time.perf_counter() - start
+        table.add_row(label, str(n), f"{elapsed / n * 1e6:,.1f}")
+    console.print(table)
+
+
 # ==========================================
 # 2. Watchlist Group
 # ==========================================
@@ -434,6 +492,50 @@ def force_scan(ctx: Any) -> None:
     run_async(_run())
 
 
+@admin_group.command(name="schema-snapshot")
+def schema_snapshot() -> None:
+    """重播完整遷移鏈並重新產生 database/schema_snapshot.sql (新增遷移後執行)"""
+    from database.core import latest_version, write_schema_snapshot
+
+    path = write_schema_snapshot()
+    rprint(
+        f"[bold green]✅ 已寫入 V{latest_version()} schema 快照: {path}[/bold green]"
+    )
+
+
+@admin_group.command(name="query-audit")
+@click.option("--rows", default=2_000, show_default=True, help="每張表的合成資料列數")
+@click.option("--min-rows", default=1_000, show_default=True, help="視為大表的列數門檻")
+@click.option("--live", is_flag=True, help="改為稽核目前的資料庫檔案 (不灌入合成資料)")
+def query_audit(rows: int, min_rows: int, live: bool) -> None:
+    """以 EXPLAIN QUERY PLAN 檢查 database 套件的每條 SQL，發現整表掃描時以非零狀態結束"""
+    import sqlite3
+
+    import config
+    from database.query_audit import audit_connection, audit_seeded_database
+
+    if live:
+        conn = sqlite3.connect(f"file:{config.DB_NAME}?mode=ro", uri=True)
+        try:
+            report = audit_connection(conn, min_rows=min_rows)
+        finally:
+            conn.close()
+    else:
+        report = audit_seeded_database(rows=rows, min_rows=min_rows)
+
+    for finding in report.findings:
+        rprint(f"[bold red]❌ {finding.describe()}[/bold red]")
+    for statement, reason in report.skipped:
+        rprint(f"[dim]⏭️ {statement.location} 無法單獨規劃: {reason}[/dim]")
+    rprint(
+        f"已規劃 {report.planned} 條語句，略過 {len(report.skipped)} 條，"
+        f"問題 {len(report.findings)} 條"
+    )
+    if not report.ok:
+        raise SystemExit(1)
+    rprint("[bold green]✅ 所有帶條件的查詢都走索引。[/bold green]")
+
+
 @admin_group.command(name="force-macro-update")
 @click.pass_context
 def force_macro_update(ctx: Any) -> None:
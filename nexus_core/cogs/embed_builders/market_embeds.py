@@ -20,6 +20,7 @@ from typing import Any, Dict, List
 from cogs.embed_builders._ansi_utils import _safe_float, _truncate_with_boundary
 from cogs.embed_builders.settings_embeds import create_info_embed
 from cogs.embed_builders._core import NexusEmbed
+from services.latency_monitor import STAGE_EMBED_RENDER, timed
 from market_analysis.macro_calendar_translator import translate_macro_event
 
 
@@ -339,6 +340,7 @@ def create_iv_risk_scan_embed(results: List[Dict[str, Any]]) -> discord.Embed:
     return embed
 
 
+@timed(STAGE_EMBED_RENDER)
 def build_radar_scan_embed(
     scan_results: List[Dict[str, Any]],
     scan_type_name: str,
@@ -1355,6 +1357,7 @@ def build_radar_scan_embed(
     return embeds
 
 
+@timed(STAGE_EMBED_RENDER)
 def build_market_macro_overview_embed(macro_data: dict) -> discord.Embed:
     """
     建立美股總體經濟與大盤風險防禦指標 (Macro & Risk Dashboard) Embed。
@@ -1348,20 +1348,20 @@ def create_tactical_symbol_embed(data: Dict[str, Any]) -> discord.Embed:
     # 4.5. 🦇 暗池與大宗交易跡象 (Dark Pool Prints)
     dp_data = data.get("darkpool")
     if dp_data:
-        from market_analysis.dark_pool_engine import sanitize_darkpool_prints
+        from market_analysis.dark_pool_engine import analyze_darkpool_prints
 
         dp_lines = ["```ansi"]
         prints = dp_data.get("prints", [])
-        valid_prints = sanitize_darkpool_prints(symbol, prints, c_val, 0.05)
+        dp_analysis = analyze_darkpool_prints(
+            symbol, prints, c_val, 0.05, watermark=dp_data.get("watermark")
+        )
 
-        if valid_prints:
-            top3 = sorted(
-                valid_prints, key=lambda x: _to_float(x.get("premium", 0)), reverse=True
-            )[:3]
+        if dp_analysis.top_order.size:
+            top3 = dp_analysis.top_prints(prints, 3)
             actual_count = len(top3)
             dp_lines.append(f" 💰 近期最大暗池成交 (Top {actual_count} Block Prints)")
 
-            filtered_count = len(prints) - len(valid_prints)
+            filtered_count = dp_analysis.dropped
 
             for i, p in enumerate(top3):
                 pr = _to_float(p.get("price", 0))
@@ -11,6 +11,7 @@ from datetime import datetime, timezone
 from typing import List, Any, Optional
 
 from market_analysis.uoa_telemetry import UOATradeResult, generate_uoa_ascii_table
+from services.latency_monitor import STAGE_EMBED_RENDER, timed
 
 from cogs.embed_builders._ansi_utils import (
     _pad_string,
@@ -127,6 +128,7 @@ def _format_uoa_field(uoa_data: list) -> str:
 # ============================================================================
 
 
+@timed(STAGE_EMBED_RENDER)
 def create_sentiment_scan_embed(
     symbol: str,
     skew_data: dict,
@@ -1118,6 +1120,7 @@ def create_cc_recovery_embed(data: dict) -> discord.Embed:
     return embed
 
 
+@timed(STAGE_EMBED_RENDER)
 def build_unified_radar_panel_embed(state: dict) -> NexusEmbed:
     """
     Constructs the state display embed for the Unified Radar Panel.
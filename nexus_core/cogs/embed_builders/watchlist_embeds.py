@@ -15,6 +15,7 @@ from typing import Dict, List
 from cogs.embed_builders._ansi_utils import _pad_string
 from cogs.embed_builders._embed_helpers import _safe_embed_field_value
 from cogs.embed_builders._core import NexusEmbed
+from services.latency_monitor import STAGE_EMBED_RENDER, timed
 
 
 def create_watchlist_embed(
@@ -53,6 +54,7 @@ def create_watchlist_embed(
     return embed
 
 
+@timed(STAGE_EMBED_RENDER)
 def create_watchlist_signal_embed(
     symbol: str,
     report_body: str = "",
@@ -556,6 +558,7 @@ def create_watchlist_signal_embed(
     return embed
 
 
+@timed(STAGE_EMBED_RENDER)
 def create_watchlist_overview_embed(
     summary_items: List[Dict[str, str]],
     llm_overview: str | None = None,
@@ -498,7 +498,7 @@ class TerminalCog(commands.Cog):
         from market_analysis.psq_engine import analyze_psq
         from cogs.embed_builder import create_psq_embed
 
-        psq_result = analyze_psq(df_hist_1d, vix_spot=macro_data.vix)
+        psq_result = analyze_psq(df_hist_1d, vix_spot=macro_data.vix, symbol=symbol)
         if psq_result:
             result["psq_result"] = psq_result
 
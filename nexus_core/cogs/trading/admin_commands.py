@@ -1,7 +1,7 @@
 """
 cogs/trading/admin_commands.py
 
-[Admin] 管理員手動觸發指令：force_scan、force_after_report、force_macro_update。
+[Admin] 管理員指令：force_scan、force_after_report、force_macro_update、latency_stats。
 """
 
 from typing import Any
@@ -215,6 +215,62 @@ class AdminCommandsCog(commands.Cog):
                 ephemeral=True,
             )
 
+    @app_commands.command(
+        name="latency_stats",
+        description="[Admin] 檢視事件迴圈延遲與各階段延遲分布 (近 15 分鐘)",
+    )
+    @app_commands.describe(reset="true=顯示後清空統計，重新累積")
+    async def latency_stats(
+        self, interaction: discord.Interaction, reset: bool = False
+    ) -> Any:
+        if interaction.user.id != DISCORD_ADMIN_USER_ID:
+            await interaction.response.send_message(
+                embed=create_error_embed(
+                    "權限不足：此指令僅限管理員使用。", title="權限錯誤"
+                ),
+                ephemeral=True,
+            )
+            logger.warning(
+                f"Unauthorized latency_stats attempt by {interaction.user.name} ({interaction.user.id})"
+            )
+            return
+
+        from services.latency_monitor import latency_registry
+
+        description = f"```\n{latency_registry.format_table()}\n```\n單位：ms"
+        monitor = getattr(self.bot, "loop_monitor", None)
+        if monitor is not None:
+            description += (
+                f"\n迴圈阻塞事件 (>{monitor.block_threshold_ms:.0f} ms)："
+                f"`{monitor.blocked_events}` 次，最近一次 "
+                f"`{monitor.last_blocked_ms:.0f} ms`"
+            )
+        from services.cache_prewarm import warmup_status
+
+        warm = warmup_status()
+        if warm["opening_first_hits"] or warm["opening_first_misses"]:
+            description += (
+                f"\n開盤首次請求快取命中率 ({warm['session_date']})："
+                f"`{warm['opening_hit_rate']:.0%}` "
+                f"({warm['opening_first_hits']}/"
+                f"{warm['opening_first_hits'] + warm['opening_first_misses']})"
+            )
+        memory_manager = getattr(self.bot, "memory_manager", None)
+        report = getattr(memory_manager, "last_warmup_report", None)
+        if report is not None:
+            description += f"\n盤前預熱：{report.summary()}"
+        scheduler = self.bot.get_cog("SchedulerCog")
+        pipeline = getattr(scheduler, "intraday_pipeline", None)
+        cycle = getattr(pipeline, "last_cycle_stats", None)
+        if cycle is not None:
+            description += f"\n盤中心跳循環：{cycle.summary()}"
+        if reset:
+            latency_registry.reset()
+            description += "\n🧹 統計已清空。"
+        await interaction.response.send_message(
+            embed=create_info_embed("延遲觀測", description), ephemeral=True
+        )
+
 
 async def setup(bot: Any) -> None:
     await bot.add_cog(AdminCommandsCog(bot))
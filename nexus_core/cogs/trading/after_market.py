@@ -1,10 +1,11 @@
 """
 cogs/trading/after_market.py
 
-盤後結算報告排程 (16:15 ET) 及共用 pipeline 邏輯。
+盤後結算報告排程 (16:15 ET)、kv_cache 過期鍵定期清理及共用 pipeline 邏輯。
 """
 
 from typing import Any
+import asyncio
 import logging
 from datetime import datetime, time
 from zoneinfo import ZoneInfo
@@ -12,6 +13,7 @@ from zoneinfo import ZoneInfo
 import discord
 from discord.ext import tasks, commands
 
+import config
 import database
 import market_time
 from services.trading_service import TradingService
@@ -28,9 +30,27 @@ class AfterMarketCog(commands.Cog):
         self.bot = bot
         self.trading_service = TradingService(bot)
         self.dynamic_after_market_report.start()
+        self.kv_cache_sweep.start()
 
     async def cog_unload(self) -> None:
         self.dynamic_after_market_report.cancel()
+        self.kv_cache_sweep.cancel()
+
+    @tasks.loop(minutes=config.KV_CACHE_SWEEP_INTERVAL_MIN)
+    async def kv_cache_sweep(self) -> None:
+        """定期分批刪除 kv_cache 中已過期的鍵 (去重標記、當日快照等)。"""
+        if not getattr(self.bot, "_is_leader_instance", True):
+            return
+        try:
+            swept = await asyncio.to_thread(database.sweep_expired_kv_cache)
+            if swept:
+                logger.info(f"🧹 kv_cache 過期鍵清理完成，刪除 {swept} 筆")
+        except Exception as e:
+            logger.warning(f"kv_cache 過期鍵清理失敗: {e}")
+
+    @kv_cache_sweep.before_loop
+    async def before_kv_cache_sweep(self) -> None:
+        await self.bot.wait_until_ready()
 
     @tasks.loop(time=time(hour=16, minute=15, tzinfo=ny_tz))
     async def dynamic_after_market_report(self) -> None:
@@ -54,6 +74,21 @@ class AfterMarketCog(commands.Cog):
         except Exception as e:
             logger.warning(f"financials_cache 清理失敗: {e}")
 
+        from database.llm_cache import purge_expired_llm_cache
+
+        if purge_expired_llm_cache():
+            logger.info("🧹 llm_response_cache 過期快取清理完成")
+
+        try:
+            from market_analysis.sentiment.history_storage import (
+                prune_sentiment_history,
+            )
+
+            pruned_rows = await asyncio.to_thread(prune_sentiment_history)
+            logger.info(f"🧹 sentiment_history 保存/降採樣完成，刪除 {pruned_rows} 筆")
+        except Exception as e:
+            logger.warning(f"sentiment_history 清理失敗: {e}")
+
     @dynamic_after_market_report.before_loop
     async def before_dynamic_after_market_report(self) -> None:
         await self.bot.wait_until_ready()
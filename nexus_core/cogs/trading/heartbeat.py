@@ -11,6 +11,7 @@ import logging
 from datetime import datetime
 
 import database
+from database.cache import DAILY_MARKER_TTL_SEC
 import market_time
 
 logger = logging.getLogger(__name__)
@@ -227,7 +228,7 @@ async def dispatch_watchlist_heartbeat(
                         cache_key = (
                             f"scenario_alert_{uid}_{symbol}_{today_str}_{scenario.name}"
                         )
-                        if not database.get_kv_cache(cache_key):
+                        if not database.is_kv_cache_fresh(cache_key):
                             alert_embed = create_scenario_alert_embed(
                                 symbol=symbol,
                                 scenario=scenario,
@@ -241,7 +242,9 @@ async def dispatch_watchlist_heartbeat(
                                 skew_percentile=skew_percentile,
                             )
                             await bot.queue_dm(uid, embed=alert_embed)
-                            await database.save_kv_cache(cache_key, True)
+                            await database.save_kv_cache(
+                                cache_key, True, ttl_sec=DAILY_MARKER_TTL_SEC
+                            )
                 # ----------------------------
         except Exception as user_err:
             logger.error(
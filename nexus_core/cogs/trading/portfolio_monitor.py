@@ -12,6 +12,7 @@ from zoneinfo import ZoneInfo
 from discord.ext import tasks, commands
 
 import database
+from database.cache import DAILY_MARKER_TTL_SEC
 import market_time
 from services.trading_service import TradingService
 from market_analysis.dynamic_rollover import (
@@ -392,12 +393,20 @@ class PortfolioMonitorCog(commands.Cog):
                         )
                     user_assets.setdefault(u_id, []).append(asset_entry)
 
+                # 機會成本候選排名：全站自選 ∪ 持倉的去重標的每輪只計算一次，
+                # 各使用者的候選挑選只在排名表上做記憶體內過濾
+                rollover_ranking = await asyncio.to_thread(
+                    self.rollover_engine.build_rollover_ranking,
+                    {a["symbol"] for assets in user_assets.values() for a in assets},
+                    radar_cache_map,
+                )
+
                 for u_id, portfolio_assets in user_assets.items():
                     total_val = sum(a["current_value"] for a in portfolio_assets)
 
                     rebalance_instructions = (
                         await self.rollover_engine.check_satellite_rebalancing(
-                            u_id, portfolio_assets, total_val
+                            u_id, portfolio_assets, total_val, ranking=rollover_ranking
                         )
                     )
 
@@ -411,7 +420,9 @@ class PortfolioMonitorCog(commands.Cog):
                         if ins.get("action") != "HOLD"
                     }
                     candidate_symbol = self.rollover_engine._find_best_rollover_target(
-                        u_id, exclude_symbols={a["symbol"] for a in portfolio_assets}
+                        u_id,
+                        exclude_symbols={a["symbol"] for a in portfolio_assets},
+                        ranking=rollover_ranking,
                     )
                     candidate_radar = radar_cache_map.get(candidate_symbol)
                     if (
@@ -439,6 +450,7 @@ class PortfolioMonitorCog(commands.Cog):
                         already_flagged,
                         candidate_symbol,
                         candidate_radar,
+                        ranking=rollover_ranking,
                     )
 
                     # 🚀 邏輯 (4): 槓桿與保證金防禦 — 排除已被 Scenario 2/3 標記過的
@@ -493,7 +505,7 @@ class PortfolioMonitorCog(commands.Cog):
                             f"rollover_alert_{u_id}_{ins['symbol']}_"
                             f"{scenario}_{action}_{today_str}"
                         )
-                        if database.get_kv_cache(dedup_key):
+                        if database.is_kv_cache_fresh(dedup_key):
                             continue
 
                         scenario_label = _SCENARIO_LABELS.get(scenario, "動態轉倉")
@@ -543,7 +555,9 @@ class PortfolioMonitorCog(commands.Cog):
                                 embed, "_view", f"RolloverActionView:{ins['symbol']}"
                             )
                         await self.bot.queue_dm(u_id, embed=embed)
-                        await database.save_kv_cache(dedup_key, 1)
+                        await database.save_kv_cache(
+                            dedup_key, 1, ttl_sec=DAILY_MARKER_TTL_SEC
+                        )
                         # 審計軌跡：記錄本次實際推送給使用者的轉倉建議本身
                         # (系統僅提供建議、不代為執行券商下單，故無法追蹤實際
                         # 成交結果，此處記錄的是「推送了什麼建議」而非「後續
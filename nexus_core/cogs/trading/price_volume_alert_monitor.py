@@ -12,6 +12,7 @@ from typing import Any, Dict, List, Optional
 from discord.ext import commands, tasks
 
 import database
+from database.cache import DAILY_MARKER_TTL_SEC
 import market_time
 from database.price_volume_watch import PriceVolumeWatch, get_all_watches
 from market_analysis.price_volume_alert import (
@@ -95,13 +96,13 @@ class PriceVolumeAlertMonitorCog(commands.Cog, name="PriceVolumeAlertMonitorCog"
                 continue
 
             cache_key = f"price_volume_alert_{watch.user_id}_{watch.symbol}_{today_str}"
-            if database.get_kv_cache(cache_key):
+            if database.is_kv_cache_fresh(cache_key):
                 continue  # 每日每標的只觸發一次，避免震盪重複洗版
 
             try:
                 embed = create_price_volume_alert_embed(watch, bar)
                 await self.bot.queue_dm(watch.user_id, embed=embed)
-                await database.save_kv_cache(cache_key, 1)
+                await database.save_kv_cache(cache_key, 1, ttl_sec=DAILY_MARKER_TTL_SEC)
 
                 logger.warning(
                     f"📊 [價量監測] 已發送 {watch.symbol} 警報給使用者 {watch.user_id} "
@@ -15,7 +15,11 @@ from discord.ext import commands
 
 import database
 from services.trading_service import TradingService
-from services.alert_filter import should_send_priority_alert
+from services.alert_filter import (
+    confirm_mtf_trends,
+    pending_crossover_signals,
+    should_send_priority_alert,
+)
 from cogs.embed_builder import (
     create_scan_embed,
     create_info_embed,
@@ -127,6 +131,19 @@ class MarketScanCog(commands.Cog):
                     )
                 return
 
+            # 本輪所有 OPTION 訊號的日線錨定趨勢一次批次確認，後續逐筆判定直接命中快取
+            try:
+                await confirm_mtf_trends(
+                    pending_crossover_signals(
+                        data
+                        for alerts_data in user_results.values()
+                        for data in alerts_data
+                        if data.get("alert_type", "OPTION") == "OPTION"
+                    )
+                )
+            except Exception as e:
+                logger.warning(f"MTF 批次確認失敗，改由逐筆判定: {e}")
+
             now = datetime.now(ny_tz)
             for uid, alerts_data in user_results.items():
                 user_cooldowns = self.signal_cooldowns.setdefault(str(uid), {})
@@ -15,6 +15,7 @@ from zoneinfo import ZoneInfo
 from discord.ext import tasks, commands
 
 import database
+from database.cache import DAILY_MARKER_TTL_SEC
 import market_time
 
 ny_tz = ZoneInfo("America/New_York")
@@ -202,7 +203,9 @@ class SchedulerCog(commands.Cog):
                             trigger_reason=trigger_reason,
                         )
                         await self.bot.queue_dm(uid, embed=embed)
-                        await database.save_kv_cache(cooldown_key, 1)
+                        await database.save_kv_cache(
+                            cooldown_key, 1, ttl_sec=DAILY_MARKER_TTL_SEC
+                        )
                         logger.warning(
                             f"🦇 [黑天鵝/尾部風險警報已發送] 使用者: {uid}, 原因: {trigger_reason}"
                         )
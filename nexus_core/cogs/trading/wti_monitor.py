@@ -12,6 +12,7 @@ from typing import Any
 from discord.ext import commands, tasks
 
 import database
+from database.cache import DAILY_MARKER_TTL_SEC
 from database.wti_config import get_wti_config
 import market_time
 from market_analysis.wti_analysis import (
@@ -157,7 +158,9 @@ class WtiMonitorCog(commands.Cog, name="WtiMonitorCog"):
 
                     embed = create_wti_alert_embed(analysis)
                     await self.bot.queue_dm(uid, embed=embed)
-                    await database.save_kv_cache(cache_key, 1)
+                    await database.save_kv_cache(
+                        cache_key, 1, ttl_sec=DAILY_MARKER_TTL_SEC
+                    )
 
                     logger.warning(
                         f"🛢️ [WTI Alert] 已發送 {alert_type.value} 警報給使用者 {uid} "
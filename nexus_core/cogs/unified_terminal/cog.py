@@ -4,6 +4,7 @@ from discord.ext import commands
 from discord import app_commands
 import asyncio
 import logging
+import pandas as pd
 from typing import Optional, List
 
 from services import market_data_service, reddit_service
@@ -33,6 +34,45 @@ logger = logging.getLogger(__name__)
 _RADAR_SCAN_SEM = asyncio.Semaphore(15)
 _SWR_REVALIDATE_SEM = asyncio.Semaphore(3)
 _active_swr_tasks: set[str] = set()
+_pending_sqz_symbols: set[str] = set()
+_SQZ_BATCH_KEY = "sqz_batch"
+
+
+async def _revalidate_sqz() -> None:
+    """
+    Squeeze Cache 批次自癒：把等待中的標的一次取出、堆疊最新 K 線後以
+    `calculate_power_squeeze_batch` 單次向量化計算並寫回快取。
+    計算期間新加入的標的會在下一輪一併處理。
+    """
+    from database.squeeze_cache import save_squeeze_cache
+    from market_analysis.squeeze_engine import calculate_power_squeeze_batch
+
+    async def _history(s: str) -> Any:
+        async with _SWR_REVALIDATE_SEM:
+            return await market_data_service.get_history_df(
+                s, period="6mo", interval="1d"
+            )
+
+    try:
+        while _pending_sqz_symbols:
+            symbols = sorted(_pending_sqz_symbols)
+            _pending_sqz_symbols.difference_update(symbols)
+            histories = await asyncio.gather(
+                *(_history(s) for s in symbols), return_exceptions=True
+            )
+            frames = {
+                s: df
+                for s, df in zip(symbols, histories)
+                if isinstance(df, pd.DataFrame) and not df.empty
+            }
+            for s, res in calculate_power_squeeze_batch(frames).items():
+                save_squeeze_cache(
+                    s, res["is_squeezing"], res["momentum"], res["direction"]
+                )
+    except Exception as ex:
+        logger.warning(f"Async SWR SQZ 批次快取自癒計算失敗: {ex}")
+    finally:
+        _active_swr_tasks.discard(_SQZ_BATCH_KEY)
 
 
 def _safe_float(value: Any, default: float = 0.0) -> float:
@@ -674,7 +714,7 @@ class UnifiedTerminalCog(commands.Cog):
                 else {"symbol": symbol, "stock_cost": stock_cost, "price": 0.0}
             )
 
-            psq_result = analyze_psq(df_hist_1d, vix_spot=macro_data.vix)
+            psq_result = analyze_psq(df_hist_1d, vix_spot=macro_data.vix, symbol=symbol)
             if psq_result:
                 result["psq_result"] = psq_result
                 is_df_valid = df_hist_1d is not None and not df_hist_1d.empty
@@ -894,41 +934,11 @@ class UnifiedTerminalCog(commands.Cog):
                 "is_expired": False,
             }
 
-            # 啟動非同步 SWR 自癒計算，不阻塞即時互動指令（去重與節流）
-            sqz_key = f"sqz_{sym.upper()}"
-            if sqz_key not in _active_swr_tasks:
-                _active_swr_tasks.add(sqz_key)
-
-                async def _revalidate_sqz(s: str, k: str) -> None:
-                    try:
-                        async with _SWR_REVALIDATE_SEM:
-                            from database.squeeze_cache import save_squeeze_cache
-                            from market_analysis.psq_engine import analyze_psq
-
-                            df_hist = await market_data_service.get_history_df(
-                                s, period="6mo", interval="1d"
-                            )
-                            if df_hist is not None and not df_hist.empty:
-                                psq_obj = analyze_psq(df_hist, vix_spot=18.0)
-                                if psq_obj:
-                                    p_is_sq = psq_obj.is_squeezing
-                                    p_m = psq_obj.momentum_value
-                                    p_d = (
-                                        "🟢"
-                                        if psq_obj.signal_direction == "Long"
-                                        else (
-                                            "🔴"
-                                            if psq_obj.signal_direction == "Short"
-                                            else "⚪"
-                                        )
-                                    )
-                                    save_squeeze_cache(s, p_is_sq, p_m, p_d)
-                    except Exception as ex:
-                        logger.warning(f"[{s}] Async SWR SQZ 快取自癒計算失敗: {ex}")
-                    finally:
-                        _active_swr_tasks.discard(k)
-
-                asyncio.create_task(_revalidate_sqz(sym, sqz_key))
+            # 啟動非同步 SWR 自癒計算，不阻塞即時互動指令（同一輪的標的合併成一批）
+            _pending_sqz_symbols.add(sym.upper())
+            if _SQZ_BATCH_KEY not in _active_swr_tasks:
+                _active_swr_tasks.add(_SQZ_BATCH_KEY)
+                asyncio.create_task(_revalidate_sqz())
 
         if not squeeze_cache:
             squeeze_cache = {}
@@ -1299,7 +1309,7 @@ class UnifiedTerminalCog(commands.Cog):
                     "signal_direction": sc.get("direction", "⚪"),
                 }
             else:
-                psq_obj = analyze_psq(df_hist, vix_spot=18.0)
+                psq_obj = analyze_psq(df_hist, vix_spot=18.0, symbol=sym)
                 if psq_obj:
                     psq_res = {
                         "is_squeezing": psq_obj.is_squeezing,
@@ -243,7 +243,9 @@ class SymbolHubView(discord.ui.View):
             if not isinstance(result, dict) or not result:
                 result = {"symbol": self.symbol, "stock_cost": stock_cost, "price": 0.0}
 
-            psq_result = analyze_psq(df_hist_1d, vix_spot=macro_data.vix)
+            psq_result = analyze_psq(
+                df_hist_1d, vix_spot=macro_data.vix, symbol=self.symbol
+            )
             if psq_result:
                 result["psq_result"] = psq_result
                 is_df_valid = df_hist_1d is not None and not df_hist_1d.empty
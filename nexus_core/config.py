@@ -57,6 +57,40 @@ API_KEY = get_env_or_secret("API_KEY", None)
 TUNNEL_URL = get_env_or_secret("TUNNEL_URL", "")
 FINNHUB_API_KEY = get_env_or_secret("FINNHUB_API_KEY", "")
 
+# LLM 推論併發上限與低優先權排隊上限 (超過即直接降級，不再排隊)
+LLM_MAX_CONCURRENCY = int(get_env_or_secret("LLM_MAX_CONCURRENCY", 2))
+LLM_MAX_QUEUE = int(get_env_or_secret("LLM_MAX_QUEUE", 8))
+
+# 盤前快取預熱：依存取統計排序後的記憶體預算 (MiB)、項目上限與同時抓取數
+CACHE_WARMUP_BUDGET_MB = float(get_env_or_secret("NEXUS_WARMUP_BUDGET_MB", 24))
+CACHE_WARMUP_MAX_ITEMS = int(get_env_or_secret("NEXUS_WARMUP_MAX_ITEMS", 200))
+CACHE_WARMUP_CONCURRENCY = int(get_env_or_secret("NEXUS_WARMUP_CONCURRENCY", 3))
+
+# 情緒歷史保存：超過保存天數的資料刪除，超過降採樣天數的資料每日只保留最後一筆
+SENTIMENT_HISTORY_RETENTION_DAYS = int(
+    get_env_or_secret("NEXUS_SENTIMENT_RETENTION_DAYS", 365)
+)
+SENTIMENT_HISTORY_DOWNSAMPLE_DAYS = int(
+    get_env_or_secret("NEXUS_SENTIMENT_DOWNSAMPLE_DAYS", 30)
+)
+
+# DDP / 波動率巡檢：同時分析的標的數 (實際 yfinance 請求仍受 call_yf 限流器節制)
+INSPECTOR_SCAN_CONCURRENCY = int(get_env_or_secret("NEXUS_INSPECTOR_CONCURRENCY", 4))
+
+# kv_cache 背景清理：每隔幾分鐘分批刪除過期列，以及每批刪除的筆數上限
+KV_CACHE_SWEEP_INTERVAL_MIN = float(
+    get_env_or_secret("NEXUS_KV_CACHE_SWEEP_INTERVAL_MIN", 30)
+)
+KV_CACHE_SWEEP_CHUNK = int(get_env_or_secret("NEXUS_KV_CACHE_SWEEP_CHUNK", 500))
+
+# 延遲觀測：事件迴圈延遲取樣間隔、阻塞回呼記錄門檻與本機文字指標端點 (port 0 = 停用)
+LOOP_LAG_SAMPLE_INTERVAL_SEC = float(
+    get_env_or_secret("NEXUS_LOOP_LAG_INTERVAL_SEC", 0.5)
+)
+LOOP_BLOCK_THRESHOLD_MS = float(get_env_or_secret("NEXUS_LOOP_BLOCK_THRESHOLD_MS", 250))
+METRICS_HTTP_HOST = get_env_or_secret("NEXUS_METRICS_HOST", "127.0.0.1")
+METRICS_HTTP_PORT = int(get_env_or_secret("NEXUS_METRICS_PORT", 0))
+
 # 策略目標 Delta 參數
 TARGET_DELTAS = {"STO_PUT": -0.20, "STO_CALL": 0.20, "BTO_PUT": -0.50, "BTO_CALL": 0.50}
 
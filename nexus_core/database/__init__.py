@@ -42,9 +42,22 @@ from .virtual_trading import (
     get_open_virtual_trades,
     get_all_virtual_trades,
     update_virtual_trade_greeks,
+    settle_virtual_trades,
 )
 from .financials import get_cached_financials, save_financials_cache, purge_old_cache
-from .cache import save_kv_cache, get_kv_cache
+from .fundamentals import (
+    load_latest_fundamentals,
+    save_fundamentals,
+    touch_fundamentals,
+)
+from .cache import (
+    save_kv_cache,
+    save_kv_cache_many,
+    get_kv_cache,
+    get_kv_cache_many,
+    is_kv_cache_fresh,
+    sweep_expired_kv_cache,
+)
 from .orders import (
     add_active_order,
     get_user_active_orders,
@@ -62,6 +75,7 @@ from .notifications import (
 from .market_cache import (
     save_market_cache,
     get_market_cache,
+    get_market_cache_batch,
     mark_market_cache_stale,
 )
 from .price_volume_watch import (
@@ -115,9 +129,13 @@ __all__ = [
     "get_open_virtual_trades",
     "get_all_virtual_trades",
     "update_virtual_trade_greeks",
+    "settle_virtual_trades",
     "get_cached_financials",
     "save_financials_cache",
     "purge_old_cache",
+    "load_latest_fundamentals",
+    "save_fundamentals",
+    "touch_fundamentals",
     "add_active_order",
     "get_user_active_orders",
     "get_all_active_orders",
@@ -130,9 +148,14 @@ __all__ = [
     "apply_preset_settings",
     "save_market_cache",
     "get_market_cache",
+    "get_market_cache_batch",
     "mark_market_cache_stale",
     "save_kv_cache",
+    "save_kv_cache_many",
     "get_kv_cache",
+    "get_kv_cache_many",
+    "is_kv_cache_fresh",
+    "sweep_expired_kv_cache",
     "WatchDirection",
     "PriceVolumeWatch",
     "WatchLimitExceededError",
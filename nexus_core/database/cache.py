@@ -1,25 +1,68 @@
 import logging
 import json
-from typing import Any, Optional
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import config
 from .financials import get_cached_financials, save_financials_cache, purge_old_cache
 
 from database.connection import get_read_connection, execute_write_async
 
 logger = logging.getLogger(__name__)
 
+# 每日去重標記 / 當日快照的保存期限：跨過換日後即可被背景清理刪除
+DAILY_MARKER_TTL_SEC = 2 * 86400.0
+
+# 精簡二進位編碼：以 BLOB 存放 (格式標記 + zlib 壓縮的緊湊 JSON)；
+# 既有的 TEXT JSON 列照常讀取，兩種格式可在同一張表並存
+_COMPACT_FORMAT_ZLIB_JSON = b"\x01"
+
+# 單一 SQL 語句內的列數上限 (每列 4 個參數，遠低於 SQLite 的變數數量限制)
+_MULTI_ROW_CHUNK = 200
+
+
+def _encode_value(value: Any, compact: bool) -> Any:
+    if not compact:
+        return json.dumps(value)
+    payload = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    return _COMPACT_FORMAT_ZLIB_JSON + zlib.compress(payload)
+
+
+def _decode_value(raw: Any) -> Any:
+    if isinstance(raw, bytes):
+        if raw[:1] != _COMPACT_FORMAT_ZLIB_JSON:
+            raise ValueError(f"未知的 kv_cache 二進位格式: {raw[:1]!r}")
+        return json.loads(zlib.decompress(raw[1:]))
+    return json.loads(raw)
+
+
+def _expires_at(ttl_sec: Optional[float], now: float) -> Optional[float]:
+    return None if ttl_sec is None else now + ttl_sec
+
+
+_UPSERT_SQL = """
+    INSERT INTO kv_cache (key, value, updated_at, expires_at)
+    VALUES {values}
+    ON CONFLICT(key) DO UPDATE SET
+    value = excluded.value,
+    updated_at = CURRENT_TIMESTAMP,
+    expires_at = excluded.expires_at
+"""
+
 
-async def save_kv_cache(key: str, value: Any) -> bool:
+async def save_kv_cache(
+    key: str, value: Any, ttl_sec: Optional[float] = None, compact: bool = False
+) -> bool:
+    """
+    寫入單一鍵值。`ttl_sec` 為存活秒數 (None = 永不過期，覆寫時同時清除舊 TTL)；
+    `compact=True` 以壓縮的二進位格式存放，適合體積較大的快照。
+    """
     try:
-        val_str = json.dumps(value)
         await execute_write_async(
-            """
-            INSERT INTO kv_cache (key, value, updated_at)
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-            ON CONFLICT(key) DO UPDATE SET
-            value = excluded.value,
-            updated_at = CURRENT_TIMESTAMP
-        """,
-            (key, val_str),
+            _UPSERT_SQL.format(values="(?, ?, CURRENT_TIMESTAMP, ?)"),
+            (key, _encode_value(value, compact), _expires_at(ttl_sec, time.time())),
         )
         return True
     except Exception as e:
@@ -27,15 +70,39 @@ async def save_kv_cache(key: str, value: Any) -> bool:
         return False
 
 
+async def save_kv_cache_many(
+    items: Mapping[str, Any], ttl_sec: Optional[float] = None, compact: bool = False
+) -> bool:
+    """以多列 INSERT 一次寫入多個鍵值 (共用同一 TTL 與編碼)。"""
+    if not items:
+        return True
+    expires_at = _expires_at(ttl_sec, time.time())
+    rows = [(k, _encode_value(v, compact), expires_at) for k, v in items.items()]
+    try:
+        for start in range(0, len(rows), _MULTI_ROW_CHUNK):
+            chunk = rows[start : start + _MULTI_ROW_CHUNK]
+            values = ", ".join("(?, ?, CURRENT_TIMESTAMP, ?)" for _ in chunk)
+            params = tuple(p for row in chunk for p in row)
+            await execute_write_async(_UPSERT_SQL.format(values=values), params)
+        return True
+    except Exception as e:
+        logger.error(f"save_kv_cache_many 失敗 ({len(rows)} 筆): {e}")
+        return False
+
+
 def get_kv_cache(key: str) -> Optional[Any]:
     conn = None
     try:
         conn = get_read_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT value FROM kv_cache WHERE key = ?", (key,))
+        cursor.execute(
+            "SELECT value FROM kv_cache "
+            "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        )
         row = cursor.fetchone()
         if row:
-            return json.loads(row[0])
+            return _decode_value(row[0])
     except Exception as e:
         logger.error(f"get_kv_cache 失敗 (key: {key}): {e}")
     finally:
@@ -44,10 +111,108 @@ def get_kv_cache(key: str) -> Optional[Any]:
     return None
 
 
+def get_kv_cache_many(keys: Iterable[str]) -> Dict[str, Any]:
+    """一次讀出多個未過期的鍵值；不存在或已過期的鍵不會出現在結果中。"""
+    wanted = list(dict.fromkeys(keys))
+    if not wanted:
+        return {}
+    result: Dict[str, Any] = {}
+    conn = None
+    try:
+        conn = get_read_connection()
+        now = time.time()
+        for start in range(0, len(wanted), _MULTI_ROW_CHUNK):
+            chunk = wanted[start : start + _MULTI_ROW_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            rows: List[Tuple[str, Any]] = conn.execute(
+                f"SELECT key, value FROM kv_cache WHERE key IN ({placeholders}) "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (*chunk, now),
+            ).fetchall()
+            for key, raw in rows:
+                try:
+                    result[key] = _decode_value(raw)
+                except Exception as e:
+                    logger.error(f"get_kv_cache_many 解碼失敗 (key: {key}): {e}")
+    except Exception as e:
+        logger.error(f"get_kv_cache_many 失敗 ({len(wanted)} 筆): {e}")
+    finally:
+        if conn:
+            conn.close()
+    return result
+
+
+def is_kv_cache_fresh(key: str, max_age_sec: Optional[float] = None) -> bool:
+    """
+    只檢查鍵是否存在且未過期 (不讀取、不解碼 value)，適合去重標記這類只在意
+    「有沒有」的查詢。`max_age_sec` 另外要求最後寫入時間在該秒數內。
+    """
+    conn = None
+    try:
+        conn = get_read_connection()
+        sql = (
+            "SELECT 1 FROM kv_cache "
+            "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)"
+        )
+        params: Tuple[Any, ...] = (key, time.time())
+        if max_age_sec is not None:
+            sql += " AND updated_at >= datetime('now', ?)"
+            params += (f"-{max(max_age_sec, 0.0)} seconds",)
+        return conn.execute(sql, params).fetchone() is not None
+    except Exception as e:
+        logger.error(f"is_kv_cache_fresh 失敗 (key: {key}): {e}")
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+
+def sweep_expired_kv_cache(
+    chunk_size: Optional[int] = None, now: Optional[float] = None
+) -> int:
+    """
+    分批刪除已過期的 kv_cache 列，回傳刪除筆數。
+
+    每批只刪 `chunk_size` 筆並立即提交，沿 expires_at 部分索引取出目標列，
+    避免一次大量刪除長時間持有寫入鎖或讓 WAL 暴增。
+    """
+    chunk = max(int(chunk_size or config.KV_CACHE_SWEEP_CHUNK), 1)
+    cutoff = time.time() if now is None else now
+    deleted = 0
+    conn = None
+    try:
+        conn = sqlite3.connect(config.DB_NAME, timeout=15.0)
+        while True:
+            cursor = conn.execute(
+                """
+                DELETE FROM kv_cache WHERE rowid IN (
+                    SELECT rowid FROM kv_cache
+                    WHERE expires_at IS NOT NULL AND expires_at <= ?
+                    LIMIT ?
+                )
+                """,
+                (cutoff, chunk),
+            )
+            conn.commit()
+            removed = max(cursor.rowcount, 0)
+            deleted += removed
+            if removed < chunk:
+                break
+    finally:
+        if conn:
+            conn.close()
+    return deleted
+
+
 __all__ = [
     "get_cached_financials",
     "save_financials_cache",
     "purge_old_cache",
     "save_kv_cache",
+    "save_kv_cache_many",
     "get_kv_cache",
+    "get_kv_cache_many",
+    "is_kv_cache_fresh",
+    "sweep_expired_kv_cache",
+    "DAILY_MARKER_TTL_SEC",
 ]
@@ -0,0 +1,58 @@
+import logging
+import sqlite3
+from typing import Iterable
+
+import config
+from database.connection import get_read_connection
+
+logger = logging.getLogger(__name__)
+
+# (symbol, kind, param, score, last_access)
+AccessRow = tuple[str, str, str, float, float]
+
+
+def load_cache_access_stats() -> list[AccessRow]:
+    conn = None
+    try:
+        conn = get_read_connection()
+        rows = conn.execute(
+            "SELECT symbol, kind, param, score, last_access FROM cache_access_stats"
+        ).fetchall()
+        return [
+            (str(r[0]), str(r[1]), str(r[2]), float(r[3]), float(r[4])) for r in rows
+        ]
+    except Exception as e:
+        logger.error("讀取 cache_access_stats 失敗: %s", e)
+        return []
+    finally:
+        if conn:
+            conn.close()
+
+
+def save_cache_access_stats(rows: Iterable[AccessRow], prune_before: float) -> bool:
+    """批次寫入存取統計，並刪除最後存取早於 `prune_before` 的冷資料。"""
+    conn = None
+    try:
+        conn = sqlite3.connect(config.DB_NAME)
+        cursor = conn.cursor()
+        cursor.executemany(
+            """
+            INSERT INTO cache_access_stats (symbol, kind, param, score, last_access)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(symbol, kind, param) DO UPDATE SET
+                score = excluded.score,
+                last_access = excluded.last_access
+            """,
+            list(rows),
+        )
+        cursor.execute(
+            "DELETE FROM cache_access_stats WHERE last_access < ?", (prune_before,)
+        )
+        conn.commit()
+        return True
+    except Exception as e:
+        logger.error("寫入 cache_access_stats 失敗: %s", e)
+        return False
+    finally:
+        if conn:
+            conn.close()
@@ -1,6 +1,6 @@
 import logging
 import sqlite3
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
 
 import config
 
@@ -132,6 +132,33 @@ def get_cached_earnings(symbol: str) -> Optional[dict[str, Any]]:
             conn.close()
 
 
+def get_cached_earnings_batch(symbols: Iterable[str]) -> dict[str, dict[str, Any]]:
+    """一次讀出多檔標的的財報日快取 (缺少快取的標的不在結果中)。"""
+    wanted = sorted({s.upper() for s in symbols})
+    if not wanted:
+        return {}
+    conn = None
+    try:
+        conn = sqlite3.connect(config.DB_NAME)
+        conn.row_factory = sqlite3.Row
+        placeholders = ",".join("?" for _ in wanted)
+        rows = conn.execute(
+            f"""
+            SELECT symbol, earnings_date, checked_at
+            FROM earnings_calendar_cache
+            WHERE symbol IN ({placeholders})
+            """,
+            wanted,
+        ).fetchall()
+        return {row["symbol"]: dict(row) for row in rows}
+    except Exception as e:
+        logger.error("批次讀取 earnings_calendar_cache 失敗: %s", e)
+        return {}
+    finally:
+        if conn:
+            conn.close()
+
+
 def save_earnings_cache(symbol: str, earnings_date: str | None) -> None:
     conn = None
     try:
@@ -3,17 +3,35 @@ import sqlite3
 import logging
 import asyncio
 import threading
+import time
 from typing import Optional
 import config
+from services.latency_monitor import STAGE_DB_READ, STAGE_DB_WRITE, latency_registry
 
 logger = logging.getLogger(__name__)
 
 
+class _TimedReadConnection(sqlite3.Connection):
+    """讀取連線自開啟到 close() 的耗時記入 db_read 延遲直方圖。"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._opened_at: Optional[float] = time.perf_counter()
+        super().__init__(*args, **kwargs)
+
+    def close(self) -> None:
+        super().close()
+        if self._opened_at is not None:
+            latency_registry.record(
+                STAGE_DB_READ, (time.perf_counter() - self._opened_at) * 1000.0
+            )
+            self._opened_at = None
+
+
 def get_read_connection() -> sqlite3.Connection:
     """
     Returns a read-only database connection with WAL mode, normal sync, and 15s timeout.
     """
-    conn = sqlite3.connect(config.DB_NAME, timeout=15.0)
+    conn = sqlite3.connect(config.DB_NAME, timeout=15.0, factory=_TimedReadConnection)
     conn.execute("PRAGMA journal_mode=WAL;")
     conn.execute("PRAGMA synchronous=NORMAL;")
     return conn
@@ -135,7 +153,8 @@ class DatabaseWriteQueue:
                 task_type, data, commit, future, sync_event_payload = task
 
                 try:
-                    res = await cls._process_task(conn, task_type, data, commit)
+                    with latency_registry.span(STAGE_DB_WRITE):
+                        res = await cls._process_task(conn, task_type, data, commit)
 
                     if future:
                         if not future.cancelled():
@@ -1,8 +1,10 @@
-from typing import Any
+from typing import Any, Optional
 import sqlite3
 import logging
 import pkgutil
 import importlib
+from functools import lru_cache
+from pathlib import Path
 import config
 import re
 
@@ -10,19 +12,31 @@ from database import migrations
 
 logger = logging.getLogger(__name__)
 
+# 預期模組名稱格式: v001_init 等
+_MODULE_PATTERN = re.compile(r"^[a-z0-9_]+$")
+_VERSION_PREFIX = re.compile(r"^v(\d+)_")
+
+# 由完整遷移鏈產生的 schema 快照；全新資料庫直接載入，不必逐一重播 V1..Vn
+SCHEMA_SNAPSHOT_PATH = Path(__file__).with_name("schema_snapshot.sql")
+
+# 遷移鏈以 CURRENT_TIMESTAMP 寫入的欄位：快照中存為 NULL 以保持內容穩定，
+# 載入快照時再補上載入當下的時間，與逐一執行遷移的結果一致
+_SNAPSHOT_TIMESTAMP_COLUMNS = (
+    ("schema_versions", "applied_at"),
+    ("kv_cache", "updated_at"),
+)
+
 
 # ==========================================
 # 資料庫版本遷移註冊表 (Migration Registry)
 # ==========================================
 # 每次需要更改資料庫結構時，請在 database/migrations 目錄下新增自立的 python 檔案。
-# 系統啟動時會自動掃描該目錄下的所有模組並載入。
+# 遷移模組只在確實有待套用的版本時才載入，schema 已是最新時啟動不需匯入任何遷移。
 def get_migrations() -> Any:
     migration_list = []
-    # 預期模組名稱格式: v001_init 等
-    module_pattern = re.compile(r"^[a-z0-9_]+$")
 
     for _, module_name, _ in pkgutil.iter_modules(migrations.__path__):
-        if not module_pattern.match(module_name):
+        if not _MODULE_PATTERN.match(module_name):
             logger.warning(f"跳過不合規的遷移模組名稱: {module_name}")
             continue
 
@@ -45,12 +59,69 @@ def get_migrations() -> Any:
     return migration_list
 
 
-MIGRATIONS = get_migrations()
+@lru_cache(maxsize=1)
+def _migration_registry() -> tuple[dict[str, Any], ...]:
+    return tuple(get_migrations())
+
+
+@lru_cache(maxsize=1)
+def latest_version() -> int:
+    """由遷移模組檔名 (vNNN_ 前綴) 推得最新 schema 版本，不匯入任何模組。"""
+    versions = [
+        int(match.group(1))
+        for _, module_name, _ in pkgutil.iter_modules(migrations.__path__)
+        if (match := _VERSION_PREFIX.match(module_name))
+    ]
+    return max(versions, default=0)
+
+
+def _current_version(cursor: sqlite3.Cursor) -> int:
+    cursor.execute("SELECT MAX(version) FROM schema_versions")
+    result = cursor.fetchone()[0]
+    return result if result is not None else 0
+
+
+def _is_fresh_database(cursor: sqlite3.Cursor) -> bool:
+    cursor.execute(
+        "SELECT COUNT(*) FROM sqlite_master "
+        "WHERE type = 'table' AND name NOT IN ('schema_versions', 'sqlite_sequence')"
+    )
+    return bool(cursor.fetchone()[0] == 0)
+
+
+def _bootstrap_from_snapshot(
+    conn: sqlite3.Connection, snapshot_path: Optional[Path] = None
+) -> bool:
+    """以 schema 快照初始化全新資料庫；快照不存在時回傳 False 交由遷移鏈處理。"""
+    path = snapshot_path or SCHEMA_SNAPSHOT_PATH
+    if not path.exists():
+        return False
+    conn.execute("DROP TABLE IF EXISTS schema_versions")
+    conn.executescript(path.read_text(encoding="utf-8"))
+    for table, column in _SNAPSHOT_TIMESTAMP_COLUMNS:
+        # nosemgrep: python.lang.security.audit.formatted-sql-query.formatted-sql-query, python.sqlalchemy.security.sqlalchemy-execute-raw-query.sqlalchemy-execute-raw-query
+        conn.execute(
+            f"UPDATE {table} SET {column} = CURRENT_TIMESTAMP WHERE {column} IS NULL"
+        )
+    conn.commit()
+    return True
 
 
 def run_migrations() -> None:
     """執行資料庫版本控管與遷移邏輯"""
     conn = sqlite3.connect(config.DB_NAME)
+    try:
+        apply_migrations(conn)
+    finally:
+        conn.close()
+
+
+def apply_migrations(conn: sqlite3.Connection, use_snapshot: bool = True) -> None:
+    """
+    將指定連線的 schema 升級到最新版本。
+
+    `use_snapshot=False` 時一律重播完整遷移鏈 (產生快照與一致性測試使用)。
+    """
     cursor = conn.cursor()
 
     # 1. 確保版控紀錄表存在
@@ -61,17 +132,24 @@ def run_migrations() -> None:
         )
     """)
 
-    # 2. 取得目前已套用的最高版本
-    cursor.execute("SELECT MAX(version) FROM schema_versions")
-    result = cursor.fetchone()[0]
-    current_version = result if result is not None else 0
+    # 2. 取得目前已套用的最高版本；已是最新時直接返回 (不載入任何遷移模組)
+    current_version = _current_version(cursor)
+    if current_version >= latest_version():
+        logger.info(f"目前資料庫 Schema 版本: V{current_version} (已是最新)")
+        return
+
+    # 3. 全新資料庫：直接載入 schema 快照，之後只需補上快照之後的新遷移
+    if current_version == 0 and use_snapshot and _is_fresh_database(cursor):
+        if _bootstrap_from_snapshot(conn):
+            current_version = _current_version(cursor)
+            logger.info(f"🧊 已由 schema 快照初始化資料庫至 V{current_version}")
 
     logger.info(f"目前資料庫 Schema 版本: V{current_version}")
 
-    # 3. 依序執行尚未套用的遷移指令
+    # 4. 依序執行尚未套用的遷移指令
     table_pattern = re.compile(r"^[a-zA-Z0-9_]+$")
 
-    for migration in MIGRATIONS:
+    for migration in _migration_registry():
         v = migration["version"]
         if v > current_version:
             logger.info(f"🚀 正在執行資料庫遷移至 V{v}: {migration['description']}")
@@ -127,7 +205,25 @@ def run_migrations() -> None:
                     logger.error(f"❌ V{v} 遷移失敗，已執行 Rollback: {e}")
                     break  # 發生 Error 即停止後續遷移，確保資料一致性
 
-    conn.close()
+
+def write_schema_snapshot(path: Optional[Path] = None) -> Path:
+    """
+    在記憶體資料庫重播完整遷移鏈，並將結果 (含 schema_versions 紀錄) 寫成快照。
+
+    新增遷移後需重新產生快照：`python cli.py admin schema-snapshot`。
+    """
+    target = path or SCHEMA_SNAPSHOT_PATH
+    conn = sqlite3.connect(":memory:")
+    try:
+        apply_migrations(conn, use_snapshot=False)
+        for table, column in _SNAPSHOT_TIMESTAMP_COLUMNS:
+            # nosemgrep: python.lang.security.audit.formatted-sql-query.formatted-sql-query, python.sqlalchemy.security.sqlalchemy-execute-raw-query.sqlalchemy-execute-raw-query
+            conn.execute(f"UPDATE {table} SET {column} = NULL")
+        conn.commit()
+        target.write_text("\n".join(conn.iterdump()) + "\n", encoding="utf-8")
+    finally:
+        conn.close()
+    return target
 
 
 # 為了向下相容，您可以保留 init_db 的名稱，並讓它直接呼叫 run_migrations
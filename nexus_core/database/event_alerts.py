@@ -0,0 +1,55 @@
+import logging
+import sqlite3
+import time
+from typing import Iterable, Optional
+
+import config
+from database.connection import get_read_connection
+
+logger = logging.getLogger(__name__)
+
+
+def load_active_event_alert_keys(now: Optional[float] = None) -> set[str]:
+    """取得尚未到期的事件預警去重鍵。"""
+    now = time.time() if now is None else now
+    conn = None
+    try:
+        conn = get_read_connection()
+        rows = conn.execute(
+            "SELECT alert_key FROM event_alert_dedupe WHERE expires_at > ?", (now,)
+        ).fetchall()
+        return {str(r[0]) for r in rows}
+    except Exception as e:
+        logger.error("讀取 event_alert_dedupe 失敗: %s", e)
+        return set()
+    finally:
+        if conn:
+            conn.close()
+
+
+def save_event_alert_keys(
+    entries: Iterable[tuple[str, float]], now: Optional[float] = None
+) -> bool:
+    """批次寫入 (alert_key, expires_at)，並在同一交易中清除已到期的鍵。"""
+    now = time.time() if now is None else now
+    conn = None
+    try:
+        conn = sqlite3.connect(config.DB_NAME)
+        cursor = conn.cursor()
+        cursor.executemany(
+            """
+            INSERT INTO event_alert_dedupe (alert_key, expires_at)
+            VALUES (?, ?)
+            ON CONFLICT(alert_key) DO UPDATE SET expires_at = excluded.expires_at
+            """,
+            list(entries),
+        )
+        cursor.execute("DELETE FROM event_alert_dedupe WHERE expires_at <= ?", (now,))
+        conn.commit()
+        return True
+    except Exception as e:
+        logger.error("寫入 event_alert_dedupe 失敗: %s", e)
+        return False
+    finally:
+        if conn:
+            conn.close()
@@ -0,0 +1,80 @@
+import logging
+import sqlite3
+from typing import Iterable, Optional
+
+import config
+from database.connection import get_read_connection
+
+logger = logging.getLogger(__name__)
+
+# (symbol, fiscal_period, info, income_stmt, cashflow, fetched_at, checked_at)
+FundamentalsRow = tuple[str, str, str, Optional[str], Optional[str], float, float]
+
+_COLUMNS = "symbol, fiscal_period, info, income_stmt, cashflow, fetched_at, checked_at"
+
+
+def load_latest_fundamentals(symbols: Iterable[str]) -> dict[str, FundamentalsRow]:
+    """一次讀出多檔標的最新會計期間的基本面資料 (以 symbol 為 key)。"""
+    wanted = sorted({s.upper() for s in symbols})
+    if not wanted:
+        return {}
+    conn = None
+    try:
+        conn = get_read_connection()
+        placeholders = ",".join("?" for _ in wanted)
+        rows = conn.execute(
+            f"""
+            SELECT {_COLUMNS} FROM fundamentals_store
+            WHERE symbol IN ({placeholders})
+            ORDER BY symbol, fiscal_period
+            """,
+            wanted,
+        ).fetchall()
+        # 依 fiscal_period 遞增排序，後出現的 (較新的期間) 覆蓋前者
+        return {str(r[0]): tuple(r) for r in rows}
+    except Exception as e:
+        logger.error("讀取 fundamentals_store 失敗: %s", e)
+        return {}
+    finally:
+        if conn:
+            conn.close()
+
+
+def save_fundamentals(row: FundamentalsRow) -> bool:
+    """寫入 (或覆蓋) 一個會計期間的基本面資料。"""
+    conn = None
+    try:
+        conn = sqlite3.connect(config.DB_NAME)
+        conn.execute(
+            f"INSERT OR REPLACE INTO fundamentals_store ({_COLUMNS}) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            row,
+        )
+        conn.commit()
+        return True
+    except Exception as e:
+        logger.error("[%s] 寫入 fundamentals_store 失敗: %s", row[0], e)
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+
+def touch_fundamentals(symbol: str, fiscal_period: str, checked_at: float) -> bool:
+    """重新檢查後仍是同一期間：只更新檢查時間。"""
+    conn = None
+    try:
+        conn = sqlite3.connect(config.DB_NAME)
+        conn.execute(
+            "UPDATE fundamentals_store SET checked_at = ? "
+            "WHERE symbol = ? AND fiscal_period = ?",
+            (checked_at, symbol.upper(), fiscal_period),
+        )
+        conn.commit()
+        return True
+    except Exception as e:
+        logger.error("[%s] 更新 fundamentals_store 檢查時間失敗: %s", symbol, e)
+        return False
+    finally:
+        if conn:
+            conn.close()
@@ -0,0 +1,68 @@
+import time
+from typing import Optional
+
+from database.connection import execute_write, execute_write_async, get_read_connection
+
+
+def get_llm_cache(cache_key: str) -> Optional[tuple[str, float]]:
+    """回傳未過期的 (response_json, latency_ms)；過期或不存在時回傳 None。"""
+    conn = None
+    try:
+        conn = get_read_connection()
+        row = conn.execute(
+            "SELECT response_json, latency_ms FROM llm_response_cache "
+            "WHERE cache_key = ? AND expires_at > ?",
+            (cache_key, time.time()),
+        ).fetchone()
+        if row:
+            return str(row[0]), float(row[1])
+    except Exception:
+        pass
+    finally:
+        if conn:
+            conn.close()
+    return None
+
+
+async def save_llm_cache(
+    cache_key: str,
+    schema_name: str,
+    model: Optional[str],
+    response_json: str,
+    latency_ms: float,
+    ttl_sec: float,
+) -> bool:
+    try:
+        await execute_write_async(
+            """
+            INSERT INTO llm_response_cache
+                (cache_key, schema_name, model, response_json, latency_ms, expires_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                response_json = excluded.response_json,
+                latency_ms = excluded.latency_ms,
+                expires_at = excluded.expires_at,
+                created_at = CURRENT_TIMESTAMP
+            """,
+            (
+                cache_key,
+                schema_name,
+                model,
+                response_json,
+                latency_ms,
+                time.time() + ttl_sec,
+            ),
+        )
+        return True
+    except Exception:
+        return False
+
+
+def purge_expired_llm_cache() -> bool:
+    try:
+        execute_write(
+            "DELETE FROM llm_response_cache WHERE expires_at <= ?", (time.time(),)
+        )
+        return True
+    except Exception:
+        return False
@@ -1,5 +1,5 @@
 import sqlite3
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
 from database.connection import get_read_connection, execute_write
 
 
@@ -101,6 +101,30 @@ def get_market_cache(
     return None
 
 
+def get_market_cache_batch(symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """一次讀出多檔標的各自最新的一筆 market_cache (等同逐檔呼叫 get_market_cache)。"""
+    wanted = sorted({s.upper() for s in symbols})
+    if not wanted:
+        return {}
+    conn = None
+    try:
+        conn = get_read_connection()
+        conn.row_factory = sqlite3.Row
+        placeholders = ",".join("?" for _ in wanted)
+        rows = conn.execute(
+            f"SELECT * FROM market_cache WHERE symbol IN ({placeholders}) "
+            "ORDER BY symbol, updated_at",
+            wanted,
+        ).fetchall()
+        # 依 updated_at 遞增排序，同一標的後出現的 (較新的) 覆蓋前者
+        return {row["symbol"]: dict(row) for row in rows}
+    except Exception:
+        return {}
+    finally:
+        if conn:
+            conn.close()
+
+
 def save_fundamental_cache(
     symbol: str, is_broken: bool, confidence: float, reasoning: str
 ) -> bool:
@@ -143,6 +167,65 @@ def get_fundamental_cache(symbol: str) -> Optional[Dict[str, Any]]:
     return None
 
 
+def get_thesis_verdict(
+    symbol: str, form_type: str, content_hash: str, prompt_version: str
+) -> Optional[Dict[str, Any]]:
+    """查詢同一份申報內容、同一版 Prompt 已做過的 LLM 論點判定。"""
+    conn = None
+    try:
+        conn = get_read_connection()
+        conn.row_factory = sqlite3.Row
+        row = conn.execute(
+            """
+            SELECT is_broken, confidence, reasoning, created_at
+            FROM thesis_verdict_cache
+            WHERE symbol = ? AND form_type = ? AND content_hash = ? AND prompt_version = ?
+            """,
+            (symbol.upper(), form_type, content_hash, prompt_version),
+        ).fetchone()
+        if row:
+            return dict(row)
+    except Exception:
+        pass
+    finally:
+        if conn:
+            conn.close()
+    return None
+
+
+def save_thesis_verdict(
+    symbol: str,
+    form_type: str,
+    content_hash: str,
+    prompt_version: str,
+    is_broken: bool,
+    confidence: float,
+    reasoning: str,
+) -> bool:
+    try:
+        execute_write(
+            """
+            INSERT OR REPLACE INTO thesis_verdict_cache (
+                symbol, form_type, content_hash, prompt_version,
+                is_broken, confidence, reasoning, created_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """,
+            (
+                symbol.upper(),
+                form_type,
+                content_hash,
+                prompt_version,
+                int(is_broken),
+                confidence,
+                reasoning,
+            ),
+        )
+        return True
+    except Exception:
+        return False
+
+
 def save_fundamental_scan_state(
     symbol: str, accession_number: str, form_type: str
 ) -> bool:
@@ -0,0 +1,15 @@
+version = 65
+description = "新增 llm_response_cache 資料表，以 (模型, Schema, 正規化 Prompt) 雜湊快取 LLM 結構化輸出，並記錄原始推論耗時供命中節省統計"
+sql = """
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key TEXT PRIMARY KEY,
+    schema_name TEXT NOT NULL,
+    model TEXT,
+    response_json TEXT NOT NULL,
+    latency_ms REAL NOT NULL DEFAULT 0.0,
+    expires_at REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_expires
+    ON llm_response_cache (expires_at);
+"""
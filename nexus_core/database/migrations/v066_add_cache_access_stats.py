@@ -0,0 +1,14 @@
+version = 66
+description = "新增 cache_access_stats 資料表，記錄行情資料層每個 (標的, 資料種類, 參數) 的衰減存取分數與最後存取時間，供盤前快取預熱排序"
+sql = """
+CREATE TABLE IF NOT EXISTS cache_access_stats (
+    symbol TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    param TEXT NOT NULL,
+    score REAL NOT NULL DEFAULT 0.0,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (symbol, kind, param)
+);
+CREATE INDEX IF NOT EXISTS idx_cache_access_stats_last_access
+    ON cache_access_stats (last_access);
+"""
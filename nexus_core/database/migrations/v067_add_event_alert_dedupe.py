@@ -0,0 +1,10 @@
+version = 67
+description = "新增 event_alert_dedupe 資料表，持久化經濟數據 / 財報事件預警的去重鍵與到期時間，避免重啟後重複推播"
+sql = """
+CREATE TABLE IF NOT EXISTS event_alert_dedupe (
+    alert_key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_event_alert_dedupe_expires
+    ON event_alert_dedupe (expires_at);
+"""
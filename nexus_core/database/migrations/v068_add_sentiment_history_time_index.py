@@ -0,0 +1,7 @@
+version = 68
+description = "sentiment_history 改用 (symbol, indicator, timestamp, value) 覆蓋索引，依時間倒序取最近視窗時免排序、免回表"
+sql = """
+DROP INDEX IF EXISTS idx_sentiment_symbol_indicator;
+CREATE INDEX IF NOT EXISTS idx_sentiment_history_symbol_indicator_ts
+    ON sentiment_history (symbol, indicator, timestamp, value);
+"""
@@ -0,0 +1,14 @@
+version = 69
+description = "新增 fundamentals_store 資料表，依會計期間保存季度損益表、現金流量表與公司資料，DDP 重複掃描時直到新財報期間出現前都不需重新下載"
+sql = """
+CREATE TABLE IF NOT EXISTS fundamentals_store (
+    symbol TEXT NOT NULL,
+    fiscal_period TEXT NOT NULL,
+    info TEXT NOT NULL,
+    income_stmt TEXT,
+    cashflow TEXT,
+    fetched_at REAL NOT NULL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (symbol, fiscal_period)
+);
+"""
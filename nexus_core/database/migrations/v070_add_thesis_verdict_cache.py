@@ -0,0 +1,15 @@
+version = 70
+description = "新增 thesis_verdict_cache 資料表，以 (標的, 申報類型, 內容雜湊, Prompt 版本) 保存基本面論點的 LLM 判定，同一份財報不再重複送入 LLM"
+sql = """
+CREATE TABLE IF NOT EXISTS thesis_verdict_cache (
+    symbol TEXT NOT NULL,
+    form_type TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    is_broken INTEGER NOT NULL,
+    confidence REAL NOT NULL,
+    reasoning TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (symbol, form_type, content_hash, prompt_version)
+);
+"""
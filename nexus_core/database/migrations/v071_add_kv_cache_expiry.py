@@ -0,0 +1,7 @@
+version = 71
+description = "kv_cache 新增 expires_at 到期欄位與部分索引，讓帶 TTL 的鍵值可被讀取端過濾並由背景清理分批刪除"
+sql = """
+ALTER TABLE kv_cache ADD COLUMN expires_at REAL;
+CREATE INDEX IF NOT EXISTS idx_kv_cache_expires_at
+    ON kv_cache (expires_at) WHERE expires_at IS NOT NULL;
+"""
@@ -0,0 +1,32 @@
+version = 72
+description = "補上查詢計畫稽核找出的熱路徑索引：依狀態 / 使用者篩選並依時間排序的查詢改走複合索引，免整表掃描與暫存排序"
+sql = """
+CREATE INDEX IF NOT EXISTS idx_virtual_trades_status_user
+    ON virtual_trades (status, user_id);
+CREATE INDEX IF NOT EXISTS idx_virtual_trades_user_opened
+    ON virtual_trades (user_id, opened_at);
+
+DROP INDEX IF EXISTS idx_active_orders_user;
+CREATE INDEX IF NOT EXISTS idx_active_orders_user_created
+    ON active_orders (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_active_orders_created
+    ON active_orders (created_at);
+
+CREATE INDEX IF NOT EXISTS idx_market_cache_symbol_updated
+    ON market_cache (symbol, updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_pending_created
+    ON pending_notifications (created_at);
+
+CREATE INDEX IF NOT EXISTS idx_assets_context_user
+    ON assets (context_type, user_id);
+
+CREATE INDEX IF NOT EXISTS idx_hedge_history_user_date
+    ON hedge_history (user_id, date);
+
+CREATE INDEX IF NOT EXISTS idx_price_volume_watches_symbol
+    ON price_volume_watches (symbol);
+
+CREATE INDEX IF NOT EXISTS idx_watchlist_tags_user_tag
+    ON watchlist_tags (user_id, tag_name);
+"""
@@ -0,0 +1,290 @@
+"""
+查詢計畫稽核：以 EXPLAIN QUERY PLAN 檢查 database 套件內的每一條 SQL。
+
+流程：
+1. 以 AST 靜態擷取 `database/*.py` 內所有 SQL 字串 (含 f-string 與隱式串接；
+   f-string 的插值一律替換為 `?`，例如 `IN ({placeholders})` → `IN (?)`)。
+2. 在記憶體資料庫套用完整 schema，並為每張資料表灌入合成資料。
+3. 逐條執行 `EXPLAIN QUERY PLAN`，回報兩類問題 (僅限列數達門檻的資料表)：
+   - 帶 WHERE 條件卻對整張表 `SCAN` (未使用任何索引)；
+   - 以暫存 B-tree 排序 / 去重 (`USE TEMP B-TREE FOR ORDER BY|DISTINCT|GROUP BY`)。
+
+動態組裝的表名或欄位 (例如 `UPDATE {table} SET ...`) 無法單獨規劃，會列入
+`skipped` 而不視為失敗；不帶 WHERE 的整表讀取屬於刻意的全量載入，不列為問題。
+"""
+
+import ast
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# 合成資料的每表列數與判定「大表」的列數門檻
+DEFAULT_SEED_ROWS = 2_000
+DEFAULT_MIN_ROWS = 1_000
+
+_PACKAGE_DIR = Path(__file__).resolve().parent
+
+_SQL_START = re.compile(r"^\s*(SELECT|UPDATE|DELETE|INSERT|REPLACE|WITH)\b")
+_FILTERED = re.compile(r"\bWHERE\b(?!\s+1\s*=\s*1\s*$)")
+_NAMED_PARAM = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+_TABLE_REF = re.compile(
+    r"\b(?:FROM|JOIN|UPDATE|INTO)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?",
+    re.IGNORECASE,
+)
+_PLAN_TARGET = re.compile(r"^(SCAN|SEARCH) (\w+)")
+_TEMP_SORT = re.compile(
+    r"USE TEMP B-TREE FOR (?:RIGHT PART OF |LAST TERM OF )?(ORDER BY|DISTINCT|GROUP BY)"
+)
+_CHECK_IN = re.compile(
+    r"(\w+)\s+TEXT[^,]*?CHECK\s*\(\s*\1\s+IN\s*\(([^)]*)\)\s*\)", re.IGNORECASE
+)
+_NOT_ALIAS = {
+    "WHERE", "ORDER", "GROUP", "LIMIT", "LEFT", "RIGHT", "INNER", "OUTER", "CROSS",
+    "JOIN", "ON", "USING", "UNION", "SET", "VALUES", "SELECT", "HAVING", "AND",
+    "DEFAULT", "INDEXED", "NOT",
+}  # fmt: skip
+
+
+@dataclass(frozen=True)
+class Statement:
+    module: str
+    lineno: int
+    sql: str
+
+    @property
+    def location(self) -> str:
+        return f"database/{self.module}:{self.lineno}"
+
+
+@dataclass(frozen=True)
+class PlanFinding:
+    statement: Statement
+    table: str
+    rows: int
+    detail: str
+
+    def describe(self) -> str:
+        sql = " ".join(self.statement.sql.split())
+        return (
+            f"{self.statement.location} [{self.table}: {self.rows} 列] "
+            f"{self.detail} ← {sql[:160]}"
+        )
+
+
+@dataclass
+class AuditReport:
+    findings: List[PlanFinding] = field(default_factory=list)
+    skipped: List[Tuple[Statement, str]] = field(default_factory=list)
+    planned: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.findings
+
+
+def _literal(node: ast.AST) -> Optional[str]:
+    """把字串常數 / f-string / 字串相加還原成 SQL 文字；無法還原時回傳 None。"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        return "".join(
+            v.value if isinstance(v, ast.Constant) and isinstance(v.value, str) else "?"
+            for v in node.values
+        )
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left, right = _literal(node.left), _literal(node.right)
+        if left is not None and right is not None:
+            return left + right
+    return None
+
+
+def _statements_in(tree: ast.AST, module: str) -> List[Statement]:
+    found: List[Statement] = []
+
+    def visit(node: ast.AST) -> None:
+        text = _literal(node)
+        if text is not None:
+            # 只取最外層的完整字串，避免 f-string 的片段被重複擷取
+            if _SQL_START.match(text):
+                found.append(Statement(module, getattr(node, "lineno", 0), text))
+            return
+        for child in ast.iter_child_nodes(node):
+            visit(child)
+
+    visit(tree)
+    return found
+
+
+def collect_statements(package_dir: Optional[Path] = None) -> List[Statement]:
+    """靜態擷取 database 套件 (或指定目錄) 內所有模組的 SQL 字串。"""
+    root = package_dir or _PACKAGE_DIR
+    statements: List[Statement] = []
+    for path in sorted(root.glob("*.py")):
+        if path.name == Path(__file__).name:
+            continue
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        statements.extend(_statements_in(tree, path.name))
+    return statements
+
+
+def _user_tables(conn: sqlite3.Connection) -> Dict[str, str]:
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master "
+        "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    return {name: sql or "" for name, sql in rows}
+
+
+def _seed_expression(column: str, decl_type: str, create_sql: str) -> str:
+    """依宣告型別產生每列唯一的合成值 (`i` 為序號)；CHECK IN 列舉欄位輪流取值。"""
+    for match in _CHECK_IN.finditer(create_sql):
+        if match.group(1).lower() == column.lower():
+            choices = [c.strip() for c in match.group(2).split(",") if c.strip()]
+            cases = " ".join(f"WHEN {n} THEN {c}" for n, c in enumerate(choices))
+            return f"CASE i % {len(choices)} {cases} END"
+    t = decl_type.upper()
+    if "INT" in t:
+        return "i"
+    if any(k in t for k in ("REAL", "FLOA", "DOUB", "NUMERIC", "DECIMAL")):
+        return "i * 0.5"
+    if "DATE" in t or "TIME" in t:
+        return "datetime(1700000000 + i * 60, 'unixepoch')"
+    return f"'{column}-' || i"
+
+
+def seed_synthetic_rows(
+    conn: sqlite3.Connection, rows: int = DEFAULT_SEED_ROWS
+) -> Dict[str, int]:
+    """為每張資料表灌入 `rows` 筆合成資料，回傳各表最終列數。"""
+    for table, create_sql in _user_tables(conn).items():
+        if table == "schema_versions" or create_sql.upper().startswith(
+            "CREATE VIRTUAL"
+        ):
+            continue
+        columns = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+        names = ", ".join(f'"{c[1]}"' for c in columns)
+        exprs = ", ".join(
+            _seed_expression(c[1], c[2] or "", create_sql) for c in columns
+        )
+        conn.execute(
+            f"""
+            WITH RECURSIVE seq(i) AS (
+                SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < ?
+            )
+            INSERT OR IGNORE INTO "{table}" ({names}) SELECT {exprs} FROM seq
+            """,
+            (rows,),
+        )
+    conn.commit()
+    return _row_counts(conn)
+
+
+def _row_counts(conn: sqlite3.Connection) -> Dict[str, int]:
+    return {
+        table: int(conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0])
+        for table in _user_tables(conn)
+    }
+
+
+def _placeholder_params(sql: str) -> Union[Dict[str, None], List[None]]:
+    names = _NAMED_PARAM.findall(sql)
+    if names:
+        return {name: None for name in names}
+    return [None] * sql.count("?")
+
+
+def _aliases(sql: str) -> Dict[str, str]:
+    mapping: Dict[str, str] = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        mapping[table] = table
+        if alias and alias.upper() not in _NOT_ALIAS:
+            mapping[alias] = table
+    return mapping
+
+
+def _plan_findings(
+    statement: Statement,
+    plan: Sequence[Tuple[Any, ...]],
+    counts: Dict[str, int],
+    min_rows: int,
+) -> List[PlanFinding]:
+    aliases = _aliases(statement.sql)
+    filtered = bool(_FILTERED.search(statement.sql))
+    findings: List[PlanFinding] = []
+    last_table: Optional[str] = None
+    for row in plan:
+        detail = str(row[-1])
+        target = _PLAN_TARGET.match(detail)
+        if target:
+            table = aliases.get(target.group(2), target.group(2))
+            # 子查詢 / CTE 的物化結果不是實體資料表
+            last_table = table if table in counts else None
+            if (
+                last_table
+                and filtered
+                and target.group(1) == "SCAN"
+                and " USING " not in detail
+                and counts[last_table] >= min_rows
+            ):
+                findings.append(
+                    PlanFinding(statement, last_table, counts[last_table], detail)
+                )
+        elif (
+            _TEMP_SORT.search(detail) and last_table and counts[last_table] >= min_rows
+        ):
+            findings.append(
+                PlanFinding(statement, last_table, counts[last_table], detail)
+            )
+    return findings
+
+
+def audit_connection(
+    conn: sqlite3.Connection,
+    statements: Optional[Iterable[Statement]] = None,
+    min_rows: int = DEFAULT_MIN_ROWS,
+) -> AuditReport:
+    """對既有連線 (已建表、已有資料) 逐條規劃 SQL 並彙整問題。"""
+    counts = _row_counts(conn)
+    report = AuditReport()
+    for statement in collect_statements() if statements is None else statements:
+        try:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN " + statement.sql,
+                _placeholder_params(statement.sql),
+            ).fetchall()
+        except (sqlite3.Error, ValueError) as e:
+            report.skipped.append((statement, str(e)))
+            continue
+        report.planned += 1
+        report.findings.extend(_plan_findings(statement, plan, counts, min_rows))
+    return report
+
+
+def audit_seeded_database(
+    rows: int = DEFAULT_SEED_ROWS, min_rows: int = DEFAULT_MIN_ROWS
+) -> AuditReport:
+    """在套用最新 schema 並灌入合成資料的記憶體資料庫上稽核 database 套件。"""
+    from database.core import apply_migrations
+
+    conn = sqlite3.connect(":memory:")
+    try:
+        apply_migrations(conn)
+        seed_synthetic_rows(conn, rows)
+        return audit_connection(conn, min_rows=min_rows)
+    finally:
+        conn.close()
+
+
+__all__ = [
+    "DEFAULT_MIN_ROWS",
+    "DEFAULT_SEED_ROWS",
+    "AuditReport",
+    "PlanFinding",
+    "Statement",
+    "audit_connection",
+    "audit_seeded_database",
+    "collect_statements",
+    "seed_synthetic_rows",
+]
@@ -0,0 +1,482 @@
+BEGIN TRANSACTION;
+CREATE TABLE active_orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    quantity REAL NOT NULL,
+    order_type TEXT NOT NULL,              -- 'MARKET', 'LIMIT', 'STOP', 'STOP_LIMIT', 'TRAILING_STOP_USD', 'TRAILING_STOP_PCT'
+    validity TEXT NOT NULL,                -- 'DAY', 'EXT_DAY', 'NIGHT', 'GTC_90'
+    limit_price REAL DEFAULT 0.0,
+    stop_price REAL DEFAULT 0.0,
+    trailing_value REAL DEFAULT 0.0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+, side TEXT NOT NULL DEFAULT 'BUY');
+CREATE TABLE archived_assets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    context_type TEXT NOT NULL,
+    risk_weight REAL DEFAULT 1.0,
+    metadata TEXT,
+    last_scan_id TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE assets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    context_type TEXT NOT NULL CHECK (context_type IN ('WATCH', 'TRADE', 'HOLDING')),
+    risk_weight REAL DEFAULT 1.0,
+    metadata TEXT, -- JSON storage
+    last_scan_id TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+, entry_price REAL);
+CREATE TABLE cache_access_stats (
+    symbol TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    param TEXT NOT NULL,
+    score REAL NOT NULL DEFAULT 0.0,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (symbol, kind, param)
+);
+CREATE TABLE daily_market_regime (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        record_date TEXT NOT NULL UNIQUE,
+        vts_ratio REAL,
+        vix_regime TEXT,
+        tail_risk_flag BOOLEAN,
+        vix_zscore_30 REAL,
+        vix_zscore_60 REAL,
+        spy_20ma REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+CREATE TABLE ddp_signals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    current_pe REAL,
+    pe_mean_3y REAL,
+    eps_growth REAL,
+    rev_accel_status TEXT,
+    confidence_score REAL,
+    confirmed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_notified_at TIMESTAMP
+);
+CREATE TABLE earnings_calendar_cache (
+    symbol TEXT PRIMARY KEY,
+    earnings_date TEXT,
+    checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE economic_calendar_events (
+    month_key TEXT NOT NULL,
+    event TEXT NOT NULL,
+    event_time TEXT NOT NULL,
+    impact TEXT NOT NULL,
+    country TEXT NOT NULL DEFAULT 'US', consensus_value TEXT, fedwatch_probability REAL,
+    PRIMARY KEY (month_key, event, event_time, country)
+);
+CREATE TABLE economic_calendar_month_cache (
+    month_key TEXT PRIMARY KEY,
+    checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    event_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE event_alert_dedupe (
+    alert_key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE financials_cache (
+    symbol TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE fundamental_scan_state (
+    symbol TEXT PRIMARY KEY,
+    last_accession_number TEXT,
+    last_form_type TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE fundamentals_store (
+    symbol TEXT NOT NULL,
+    fiscal_period TEXT NOT NULL,
+    info TEXT NOT NULL,
+    income_stmt TEXT,
+    cashflow TEXT,
+    fetched_at REAL NOT NULL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (symbol, fiscal_period)
+);
+CREATE TABLE hedge_alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    vix_level REAL NOT NULL,
+    vix_stage_move INTEGER DEFAULT 0, -- Stages moved (e.g., +2)
+    portfolio_delta REAL NOT NULL,
+    portfolio_vega REAL NOT NULL,
+    hedge_instrument TEXT NOT NULL, -- e.g., 'SPY'
+    hedge_contracts INTEGER NOT NULL,
+    instruction_text TEXT NOT NULL,
+    narration TEXT, -- LLM generated explanation
+    status TEXT DEFAULT 'PENDING', -- PENDING, EXECUTED, CANCELLED
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    executed_at TIMESTAMP
+);
+CREATE TABLE hedge_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    alpha_pnl REAL DEFAULT 0.0,
+    hedge_pnl REAL DEFAULT 0.0,
+    effectiveness REAL DEFAULT 0.0,
+    tau_applied REAL DEFAULT 1.0
+);
+CREATE TABLE hedge_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    trigger_event TEXT NOT NULL, -- e.g., 'VIX Spike', 'Delta Deviation'
+    benchmark_vix REAL,
+    benchmark_ivp REAL,
+    pre_hedge_delta REAL,
+    pre_hedge_vega REAL,
+    instrument TEXT NOT NULL,
+    qty INTEGER NOT NULL,
+    entry_price REAL,
+    exit_price REAL,
+    pnl_impact REAL,
+    protection_score REAL,
+    status TEXT DEFAULT 'OPEN'
+);
+CREATE TABLE historical_iv (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    iv REAL NOT NULL,
+    date TEXT NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE holdings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    quantity REAL DEFAULT 0.0,
+    avg_cost REAL DEFAULT 0.0,
+    weighted_delta REAL DEFAULT 0.0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE kv_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+, expires_at REAL);
+INSERT INTO "kv_cache" VALUES('macro_spx','5150.0',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_vix','18.0',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_us10y','4.25',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_wti','75.0',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_rrp','420.5',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_fed_balance','7.25',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_cpi_nfp_calendar','"2026-06-18 (CPI), 2026-07-03 (NFP)"',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_fear_greed','48.0',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_gamma_flip_line','5180.0',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_spy_spot','510.0',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_spy_gamma_flip','515.0',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_vts_ratio','0.95',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_uer','4.0',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_sahm_rule','0.35',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_cpi_deviation','0.0',NULL,NULL);
+INSERT INTO "kv_cache" VALUES('macro_rrp_change_30d','0.05',NULL,NULL);
+CREATE TABLE llm_response_cache (
+    cache_key TEXT PRIMARY KEY,
+    schema_name TEXT NOT NULL,
+    model TEXT,
+    response_json TEXT NOT NULL,
+    latency_ms REAL NOT NULL DEFAULT 0.0,
+    expires_at REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE market_cache (
+            symbol TEXT NOT NULL,
+            expiry TEXT NOT NULL,
+            max_pain REAL,
+            expected_move_lower REAL,
+            expected_move_upper REAL,
+            reference_spot_price REAL,
+            is_stale INTEGER DEFAULT 0,
+            calculation_mode TEXT DEFAULT 'OI',
+            is_degraded INTEGER DEFAULT 0,
+            circuit_breaker_triggered INTEGER DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (symbol, expiry)
+        );
+CREATE TABLE pending_notifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    content TEXT,
+    embed_json TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    retry_count INTEGER DEFAULT 0
+);
+CREATE TABLE portfolio (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                symbol TEXT NOT NULL,
+                opt_type TEXT NOT NULL,
+                strike REAL NOT NULL,
+                expiry TEXT NOT NULL,
+                entry_price REAL NOT NULL,
+                quantity INTEGER NOT NULL
+            , stock_cost REAL DEFAULT 0.0, weighted_delta REAL DEFAULT 0.0, theta REAL DEFAULT 0.0, gamma REAL DEFAULT 0.0, trade_category TEXT DEFAULT 'SPECULATIVE');
+CREATE TABLE price_volume_watches (
+    user_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    target_price REAL NOT NULL,
+    direction TEXT NOT NULL DEFAULT 'above',
+    volume_multiplier REAL NOT NULL DEFAULT 1.5,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, symbol)
+);
+CREATE TABLE rollover_audit_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    action TEXT NOT NULL,
+    sell_ratio REAL NOT NULL DEFAULT 0.0,
+    target_core TEXT,
+    suggested_price TEXT,
+    cash_impact TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE runtime_leader_lock (
+    name TEXT PRIMARY KEY,
+    instance_id TEXT NOT NULL,
+    heartbeat_ts INTEGER NOT NULL
+);
+CREATE TABLE schema_versions (
+            version INTEGER PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+INSERT INTO "schema_versions" VALUES(1,NULL);
+INSERT INTO "schema_versions" VALUES(2,NULL);
+INSERT INTO "schema_versions" VALUES(3,NULL);
+INSERT INTO "schema_versions" VALUES(4,NULL);
+INSERT INTO "schema_versions" VALUES(5,NULL);
+INSERT INTO "schema_versions" VALUES(6,NULL);
+INSERT INTO "schema_versions" VALUES(7,NULL);
+INSERT INTO "schema_versions" VALUES(8,NULL);
+INSERT INTO "schema_versions" VALUES(9,NULL);
+INSERT INTO "schema_versions" VALUES(10,NULL);
+INSERT INTO "schema_versions" VALUES(11,NULL);
+INSERT INTO "schema_versions" VALUES(12,NULL);
+INSERT INTO "schema_versions" VALUES(13,NULL);
+INSERT INTO "schema_versions" VALUES(14,NULL);
+INSERT INTO "schema_versions" VALUES(15,NULL);
+INSERT INTO "schema_versions" VALUES(16,NULL);
+INSERT INTO "schema_versions" VALUES(17,NULL);
+INSERT INTO "schema_versions" VALUES(18,NULL);
+INSERT INTO "schema_versions" VALUES(19,NULL);
+INSERT INTO "schema_versions" VALUES(20,NULL);
+INSERT INTO "schema_versions" VALUES(21,NULL);
+INSERT INTO "schema_versions" VALUES(22,NULL);
+INSERT INTO "schema_versions" VALUES(23,NULL);
+INSERT INTO "schema_versions" VALUES(24,NULL);
+INSERT INTO "schema_versions" VALUES(25,NULL);
+INSERT INTO "schema_versions" VALUES(26,NULL);
+INSERT INTO "schema_versions" VALUES(27,NULL);
+INSERT INTO "schema_versions" VALUES(28,NULL);
+INSERT INTO "schema_versions" VALUES(29,NULL);
+INSERT INTO "schema_versions" VALUES(30,NULL);
+INSERT INTO "schema_versions" VALUES(31,NULL);
+INSERT INTO "schema_versions" VALUES(32,NULL);
+INSERT INTO "schema_versions" VALUES(33,NULL);
+INSERT INTO "schema_versions" VALUES(34,NULL);
+INSERT INTO "schema_versions" VALUES(35,NULL);
+INSERT INTO "schema_versions" VALUES(36,NULL);
+INSERT INTO "schema_versions" VALUES(37,NULL);
+INSERT INTO "schema_versions" VALUES(38,NULL);
+INSERT INTO "schema_versions" VALUES(39,NULL);
+INSERT INTO "schema_versions" VALUES(40,NULL);
+INSERT INTO "schema_versions" VALUES(41,NULL);
+INSERT INTO "schema_versions" VALUES(42,NULL);
+INSERT INTO "schema_versions" VALUES(43,NULL);
+INSERT INTO "schema_versions" VALUES(44,NULL);
+INSERT INTO "schema_versions" VALUES(45,NULL);
+INSERT INTO "schema_versions" VALUES(46,NULL);
+INSERT INTO "schema_versions" VALUES(47,NULL);
+INSERT INTO "schema_versions" VALUES(48,NULL);
+INSERT INTO "schema_versions" VALUES(49,NULL);
+INSERT INTO "schema_versions" VALUES(50,NULL);
+INSERT INTO "schema_versions" VALUES(51,NULL);
+INSERT INTO "schema_versions" VALUES(52,NULL);
+INSERT INTO "schema_versions" VALUES(53,NULL);
+INSERT INTO "schema_versions" VALUES(55,NULL);
+INSERT INTO "schema_versions" VALUES(56,NULL);
+INSERT INTO "schema_versions" VALUES(58,NULL);
+INSERT INTO "schema_versions" VALUES(60,NULL);
+INSERT INTO "schema_versions" VALUES(61,NULL);
+INSERT INTO "schema_versions" VALUES(62,NULL);
+INSERT INTO "schema_versions" VALUES(63,NULL);
+INSERT INTO "schema_versions" VALUES(64,NULL);
+INSERT INTO "schema_versions" VALUES(65,NULL);
+INSERT INTO "schema_versions" VALUES(66,NULL);
+INSERT INTO "schema_versions" VALUES(67,NULL);
+INSERT INTO "schema_versions" VALUES(68,NULL);
+INSERT INTO "schema_versions" VALUES(69,NULL);
+INSERT INTO "schema_versions" VALUES(70,NULL);
+INSERT INTO "schema_versions" VALUES(71,NULL);
+INSERT INTO "schema_versions" VALUES(72,NULL);
+CREATE TABLE sentiment_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    indicator TEXT NOT NULL, -- 'SKEW', 'PCR'
+    value REAL NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE squeeze_cache (
+    symbol TEXT PRIMARY KEY,
+    is_squeezing INTEGER NOT NULL DEFAULT 0,
+    momentum REAL NOT NULL DEFAULT 0.0,
+    direction TEXT NOT NULL DEFAULT '⚪',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE thesis_verdict_cache (
+    symbol TEXT NOT NULL,
+    form_type TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    is_broken INTEGER NOT NULL,
+    confidence REAL NOT NULL,
+    reasoning TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (symbol, form_type, content_hash, prompt_version)
+);
+CREATE TABLE user_notification_settings (
+    user_id INTEGER NOT NULL,
+    notification_key TEXT NOT NULL,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (user_id, notification_key)
+);
+CREATE TABLE "user_settings" (
+    user_id INTEGER PRIMARY KEY,
+    capital REAL NOT NULL DEFAULT 100000.0,
+    risk_limit REAL DEFAULT 15.0,
+    last_rehedge_alert_time INTEGER DEFAULT 0,
+    dynamic_tau REAL DEFAULT 1.0,
+    enable_option_alerts BOOLEAN DEFAULT 1,
+    enable_vtr BOOLEAN DEFAULT 1,
+    enable_psq_watchlist BOOLEAN DEFAULT 0,
+    enable_analyst_agent BOOLEAN DEFAULT 0,
+    polymarket_threshold REAL DEFAULT 10000.0,
+    polymarket_use_llm INTEGER DEFAULT 1,
+    polymarket_slippage REAL DEFAULT 2.0,
+    is_professional_mode BOOLEAN DEFAULT 1,
+    monthly_expense REAL DEFAULT 0.0,
+    tax_reserve_rate REAL DEFAULT 0.20,
+    cash_reserve REAL DEFAULT 0.0
+, option_alert_mode INTEGER DEFAULT 1, enable_local_tunnel BOOLEAN DEFAULT 0, escape_window_start TEXT DEFAULT '07-15', escape_window_end TEXT DEFAULT '07-31');
+CREATE TABLE virtual_trades (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                symbol TEXT NOT NULL,
+                opt_type TEXT NOT NULL,
+                strike REAL NOT NULL,
+                expiry TEXT NOT NULL,
+                entry_price REAL NOT NULL,
+                quantity INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'OPEN',
+                opened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                closed_at TIMESTAMP,
+                pnl REAL,
+                parent_trade_id INTEGER,
+                exit_price REAL,
+                tags TEXT
+            , weighted_delta REAL DEFAULT 0.0, theta REAL DEFAULT 0.0, gamma REAL DEFAULT 0.0, trade_category TEXT DEFAULT 'SPECULATIVE');
+CREATE TABLE vtr_hedge_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    strategy_tag TEXT NOT NULL, -- e.g., 'VEGA_SPIKE', 'POLY_EVENT_HEDGE'
+    event_context TEXT, -- JSON: Polymarket events, odds, whale intent
+    pre_hedge_greeks TEXT, -- JSON: Delta, Gamma, Vega, Vanna
+    theoretical_pnl_delta REAL, -- PnL difference hedged vs unhedged
+    protection_score REAL, -- 0-100
+    cost_of_hedge REAL,
+    loss_avoided REAL,
+    status TEXT DEFAULT 'OPEN' -- OPEN, CLOSED
+);
+CREATE TABLE "watchlist" (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    use_llm INTEGER DEFAULT 1,
+    last_cross_dir TEXT,
+    last_cross_price REAL,
+    last_cross_time INTEGER,
+    UNIQUE(user_id, symbol)
+);
+CREATE TABLE watchlist_tags (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                symbol TEXT NOT NULL,
+                tag_name TEXT NOT NULL,
+                UNIQUE(user_id, symbol, tag_name)
+            );
+CREATE INDEX idx_financials_updated
+ON financials_cache(updated_at);
+CREATE INDEX idx_ddp_symbol ON ddp_signals(symbol);
+CREATE INDEX idx_pending_user ON pending_notifications(user_id);
+CREATE INDEX idx_holdings_user ON holdings(user_id);
+CREATE INDEX idx_assets_user_context ON assets(user_id, context_type);
+CREATE INDEX idx_assets_symbol ON assets(symbol);
+CREATE INDEX idx_hedge_alerts_user_status ON hedge_alerts(user_id, status);
+CREATE INDEX idx_vtr_hedge_user ON vtr_hedge_logs(user_id);
+CREATE INDEX idx_hedge_logs_user ON hedge_logs(user_id);
+CREATE UNIQUE INDEX idx_historical_iv_symbol_date ON historical_iv(symbol, date);
+CREATE INDEX idx_economic_calendar_events_time
+ON economic_calendar_events(event_time);
+CREATE INDEX idx_active_orders_symbol ON active_orders(symbol);
+CREATE INDEX idx_user_notification_settings ON user_notification_settings(user_id);
+CREATE INDEX idx_archived_assets_user ON archived_assets(user_id);
+CREATE UNIQUE INDEX idx_assets_user_symbol_context
+ON assets(user_id, symbol, context_type)
+WHERE context_type != 'TRADE';
+CREATE INDEX idx_watchlist_tags_user_symbol ON watchlist_tags(user_id, symbol);
+CREATE INDEX idx_watchlist_tags_tag_name ON watchlist_tags(tag_name);
+CREATE INDEX idx_rollover_audit_log_user_created
+    ON rollover_audit_log (user_id, created_at DESC);
+CREATE INDEX idx_llm_response_cache_expires
+    ON llm_response_cache (expires_at);
+CREATE INDEX idx_cache_access_stats_last_access
+    ON cache_access_stats (last_access);
+CREATE INDEX idx_event_alert_dedupe_expires
+    ON event_alert_dedupe (expires_at);
+CREATE INDEX idx_sentiment_history_symbol_indicator_ts
+    ON sentiment_history (symbol, indicator, timestamp, value);
+CREATE INDEX idx_kv_cache_expires_at
+    ON kv_cache (expires_at) WHERE expires_at IS NOT NULL;
+CREATE INDEX idx_virtual_trades_status_user
+    ON virtual_trades (status, user_id);
+CREATE INDEX idx_virtual_trades_user_opened
+    ON virtual_trades (user_id, opened_at);
+CREATE INDEX idx_active_orders_user_created
+    ON active_orders (user_id, created_at);
+CREATE INDEX idx_active_orders_created
+    ON active_orders (created_at);
+CREATE INDEX idx_market_cache_symbol_updated
+    ON market_cache (symbol, updated_at);
+CREATE INDEX idx_pending_created
+    ON pending_notifications (created_at);
+CREATE INDEX idx_assets_context_user
+    ON assets (context_type, user_id);
+CREATE INDEX idx_hedge_history_user_date
+    ON hedge_history (user_id, date);
+CREATE INDEX idx_price_volume_watches_symbol
+    ON price_volume_watches (symbol);
+CREATE INDEX idx_watchlist_tags_user_tag
+    ON watchlist_tags (user_id, tag_name);
+DELETE FROM "sqlite_sequence";
+INSERT INTO "sqlite_sequence" VALUES('holdings',0);
+INSERT INTO "sqlite_sequence" VALUES('watchlist',0);
+COMMIT;
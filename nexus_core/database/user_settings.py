@@ -270,12 +270,14 @@ def get_full_user_context(user_id: int) -> UserContext:
                     SUM(COALESCE(CAST(json_extract(metadata, '$.gamma') AS REAL), 0.0)) as sum_gamma,
                     SUM(COALESCE(CAST(json_extract(metadata, '$.vanna') AS REAL), 0.0)) as sum_vanna
                 FROM assets
-                WHERE context_type IN ('TRADE', 'HOLDING')
+                WHERE user_id = ? AND context_type IN ('TRADE', 'HOLDING')
                 GROUP BY user_id
             ) g ON u.user_id = g.user_id
             WHERE u.user_id = ?
         """
-        cursor.execute(sql, (user_id,))
+        # 子查詢只聚合該使用者的部位 (走 assets(user_id, context_type) 索引)，
+        # 不再為單一使用者彙總全站資產
+        cursor.execute(sql, (user_id, user_id))
         user_row = cursor.fetchone()
 
         if not user_row:
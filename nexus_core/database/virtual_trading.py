@@ -161,6 +161,79 @@ def close_virtual_trade(
         conn.close()
 
 
+def settle_virtual_trades(
+    closes: list[dict[str, Any]], entries: list[dict[str, Any]] | None = None
+) -> list[int]:
+    """
+    在單一交易內批次結算虛擬部位。
+
+    `closes` 每筆含 id / exit_price / status / tags；只結算仍為 OPEN 的部位，
+    PnL 與 `close_virtual_trade` 相同以 (exit - entry) × quantity × 100 計算。
+    `entries` 為 `add_virtual_trade` 的參數字典 (轉倉新腳)；帶 parent_trade_id
+    者只在母單本次成功結算時建立。回傳成功結算的 trade id。
+    """
+    conn = sqlite3.connect(config.DB_NAME)
+    cursor = conn.cursor()
+    try:
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        settled: list[int] = []
+        for close in closes:
+            cursor.execute(
+                """
+                UPDATE virtual_trades
+                SET status = ?, exit_price = ?, closed_at = ?,
+                    pnl = (? - entry_price) * quantity * 100, tags = ?
+                WHERE id = ? AND status = 'OPEN'
+            """,
+                (
+                    close["status"],
+                    close["exit_price"],
+                    now,
+                    close["exit_price"],
+                    json.dumps(close.get("tags") or []),
+                    close["id"],
+                ),
+            )
+            if cursor.rowcount:
+                settled.append(close["id"])
+
+        settled_ids = set(settled)
+        rows = [
+            (
+                entry["user_id"],
+                entry["symbol"],
+                entry["opt_type"],
+                entry["strike"],
+                entry["expiry"],
+                entry["entry_price"],
+                entry["quantity"],
+                entry.get("weighted_delta", 0.0),
+                entry.get("theta", 0.0),
+                entry.get("gamma", 0.0),
+                entry.get("parent_trade_id"),
+                json.dumps(entry["tags"]) if entry.get("tags") else None,
+                entry.get("trade_category", "SPECULATIVE"),
+            )
+            for entry in entries or []
+            if entry.get("parent_trade_id") is None
+            or entry["parent_trade_id"] in settled_ids
+        ]
+        cursor.executemany(
+            """
+            INSERT INTO virtual_trades (user_id, symbol, opt_type, strike, expiry, entry_price, quantity, weighted_delta, theta, gamma, status, parent_trade_id, tags, trade_category)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'OPEN', ?, ?, ?)
+        """,
+            rows,
+        )
+        conn.commit()
+        return settled
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
 def get_open_virtual_trades(user_id: int | None = None) -> Any:
     """
     抓取所有開放中的虛擬部位。如果 user_id 為 None，則抓取全系統部位 (用於背景排程)。
@@ -1,10 +1,13 @@
+import argparse
 import logging
 import asyncio
+import resource
 import signal
 import os
-import yfinance as yf
+import sys
+import time
+from typing import Dict
 from config import DISCORD_TOKEN, LOG_LEVEL
-from bot import NexusBot
 
 # 0. 設定日誌
 logging.basicConfig(
@@ -13,20 +16,63 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# --- yfinance 快取初始化 ---
-# 1. 確保快取目錄存在 (在 Docker 內建議指向持久化目錄 /app/data)
-cache_path = os.path.join(os.getcwd(), "data", "yfinance_cache")
-if not os.path.exists(cache_path):
-    os.makedirs(cache_path, exist_ok=True)
 
-# 2. 顯式設定 yfinance 的時區快取路徑
-try:
-    yf.set_tz_cache_location(cache_path)
-    logger.info(f"✅ yfinance 快取路徑設定成功: {cache_path}")
-except Exception as e:
-    # 預防某些版本不支援此方法
-    logger.warning(f"⚠️ 無法設定 yfinance 快取路徑: {e}")
-# --------------------------
+def configure_yfinance_cache() -> None:
+    """yfinance 快取初始化 (延後到啟動時才匯入 yfinance)"""
+    import yfinance as yf
+
+    # 1. 確保快取目錄存在 (在 Docker 內建議指向持久化目錄 /app/data)
+    cache_path = os.path.join(os.getcwd(), "data", "yfinance_cache")
+    if not os.path.exists(cache_path):
+        os.makedirs(cache_path, exist_ok=True)
+
+    # 2. 顯式設定 yfinance 的時區快取路徑
+    try:
+        yf.set_tz_cache_location(cache_path)
+        logger.info(f"✅ yfinance 快取路徑設定成功: {cache_path}")
+    except Exception as e:
+        # 預防某些版本不支援此方法
+        logger.warning(f"⚠️ 無法設定 yfinance 快取路徑: {e}")
+
+
+def _peak_rss_mb() -> float:
+    # Linux 的 ru_maxrss 單位為 KB，macOS 為 bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def startup_profile() -> None:
+    """
+    依序量測啟動各階段 (匯入、資料庫遷移、Cog 載入) 的耗時與峰值 RSS，
+    不連線 Discord Gateway，量測完即結束。
+    """
+    phases: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    configure_yfinance_cache()
+    from bot import NexusBot
+    import database
+
+    phases["import"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    database.init_db()
+    phases["migrations"] = time.perf_counter() - started
+
+    # async with 只初始化 client 狀態 (不登入)，離開時走正常的 close 流程
+    cog_timings: Dict[str, float] = {}
+    async with NexusBot() as bot:
+        started = time.perf_counter()
+        await bot.load_extensions(cog_timings)
+        phases["cogs"] = time.perf_counter() - started
+
+    print("⏱️ Nexus Seeker 啟動剖析")
+    for phase, seconds in phases.items():
+        print(f"  {phase:<12} {seconds * 1000:>9.1f} ms")
+    for name, seconds in cog_timings.items():
+        print(f"    {name:<28} {seconds * 1000:>9.1f} ms")
+    print(f"  {'total':<12} {sum(phases.values()) * 1000:>9.1f} ms")
+    print(f"  peak RSS     {_peak_rss_mb():>9.1f} MB")
 
 
 async def main() -> None:
@@ -34,6 +80,9 @@ async def main() -> None:
         logger.error("❌ 錯誤：找不到 DISCORD_TOKEN。")
         return
 
+    configure_yfinance_cache()
+    from bot import NexusBot
+
     bot = NexusBot()
 
     # 取得當前的 event loop
@@ -63,8 +112,15 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nexus Seeker Discord Bot")
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="量測各啟動階段耗時與峰值 RSS 後結束 (不連線 Discord)",
+    )
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(startup_profile() if args.startup_profile else main())
     except KeyboardInterrupt:
         # 正常退出時忽略 KeyboardInterrupt
         pass
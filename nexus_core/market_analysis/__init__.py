@@ -1,9 +1,40 @@
-from .greeks import calculate_contract_delta
-from .data import get_next_earnings_date
-from .strategy import analyze_symbol, evaluate_ema_trend, detect_ema_signals
-from .portfolio import check_portfolio_status_logic
-from .stock_alias_matrix import StockAliasMatrix
-from .macro_calendar_translator import MacroCalendarTranslator, translate_macro_event
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .greeks import calculate_contract_delta
+    from .data import get_next_earnings_date
+    from .strategy import analyze_symbol, evaluate_ema_trend, detect_ema_signals
+    from .portfolio import check_portfolio_status_logic
+    from .stock_alias_matrix import StockAliasMatrix
+    from .macro_calendar_translator import (
+        MacroCalendarTranslator,
+        translate_macro_event,
+    )
+
+# 套件層級的匯出改為第一次存取時才載入子模組 (PEP 562)，
+# 避免 `import market_analysis.xxx` 連帶載入整個分析堆疊拖慢啟動。
+_LAZY_EXPORTS = {
+    "calculate_contract_delta": ".greeks",
+    "get_next_earnings_date": ".data",
+    "analyze_symbol": ".strategy",
+    "evaluate_ema_trend": ".strategy",
+    "detect_ema_signals": ".strategy",
+    "check_portfolio_status_logic": ".portfolio",
+    "StockAliasMatrix": ".stock_alias_matrix",
+    "MacroCalendarTranslator": ".macro_calendar_translator",
+    "translate_macro_event": ".macro_calendar_translator",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "calculate_contract_delta",
@@ -188,19 +188,25 @@ class AttributionEngine:
             字數 100 字以內，語氣專業精煉。
             """
 
-            from services.llm_service import client, LLM_MODEL_NAME
-
-            response = await client.chat.completions.create(
-                model=LLM_MODEL_NAME,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a Quant Attribution Analyst. You must answer in 100% fluent Traditional Chinese (繁體中文) using Taiwanese market terminology.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=250,
+            from services.llm_service import (
+                client,
+                LLM_MODEL_NAME,
+                PRIORITY_NORMAL,
+                inference_slot,
             )
+
+            async with inference_slot(PRIORITY_NORMAL):
+                response = await client.chat.completions.create(
+                    model=LLM_MODEL_NAME,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a Quant Attribution Analyst. You must answer in 100% fluent Traditional Chinese (繁體中文) using Taiwanese market terminology.",
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    max_tokens=250,
+                )
             content = response.choices[0].message.content
             return str(content.strip()) if content else "AI 歸因分析生成空白。"
         except Exception as e:
@@ -0,0 +1,43 @@
+"""
+market_analysis/bsm.py
+
+py_vollib BSM 解析式 Greeks 的惰性載入入口。
+
+`py_vollib` 匯入時會連帶載入 scipy.stats 與 numba (約 1.3 秒)，原本任何
+`import market_analysis` 都會付出這筆啟動成本。此模組以相同名稱與簽名轉發
+`delta` / `gamma` / `theta` / `vega` / `d1` / `d2`，第一次呼叫時才真正匯入。
+"""
+
+from functools import lru_cache
+from importlib import import_module
+from types import ModuleType
+from typing import Any
+
+
+@lru_cache(maxsize=1)
+def _analytical() -> ModuleType:
+    return import_module("py_vollib.black_scholes_merton.greeks.analytical")
+
+
+def delta(*args: Any, **kwargs: Any) -> Any:
+    return _analytical().delta(*args, **kwargs)
+
+
+def gamma(*args: Any, **kwargs: Any) -> Any:
+    return _analytical().gamma(*args, **kwargs)
+
+
+def theta(*args: Any, **kwargs: Any) -> Any:
+    return _analytical().theta(*args, **kwargs)
+
+
+def vega(*args: Any, **kwargs: Any) -> Any:
+    return _analytical().vega(*args, **kwargs)
+
+
+def d1(*args: Any, **kwargs: Any) -> Any:
+    return _analytical().d1(*args, **kwargs)
+
+
+def d2(*args: Any, **kwargs: Any) -> Any:
+    return _analytical().d2(*args, **kwargs)
@@ -0,0 +1,274 @@
+"""
+market_analysis/chain_arrays.py
+
+選擇權鏈的向量化計算工具。
+
+心跳慢速雷達路徑原本以 `iterrows()` 逐列處理整條選擇權鏈 (加權 ATM IV、
+Gamma 牆、拆股校準、Max Pain)。此模組把各欄位轉成共用的 float64 欄位緩衝區，
+並以陣列運算重寫這些計算；輸出與原本逐列迴圈完全一致 (包含 NaN 傳遞與
+平手時取第一個的行為)。
+"""
+
+import math
+from typing import Iterable, Literal, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from config import RISK_FREE_RATE
+from market_analysis.bsm import d1, gamma
+
+
+def chain_column(df: pd.DataFrame, column: str, default: float = 0.0) -> np.ndarray:
+    """取出選擇權鏈欄位的 float64 緩衝區；欄位不存在時回傳填滿 `default` 的陣列。"""
+    if column not in df.columns:
+        return np.full(len(df), default, dtype=np.float64)
+    values: np.ndarray = pd.to_numeric(df[column], errors="coerce").to_numpy(
+        dtype=np.float64
+    )
+    return values
+
+
+def weighted_atm_iv(
+    frames: Iterable[Optional[pd.DataFrame]],
+    spot_price: float,
+    max_distance_pct: float = 0.20,
+) -> Optional[float]:
+    """
+    VIX 式加權 ATM IV：只納入 IV > 1%、履約價距現價 20% 內的合約，
+    權重 = (OI + Volume + 1) / (距離% × 100 + 1)。
+
+    無任何合格合約時回傳 None；OI/Volume 為 NaN 時結果同樣為 NaN，
+    與原本逐列累加的行為相同 (呼叫端會以 `math.isnan` 退回備援路徑)。
+    """
+    iv_parts = []
+    weight_parts = []
+    for df in frames:
+        if df is None or df.empty:
+            continue
+        iv = chain_column(df, "impliedVolatility")
+        strike = chain_column(df, "strike")
+        oi = chain_column(df, "openInterest")
+        vol = chain_column(df, "volume")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            distance_pct = np.abs(strike - spot_price) / spot_price
+            mask = (iv > 0.01) & (strike > 0.0) & (distance_pct <= max_distance_pct)
+        if not mask.any():
+            continue
+        iv_parts.append(iv[mask])
+        weight_parts.append(
+            (oi[mask] + vol[mask] + 1.0) / (distance_pct[mask] * 100.0 + 1.0)
+        )
+
+    if not iv_parts:
+        return None
+    ivs = np.concatenate(iv_parts)
+    weights = np.concatenate(weight_parts)
+    return float(np.sum(ivs * weights) / np.sum(weights))
+
+
+def _raw_gamma_array(
+    stock_price: float,
+    strikes: np.ndarray,
+    t_years: float,
+    ivs: np.ndarray,
+    q: float,
+) -> np.ndarray:
+    """整條鏈的 BSM Gamma；IV <= 0 的合約為 0.0，無法計算者 (例如已到期) 保留 NaN。"""
+    strikes = np.asarray(strikes, dtype=np.float64)
+    ivs = np.asarray(ivs, dtype=np.float64)
+    valid = ivs > 0
+    out = np.zeros(strikes.shape, dtype=np.float64)
+    if not valid.any():
+        return out
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        out[valid] = gamma(
+            "p", stock_price, strikes[valid], t_years, RISK_FREE_RATE, ivs[valid], q
+        )
+    return out
+
+
+def gamma_array(
+    stock_price: float,
+    strikes: np.ndarray,
+    t_years: float,
+    ivs: np.ndarray,
+    q: float,
+) -> np.ndarray:
+    """
+    整條鏈的 BSM Gamma (call/put 相同)。IV <= 0 或無法計算 (例如非正履約價)
+    的合約為 0.0，與 `calculate_greeks` 的防禦行為一致。
+    """
+    values = _raw_gamma_array(stock_price, strikes, t_years, ivs, q)
+    return np.where(np.isnan(values), 0.0, values)
+
+
+def delta_array(
+    flag: str,
+    stock_price: float,
+    strikes: np.ndarray,
+    t_years: float,
+    ivs: np.ndarray,
+    q: float = 0.0,
+) -> np.ndarray:
+    """
+    整條鏈 (或同一到期日的一組合約) 的 BSM Delta。IV <= 0、NaN 或無法計算的
+    合約為 NaN，呼叫端以 `np.isnan` 排除，與逐列 `try/except` 略過的行為一致。
+
+    py_vollib 的 `delta` 內部的常態 CDF 只接受純量，因此以陣列版 d1 搭配
+    `scipy.special.ndtr` (ufunc) 計算 N(d1)。
+    """
+    strikes = np.asarray(strikes, dtype=np.float64)
+    ivs = np.asarray(ivs, dtype=np.float64)
+    valid = ivs > 0
+    out = np.full(strikes.shape, np.nan, dtype=np.float64)
+    if not valid.any() or not stock_price or stock_price <= 0:
+        return out
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        d1_values = np.asarray(
+            d1(stock_price, strikes[valid], t_years, RISK_FREE_RATE, ivs[valid], q),
+            dtype=np.float64,
+        )
+        cdf = ndtr(d1_values)
+    discount = math.exp(-q * t_years)
+    out[valid] = discount * (cdf if flag == "c" else cdf - 1.0)
+    return out
+
+
+def contract_marks(
+    opts: pd.DataFrame, strikes: np.ndarray, tolerance: float = 0.0
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    一次查出多個履約價的 Mid 價與 IV。買賣價缺漏或為 0 時以最後成交價代替；
+    履約價不在鏈上的合約回傳 NaN。同一履約價重複出現時取第一列。
+
+    `tolerance` > 0 時，履約價差距小於該值即視為同一合約 (吸收浮點誤差)。
+    """
+    strikes = np.asarray(strikes, dtype=np.float64)
+    mids = np.full(strikes.shape, np.nan, dtype=np.float64)
+    ivs = np.full(strikes.shape, np.nan, dtype=np.float64)
+    if opts is None or opts.empty or not len(strikes):
+        return mids, ivs
+
+    chain_strikes = chain_column(opts, "strike", np.nan)
+    bid = chain_column(opts, "bid", np.nan)
+    ask = chain_column(opts, "ask", np.nan)
+    last = chain_column(opts, "lastPrice", np.nan)
+    chain_iv = chain_column(opts, "impliedVolatility", np.nan)
+    use_last = np.isnan(bid) | np.isnan(ask) | (bid == 0) | (ask == 0)
+    chain_mid = np.where(use_last, last, (bid + ask) / 2.0)
+
+    order = np.argsort(chain_strikes, kind="stable")
+    sorted_strikes = chain_strikes[order]
+    # 容差模式找第一個 > strike - tolerance 的履約價，再檢查是否 < strike + tolerance
+    side: Literal["left", "right"] = "right" if tolerance > 0 else "left"
+    pos = np.clip(
+        np.searchsorted(sorted_strikes, strikes - tolerance, side=side),
+        0,
+        len(order) - 1,
+    )
+    if tolerance > 0:
+        found = np.abs(sorted_strikes[pos] - strikes) < tolerance
+    else:
+        found = sorted_strikes[pos] == strikes
+    rows = order[pos]
+    mids[found] = chain_mid[rows[found]]
+    ivs[found] = chain_iv[rows[found]]
+    return mids, ivs
+
+
+def nearest_delta_strike(
+    opts: pd.DataFrame,
+    flag: str,
+    stock_price: float,
+    t_years: float,
+    target_delta: float,
+) -> Optional[float]:
+    """|Delta| 最接近 `target_delta` 的履約價 (平手取第一個)；無可計算合約時回傳 None。"""
+    if opts is None or opts.empty:
+        return None
+    strikes = chain_column(opts, "strike", np.nan)
+    ivs = chain_column(opts, "impliedVolatility", np.nan)
+    diff = np.abs(
+        np.abs(delta_array(flag, stock_price, strikes, t_years, ivs)) - target_delta
+    )
+    finite = ~np.isnan(diff)
+    if not finite.any():
+        return None
+    return float(strikes[int(np.argmin(np.where(finite, diff, np.inf)))])
+
+
+def max_gamma_wall(
+    puts: pd.DataFrame,
+    current_price: float,
+    t_years: float,
+    dividend_yield: float,
+) -> float:
+    """
+    Gamma 暴險 (|Γ| × OI × 100) 最大的 Put 履約價；全部無法計算時回傳現價。
+    與逐列比較相同，平手時取第一個出現的履約價。
+    """
+    strikes = chain_column(puts, "strike")
+    oi = chain_column(puts, "openInterest")
+    ivs = chain_column(puts, "impliedVolatility")
+    gammas = _raw_gamma_array(current_price, strikes, t_years, ivs, dividend_yield)
+    # 已到期 (t_years <= 0) 時整條鏈的 Gamma 皆為 NaN：沒有 Gamma 牆，維持現價
+    if np.isnan(gammas).all():
+        return current_price
+    scores = np.abs(gammas) * oi * 100.0
+    finite = ~np.isnan(scores)
+    if not finite.any():
+        return current_price
+    idx = int(np.argmax(np.where(finite, scores, -np.inf)))
+    return float(strikes[idx])
+
+
+def split_adjust_chain(
+    df: pd.DataFrame, spot_price: float, cumulative_factor: float
+) -> np.ndarray:
+    """
+    就地校準未經拆股調整的履約價：履約價超過現價 2 倍、且除以累積拆股因子後
+    落在現價 ±100% 內者，履約價除以因子、OI 與 Volume 乘以因子。
+
+    回傳被調整列的布林遮罩 (供呼叫端記錄日誌)。
+    """
+    strike = chain_column(df, "strike")
+    adjusted_k = strike / cumulative_factor
+    mask = (
+        (strike > spot_price * 2.0)
+        & (adjusted_k >= 0.5 * spot_price)
+        & (adjusted_k <= 2.0 * spot_price)
+    )
+    if mask.any():
+        oi = chain_column(df, "openInterest")
+        vol = chain_column(df, "volume")
+        df["strike"] = np.where(mask, adjusted_k, strike)
+        df["openInterest"] = np.where(mask, oi * cumulative_factor, oi)
+        df["volume"] = np.where(mask, vol * cumulative_factor, vol)
+    return mask
+
+
+def max_pain_strike(
+    calls: pd.DataFrame,
+    puts: pd.DataFrame,
+    strikes: np.ndarray,
+    weight_key: str,
+) -> float:
+    """
+    對每個候選結算價 s 計算買方總痛苦
+    Σ_call w·max(s-K, 0) + Σ_put w·max(K-s, 0)，回傳痛苦最小的 s (平手取第一個)。
+    """
+    candidates = np.asarray(strikes, dtype=np.float64)
+    pains = np.zeros(len(candidates), dtype=np.float64)
+    if not calls.empty:
+        k = chain_column(calls, "strike")
+        w = chain_column(calls, weight_key)
+        diff = candidates[:, None] - k[None, :]
+        pains += np.where(diff > 0, w[None, :] * diff, 0.0).sum(axis=1)
+    if not puts.empty:
+        k = chain_column(puts, "strike")
+        w = chain_column(puts, weight_key)
+        diff = k[None, :] - candidates[:, None]
+        pains += np.where(diff > 0, w[None, :] * diff, 0.0).sum(axis=1)
+    return float(candidates[int(np.argmin(pains))])
@@ -1,11 +1,22 @@
 import httpx
 import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
 import config
-from typing import Dict, List, Any
 from database.cache import save_kv_cache
 
 logger = logging.getLogger(__name__)
 
+# POC 直方圖的價格分箱寬度 (相對於 VWAP 的比例)
+DP_POC_BIN_PCT = 0.001
+# 欄位式暗池成交快取保留的標的數上限 (超過時淘汰最久未使用者)
+DP_TAPE_CACHE_MAX_SYMBOLS = 256
+
 
 async def fetch_and_cache_darkpool_dix() -> Dict[str, float]:
     """呼叫邊緣爬蟲獲取大盤 DIX 數據並寫入快取。"""
@@ -51,6 +62,8 @@ async def fetch_darkpool_prints(symbol: str) -> Dict[str, Any]:
                 data = res.json()
                 if data.get("status") == "success":
                     dp_data = data.get("data", fallback)
+                    # 每次抓取的批次標記：同一份明細重複渲染時直接命中欄位快取
+                    dp_data.setdefault("watermark", time.time_ns())
                     dp_poc = dp_data.get("dp_poc")
                     if dp_poc is not None:
                         import asyncio
@@ -66,6 +79,276 @@ async def fetch_darkpool_prints(symbol: str) -> Dict[str, Any]:
     return fallback
 
 
+def _as_float(value: Any) -> float:
+    try:
+        return float(value) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _column(prints: Sequence[Mapping[str, Any]], key: str) -> np.ndarray:
+    """取出明細欄位的 float64 緩衝區；缺值 (None / NaN) 為 0。"""
+    values = [p.get(key) for p in prints]
+    try:
+        column = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        # 含有無法解析的字串等髒欄位：退回逐值轉換
+        column = np.array([_as_float(v) for v in values], dtype=np.float64)
+    column[np.isnan(column)] = 0.0
+    return column
+
+
+@dataclass(frozen=True)
+class DarkPoolTape:
+    """一批暗池成交的欄位式表示：price / volume / premium 各為一條 float64 陣列。"""
+
+    price: np.ndarray
+    volume: np.ndarray
+    premium: np.ndarray
+
+    @classmethod
+    def from_prints(cls, prints: Sequence[Mapping[str, Any]]) -> "DarkPoolTape":
+        return cls(
+            _column(prints, "price"),
+            _column(prints, "volume"),
+            _column(prints, "premium"),
+        )
+
+    def extend(self, prints: Sequence[Mapping[str, Any]]) -> "DarkPoolTape":
+        """只轉換新到的成交，接在既有欄位之後。"""
+        if not prints:
+            return self
+        tail = DarkPoolTape.from_prints(prints)
+        return DarkPoolTape(
+            np.concatenate([self.price, tail.price]),
+            np.concatenate([self.volume, tail.volume]),
+            np.concatenate([self.premium, tail.premium]),
+        )
+
+    def __len__(self) -> int:
+        return int(self.price.size)
+
+
+@dataclass(frozen=True)
+class DarkPoolAnalysis:
+    """
+    單次向量化計算的結果。`valid` 為對應原始批次順序的布林遮罩，
+    `top_order` 為合格成交依金額由大到小排列的索引 (同額時保留原始順序)。
+    """
+
+    valid: np.ndarray
+    top_order: np.ndarray
+    skew: float
+    poc: float
+    vwap: float
+    total_premium: float
+    total_volume: float
+    # DIX 式彙總：成交價位於 VWAP 之上 (含) 的成交量佔比 (%)
+    buy_volume_pct: float
+
+    @property
+    def dropped(self) -> int:
+        return int(self.valid.size - np.count_nonzero(self.valid))
+
+    def valid_prints(
+        self, prints: Sequence[Mapping[str, Any]]
+    ) -> List[Mapping[str, Any]]:
+        return [prints[i] for i in np.flatnonzero(self.valid).tolist()]
+
+    def top_prints(
+        self, prints: Sequence[Mapping[str, Any]], k: int
+    ) -> List[Mapping[str, Any]]:
+        return [prints[i] for i in self.top_order[:k].tolist()]
+
+
+def _poc_from_histogram(price: np.ndarray, premium: np.ndarray, vwap: float) -> float:
+    """以金額加權的價格直方圖取出最密集的價位箱，回傳箱內的金額加權均價。"""
+    width = abs(vwap) * DP_POC_BIN_PCT
+    if width <= 0:
+        return float(price[int(np.argmax(premium))])
+    # 價位箱以最低成交價為起點，避免固定網格把相鄰成交切到兩個箱
+    _, bins = np.unique(np.floor((price - price.min()) / width), return_inverse=True)
+    weights = np.bincount(bins, weights=premium)
+    in_bin = bins == int(np.argmax(weights))
+    bin_premium = float(premium[in_bin].sum())
+    if bin_premium <= 0:
+        return float(price[in_bin].mean())
+    return float((price[in_bin] * premium[in_bin]).sum() / bin_premium)
+
+
+def analyze_tape(
+    tape: DarkPoolTape, current_price: float, deviation_threshold: float = 0.05
+) -> DarkPoolAnalysis:
+    """
+    一次完成偏離度過濾、VWAP 偏斜度、POC 直方圖與 DIX 式彙總。
+
+    `current_price <= 0` 時不做過濾 (與 `sanitize_darkpool_prints` 相同)。
+    偏斜度以 VWAP 區分買賣盤；批次沒有成交量時退回算術平均價。
+    """
+    price, volume, premium = tape.price, tape.volume, tape.premium
+    if current_price > 0:
+        with np.errstate(invalid="ignore"):
+            valid = (price > 0) & (
+                np.abs(price - current_price) / current_price <= deviation_threshold
+            )
+    else:
+        valid = np.ones(price.size, dtype=bool)
+
+    idx = np.flatnonzero(valid)
+    top_order = idx[np.argsort(-premium[idx], kind="stable")]
+    if idx.size == 0:
+        return DarkPoolAnalysis(valid, top_order, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+    p, v, prem = price[idx], volume[idx], premium[idx]
+    total_volume = float(v.sum())
+    vwap = float((p * v).sum() / total_volume) if total_volume > 0 else float(p.mean())
+    buy = p >= vwap
+    total_premium = float(prem.sum())
+    skew = (
+        round(float(prem[buy].sum() - prem[~buy].sum()) / total_premium, 4)
+        if total_premium
+        else 0.0
+    )
+    return DarkPoolAnalysis(
+        valid=valid,
+        top_order=top_order,
+        skew=skew,
+        poc=_poc_from_histogram(p, prem, vwap),
+        vwap=vwap,
+        total_premium=total_premium,
+        total_volume=total_volume,
+        buy_volume_pct=float(v[buy].sum() / total_volume * 100.0)
+        if total_volume > 0
+        else 0.0,
+    )
+
+
+@dataclass(frozen=True)
+class TapeOffset:
+    """
+    Append-only 成交帶的批次標記。
+
+    來源保證同一個 `tape_id` 的批次只會在尾端追加成交 (例如同一交易日的逐筆
+    成交帶)，`offset` 為該批次的成交筆數。只有這種標記能讓快取沿用舊欄位、
+    只轉換新到的成交；其他標記 (例如每次抓取的時間戳) 一律視為獨立批次。
+    """
+
+    tape_id: Hashable
+    offset: int
+
+
+@dataclass
+class _TapeState:
+    watermark: Hashable
+    tape: DarkPoolTape
+    # 最近一次的計算參數 (現價, 偏離門檻) 與結果
+    last: Optional[Tuple[Tuple[float, float], DarkPoolAnalysis]] = None
+
+
+def _extends(previous: Hashable, current: Hashable, size: int, total: int) -> bool:
+    """`current` 批次是否由來源保證為 `previous` 批次的尾端延伸。"""
+    return (
+        isinstance(previous, TapeOffset)
+        and isinstance(current, TapeOffset)
+        and previous.tape_id == current.tape_id
+        and previous.offset == size
+        and current.offset == total
+        and 0 < size <= total
+    )
+
+
+class DarkPoolTapeCache:
+    """
+    以 (標的, 批次標記) 記憶欄位式成交與計算結果。
+
+    同一標記重複查詢 (例如同一份明細重新渲染) 直接重用欄位；`TapeOffset`
+    標記在同一條成交帶上前進時只轉換新到的成交；其餘情況 (例如邊緣爬蟲的
+    Top-N 視窗整批換新) 重新建立欄位，不以部分列比對推斷前段是否相同。
+    """
+
+    def __init__(self, max_symbols: int = DP_TAPE_CACHE_MAX_SYMBOLS) -> None:
+        self._states: OrderedDict[str, _TapeState] = OrderedDict()
+        self.max_symbols = max_symbols
+        self.rows_ingested = 0
+
+    def clear(self) -> None:
+        """清除所有標的的欄位與結果。"""
+        self._states.clear()
+
+    def _state_for(
+        self, symbol: str, prints: Sequence[Mapping[str, Any]], watermark: Hashable
+    ) -> _TapeState:
+        state = self._states.get(symbol)
+        if state is not None:
+            self._states.move_to_end(symbol)
+            size = len(state.tape)
+            if state.watermark == watermark and size == len(prints):
+                return state
+            if _extends(state.watermark, watermark, size, len(prints)):
+                new_rows = prints[size:]
+                self.rows_ingested += len(new_rows)
+                state.tape = state.tape.extend(new_rows)
+                state.watermark = watermark
+                state.last = None
+                return state
+
+        self.rows_ingested += len(prints)
+        state = _TapeState(watermark, DarkPoolTape.from_prints(prints))
+        self._states[symbol] = state
+        while len(self._states) > self.max_symbols:
+            self._states.popitem(last=False)
+        return state
+
+    def analyze(
+        self,
+        symbol: str,
+        prints: Sequence[Mapping[str, Any]],
+        current_price: float,
+        deviation_threshold: float = 0.05,
+        watermark: Hashable = None,
+    ) -> DarkPoolAnalysis:
+        params = (float(current_price), float(deviation_threshold))
+        if watermark is None:
+            # 沒有批次標記時無法判斷是否為同一批，只做單次計算、不記憶
+            self.rows_ingested += len(prints)
+            state = _TapeState(None, DarkPoolTape.from_prints(prints))
+        else:
+            state = self._state_for(symbol.upper(), prints, watermark)
+            if state.last is not None and state.last[0] == params:
+                return state.last[1]
+
+        result = analyze_tape(state.tape, current_price, deviation_threshold)
+        if result.dropped:
+            dirty = state.tape.price[~result.valid]
+            logger.warning(
+                f"Dirty Dark Pool data detected for {symbol}: "
+                f"{dirty.round(2).tolist()}, dropping."
+            )
+        state.last = (params, result)
+        return result
+
+
+darkpool_tapes = DarkPoolTapeCache()
+
+
+def analyze_darkpool_prints(
+    symbol: str,
+    prints: Sequence[Mapping[str, Any]],
+    current_price: float,
+    deviation_threshold: float = 0.05,
+    watermark: Hashable = None,
+) -> DarkPoolAnalysis:
+    """
+    暗池明細的單次向量化分析 (過濾、偏斜度、POC、DIX 式彙總)。
+
+    傳入 `watermark` (例如 `fetch_darkpool_prints` 回傳的批次標記) 時，結果依
+    (標的, 標記) 記憶；標記為 `TapeOffset` 時之後只處理新到的成交。
+    """
+    return darkpool_tapes.analyze(
+        symbol, prints, current_price, deviation_threshold, watermark
+    )
+
+
 def sanitize_darkpool_prints(
     symbol: str,
     prints: List[Dict[str, Any]],
@@ -75,66 +358,31 @@ def sanitize_darkpool_prints(
     """
     實施滑價與偏離度防禦機制，過濾掉與現價背離過大的暗池髒數據。
     """
-    valid_prints = []
     if current_price <= 0:
         return prints
-
-    for p in prints:
-        pr = float(p.get("price", 0.0))
-        if pr <= 0:
-            continue
-
-        deviation_ratio = abs(pr - current_price) / current_price
-        if deviation_ratio > deviation_threshold:
-            logger.warning(
-                f"Dirty Dark Pool data detected for {symbol}: {pr}, dropping."
-            )
-            continue
-
-        valid_prints.append(p)
-
-    return valid_prints
+    analysis = analyze_darkpool_prints(
+        symbol, prints, current_price, deviation_threshold
+    )
+    return [prints[i] for i in np.flatnonzero(analysis.valid).tolist()]
 
 
 def calculate_dark_pool_skew(prints: List[Dict[str, Any]]) -> float:
     """
     計算暗池偏斜度 (Dark Pool Skew)。
     買盤與賣盤的淨額比 (Net Premium)。若指標呈極端正值，代表機構強力護盤；負值為隱形天花板。
+    以 VWAP 區分買賣盤 (無成交量時退回平均價)；實際應以成交當下的 bid/ask 判斷。
     """
     if not prints:
         return 0.0
-
-    # Simple heuristic to determine if a print is "buy" or "sell" initiated based on VWAP or average.
-    # For a real implementation, this would use bid/ask at trade time.
-    avg_price = sum(p.get("price", 0.0) for p in prints) / len(prints)
-
-    net_premium = 0.0
-    total_premium = 0.0
-
-    for p in prints:
-        premium = float(p.get("premium", 0.0))
-        price = float(p.get("price", 0.0))
-        total_premium += premium
-
-        if price >= avg_price:
-            net_premium += premium
-        else:
-            net_premium -= premium
-
-    if total_premium == 0:
-        return 0.0
-
-    skew = net_premium / total_premium
-    return round(skew, 4)
+    return analyze_tape(DarkPoolTape.from_prints(prints), 0.0).skew
 
 
 def calculate_dp_poc(prints: List[Dict[str, Any]]) -> float:
     """
     DP-POC (Dark Pool Point of Control)
-    從大宗交易中萃取出金額最大的一筆成交價，將其標定為「暗池磁吸價/阻力價」
+    以金額加權的價格直方圖找出大宗交易最集中的價位，將其標定為「暗池磁吸價/阻力價」
+    (單筆獨佔一個價位箱時即為金額最大的一筆成交價)。
     """
     if not prints:
         return 0.0
-
-    max_print = max(prints, key=lambda x: x.get("premium", 0.0))
-    return float(max_print.get("price", 0.0))
+    return analyze_tape(DarkPoolTape.from_prints(prints), 0.0).poc
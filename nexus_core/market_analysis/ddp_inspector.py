@@ -1,14 +1,25 @@
 from typing import Any
 import logging
-import asyncio
 import numpy as np
-import yfinance as yf
 from typing import Dict, Optional, List
 
+from config import INSPECTOR_SCAN_CONCURRENCY
 from services import market_data_service
+from services.fundamentals_store import fundamentals_store
+from .inspector_scan import InspectorScanStats, scan_symbols
 
 logger = logging.getLogger(__name__)
 
+STAGE_DDP_SCAN = "ddp_scan"
+
+
+def _live_ratio(ratio: Any, info: Dict[str, Any], price: Optional[float]) -> Any:
+    """已存的本益比依下載時股價與最新收盤價的變化等比例換算 (EPS 一季才變動)。"""
+    ref = info.get("currentPrice")
+    if ratio and price and ref and float(ref) > 0:
+        return float(ratio) * price / float(ref)
+    return ratio
+
 
 class DDPInspector:
     """
@@ -23,29 +34,28 @@ class DDPInspector:
 
     def __init__(self, bot: Any = None):
         self.bot = bot
+        self.last_scan_stats = InspectorScanStats()
 
     async def run_scan(self, symbols: List[str]) -> List[Dict[str, Any]]:
-        """執行 DDP 掃描並回傳符合條件的標的"""
-        results = []
-        for sym in symbols:
-            try:
-                report = await self.inspect_symbol(sym)
-                if report and report.get("is_ddp"):
-                    results.append(report)
-            except Exception as e:
-                logger.error(f"DDP 掃描標的 {sym} 失敗: {e}")
-            # 避免過快請求
-            await asyncio.sleep(0.5)
-        return results
+        """執行 DDP 掃描並回傳符合條件的標的 (有界併發，順序與輸入一致)"""
+        await fundamentals_store.prime(symbols)
+        stats = InspectorScanStats()
+        reports = await scan_symbols(
+            symbols,
+            self.inspect_symbol,
+            INSPECTOR_SCAN_CONCURRENCY,
+            STAGE_DDP_SCAN,
+            "DDP",
+            stats,
+        )
+        self.last_scan_stats = stats
+        return [r for r in reports if r and r.get("is_ddp")]
 
     async def inspect_symbol(self, symbol: str) -> Optional[Dict[str, Any]]:
         """分析單一標的是否符合 DDP 條件"""
-
-        def _fetch_info_and_income(sym: str) -> tuple[Dict[str, Any], Any]:
-            t = yf.Ticker(sym)
-            return t.info, t.quarterly_income_stmt
-
-        info, q_inc = await market_data_service.call_yf(_fetch_info_and_income, symbol)
+        # 財報與公司資料一季才變動：由持久化快取提供，新一季公布前不重新下載
+        fundamentals = await fundamentals_store.get(symbol)
+        info, q_inc = fundamentals.info, fundamentals.income
 
         # 1. 產業過濾
         sector = info.get("sector")
@@ -120,19 +130,21 @@ class DDPInspector:
                     if curr_margin >= prev_margin:
                         op_margin_bonus = 5
 
-            # 3. P/E Analysis
-            curr_pe = info.get("trailingPE")
+            # 3. P/E Analysis (以最新日 K 收盤換算已存的本益比)
+            df_1d = await market_data_service.get_history_df(
+                symbol, period="1mo", interval="1d"
+            )
+            last_close = float(df_1d["Close"].iloc[-1]) if not df_1d.empty else None
+            curr_pe = _live_ratio(info.get("trailingPE"), info, last_close)
             if curr_pe is not None and float(curr_pe) > 500.0:
                 return None
             if not curr_pe or curr_pe <= 0:
                 return None
 
             # Forward Alignment
-            fwd_pe = info.get("forwardPE")
+            fwd_pe = _live_ratio(info.get("forwardPE"), info, last_close)
             if not fwd_pe:
-                q_cash = await market_data_service.call_yf(
-                    lambda sym: yf.Ticker(sym).quarterly_cashflow, symbol
-                )
+                q_cash = fundamentals.cashflow
                 if not q_cash.empty and "Operating Cash Flow" in q_cash.index:
                     ocf = float(q_cash.loc["Operating Cash Flow"].iloc[0])
                     if ocf <= 0:
@@ -166,7 +178,7 @@ class DDPInspector:
                     return None
                 price_25th = np.percentile(hist["Close"].dropna(), 25)
                 price_mean = hist["Close"].dropna().mean()
-                curr_price = info.get("currentPrice", hist["Close"].iloc[-1])
+                curr_price = last_close or hist["Close"].iloc[-1]
                 if curr_price > price_25th:
                     logger.info(f"[{symbol}] DDP Fail: Price not compressed")
                     return None
@@ -177,9 +189,6 @@ class DDPInspector:
                 )
 
             # 4. RVOL 催化劑
-            df_1d = await market_data_service.get_history_df(
-                symbol, period="1mo", interval="1d"
-            )
             rvol = 0.0
             rvol_bonus = 0
             if not df_1d.empty and len(df_1d) >= 20:
@@ -14,7 +14,7 @@ from config import LLM_MODEL_NAME
 from database.user_settings import get_full_user_context
 from market_analysis.gamma_cliff_confirmation import is_gamma_cliff_confirmed
 from market_analysis.ivr_strategy_gate import is_selling_locked_by_ivr
-from services.llm_service import client, is_memory_safe
+from services.llm_service import is_memory_safe
 from services.market_data_service import BoundedCache
 
 logger = logging.getLogger(__name__)
@@ -24,6 +24,7 @@ from .anti_washout import (  # noqa: E402
     apply_ivr_strategy_overlay_impl,
     check_satellite_rebalancing_impl,
 )
+from .candidate_ranking import RolloverCandidate, RolloverRanking  # noqa: E402
 from .constants import CORE_DEFENSE_ETF_SYMBOLS  # noqa: E402
 from .fundamental_thesis import evaluate_fundamental_thesis_impl  # noqa: E402
 from .margin_defense import _MarginDefenseMixin, evaluate_margin_defense_impl  # noqa: E402
@@ -40,6 +41,8 @@ __all__ = [
     "CORE_DEFENSE_ETF_SYMBOLS",
     "FundamentalThesisResult",
     "RolloverScenario",
+    "RolloverCandidate",
+    "RolloverRanking",
     "_resolve_canonical_anchor_base",
     "_scan_gex_walls",
 ]
@@ -65,7 +68,6 @@ class DynamicRolloverEngine(
         用於依財報格式客製化 LLM 分析框架；留空則行為與未區分格式時完全一致。
         """
         return await evaluate_fundamental_thesis_impl(
-            client,
             is_memory_safe,
             LLM_MODEL_NAME,
             symbol,
@@ -128,13 +130,19 @@ class DynamicRolloverEngine(
         user_id: int,
         portfolio_assets: List[Dict[str, Any]],
         total_account_value: float,
+        ranking: Optional[RolloverRanking] = None,
     ) -> List[Dict[str, Any]]:
         """
         邏輯 (3): 核心與衛星比例再平衡 + 深度微觀結構與選擇權籌碼驅動
         包含勝率傾斜與雜訊避險等高階戰術。
         """
         return await check_satellite_rebalancing_impl(
-            self, get_full_user_context, user_id, portfolio_assets, total_account_value
+            self,
+            get_full_user_context,
+            user_id,
+            portfolio_assets,
+            total_account_value,
+            ranking,
         )
 
     async def evaluate_margin_defense(
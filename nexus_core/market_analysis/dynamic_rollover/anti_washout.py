@@ -4,6 +4,7 @@ from market_analysis.option_guidance import is_spread_illiquid
 from market_analysis.sentiment.history_storage import get_indicator_percentile
 
 from . import logger
+from .candidate_ranking import RolloverRanking
 from .constants import (
     _BEAR_CALL_SPREAD_WING_ATR_MULT,
     _BUYER_LOCKOUT_IVR_THRESHOLD,
@@ -597,6 +598,7 @@ async def check_satellite_rebalancing_impl(
     user_id: int,
     portfolio_assets: List[Dict[str, Any]],
     total_account_value: float,
+    ranking: Optional[RolloverRanking] = None,
 ) -> List[Dict[str, Any]]:
     """
     邏輯 (3): 核心與衛星比例再平衡 + 深度微觀結構與選擇權籌碼驅動
@@ -749,7 +751,7 @@ async def check_satellite_rebalancing_impl(
                     next_target = "VOO"
                 else:
                     next_target = engine._find_best_rollover_target(
-                        user_id, exclude_symbols=satellite_symbols
+                        user_id, exclude_symbols=satellite_symbols, ranking=ranking
                     )
 
                 if is_euphoria:
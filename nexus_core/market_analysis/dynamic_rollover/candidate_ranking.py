@@ -0,0 +1,104 @@
+"""
+跨使用者的轉倉候選排名表 (每輪監控計算一次)。
+
+多數使用者的自選清單與衛星持倉高度重疊，逐使用者查詢 market_cache / 財報日
+會讓同一標的的 EV 與財報黑名單在同一輪被重算數十次。這裡先對「全站自選 ∪ 持倉」
+的去重標的批次讀取快取、計算一次 EV proxy、PowerSqueeze 分數與財報黑名單狀態，
+之後每位使用者的候選挑選只是對這張表做記憶體內的過濾與 top-k。
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from .constants import (
+    CORE_DEFENSE_ETF_SYMBOLS,
+    _EARNINGS_PRE_EVENT_BUFFER_DAYS,
+    _SKEW_DOWNSIDE_PENALTY_FACTOR,
+)
+
+# 候選標的的最低 EV 門檻，未達門檻時退回核心資產
+ROLLOVER_TARGET_MIN_EV = 0.05
+ROLLOVER_FALLBACK_SYMBOL = "VOO"
+
+
+def ev_from_market_cache(
+    row: Optional[Mapping[str, Any]], skew_percentile: Optional[float]
+) -> float:
+    """Skew-Adjusted EV：以 market_cache 列計算 (過期或降級的快取回傳 0.0)。"""
+    if not row or row.get("is_stale") or row.get("is_degraded"):
+        return 0.0
+    spot = float(row.get("reference_spot_price") or 0.0)
+    upper = float(row.get("expected_move_upper") or 0.0)
+    if spot <= 0.0:
+        return 0.0
+    base_ev = (upper - spot) / spot
+    if skew_percentile is not None and skew_percentile < 50.0:
+        downside_penalty = (
+            (50.0 - skew_percentile) / 50.0
+        ) * _SKEW_DOWNSIDE_PENALTY_FACTOR
+        return float(max(0.0, base_ev * (1.0 - downside_penalty)))
+    return float(base_ev)
+
+
+def in_earnings_blackout(earn: Optional[Mapping[str, Any]], today: date) -> bool:
+    """財報是否將在緩衝天數內發布 (避開二元事件)；日期無法解析時視為非黑名單。"""
+    if not earn or not earn.get("earnings_date"):
+        return False
+    try:
+        earn_dt = date.fromisoformat(str(earn["earnings_date"])[:10])
+    except ValueError:
+        return False
+    return 0 <= (earn_dt - today).days <= _EARNINGS_PRE_EVENT_BUFFER_DAYS
+
+
+@dataclass(frozen=True)
+class RolloverCandidate:
+    symbol: str
+    ev: float
+    power_squeeze: Optional[float]
+    earnings_blackout: bool
+
+
+@dataclass
+class RolloverRanking:
+    """本輪的候選表 (標的 → 指標)，附帶各使用者的自選清單。"""
+
+    candidates: Dict[str, RolloverCandidate]
+    watchlists: Dict[int, List[str]] = field(default_factory=dict)
+
+    def ev(self, symbol: str) -> Optional[float]:
+        row = self.candidates.get(symbol.upper())
+        return row.ev if row else None
+
+    def top_candidates(
+        self,
+        universe: Iterable[str],
+        exclude: Iterable[str] = (),
+        k: int = 1,
+        min_ev: float = ROLLOVER_TARGET_MIN_EV,
+    ) -> List[RolloverCandidate]:
+        """
+        在 `universe` 內挑出 EV 高於門檻、非財報黑名單的前 k 名。
+
+        同分時以 `universe` 的順序決勝，與舊版逐一掃描自選清單 (嚴格大於才取代)
+        的結果一致。
+        """
+        order: Dict[str, int] = {}
+        for sym in universe:
+            order.setdefault(sym.upper(), len(order))
+        skip = {s.upper() for s in exclude} | CORE_DEFENSE_ETF_SYMBOLS
+        eligible = [
+            c
+            for sym in order
+            if sym not in skip
+            and (c := self.candidates.get(sym)) is not None
+            and not c.earnings_blackout
+            and c.ev > min_ev
+        ]
+        eligible.sort(key=lambda c: (-c.ev, order[c.symbol]))
+        return eligible[:k]
+
+    def best_for_user(self, user_id: int, exclude: Iterable[str] = ()) -> str:
+        top = self.top_candidates(self.watchlists.get(user_id, []), exclude, k=1)
+        return top[0].symbol if top else ROLLOVER_FALLBACK_SYMBOL
@@ -1,5 +1,9 @@
+import hashlib
 from typing import Any, Dict, Optional
 
+from services.llm_service import parse_structured
+from services.single_flight import SingleFlightManager
+
 from . import logger
 from .models import FundamentalThesisResult
 
@@ -50,6 +54,34 @@ _FORM_TYPE_PROMPT_NOTES: Dict[str, str] = {
     ),
 }
 
+_SYSTEM_PROMPT_BASE = (
+    "You are a senior Wall Street quantitative analyst and fundamental research director.\n"
+    "Your objective is to determine whether a company's long-term 'growth moat' has been lost or if its original bullish fundamental thesis is structurally broken.\n\n"
+    "### 🧠 Analytical Framework (Think step-by-step before finalizing fields):\n"
+    "Evaluate based on these four strict criteria:\n"
+    "1. Forward Guidance: Are there significant downward revisions or withdrawal of future guidance?\n"
+    "2. Margin Compression: Is there a structural contraction in gross/operating margins indicating lost pricing power?\n"
+    "3. Market Share & Competition: Is there clear evidence of the company losing core market share to rivals?\n"
+    "4. Core Strategy: Has management pivoted away from their primary growth engine due to failure?\n\n"
+    "### ⚠️ STRICT EXCLUSION RULE (Crucial for `is_broken` decision):\n"
+    "DO NOT classify the thesis as broken (is_broken = false) if the weakness is primarily driven by:\n"
+    "- Cyclical / Macroeconomic headwinds (e.g., interest rates, inflation).\n"
+    "- Foreign exchange (FX) fluctuations.\n"
+    "- General industry downturns.\n"
+    "- A minor single-quarter EPS/Revenue miss where the long-term structural advantage remains intact.\n"
+    "A thesis is ONLY broken (is_broken = true) due to company-specific structural degradation (e.g., lost pricing power, technological obsolescence, permanent market share loss).\n\n"
+    "### 📝 Output Field Instructions:\n"
+    "You must strictly populate the required structured output fields based on the following logic:\n"
+    "- `reasoning`: (CRITICAL) You must perform a Chain-of-Thought analysis here BEFORE concluding. Explicitly state the evidence extracted, categorize if the headwinds are macro (A) or structural (B), and explain how it triggers or avoids the strict exclusion rule. This field MUST be highly analytical, actionable, and written in Traditional Chinese (繁體中文).\n"
+    "- `is_broken`: Set to `true` ONLY IF the thesis is structurally broken based on the exclusion rule. Otherwise, `false`.\n"
+    "- `confidence`: Provide a float from 0.0 to 1.0 reflecting your confidence in this assessment based on the density and clarity of the provided text."
+)
+
+_USER_PROMPT_TEMPLATE = (
+    "Please analyze the following latest earnings report and conference call highlights for {symbol}.\n\n"
+    "Context:\n{fundamental_text}{appendix}"
+)
+
 _SECTION_LABELS: Dict[str, str] = {
     "forward_guidance": "Forward Guidance",
     "margin_data": "Margin & Cost Structure",
@@ -82,80 +114,126 @@ def _format_sections_appendix(sections: Optional[Dict[str, str]]) -> str:
     )
 
 
-async def evaluate_fundamental_thesis_impl(
-    client: Any,
+def _digest(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def thesis_prompt_version(llm_model_name: str) -> str:
+    """
+    Prompt 模板的版本指紋：系統 prompt、各申報類型補充、附錄標籤、user prompt
+    模板與模型名稱任一變動，指紋即改變，舊的判定快取自動失效。
+    """
+    notes = [f"{k}={v}" for k, v in sorted(_FORM_TYPE_PROMPT_NOTES.items())]
+    labels = [f"{k}={v}" for k, v in _SECTION_LABELS.items()]
+    return _digest(
+        _SYSTEM_PROMPT_BASE, *notes, *labels, _USER_PROMPT_TEMPLATE, str(llm_model_name)
+    )[:16]
+
+
+async def _evaluate_uncached(
     is_memory_safe: Any,
-    llm_model_name: str,
     symbol: str,
-    fundamental_text: str,
-    form_type: str = "",
-    sections: Optional[Dict[str, str]] = None,
+    form_type: str,
+    content_hash: str,
+    prompt_version: str,
+    user_prompt: str,
 ) -> Optional[FundamentalThesisResult]:
-    """
-    邏輯 (1): 原型假設破滅
-    傳入 FastAPI 爬取的法說會或財報文本，使用 LLM 判定基本面護城河是否流失。
-    `form_type` (10-K/10-Q/8-K) 客製化分析框架補充說明；`sections` 為
-    edge scraper 結構化擷取的段落，會以附錄形式併入 user prompt。兩者皆為
-    選填，留空時 prompt 與未區分格式前完全一致。
-    """
+    from database.market_cache import save_fundamental_cache, save_thesis_verdict
+
     if not is_memory_safe():
         logger.warning("記憶體水位過高，跳過 vLLM 基本面護城河判定")
         return None
 
-    system_prompt = (
-        "You are a senior Wall Street quantitative analyst and fundamental research director.\n"
-        "Your objective is to determine whether a company's long-term 'growth moat' has been lost or if its original bullish fundamental thesis is structurally broken.\n\n"
-        "### 🧠 Analytical Framework (Think step-by-step before finalizing fields):\n"
-        "Evaluate based on these four strict criteria:\n"
-        "1. Forward Guidance: Are there significant downward revisions or withdrawal of future guidance?\n"
-        "2. Margin Compression: Is there a structural contraction in gross/operating margins indicating lost pricing power?\n"
-        "3. Market Share & Competition: Is there clear evidence of the company losing core market share to rivals?\n"
-        "4. Core Strategy: Has management pivoted away from their primary growth engine due to failure?\n\n"
-        "### ⚠️ STRICT EXCLUSION RULE (Crucial for `is_broken` decision):\n"
-        "DO NOT classify the thesis as broken (is_broken = false) if the weakness is primarily driven by:\n"
-        "- Cyclical / Macroeconomic headwinds (e.g., interest rates, inflation).\n"
-        "- Foreign exchange (FX) fluctuations.\n"
-        "- General industry downturns.\n"
-        "- A minor single-quarter EPS/Revenue miss where the long-term structural advantage remains intact.\n"
-        "A thesis is ONLY broken (is_broken = true) due to company-specific structural degradation (e.g., lost pricing power, technological obsolescence, permanent market share loss).\n\n"
-        "### 📝 Output Field Instructions:\n"
-        "You must strictly populate the required structured output fields based on the following logic:\n"
-        "- `reasoning`: (CRITICAL) You must perform a Chain-of-Thought analysis here BEFORE concluding. Explicitly state the evidence extracted, categorize if the headwinds are macro (A) or structural (B), and explain how it triggers or avoids the strict exclusion rule. This field MUST be highly analytical, actionable, and written in Traditional Chinese (繁體中文).\n"
-        "- `is_broken`: Set to `true` ONLY IF the thesis is structurally broken based on the exclusion rule. Otherwise, `false`.\n"
-        "- `confidence`: Provide a float from 0.0 to 1.0 reflecting your confidence in this assessment based on the density and clarity of the provided text."
-    ) + _FORM_TYPE_PROMPT_NOTES.get(form_type, "")
-
-    user_prompt = (
-        f"Please analyze the following latest earnings report and conference call highlights for {symbol}.\n\n"
-        f"Context:\n{fundamental_text}"
-        f"{_format_sections_appendix(sections)}"
-    )
+    system_prompt = _SYSTEM_PROMPT_BASE + _FORM_TYPE_PROMPT_NOTES.get(form_type, "")
 
     try:
-        response = await client.beta.chat.completions.parse(
-            model=llm_model_name,
-            messages=[
+        parsed = await parse_structured(
+            FundamentalThesisResult,
+            [
                 {
                     "role": "system",
                     "content": system_prompt,
                 },
                 {"role": "user", "content": user_prompt},
             ],
-            response_format=FundamentalThesisResult,
         )
-        parsed = response.choices[0].message.parsed
 
         # 寫入 SQLite 全域防禦閘門
         if parsed:
-            from database.market_cache import save_fundamental_cache
-
             save_fundamental_cache(
                 symbol, parsed.is_broken, parsed.confidence, parsed.reasoning
             )
 
         if isinstance(parsed, FundamentalThesisResult):
+            save_thesis_verdict(
+                symbol,
+                form_type,
+                content_hash,
+                prompt_version,
+                parsed.is_broken,
+                parsed.confidence,
+                parsed.reasoning,
+            )
             return parsed
         return None
     except Exception as e:
         logger.error(f"[{symbol}] Fundamental thesis evaluation failed: {e}")
         return None
+
+
+async def evaluate_fundamental_thesis_impl(
+    is_memory_safe: Any,
+    llm_model_name: str,
+    symbol: str,
+    fundamental_text: str,
+    form_type: str = "",
+    sections: Optional[Dict[str, str]] = None,
+) -> Optional[FundamentalThesisResult]:
+    """
+    邏輯 (1): 原型假設破滅
+    傳入 FastAPI 爬取的法說會或財報文本，使用 LLM 判定基本面護城河是否流失。
+    `form_type` (10-K/10-Q/8-K) 客製化分析框架補充說明；`sections` 為
+    edge scraper 結構化擷取的段落，會以附錄形式併入 user prompt。兩者皆為
+    選填，留空時 prompt 與未區分格式前完全一致。
+
+    判定以 (標的, 申報類型, 文本雜湊, Prompt 版本) 持久快取：同一份財報重複
+    檢查時直接回傳既有判定 (不經記憶體水位閘門)，同一份財報的並行請求以
+    SingleFlight 合併為一次 LLM 呼叫。
+    """
+    from database.market_cache import get_thesis_verdict, save_fundamental_cache
+
+    appendix = _format_sections_appendix(sections)
+    content_hash = _digest(fundamental_text, appendix)
+    prompt_version = thesis_prompt_version(llm_model_name)
+
+    cached = get_thesis_verdict(symbol, form_type, content_hash, prompt_version)
+    if cached:
+        verdict = FundamentalThesisResult(
+            reasoning=cached["reasoning"],
+            is_broken=bool(cached["is_broken"]),
+            confidence=float(cached["confidence"]),
+        )
+        # 全域防禦閘門以最近一次檢查為準，命中快取時同樣刷新
+        save_fundamental_cache(
+            symbol, verdict.is_broken, verdict.confidence, verdict.reasoning
+        )
+        return verdict
+
+    user_prompt = _USER_PROMPT_TEMPLATE.format(
+        symbol=symbol, fundamental_text=fundamental_text, appendix=appendix
+    )
+    result: Optional[FundamentalThesisResult] = await SingleFlightManager.run(
+        f"thesis:{symbol.upper()}:{form_type}:{content_hash}:{prompt_version}",
+        _evaluate_uncached,
+        is_memory_safe,
+        symbol,
+        form_type,
+        content_hash,
+        prompt_version,
+        user_prompt,
+    )
+    return result
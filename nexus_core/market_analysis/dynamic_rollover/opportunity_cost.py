@@ -1,10 +1,18 @@
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
 from market_analysis.index_microstructure import estimate_symbol_gamma_flip
 from market_analysis.option_guidance import is_spread_illiquid
 
 from . import logger
+from .candidate_ranking import (
+    ROLLOVER_FALLBACK_SYMBOL,
+    ROLLOVER_TARGET_MIN_EV,
+    RolloverCandidate,
+    RolloverRanking,
+    ev_from_market_cache,
+    in_earnings_blackout,
+)
 from .constants import (
     CORE_DEFENSE_ETF_SYMBOLS,
     _BREAKOUT_READY_THRESHOLD,
@@ -23,12 +31,21 @@ from .constants import (
     _PUT_WALL_PROXIMITY_TOLERANCE,
     _ROLLOVER_RATIO_HIGH_PROFIT,
     _ROLLOVER_RATIO_STANDARD,
-    _SKEW_DOWNSIDE_PENALTY_FACTOR,
 )
 from .models import RolloverScenario
 from .structural_signals import _scan_gex_walls
 
 
+def _cached_skew_percentile(symbol: str) -> Optional[float]:
+    try:
+        from database.cache import get_kv_cache
+
+        cached_sp = get_kv_cache(f"skew_percentile_{symbol.upper()}")
+        return float(cached_sp) if cached_sp is not None else None
+    except Exception:
+        return None
+
+
 class _OpportunityCostMixin:
     """邏輯 (2)：機會成本與期望值比對 (Opportunity Cost & EV Comparison)。"""
 
@@ -49,36 +66,25 @@ class _OpportunityCostMixin:
         row = get_market_cache(symbol)
         if not row or row.get("is_stale") or row.get("is_degraded"):
             return 0.0
-        spot = float(row.get("reference_spot_price") or 0.0)
-        upper = float(row.get("expected_move_upper") or 0.0)
-        if spot <= 0.0:
-            return 0.0
-        base_ev = (upper - spot) / spot
 
         # 若未提供 skew_percentile，嘗試從快取讀取
         if skew_percentile is None:
-            try:
-                from database.cache import get_kv_cache
-
-                cached_sp = get_kv_cache(f"skew_percentile_{symbol.upper()}")
-                if cached_sp is not None:
-                    skew_percentile = float(cached_sp)
-            except Exception:
-                pass
-
-        if skew_percentile is not None and skew_percentile < 50.0:
-            downside_penalty = (
-                (50.0 - skew_percentile) / 50.0
-            ) * _SKEW_DOWNSIDE_PENALTY_FACTOR
-            return float(max(0.0, base_ev * (1.0 - downside_penalty)))
-
-        return float(base_ev)
+            skew_percentile = _cached_skew_percentile(symbol)
+        return ev_from_market_cache(row, skew_percentile)
 
     def _find_best_rollover_target(
-        self, user_id: int, exclude_symbols: Optional[set] = None
+        self,
+        user_id: int,
+        exclude_symbols: Optional[set] = None,
+        ranking: Optional[RolloverRanking] = None,
     ) -> str:
         """掃描使用者 Watchlist 與 market_cache 快取尋找下一個高 EV 衛星標的，若無則回傳 VOO。
-        自動避開即將在 3 天內發布財報的高波事件標的。"""
+        自動避開即將在 3 天內發布財報的高波事件標的。
+
+        傳入本輪的 `ranking` 時直接在排名表上過濾，不再讀取資料庫。"""
+        if ranking is not None:
+            return ranking.best_for_user(user_id, exclude_symbols or ())
+
         from database.calendar_cache import get_cached_earnings
         from database.watchlist import get_user_watchlist
 
@@ -89,11 +95,11 @@ class _OpportunityCostMixin:
             watchlist = get_user_watchlist(user_id)
         except Exception as e:
             logger.error(f"取得 user {user_id} watchlist 失敗: {e}")
-            return "VOO"
+            return ROLLOVER_FALLBACK_SYMBOL
 
         today_dt = datetime.now().date()
-        best_symbol = "VOO"
-        best_ev = 0.05  # 門檻 EV > 0.05
+        best_symbol = ROLLOVER_FALLBACK_SYMBOL
+        best_ev = ROLLOVER_TARGET_MIN_EV
         for sym, _ in watchlist:
             sym_u = str(sym).upper()
             if sym_u in exclude:
@@ -101,13 +107,8 @@ class _OpportunityCostMixin:
 
             # 避開即將發布財報的標的 (機構風控：避開二元事件黑天鵝)
             try:
-                earn = get_cached_earnings(sym_u)
-                if earn and earn.get("earnings_date"):
-                    earn_date_str = str(earn["earnings_date"])[:10]
-                    earn_dt = datetime.strptime(earn_date_str, "%Y-%m-%d").date()
-                    diff_days = (earn_dt - today_dt).days
-                    if 0 <= diff_days <= _EARNINGS_PRE_EVENT_BUFFER_DAYS:
-                        continue
+                if in_earnings_blackout(get_cached_earnings(sym_u), today_dt):
+                    continue
             except Exception:
                 pass
 
@@ -117,6 +118,55 @@ class _OpportunityCostMixin:
                 best_symbol = sym_u
         return best_symbol
 
+    def build_rollover_ranking(
+        self,
+        extra_symbols: Iterable[str] = (),
+        radar_map: Optional[Mapping[str, Any]] = None,
+    ) -> RolloverRanking:
+        """
+        本輪監控共用的候選排名表：全站自選清單 ∪ `extra_symbols` (持倉) 的去重標的，
+        各以批次查詢計算一次 EV proxy、PowerSqueeze 分數與財報黑名單狀態。
+        """
+        from database.cache import get_kv_cache_many
+        from database.calendar_cache import get_cached_earnings_batch
+        from database.market_cache import get_market_cache_batch
+        from database.watchlist import get_all_watchlist
+
+        watchlists: Dict[int, List[str]] = {}
+        try:
+            for uid, sym, _ in get_all_watchlist():
+                watchlists.setdefault(int(uid), []).append(str(sym).upper())
+        except Exception as e:
+            logger.error(f"取得全站 watchlist 失敗: {e}")
+
+        symbols = {s for syms in watchlists.values() for s in syms}
+        symbols |= {str(s).upper() for s in extra_symbols}
+        cache_rows = get_market_cache_batch(symbols)
+        earnings = get_cached_earnings_batch(symbols)
+        skews = get_kv_cache_many(f"skew_percentile_{s}" for s in sorted(symbols))
+        today_dt = datetime.now().date()
+        radar_map = radar_map or {}
+
+        candidates: Dict[str, RolloverCandidate] = {}
+        for sym in symbols:
+            row = cache_rows.get(sym)
+            usable = row is not None and not (row["is_stale"] or row["is_degraded"])
+            cached_sp = skews.get(f"skew_percentile_{sym}") if usable else None
+            skew = float(cached_sp) if isinstance(cached_sp, (int, float)) else None
+            radar = radar_map.get(sym)
+            psq = radar.get("psq_result") if isinstance(radar, dict) else None
+            candidates[sym] = RolloverCandidate(
+                symbol=sym,
+                ev=ev_from_market_cache(row, skew),
+                power_squeeze=self._normalize_power_squeeze(psq) if psq else None,
+                earnings_blackout=in_earnings_blackout(earnings.get(sym), today_dt),
+            )
+        return RolloverRanking(candidates, watchlists)
+
+    def _ranked_ev(self, symbol: str, ranking: Optional[RolloverRanking]) -> float:
+        ev = ranking.ev(symbol) if ranking is not None else None
+        return ev if ev is not None else self._calculate_ev_proxy(symbol)
+
     def _normalize_power_squeeze(self, psq: Dict[str, Any]) -> float:
         """
         將 analyze_psq() 產生的 PSQResult (dict 形式，如 radar cache 中的 psq_result)
@@ -493,6 +543,7 @@ class _OpportunityCostMixin:
         already_flagged_symbols: set,
         candidate_symbol: str,
         candidate_radar: Optional[Dict[str, Any]],
+        ranking: Optional[RolloverRanking] = None,
     ) -> List[Dict[str, Any]]:
         """
         邏輯 (2) 批次橋接：對每一個尚未被 Scenario 3 標記的 SATELLITE 持倉，
@@ -501,6 +552,7 @@ class _OpportunityCostMixin:
 
         candidate_radar: 由呼叫端 (cog 層) 預先透過既有 radar 抓取機制取得的單一候選標的資料，
         純資料 dict，避免 market_analysis 層依賴 cogs。
+        ranking: 本輪的候選排名表；提供時 EV 直接查表，不再逐檔讀取快取。
         """
         instructions: List[Dict[str, Any]] = []
         if candidate_symbol == "VOO" or not candidate_radar:
@@ -508,7 +560,7 @@ class _OpportunityCostMixin:
 
         target_psq = candidate_radar.get("psq_result", {}) or {}
         target_power_squeeze = self._normalize_power_squeeze(target_psq)
-        target_expected_value = self._calculate_ev_proxy(candidate_symbol)
+        target_expected_value = self._ranked_ev(candidate_symbol, ranking)
         target_spot = float(
             candidate_radar.get("quote", {}).get("c", 0.0)
             if candidate_radar.get("quote")
@@ -549,7 +601,7 @@ class _OpportunityCostMixin:
 
             holding_psq = asset.get("psq_result", {}) or {}
             current_power_squeeze = self._normalize_power_squeeze(holding_psq)
-            current_ev = self._calculate_ev_proxy(symbol)
+            current_ev = self._ranked_ev(symbol, ranking)
 
             avg_cost = float(asset.get("avg_cost", 0.0))
             spot = float(asset.get("spot_price", 0.0))
@@ -1,54 +1,184 @@
-from typing import Any
+from typing import Any, Iterable, Optional
 import logging
 import datetime
-import yfinance as yf
-import pandas as pd
+import time
 import asyncio
-import json
-from py_vollib.black_scholes_merton.greeks.analytical import delta
+from dataclasses import dataclass, field
 
-from config import RISK_FREE_RATE
+import numpy as np
+
+from market_analysis.chain_arrays import (
+    contract_marks,
+    delta_array,
+    nearest_delta_strike,
+)
 from services import market_data_service
+from services.latency_monitor import latency_registry
 from database.virtual_trading import (
     add_virtual_trade,
     get_all_open_virtual_trades,
-    close_virtual_trade,
     get_all_virtual_trades,
+    settle_virtual_trades,
 )
 from market_analysis.risk_engine import evaluate_ditm_defense, DITMDefenseAction
 
 logger = logging.getLogger(__name__)
 
+STAGE_GHOST_PASS = "ghost_trader_pass"
+
+# 單一週期內同時在途的期權鏈讀取數，以及轉倉新腳的目標 DTE 區間
+CHAIN_FETCH_CONCURRENCY = 6
+ROLL_TARGET_DTE = (30, 45)
+
+
+@dataclass
+class GhostPassStats:
+    stage: str
+    trades: int = 0
+    chain_groups: int = 0
+    chains_fetched: int = 0
+    closed: int = 0
+    opened: int = 0
+    duration_ms: float = 0.0
+
+
+@dataclass
+class _MarkedTrade:
+    trade: dict[str, Any]
+    dte: int
+    mid: Optional[float]
+    iv: Optional[float]
+    delta: Optional[float]
+    spot: Optional[float]
+
+
+@dataclass
+class _Exit:
+    trade: dict[str, Any]
+    reason: str
+    exit_price: float
+    status: str = "CLOSED"
+    roll_delta: Optional[float] = None
+    roll_tags: list[str] = field(default_factory=list)
+
+
+def _finite(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
+
+
+def group_trades(
+    trades: Iterable[dict[str, Any]],
+) -> dict[tuple[str, str, str], list[dict[str, Any]]]:
+    """依 (標的, 到期日, 買賣權) 分組：同組共用一條期權鏈與相同的剩餘天數。"""
+    groups: dict[tuple[str, str, str], list[dict[str, Any]]] = {}
+    for trade in trades:
+        key = (trade["symbol"], trade["expiry"], trade["opt_type"])
+        groups.setdefault(key, []).append(trade)
+    return groups
+
+
+class ChainSnapshot:
+    """
+    單次管理週期共用的期權鏈 / 報價快照。
+
+    同一 (標的, 到期日) 只經由快取資料層 `get_option_chain` 讀取一次 (不裁切
+    履約價，深度價內合約也查得到)；轉倉目標合約也在週期內依標的記憶。
+    """
+
+    def __init__(self, concurrency: int = CHAIN_FETCH_CONCURRENCY) -> None:
+        self._chains: dict[tuple[str, str], Optional[Any]] = {}
+        self._spots: dict[str, Optional[float]] = {}
+        self._emas: dict[str, Optional[float]] = {}
+        self.targets: dict[tuple[Any, ...], Optional[dict[str, Any]]] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.chains_fetched = 0
+
+    async def _load_chain(self, symbol: str, expiry: str) -> None:
+        async with self._semaphore:
+            try:
+                chain = await market_data_service.get_option_chain(
+                    symbol, expiry, prune_pct=None
+                )
+            except Exception as e:
+                logger.error(f"GhostTrader 獲取 {symbol} {expiry} 期權鏈失敗: {e}")
+                chain = None
+        self._chains[(symbol, expiry)] = chain
+        self.chains_fetched += 1
+
+    async def load_chains(self, keys: Iterable[tuple[str, str]]) -> None:
+        missing = {key for key in keys if key not in self._chains}
+        await asyncio.gather(*(self._load_chain(*key) for key in missing))
+
+    async def chain(self, symbol: str, expiry: str) -> Optional[Any]:
+        if (symbol, expiry) not in self._chains:
+            await self._load_chain(symbol, expiry)
+        return self._chains[(symbol, expiry)]
+
+    async def marks(
+        self, symbol: str, expiry: str, opt_type: str, strikes: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """同一條鏈上多個履約價的 (Mid, IV)；鏈不存在時全為 NaN。"""
+        chain = await self.chain(symbol, expiry)
+        if chain is None:
+            empty = np.full(len(strikes), np.nan)
+            return empty, empty.copy()
+        opts = chain.calls if opt_type == "call" else chain.puts
+        return contract_marks(opts, strikes)
+
+    async def load_spots(self, symbols: Iterable[str]) -> None:
+        missing = sorted({s for s in symbols if s not in self._spots})
+        if not missing:
+            return
+        try:
+            quotes = await market_data_service.batch_get_quotes(missing)
+        except Exception as e:
+            logger.error(f"GhostTrader 批次報價失敗: {e}")
+            quotes = {}
+        for symbol in missing:
+            price = (quotes.get(symbol.upper()) or {}).get("c")
+            self._spots[symbol] = float(price) if price else None
+
+    def spot(self, symbol: str) -> Optional[float]:
+        return self._spots.get(symbol)
+
+    async def load_emas(self, symbols: Iterable[str]) -> None:
+        missing = sorted({s for s in symbols if s not in self._emas})
+        values = await asyncio.gather(
+            *(market_data_service.get_ema(s, 21) for s in missing),
+            return_exceptions=True,
+        )
+        for symbol, value in zip(missing, values):
+            self._emas[symbol] = None if isinstance(value, BaseException) else value
+
+    def ema21(self, symbol: str) -> Optional[float]:
+        return self._emas.get(symbol)
+
 
 class GhostTrader:
     """虛擬交易室核心邏輯 (Async)"""
 
     def __init__(self) -> None:
         self.today = datetime.datetime.now().date()
+        self.last_pass_stats: dict[str, GhostPassStats] = {}
 
     async def get_option_mid_price(
-        self, symbol: str, opt_type: str, strike: float, expiry: str
+        self,
+        symbol: str,
+        opt_type: str,
+        strike: float,
+        expiry: str,
+        snapshot: Optional[ChainSnapshot] = None,
     ) -> Any:
-        """獲取特定期權合約的 Mid 價格 (用 to_thread)"""
+        """獲取特定期權合約的 Mid 價格與 IV (經由快取資料層)"""
         try:
-            ticker = yf.Ticker(symbol)
-            chain = await market_data_service.call_yf(ticker.option_chain, expiry)
-            opts = chain.calls if opt_type == "call" else chain.puts
-            contract = opts[opts["strike"] == strike]
-            if contract.empty:
-                return None, None
-
-            bid, ask, last, iv = (
-                contract["bid"].iloc[0],
-                contract["ask"].iloc[0],
-                contract["lastPrice"].iloc[0],
-                contract["impliedVolatility"].iloc[0],
+            snapshot = snapshot or ChainSnapshot()
+            mids, ivs = await snapshot.marks(
+                symbol, expiry, opt_type, np.array([strike], dtype=np.float64)
             )
-            if pd.isna(bid) or pd.isna(ask) or bid == 0 or ask == 0:
-                mid = last
-            else:
-                mid = (bid + ask) / 2.0
-            return mid, iv
+            mid = _finite(mids[0])
+            if mid is None:
+                return None, None
+            return mid, _finite(ivs[0])
         except Exception as e:
             logger.error(f"GhostTrader 獲取 {symbol} 期權價格失敗: {e}")
             return None, None
@@ -100,185 +230,269 @@ class GhostTrader:
         )
         return trade_id
 
-    async def manage_virtual_positions(self) -> None:
-        """自動平倉邏輯 (Async)"""
+    async def _mark_trades(
+        self,
+        trades: list[dict[str, Any]],
+        snapshot: ChainSnapshot,
+        stats: GhostPassStats,
+    ) -> list[_MarkedTrade]:
+        """
+        依 (標的, 到期日, 買賣權) 分組後，每組一次查出所有部位的 Mid / IV，
+        並以向量化 BSM 算出整組的 Delta。
+        """
+        groups = group_trades(trades)
+        stats.chain_groups = len(groups)
+        await asyncio.gather(
+            snapshot.load_chains({(symbol, expiry) for symbol, expiry, _ in groups}),
+            snapshot.load_spots({symbol for symbol, _, _ in groups}),
+        )
+
+        marked: list[_MarkedTrade] = []
+        for (symbol, expiry, opt_type), members in groups.items():
+            try:
+                exp_date = datetime.datetime.strptime(expiry, "%Y-%m-%d").date()
+            except (TypeError, ValueError):
+                logger.error(f"VTR 到期日格式錯誤 {symbol} {expiry}")
+                continue
+            dte = (exp_date - self.today).days
+            strikes = np.array([t["strike"] for t in members], dtype=np.float64)
+            mids, ivs = await snapshot.marks(symbol, expiry, opt_type, strikes)
+            spot = snapshot.spot(symbol)
+            deltas = delta_array(
+                "c" if opt_type == "call" else "p",
+                spot or 0.0,
+                strikes,
+                max(dte, 1) / 365.0,
+                ivs,
+            )
+            for i, trade in enumerate(members):
+                marked.append(
+                    _MarkedTrade(
+                        trade,
+                        dte,
+                        _finite(mids[i]),
+                        _finite(ivs[i]),
+                        _finite(deltas[i]),
+                        spot,
+                    )
+                )
+        return marked
+
+    def _begin_pass(self, stage: str, trades: int) -> GhostPassStats:
+        self.today = datetime.datetime.now().date()
+        return GhostPassStats(stage=stage, trades=trades)
+
+    def _finish_pass(
+        self,
+        stats: GhostPassStats,
+        started: float,
+        fetched_before: int,
+        snapshot: ChainSnapshot,
+    ) -> None:
+        stats.chains_fetched = snapshot.chains_fetched - fetched_before
+        stats.duration_ms = (time.perf_counter() - started) * 1000.0
+        latency_registry.record(STAGE_GHOST_PASS, stats.duration_ms)
+        self.last_pass_stats[stats.stage] = stats
+        logger.info(
+            f"👻 VTR {stats.stage} 完成：{stats.trades} 筆部位 / {stats.chain_groups} 組鏈 "
+            f"(新抓 {stats.chains_fetched})，平倉 {stats.closed}、建倉 {stats.opened}，"
+            f"耗時 {stats.duration_ms:.0f} ms"
+        )
+
+    async def manage_virtual_positions(
+        self, snapshot: Optional[ChainSnapshot] = None
+    ) -> None:
+        """自動平倉邏輯 (Async)：全部部位分組估值後，一次批次結算。"""
+        started = time.perf_counter()
+        snapshot = snapshot or ChainSnapshot()
+        fetched_before = snapshot.chains_fetched
         open_trades = await asyncio.to_thread(get_all_open_virtual_trades)
-        for trade in open_trades:
-            await self._check_and_exit_trade(trade)
+        stats = self._begin_pass("manage", len(open_trades))
+
+        marked = await self._mark_trades(open_trades, snapshot, stats)
+        await snapshot.load_emas(
+            {m.trade["symbol"] for m in marked if m.trade["quantity"] > 0}
+        )
+        exits = []
+        for m in marked:
+            try:
+                exit_plan = self._exit_for(m, snapshot)
+            except Exception as e:
+                logger.error(f"VTR 平倉檢查失敗 [{m.trade['id']}]: {e}")
+                continue
+            if exit_plan is not None:
+                exits.append(exit_plan)
 
-    async def _check_and_exit_trade(self, trade: Any):  # type: ignore
-        trade_id, symbol, opt_type, strike, expiry, entry_price, quantity = (
+        await self._settle(exits, snapshot, stats)
+        self._finish_pass(stats, started, fetched_before, snapshot)
+
+    def _exit_for(self, m: _MarkedTrade, snapshot: ChainSnapshot) -> Optional[_Exit]:
+        trade = m.trade
+        trade_id, symbol, opt_type, entry_price, quantity = (
             trade["id"],
             trade["symbol"],
             trade["opt_type"],
-            trade["strike"],
-            trade["expiry"],
             trade["entry_price"],
             trade["quantity"],
         )
-        exp_date = datetime.datetime.strptime(expiry, "%Y-%m-%d").date()
-        dte = (exp_date - self.today).days
+        mid = m.mid
+        if mid is None:
+            return None
 
-        if dte <= 21:
+        if m.dte <= 21:
             # 基本 DTE 檢查，如果是賣方則強制平倉，買方則由下方的 DITM 邏輯進一步判斷或在此平倉
             if quantity < 0:
-                await self._close_position(trade, "DTE <= 21")
-                return
-
-        mid, iv = await self.get_option_mid_price(symbol, opt_type, strike, expiry)
-        if mid is None:
-            return
-
-        # 🚀 DITM 防禦檢查 (僅針對買方)
-        if quantity > 0:
-            quote = await market_data_service.get_quote(symbol)
-            current_stock_price = quote.get("c") if quote else None
-
-            if current_stock_price and iv and iv > 0:
-                t_years = max(dte, 1) / 365.0
-                try:
-                    current_delta = delta(
-                        ("c" if opt_type == "call" else "p"),
-                        current_stock_price,
-                        strike,
-                        t_years,
-                        RISK_FREE_RATE,
-                        iv,
-                        0.0,
-                    )
-                    pnl_pct = (mid - entry_price) / entry_price
+                return _Exit(trade, "DTE <= 21", mid)
 
-                    ditm_action = evaluate_ditm_defense(
-                        quantity, current_delta, dte, pnl_pct
-                    )
+        # 🚀 DITM 防禦檢查 (僅針對買方；無現價或 IV 時 Delta 為 None)
+        if quantity > 0 and m.delta is not None:
+            current_delta = m.delta
+            pnl_pct = (mid - entry_price) / entry_price
+            ditm_action = evaluate_ditm_defense(quantity, current_delta, m.dte, pnl_pct)
 
-                    if ditm_action == DITMDefenseAction.DEFENSIVE_CLOSE:
-                        await self._close_position(
-                            trade,
-                            f"🚨 DITM 喪失凸性防禦 ｜ Delta:{current_delta:.2f}, PnL:{pnl_pct*100:.1f}%",
-                            mid,
-                        )
-                        return
-                    elif ditm_action == DITMDefenseAction.ROLL_UP_OUT:
-                        logger.info(
-                            f"🔄 DITM 觸發自動轉倉防禦 [{trade_id}] {symbol} Delta: {current_delta:.2f}"
-                        )
-                        # 執行轉倉：平掉舊的，開新的 (Delta ~0.50, DTE 30-45)
-                        await self._close_position(
-                            trade,
-                            f"🔄 DITM 轉倉防禦 ｜ Delta:{current_delta:.2f}, PnL:{pnl_pct*100:.1f}%",
-                            mid,
-                            status="ROLLED",
-                        )
-                        new_contract = await self._find_target_contract(
-                            symbol,
-                            opt_type,
-                            current_stock_price,
-                            target_dte=(30, 45),
-                            target_delta=0.50,
-                        )
-                        if new_contract:
-                            await self.record_virtual_entry(
-                                user_id=trade["user_id"],
-                                symbol=symbol,
-                                opt_type=opt_type,
-                                strike=new_contract["strike"],
-                                expiry=new_contract["expiry"],
-                                quantity=quantity,
-                                tags=["ditm_roll", f"from:{trade_id}"],
-                                parent_trade_id=trade_id,
-                            )
-                        return
-                except Exception as e:
-                    logger.error(f"DITM 檢查失敗 {symbol}: {e}")
+            if ditm_action == DITMDefenseAction.DEFENSIVE_CLOSE:
+                return _Exit(
+                    trade,
+                    f"🚨 DITM 喪失凸性防禦 ｜ Delta:{current_delta:.2f}, PnL:{pnl_pct*100:.1f}%",
+                    mid,
+                )
+            elif ditm_action == DITMDefenseAction.ROLL_UP_OUT:
+                logger.info(
+                    f"🔄 DITM 觸發自動轉倉防禦 [{trade_id}] {symbol} Delta: {current_delta:.2f}"
+                )
+                # 執行轉倉：平掉舊的，開新的 (Delta ~0.50, DTE 30-45)
+                return _Exit(
+                    trade,
+                    f"🔄 DITM 轉倉防禦 ｜ Delta:{current_delta:.2f}, PnL:{pnl_pct*100:.1f}%",
+                    mid,
+                    status="ROLLED",
+                    roll_delta=0.50,
+                    roll_tags=["ditm_roll", f"from:{trade_id}"],
+                )
 
         if quantity < 0:
             pnl_pct = (entry_price - mid) / entry_price
             if pnl_pct >= 0.50:
-                await self._close_position(trade, "Seller Target Reached (>=50%)", mid)
+                return _Exit(trade, "Seller Target Reached (>=50%)", mid)
             elif pnl_pct <= -1.50:
-                await self._close_position(trade, "Seller Stop Loss (>=150%)", mid)
+                return _Exit(trade, "Seller Stop Loss (>=150%)", mid)
         elif quantity > 0:
-            ema21 = await market_data_service.get_ema(symbol, 21)
-            quote = await market_data_service.get_quote(symbol)
-            current_price = quote.get("c") if quote else None
+            ema21 = snapshot.ema21(symbol)
+            current_price = m.spot
 
             if ema21 is not None and current_price is not None:
                 if (opt_type == "call" and current_price < ema21) or (
                     opt_type == "put" and current_price > ema21
                 ):
-                    await self._close_position(
+                    return _Exit(
                         trade,
                         f"🚨 動能平倉警報 ｜ 價格{'跌破' if opt_type=='call' else '突破'} EMA 21",
                         mid,
                     )
-                    return
 
             pnl_pct = (mid - entry_price) / entry_price
             if pnl_pct >= 1.00:
-                await self._close_position(trade, "Buyer Target Reached (>=100%)", mid)
+                return _Exit(trade, "Buyer Target Reached (>=100%)", mid)
             elif pnl_pct <= -0.50:
-                await self._close_position(trade, "Buyer Stop Loss (>=50%)", mid)
-
-    async def _close_position(
-        self,
-        trade: Any,
-        reason: str,
-        exit_price: float | None = None,
-        status: str = "CLOSED",
-    ) -> Any:
-        """執行平倉"""
-        if exit_price is None:
-            exit_price, _ = await self.get_option_mid_price(
-                trade["symbol"], trade["opt_type"], trade["strike"], trade["expiry"]
-            )
-            if exit_price is None:
-                return
-
-        actual_exit_price = exit_price * (0.99 if trade["quantity"] > 0 else 1.01)
-        pnl = (actual_exit_price - trade["entry_price"]) * trade["quantity"] * 100
-
-        # 紀錄原因至 tags
-        updated_tags = trade.get("tags", [])
-        if not isinstance(updated_tags, list):
-            updated_tags = []
-        updated_tags.append(f"exit_reason:{reason}")
+                return _Exit(trade, "Buyer Stop Loss (>=50%)", mid)
+        return None
 
-        # 執行主平倉邏輯
-        success = await asyncio.to_thread(
-            close_virtual_trade, trade["id"], actual_exit_price, status=status, pnl=pnl
-        )
+    async def _settle(
+        self, exits: list[_Exit], snapshot: ChainSnapshot, stats: GhostPassStats
+    ) -> None:
+        """計算出場滑價與轉倉新腳後，於單一 DB 交易內完成所有平倉 / 建倉。"""
+        if not exits:
+            return
 
-        # 由於 close_virtual_trade 不支援 tags 更新，此處手動補償
-        if success:
-            try:
-                from database.connection import execute_write_async
+        closes = []
+        for ex in exits:
+            trade = ex.trade
+            tags = trade.get("tags", [])
+            if not isinstance(tags, list):
+                tags = []
+            closes.append(
+                {
+                    "id": trade["id"],
+                    "exit_price": ex.exit_price
+                    * (0.99 if trade["quantity"] > 0 else 1.01),
+                    "status": ex.status,
+                    "tags": [*tags, f"exit_reason:{ex.reason}"],
+                }
+            )
 
-                await execute_write_async(
-                    "UPDATE virtual_trades SET tags = ? WHERE id = ?",
-                    (json.dumps(updated_tags), trade["id"]),
+        entries = []
+        for ex in exits:
+            if ex.roll_delta is None:
+                continue
+            trade = ex.trade
+            symbol, opt_type = trade["symbol"], trade["opt_type"]
+            spot = snapshot.spot(symbol)
+            if not spot:
+                continue
+            target = await self._find_target_contract(
+                symbol,
+                opt_type,
+                spot,
+                target_dte=ROLL_TARGET_DTE,
+                target_delta=ex.roll_delta,
+                snapshot=snapshot,
+            )
+            if not target:
+                continue
+            mid, _ = await self.get_option_mid_price(
+                symbol, opt_type, target["strike"], target["expiry"], snapshot
+            )
+            if mid is None:
+                logger.warning(
+                    f"VTR 建倉失敗：找不到 {symbol} {target['expiry']} {target['strike']} {opt_type} 的報價"
                 )
-            except Exception as e:
-                logger.error(f"VTR 更新 tags 失敗: {e}")
-
-            logger.info(
-                f"🔴 VTR 自動平倉 [{trade['id']}] {trade['symbol']} {trade['opt_type']} {trade['strike']} 原因:{reason} Exit:{actual_exit_price:.2f}"
+                continue
+            entries.append(
+                {
+                    "user_id": trade["user_id"],
+                    "symbol": symbol,
+                    "opt_type": opt_type,
+                    "strike": target["strike"],
+                    "expiry": target["expiry"],
+                    "entry_price": mid * (1.01 if trade["quantity"] > 0 else 0.99),
+                    "quantity": trade["quantity"],
+                    "tags": ex.roll_tags,
+                    "parent_trade_id": trade["id"],
+                }
             )
 
-    async def get_transition_candidates(self) -> Any:
+        settled = await asyncio.to_thread(settle_virtual_trades, closes, entries)
+        settled_ids = set(settled)
+        stats.closed += len(settled)
+        stats.opened += sum(1 for e in entries if e["parent_trade_id"] in settled_ids)
+        for close, ex in zip(closes, exits):
+            if close["id"] in settled_ids:
+                trade = ex.trade
+                logger.info(
+                    f"🔴 VTR 自動平倉 [{trade['id']}] {trade['symbol']} {trade['opt_type']} {trade['strike']} 原因:{ex.reason} Exit:{close['exit_price']:.2f}"
+                )
+
+    async def get_transition_candidates(
+        self, snapshot: Optional[ChainSnapshot] = None
+    ) -> Any:
         """
         找出適合從投機部位演進至現股/Covered Call 的候選交易。
         候選條件：SPECULATIVE 類別、買方部位、獲利率 > 30%
         """
+        started = time.perf_counter()
+        snapshot = snapshot or ChainSnapshot()
+        fetched_before = snapshot.chains_fetched
         open_trades = await asyncio.to_thread(get_all_open_virtual_trades)
-        candidates = []
-        for trade in open_trades:
-            if trade.get("trade_category") != "SPECULATIVE" or trade["quantity"] <= 0:
-                continue
+        speculative = [
+            t
+            for t in open_trades
+            if t.get("trade_category") == "SPECULATIVE" and t["quantity"] > 0
+        ]
+        stats = self._begin_pass("transition", len(speculative))
 
-            mid, _ = await self.get_option_mid_price(
-                trade["symbol"], trade["opt_type"], trade["strike"], trade["expiry"]
-            )
+        candidates = []
+        for m in await self._mark_trades(speculative, snapshot, stats):
+            trade, mid = m.trade, m.mid
             if mid is None:
                 continue
 
@@ -294,134 +508,83 @@ class GhostTrader:
                         * 100,
                     }
                 )
+        self._finish_pass(stats, started, fetched_before, snapshot)
         return candidates
 
-    async def execute_virtual_roll(self) -> None:
-        """自動轉倉邏輯 (Async)"""
+    async def execute_virtual_roll(
+        self, snapshot: Optional[ChainSnapshot] = None
+    ) -> None:
+        """自動轉倉邏輯 (Async)：賣方部位 |Delta| >= 0.40 時平倉並轉至 Delta ~0.20"""
+        started = time.perf_counter()
+        snapshot = snapshot or ChainSnapshot()
+        fetched_before = snapshot.chains_fetched
         open_trades = await asyncio.to_thread(get_all_open_virtual_trades)
-        for trade in open_trades:
-            if trade["quantity"] >= 0:
-                continue
-            symbol, opt_type, strike, expiry = (
-                trade["symbol"],
-                trade["opt_type"],
-                trade["strike"],
-                trade["expiry"],
-            )
+        sellers = [t for t in open_trades if t["quantity"] < 0]
+        stats = self._begin_pass("roll", len(sellers))
 
-            quote = await market_data_service.get_quote(symbol)
-            if not quote or "c" not in quote:
+        exits = []
+        for m in await self._mark_trades(sellers, snapshot, stats):
+            if m.mid is None or m.iv is None or m.iv <= 0 or m.delta is None:
                 continue
-            current_stock_price = quote["c"]
-
-            mid, iv = await self.get_option_mid_price(symbol, opt_type, strike, expiry)
-            if mid is None or iv is None or iv <= 0:
-                continue
-
-            exp_date = datetime.datetime.strptime(expiry, "%Y-%m-%d").date()
-            t_years = max((exp_date - self.today).days, 1) / 365.0
-
-            try:
-                opt_delta = delta(
-                    ("c" if opt_type == "call" else "p"),
-                    current_stock_price,
-                    strike,
-                    t_years,
-                    RISK_FREE_RATE,
-                    iv,
-                    0.0,
+            if abs(m.delta) >= 0.40:
+                logger.info(
+                    f"🔄 VTR 觸發自動轉倉 [{m.trade['id']}] {m.trade['symbol']} Delta: {m.delta:.2f}"
                 )
-                if abs(opt_delta) >= 0.40:
-                    logger.info(
-                        f"🔄 VTR 觸發自動轉倉 [{trade['id']}] {symbol} Delta: {opt_delta:.2f}"
+                exits.append(
+                    _Exit(
+                        m.trade,
+                        "Auto-Roll (Delta >= 0.40)",
+                        m.mid,
+                        status="ROLLED",
+                        roll_delta=0.20,
+                        roll_tags=["rolled_from:" + str(m.trade["id"])],
                     )
-                    await self._roll_position(trade, current_stock_price)
-            except Exception:
-                continue
-
-    async def _roll_position(self, old_trade: Any, current_stock_price: Any):  # type: ignore
-        """平掉舊部位，尋找並開啟新部位 (Async)"""
-        await self._close_position(
-            old_trade,
-            reason="Auto-Roll (Delta >= 0.40)",
-            exit_price=None,
-            status="ROLLED",
-        )
-        new_contract = await self._find_target_contract(
-            old_trade["symbol"],
-            old_trade["opt_type"],
-            current_stock_price,
-            target_dte=(30, 45),
-            target_delta=0.20,
-        )
+                )
 
-        if new_contract:
-            await self.record_virtual_entry(
-                user_id=old_trade["user_id"],
-                symbol=old_trade["symbol"],
-                opt_type=old_trade["opt_type"],
-                strike=new_contract["strike"],
-                expiry=new_contract["expiry"],
-                quantity=old_trade["quantity"],
-                tags=["rolled_from:" + str(old_trade["id"])],
-                parent_trade_id=old_trade["id"],
-            )
+        await self._settle(exits, snapshot, stats)
+        self._finish_pass(stats, started, fetched_before, snapshot)
 
-    async def _find_target_contract(  # type: ignore
+    async def _find_target_contract(
         self,
-        symbol: Any,
-        opt_type: Any,
-        current_stock_price: Any,
-        target_dte: Any = (30, 45),
-        target_delta: Any = 0.20,
-    ):
-        """尋找符合 DTE 與 Delta 條件的合約 (Async)"""
-        ticker = yf.Ticker(symbol)
-        expirations = await market_data_service.call_yf(lambda: ticker.options)
-
+        symbol: str,
+        opt_type: str,
+        current_stock_price: float,
+        target_dte: tuple[int, int] = ROLL_TARGET_DTE,
+        target_delta: float = 0.20,
+        snapshot: Optional[ChainSnapshot] = None,
+    ) -> Optional[dict[str, Any]]:
+        """尋找符合 DTE 與 Delta 條件的合約 (Async)，同一週期內依標的記憶"""
+        snapshot = snapshot or ChainSnapshot()
+        key = (symbol, opt_type, tuple(target_dte), target_delta)
+        if key in snapshot.targets:
+            return snapshot.targets[key]
+
+        result: Optional[dict[str, Any]] = None
+        expirations = await market_data_service.get_all_option_expiries(symbol)
         valid_expiries = []
         for exp in expirations:
             dte = (datetime.datetime.strptime(exp, "%Y-%m-%d").date() - self.today).days
             if target_dte[0] <= dte <= target_dte[1]:
                 valid_expiries.append((exp, dte))
-        if not valid_expiries:
-            return None
-
-        best_exp = min(
-            valid_expiries, key=lambda x: abs(x[1] - (sum(target_dte) / 2.0))
-        )[0]
-        chain = await market_data_service.call_yf(ticker.option_chain, best_exp)
-        opts = chain.calls if opt_type == "call" else chain.puts
 
-        best_strike, min_diff = None, 999
-        t_years = (
-            max(
-                (
-                    datetime.datetime.strptime(best_exp, "%Y-%m-%d").date() - self.today
-                ).days,
-                1,
+        if valid_expiries:
+            best_exp, best_dte = min(
+                valid_expiries, key=lambda x: abs(x[1] - (sum(target_dte) / 2.0))
             )
-            / 365.0
-        )
-        flag = "c" if opt_type == "call" else "p"
-
-        for _, row in opts.iterrows():
-            strike, iv = row["strike"], row["impliedVolatility"]
-            if iv <= 0:
-                continue
-            try:
-                opt_delta = delta(
-                    flag, current_stock_price, strike, t_years, RISK_FREE_RATE, iv, 0.0
+            chain = await snapshot.chain(symbol, best_exp)
+            if chain is not None:
+                best_strike = nearest_delta_strike(
+                    chain.calls if opt_type == "call" else chain.puts,
+                    "c" if opt_type == "call" else "p",
+                    current_stock_price,
+                    max(best_dte, 1) / 365.0,
+                    target_delta,
                 )
-                diff = abs(abs(opt_delta) - target_delta)
-                if diff < min_diff:
-                    min_diff, best_strike = diff, strike
-            except Exception:
-                pass
-
-        if best_strike:
-            return {"expiry": best_exp, "strike": best_strike}
-        return None
+                if best_strike:
+                    result = {"expiry": best_exp, "strike": best_strike}
+
+        snapshot.targets[key] = result
+        return result
 
     @staticmethod
     async def get_vtr_performance_stats(user_id: int) -> dict:
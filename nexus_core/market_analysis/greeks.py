@@ -2,7 +2,7 @@ from typing import Any
 import logging
 import math
 import pandas as pd
-from py_vollib.black_scholes_merton.greeks.analytical import (
+from market_analysis.bsm import (
     delta,
     theta,
     gamma,
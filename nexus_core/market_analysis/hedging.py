@@ -166,10 +166,10 @@ def suggest_hedge_unlock(
 
 
 async def analyze_hedge_performance(user_id: int) -> Dict[str, Any]:
-    """分析投資組合的對沖有效性與績效歸因。"""
+    """分析投資組合的對沖有效性與績效歸因 (真實 + 虛擬部位一次批次估值)。"""
     from database.portfolio import get_user_portfolio
     from database.virtual_trading import get_open_virtual_trades
-    from market_analysis.portfolio import get_option_chain_mid_iv
+    from services.mark_to_market import as_leg, mark_option_legs
 
     real_trades = await asyncio.to_thread(get_user_portfolio, user_id)
     virtual_trades = await asyncio.to_thread(get_open_virtual_trades, user_id)
@@ -204,14 +204,8 @@ async def analyze_hedge_performance(user_id: int) -> Dict[str, Any]:
 
     alpha_pnl, hedge_pnl, alpha_delta, hedge_delta = 0.0, 0.0, 0.0, 0.0
 
-    for t in all_trades_normalized:
-        current_price, _ = await asyncio.to_thread(
-            get_option_chain_mid_iv,
-            t["symbol"],
-            t["expiry"],
-            t["strike"],
-            t["opt_type"],
-        )
+    marks = await mark_option_legs(as_leg(t) for t in all_trades_normalized)
+    for t, (current_price, _) in zip(all_trades_normalized, marks):
         pnl = (
             (current_price - t["entry_price"]) * t["quantity"] * 100
             if current_price > 0
@@ -247,9 +241,16 @@ async def analyze_hedge_performance(user_id: int) -> Dict[str, Any]:
     }
 
 
-async def calculate_daily_effectiveness(user_id: int) -> Any:
-    perf = await analyze_hedge_performance(user_id)
-    u_ctx = await asyncio.to_thread(database.get_full_user_context, user_id)
+async def calculate_daily_effectiveness(
+    user_id: int,
+    perf: Optional[Dict[str, Any]] = None,
+    u_ctx: Optional[UserContext] = None,
+) -> Any:
+    """記錄當日對沖有效性；呼叫端已算好的績效與使用者快照可直接傳入，避免重複估值。"""
+    if perf is None:
+        perf = await analyze_hedge_performance(user_id)
+    if u_ctx is None:
+        u_ctx = await asyncio.to_thread(database.get_full_user_context, user_id)
     await asyncio.to_thread(
         database.add_hedge_history,
         user_id=user_id,
@@ -262,7 +263,9 @@ async def calculate_daily_effectiveness(user_id: int) -> Any:
     return perf
 
 
-async def calculate_dynamic_tau(user_id: int, lookback_days: int = 7) -> float:
+async def calculate_dynamic_tau(
+    user_id: int, lookback_days: int = 7, u_ctx: Optional[UserContext] = None
+) -> float:
     history = await asyncio.to_thread(
         database.get_hedge_history, user_id, limit=lookback_days
     )
@@ -272,7 +275,8 @@ async def calculate_dynamic_tau(user_id: int, lookback_days: int = 7) -> float:
     alpha_pnls = [h["alpha_pnl"] for h in history]
     hedge_pnls = [h["hedge_pnl"] for h in history]
     avg_effectiveness = np.average(scores, weights=np.linspace(0.5, 1.0, len(scores)))
-    u_ctx = await asyncio.to_thread(database.get_full_user_context, user_id)
+    if u_ctx is None:
+        u_ctx = await asyncio.to_thread(database.get_full_user_context, user_id)
     new_tau = u_ctx.dynamic_tau
     if avg_effectiveness < 0.5 and sum(alpha_pnls) > 0 and sum(hedge_pnls) < 0:
         new_tau -= 0.05
@@ -0,0 +1,660 @@
+"""
+market_analysis/indicator_engine.py
+
+每個 (symbol, interval) 維護一份滾動技術指標狀態（EMA / Wilder 累加器、
+滾動和、線性迴歸和），讓掃描時只需以 O(1) 推進新 K 線，而不是每次對整段
+1y 框架重跑 pandas / pandas_ta。
+
+狀態只「提交」到框架的倒數第二根 K 線；最後一根（盤中仍在變動的當日 K）
+每次呼叫都以不改動狀態的方式試算，因此「只有最後一根變了」的重複掃描完全
+不會重跑整段歷史。遇到下列情況會自動退回完整重算 (reseed)：
+
+- 上次提交的 K 線時間不在新框架中（資料缺口、框架跳動）
+- 該根 K 線的 OHLC 與記錄不同（分割 / 除息造成 auto_adjust 回溯調整）
+- 一次累積超過 `MAX_CATCHUP_BARS` 根新 K 線（追趕成本已接近重算）
+
+非 DatetimeIndex、含 NaN 或長度不足的框架由呼叫端 (`supports()` 為 False)
+直接走原本的完整向量化計算路徑。各指標的遞迴式與 pandas_ta / TA-Lib 相容
+實作逐一對齊，對應的一致性測試見 tests/unit/test_indicator_engine.py。
+"""
+
+from typing import Any, Callable, Optional, Protocol, cast
+from collections import deque
+from dataclasses import dataclass
+import logging
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from services.market_data_service import BoundedCache
+from .psq_engine import PSQResult, _build_psq_result
+
+logger = logging.getLogger(__name__)
+
+# 一次最多以增量方式追趕的已收盤 K 線數量，超過即直接重算
+MAX_CATCHUP_BARS = 32
+# 最多同時追蹤的 (symbol, interval, 指標) 狀態數量 (1GB RAM VPS 優化)
+MAX_TRACKED_STATES = 1024
+# 判定「同一根 K 線被回溯調整」的相對容忍度
+_ADJUST_TOLERANCE = 1e-9
+
+_SQRT_252 = math.sqrt(252)
+
+Bar = tuple[float, float, float]  # (high, low, close)
+
+
+# ---------------------------------------------------------------------------
+# 基本累加器：每個都提供 `after(x)` (試算，不改動狀態) 與 `push(x)` (提交)
+# ---------------------------------------------------------------------------
+
+
+class _Window:
+    """固定長度滑動視窗 + 滾動和。"""
+
+    __slots__ = ("length", "values", "total")
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self.values: deque[float] = deque(maxlen=length)
+        self.total = 0.0
+
+    def _total_after(self, x: float) -> float:
+        if len(self.values) == self.length:
+            return self.total - self.values[0] + x
+        return self.total + x
+
+    def mean_after(self, x: float) -> Optional[float]:
+        if len(self.values) + 1 < self.length:
+            return None
+        return self._total_after(x) / self.length
+
+    def std_after(self, x: float) -> Optional[float]:
+        """樣本標準差 (ddof=1)，與 pandas `rolling().std()` 一致。"""
+        if len(self.values) + 1 < self.length:
+            return None
+        vals = (
+            list(self.values)[1:]
+            if len(self.values) == self.length
+            else list(self.values)
+        )
+        vals.append(x)
+        mean = sum(vals) / self.length
+        var = sum((v - mean) ** 2 for v in vals) / (self.length - 1)
+        return math.sqrt(var)
+
+    def push(self, x: float) -> None:
+        self.total = self._total_after(x)
+        self.values.append(x)
+
+
+class _Ema:
+    """pandas `ewm(adjust=False)` 遞迴。`presma=True` 時前 length 筆以 SMA
+    起始 (pandas_ta / TA-Lib 相容)；否則以第一筆數值起始。"""
+
+    __slots__ = ("length", "alpha", "presma", "value", "_seed")
+
+    def __init__(
+        self, length: int, alpha: Optional[float] = None, presma: bool = False
+    ) -> None:
+        self.length = length
+        self.alpha = alpha if alpha is not None else 2.0 / (length + 1)
+        self.presma = presma
+        self.value: Optional[float] = None
+        self._seed: list[float] = []
+
+    def after(self, x: float) -> Optional[float]:
+        if self.value is not None:
+            return (1.0 - self.alpha) * self.value + self.alpha * x
+        if not self.presma:
+            return x
+        if len(self._seed) + 1 < self.length:
+            return None
+        return (sum(self._seed) + x) / self.length
+
+    def push(self, x: float) -> None:
+        nxt = self.after(x)
+        if nxt is None:
+            self._seed.append(x)
+        else:
+            self.value = nxt
+            self._seed = []
+
+
+class _RollingExtreme:
+    """單調佇列實作的滑動最大/最小值，以 K 線序號 (seq) 界定視窗。"""
+
+    __slots__ = ("is_max", "items")
+
+    def __init__(self, is_max: bool) -> None:
+        self.is_max = is_max
+        self.items: deque[tuple[int, float]] = deque()
+
+    def _dominates(self, a: float, b: float) -> bool:
+        return a >= b if self.is_max else a <= b
+
+    def evict_before(self, cutoff_seq: int) -> None:
+        while self.items and self.items[0][0] < cutoff_seq:
+            self.items.popleft()
+
+    def after(self, x: float, cutoff_seq: int) -> float:
+        for seq, value in self.items:
+            if seq >= cutoff_seq:
+                return value if self._dominates(value, x) else x
+        return x
+
+    def push(self, seq: int, x: float) -> None:
+        while self.items and self._dominates(x, self.items[-1][1]):
+            self.items.pop()
+        self.items.append((seq, x))
+
+
+class _LinReg:
+    """滑動視窗線性迴歸 (x = 1..length)，以 Σy、Σxy 閉式解 O(1) 推進。
+    `after` 回傳 (斜率, 視窗終點值)，與 `psq_engine._fast_rolling_linreg`
+    及 `np.polyfit` 斜率一致。"""
+
+    __slots__ = ("length", "values", "s_y", "s_xy", "_x_sum", "_x2_sum", "_div")
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self.values: deque[float] = deque(maxlen=length)
+        self.s_y = 0.0
+        self.s_xy = 0.0
+        self._x_sum = 0.5 * length * (length + 1)
+        self._x2_sum = self._x_sum * (2 * length + 1) / 3.0
+        self._div = length * self._x2_sum - self._x_sum * self._x_sum
+
+    def _sums_after(self, y: float) -> tuple[float, float]:
+        if len(self.values) == self.length:
+            return self.s_y - self.values[0] + y, self.s_xy - self.s_y + self.length * y
+        return self.s_y + y, self.s_xy + (len(self.values) + 1) * y
+
+    def after(self, y: float) -> Optional[tuple[float, float]]:
+        if len(self.values) + 1 < self.length:
+            return None
+        s_y, s_xy = self._sums_after(y)
+        slope = (self.length * s_xy - self._x_sum * s_y) / self._div
+        intercept = (s_y * self._x2_sum - self._x_sum * s_xy) / self._div
+        return slope, slope * self.length + intercept
+
+    def push(self, y: float) -> None:
+        self.s_y, self.s_xy = self._sums_after(y)
+        self.values.append(y)
+
+
+def _true_range(bar: Bar, prev_close: Optional[float]) -> float:
+    high, low, _ = bar
+    if prev_close is None:
+        return abs(high - low)
+    return max(abs(high - low), abs(high - prev_close), abs(low - prev_close))
+
+
+# ---------------------------------------------------------------------------
+# 指標狀態：`step(bar, first_seq, commit)` 計算該根 K 線的輸出，commit 時提交
+# ---------------------------------------------------------------------------
+
+
+class _IndicatorState(Protocol):
+    seq: int
+    # 狀態可服務的最早框架起點序號；框架向前延伸超過此值時必須重算
+    floor_seq: int
+
+    def step(self, bar: Bar, first_seq: int, commit: bool) -> Any: ...
+
+
+class _TechnicalState:
+    """`strategy._calculate_technical_indicators` 的增量版本：
+    HV_20 / HV Rank、RSI-14 (Wilder)、SMA-20、MACD(12, 26, 9) 柱體。"""
+
+    HV_WINDOW = 20
+
+    def __init__(self) -> None:
+        self.seq = -1
+        self.floor_seq = 0
+        self.prev_close: Optional[float] = None
+        self.log_rets = _Window(self.HV_WINDOW)
+        self.sma20 = _Window(20)
+        self.gain = _Ema(14, alpha=1.0 / 14)
+        self.loss = _Ema(14, alpha=1.0 / 14)
+        self.ema_fast = _Ema(12, presma=True)
+        self.ema_slow = _Ema(26, presma=True)
+        self.signal = _Ema(9, presma=True)
+        self.hv_max = _RollingExtreme(is_max=True)
+        self.hv_min = _RollingExtreme(is_max=False)
+
+    def step(self, bar: Bar, first_seq: int, commit: bool) -> Optional[dict[str, Any]]:
+        close = bar[2]
+        seq = self.seq + 1
+        # 框架中 HV_20 自第 20 根起才有值，HV Rank 的 min/max 只涵蓋這段
+        hv_cutoff = first_seq + self.HV_WINDOW
+
+        hv: Optional[float] = None
+        log_ret: Optional[float] = None
+        delta: Optional[float] = None
+        if self.prev_close is not None:
+            log_ret = math.log(close / self.prev_close)
+            std = self.log_rets.std_after(log_ret)
+            hv = std * _SQRT_252 if std is not None else None
+            delta = close - self.prev_close
+
+        sma = self.sma20.mean_after(close)
+        avg_gain = self.gain.after(max(delta, 0.0)) if delta is not None else None
+        avg_loss = self.loss.after(min(delta, 0.0)) if delta is not None else None
+        fast = self.ema_fast.after(close)
+        slow = self.ema_slow.after(close)
+        macd = fast - slow if fast is not None and slow is not None else None
+        signal = self.signal.after(macd) if macd is not None else None
+
+        output: Optional[dict[str, Any]] = None
+        if hv is not None and seq >= hv_cutoff:
+            hv_max = self.hv_max.after(hv, hv_cutoff)
+            hv_min = self.hv_min.after(hv, hv_cutoff)
+            hv_rank = (
+                ((hv - hv_min) / (hv_max - hv_min)) * 100 if hv_max > hv_min else 0.0
+            )
+            rsi = float("nan")
+            if avg_gain is not None and avg_loss is not None:
+                denom = avg_gain + abs(avg_loss)
+                rsi = 100.0 * avg_gain / denom if denom else float("nan")
+            output = {
+                "price": close,
+                "rsi": rsi,
+                "sma20": sma if sma is not None else float("nan"),
+                "macd_hist": (
+                    macd - signal
+                    if macd is not None and signal is not None
+                    else float("nan")
+                ),
+                "hv_current": hv,
+                "hv_rank": hv_rank,
+            }
+
+        if commit:
+            self.seq = seq
+            if log_ret is not None:
+                self.log_rets.push(log_ret)
+            if delta is not None:
+                self.gain.push(max(delta, 0.0))
+                self.loss.push(min(delta, 0.0))
+            if hv is not None:
+                self.hv_max.push(seq, hv)
+                self.hv_min.push(seq, hv)
+            self.sma20.push(close)
+            self.ema_fast.push(close)
+            self.ema_slow.push(close)
+            if macd is not None:
+                self.signal.push(macd)
+            self.prev_close = close
+        return output
+
+    def evict(self, first_seq: int) -> None:
+        self.hv_max.evict_before(first_seq + self.HV_WINDOW)
+        self.hv_min.evict_before(first_seq + self.HV_WINDOW)
+        self.floor_seq = first_seq
+
+
+class _EmaSignalState:
+    """`strategy.detect_ema_signals` 的增量版本 (EMA span, adjust=False)。"""
+
+    def __init__(self, window: int, threshold: float) -> None:
+        self.seq = -1
+        self.floor_seq = 0
+        self.window = window
+        self.threshold = threshold
+        self.ema = _Ema(window)
+        self.prev_close: Optional[float] = None
+
+    def step(self, bar: Bar, first_seq: int, commit: bool) -> Optional[dict[str, Any]]:
+        p_curr = bar[2]
+        ema_curr = self.ema.after(p_curr)
+        p_prev, ema_prev = self.prev_close, self.ema.value
+        if commit:
+            self.seq += 1
+            self.ema.push(p_curr)
+            self.prev_close = p_curr
+        if ema_curr is None or p_prev is None or ema_prev is None:
+            return None
+
+        signal_type, direction = None, None
+        if p_prev < ema_prev and p_curr >= ema_curr:
+            signal_type, direction = "CROSSOVER", "BULLISH"
+        elif p_prev > ema_prev and p_curr <= ema_curr:
+            signal_type, direction = "CROSSOVER", "BEARISH"
+        if not signal_type:
+            dist_pct = abs(p_curr - ema_curr) / ema_curr
+            if dist_pct <= self.threshold:
+                signal_type, direction = (
+                    "TEST",
+                    ("SUPPORT" if p_curr > ema_curr else "RESISTANCE"),
+                )
+        if not signal_type:
+            return None
+        return {
+            "window": self.window,
+            "type": signal_type,
+            "direction": direction,
+            "ema_val": round(ema_curr, 2),
+            "distance_pct": round((p_curr - ema_curr) / ema_curr * 100, 2),
+        }
+
+
+class _PowerSqueezeState:
+    """`squeeze_engine.calculate_power_squeeze` 的增量版本：
+    BB(20, 2.0) vs KC(20, 1.5, SMA-ATR) 與近 4 期 (close - SMA20) 迴歸斜率。"""
+
+    def __init__(self) -> None:
+        self.seq = -1
+        self.floor_seq = 0
+        self.closes = _Window(20)
+        self.trs = _Window(20)
+        self.diffs = _LinReg(4)
+        self.prev_close: Optional[float] = None
+
+    def step(self, bar: Bar, first_seq: int, commit: bool) -> dict[str, Any]:
+        close = bar[2]
+        tr = _true_range(bar, self.prev_close)
+        sma = self.closes.mean_after(close)
+        std = self.closes.std_after(close)
+        atr = self.trs.mean_after(tr)
+
+        is_squeezing = False
+        momentum = 0.0
+        diff: Optional[float] = None
+        if sma is not None and std is not None and atr is not None:
+            is_squeezing = (sma + 2.0 * std < sma + 1.5 * atr) and (
+                sma - 2.0 * std > sma - 1.5 * atr
+            )
+        if sma is not None:
+            diff = close - sma
+            reg = self.diffs.after(diff)
+            if reg is not None:
+                momentum = reg[0]
+
+        if commit:
+            self.seq += 1
+            self.closes.push(close)
+            self.trs.push(tr)
+            if diff is not None:
+                self.diffs.push(diff)
+            self.prev_close = close
+
+        if momentum > 0:
+            direction = "🟢"
+        elif momentum < 0:
+            direction = "🔴"
+        else:
+            direction = "⚪"
+        return {
+            "is_squeezing": bool(is_squeezing),
+            "momentum": float(momentum),
+            "direction": direction,
+        }
+
+
+class _PsqState:
+    """`psq_engine.analyze_psq` 的增量版本：BB vs 三級 KC (EMA 基準 + EMA TR)、
+    (close - 均價中軸) 的 `length` 期線性迴歸終點動能。"""
+
+    def __init__(
+        self, length: int, bb_mult: float, kc_mults: tuple[float, ...]
+    ) -> None:
+        self.seq = -1
+        self.floor_seq = 0
+        self.length = length
+        self.bb_mult = bb_mult
+        self.kc_mults = kc_mults
+        self.closes = _Window(length)
+        self.kc_basis = _Ema(length, presma=True)
+        self.band = _Ema(length, presma=True)
+        self.high_max = _RollingExtreme(is_max=True)
+        self.low_min = _RollingExtreme(is_max=False)
+        self.momentum = _LinReg(length)
+        self.prev_close: Optional[float] = None
+        self.prev_mom: Optional[float] = None
+        self.prev_sqz_high = False
+
+    def step(self, bar: Bar, first_seq: int, commit: bool) -> Optional[dict[str, Any]]:
+        high, low, close = bar
+        seq = self.seq + 1
+        window_start = seq - self.length + 1
+        tr = (
+            high - low if self.prev_close is None else _true_range(bar, self.prev_close)
+        )
+
+        basis = self.closes.mean_after(close)
+        std = self.closes.std_after(close)
+        kc_basis = self.kc_basis.after(close)
+        band = self.band.after(tr)
+
+        sqz = [False, False, False]
+        if (
+            basis is not None
+            and std is not None
+            and kc_basis is not None
+            and band is not None
+        ):
+            bb_lower = basis - self.bb_mult * std
+            bb_upper = basis + self.bb_mult * std
+            sqz = [
+                bb_lower > kc_basis - mult * band and bb_upper < kc_basis + mult * band
+                for mult in self.kc_mults
+            ]
+
+        mom_src: Optional[float] = None
+        curr_mom: Optional[float] = None
+        if basis is not None and window_start >= 0:
+            h_max = self.high_max.after(high, window_start)
+            l_min = self.low_min.after(low, window_start)
+            mom_src = close - ((h_max + l_min) / 2.0 + basis) / 2.0
+            reg = self.momentum.after(mom_src)
+            if reg is not None:
+                curr_mom = reg[1]
+
+        output: Optional[dict[str, Any]] = None
+        if curr_mom is not None and basis is not None:
+            output = {
+                "curr_mom": curr_mom,
+                "prev_mom": self.prev_mom,
+                "sqz_high": sqz[0],
+                "sqz_mid": sqz[1],
+                "sqz_normal": sqz[2],
+                "prev_sqz_high": self.prev_sqz_high,
+                "sma_distance_pct": (close - basis) / basis * 100,
+                "sma_20": basis,
+            }
+
+        if commit:
+            self.seq = seq
+            self.closes.push(close)
+            self.kc_basis.push(close)
+            self.band.push(tr)
+            self.high_max.push(seq, high)
+            self.low_min.push(seq, low)
+            self.high_max.evict_before(window_start + 1)
+            self.low_min.evict_before(window_start + 1)
+            if mom_src is not None:
+                self.momentum.push(mom_src)
+            self.prev_mom = curr_mom
+            self.prev_sqz_high = sqz[0]
+            self.prev_close = close
+        return output
+
+
+# ---------------------------------------------------------------------------
+# 引擎：框架對齊、缺口 / 調整偵測、LRU 狀態管理
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class _Tracker:
+    state: _IndicatorState
+    last_ts: Any
+    last_bar: Bar
+
+
+def _bars_equal(a: Bar, b: Bar) -> bool:
+    return all(abs(x - y) <= _ADJUST_TOLERANCE * max(1.0, abs(y)) for x, y in zip(a, b))
+
+
+class IndicatorEngine:
+    """以 (symbol, interval, 指標, 參數) 為鍵的增量指標狀態管理器。
+
+    執行緒安全：呼叫端多以 `asyncio.to_thread` 平行執行，所有狀態異動都在
+    同一把鎖內完成（單次增量更新僅數十微秒，鎖競爭可忽略）。"""
+
+    def __init__(self, max_states: int = MAX_TRACKED_STATES) -> None:
+        self._trackers: BoundedCache = BoundedCache(max_size=max_states)
+        self._lock = threading.Lock()
+        self.full_recomputes = 0
+        self.incremental_updates = 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._trackers.clear()
+            self.full_recomputes = 0
+            self.incremental_updates = 0
+
+    @staticmethod
+    def supports(df: Optional[pd.DataFrame]) -> bool:
+        """框架是否適用增量路徑：遞增的 DatetimeIndex、High/Low/Close 皆為有限值。"""
+        if df is None or df.empty or len(df) < 2:
+            return False
+        if not isinstance(df.index, pd.DatetimeIndex):
+            return False
+        if not df.index.is_monotonic_increasing or not df.index.is_unique:
+            return False
+        if not {"High", "Low", "Close"}.issubset(df.columns):
+            return False
+        values = df[["High", "Low", "Close"]].to_numpy(dtype=np.float64)
+        return bool(np.isfinite(values).all())
+
+    def _evaluate(
+        self, key: tuple[Any, ...], factory: Callable[[], Any], df: pd.DataFrame
+    ) -> Any:
+        highs = df["High"].to_numpy(dtype=np.float64)
+        lows = df["Low"].to_numpy(dtype=np.float64)
+        closes = df["Close"].to_numpy(dtype=np.float64)
+        index = df.index
+        n = len(df)
+
+        def bar(i: int) -> Bar:
+            return (float(highs[i]), float(lows[i]), float(closes[i]))
+
+        with self._lock:
+            tracker: Optional[_Tracker] = self._trackers.get(key)
+            first_seq = 0
+            if tracker is not None:
+                pos = int(index.searchsorted(tracker.last_ts))
+                first_seq = tracker.state.seq - pos
+                new_closed = n - 2 - pos
+                if (
+                    pos >= n - 1
+                    or index[pos] != tracker.last_ts
+                    or not _bars_equal(bar(pos), tracker.last_bar)
+                    or new_closed > MAX_CATCHUP_BARS
+                    or first_seq < tracker.state.floor_seq
+                ):
+                    tracker = None
+                else:
+                    for i in range(pos + 1, n - 1):
+                        tracker.state.step(bar(i), first_seq, commit=True)
+                    if new_closed:
+                        tracker.last_ts = index[n - 2]
+                        tracker.last_bar = bar(n - 2)
+                    self._trackers[key] = tracker
+                    self.incremental_updates += 1
+
+            if tracker is None:
+                state = factory()
+                first_seq = 0
+                for i in range(n - 1):
+                    state.step(bar(i), first_seq, commit=True)
+                tracker = _Tracker(
+                    state=state, last_ts=index[n - 2], last_bar=bar(n - 2)
+                )
+                self._trackers[key] = tracker
+                self.full_recomputes += 1
+
+            if hasattr(tracker.state, "evict"):
+                tracker.state.evict(first_seq)
+            return tracker.state.step(bar(n - 1), first_seq, commit=False)
+
+    def technical_indicators(
+        self, symbol: str, interval: str, df: pd.DataFrame
+    ) -> Optional[dict[str, Any]]:
+        if len(df) < 50:
+            return None
+        return cast(
+            Optional[dict[str, Any]],
+            self._evaluate(
+                (symbol.upper(), interval, "technical"), _TechnicalState, df
+            ),
+        )
+
+    def ema_signal(
+        self,
+        symbol: str,
+        interval: str,
+        df: pd.DataFrame,
+        window: int = 21,
+        threshold: float = 0.005,
+    ) -> Optional[dict[str, Any]]:
+        if len(df) < window + 2:
+            return None
+        return cast(
+            Optional[dict[str, Any]],
+            self._evaluate(
+                (symbol.upper(), interval, "ema_signal", window, threshold),
+                lambda: _EmaSignalState(window, threshold),
+                df,
+            ),
+        )
+
+    def power_squeeze(
+        self, symbol: str, interval: str, df: pd.DataFrame
+    ) -> dict[str, Any]:
+        return cast(
+            dict[str, Any],
+            self._evaluate(
+                (symbol.upper(), interval, "power_squeeze"), _PowerSqueezeState, df
+            ),
+        )
+
+    def psq(
+        self,
+        symbol: str,
+        interval: str,
+        df: pd.DataFrame,
+        length: int = 20,
+        bb_mult: float = 2.0,
+        kc_mults: tuple[float, ...] = (1.0, 1.5, 2.0),
+        near_pct: float = 1.5,
+        vix_spot: Optional[float] = None,
+    ) -> Optional[PSQResult]:
+        if len(df) < length * 2:
+            return None
+        raw = self._evaluate(
+            (symbol.upper(), interval, "psq", length, bb_mult, kc_mults),
+            lambda: _PsqState(length, bb_mult, kc_mults),
+            df,
+        )
+        if raw is None:
+            return None
+        prev_mom = raw["prev_mom"] if raw["prev_mom"] is not None else float("nan")
+        return _build_psq_result(
+            curr_mom=raw["curr_mom"],
+            prev_mom=prev_mom,
+            sqz_high=raw["sqz_high"],
+            sqz_mid=raw["sqz_mid"],
+            sqz_normal=raw["sqz_normal"],
+            prev_sqz_high=raw["prev_sqz_high"],
+            sma_distance_pct=raw["sma_distance_pct"],
+            sma_20=raw["sma_20"],
+            near_pct=near_pct,
+            vix_spot=vix_spot,
+        )
+
+
+indicator_engine = IndicatorEngine()
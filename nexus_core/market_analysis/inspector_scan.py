@@ -0,0 +1,68 @@
+"""
+巡檢器 (DDP / 波動率) 共用的有界併發掃描。
+
+舊版逐檔掃描並在每檔之間固定 `sleep(0.5)`，500 檔標的光等待就要四分鐘以上。
+實際的 yfinance 節流已由 `market_data_service.call_yf` 的限流器與號誌負責，
+這裡只需限制同時分析的標的數，並保持輸出順序與輸入一致。
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from services.latency_monitor import latency_registry
+
+logger = logging.getLogger(__name__)
+
+Report = Dict[str, Any]
+
+
+@dataclass
+class InspectorScanStats:
+    symbols: int = 0
+    reports: int = 0
+    errors: int = 0
+    peak_in_flight: int = 0
+    duration_ms: float = 0.0
+
+
+async def scan_symbols(
+    symbols: Sequence[str],
+    inspect: Callable[[str], Awaitable[Optional[Report]]],
+    concurrency: int,
+    stage: str,
+    label: str,
+    stats: Optional[InspectorScanStats] = None,
+) -> List[Optional[Report]]:
+    """
+    以最多 `concurrency` 個同時進行的 `inspect` 掃描所有標的。
+
+    回傳與 `symbols` 同順序的結果；單檔失敗只記錄錯誤並以 None 佔位，不中斷整批。
+    """
+    stats = stats if stats is not None else InspectorScanStats()
+    stats.symbols = len(symbols)
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    in_flight = 0
+    started = time.perf_counter()
+
+    async def _one(symbol: str) -> Optional[Report]:
+        nonlocal in_flight
+        async with semaphore:
+            in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, in_flight)
+            try:
+                return await inspect(symbol)
+            except Exception as e:
+                stats.errors += 1
+                logger.error(f"{label} 掃描標的 {symbol} 失敗: {e}")
+                return None
+            finally:
+                in_flight -= 1
+
+    results = await asyncio.gather(*(_one(s) for s in symbols))
+    stats.reports = sum(1 for r in results if r)
+    stats.duration_ms = (time.perf_counter() - started) * 1000.0
+    latency_registry.record(stage, stats.duration_ms)
+    return list(results)
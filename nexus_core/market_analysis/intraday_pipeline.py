@@ -1,13 +1,16 @@
 from typing import Any
 import logging
 import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Optional, Dict
 from zoneinfo import ZoneInfo
 
 import pandas as pd
 
-from market_time import ny_tz, is_market_open
+from market_time import ny_tz, is_market_open, session_calendar
 from models.schemas import (
     EnhancedWatchlistMetrics,
     WatchlistEvaluation,
@@ -25,6 +28,7 @@ from market_analysis.models.trader_models import (
     TickerMarketData,
 )
 from market_analysis.gamma_squeeze_engine import NexusGammaSqueezeEngine
+from services.latency_monitor import latency_registry
 from market_analysis.signal_calculator import (
     _derive_buy_levels,
     _derive_sell_levels,
@@ -110,7 +114,8 @@ async def _estimate_options_wall_metrics(
     current_price: float,
     dividend_yield: float,
 ) -> tuple[float | None, float | None]:
-    from market_analysis.greeks import calculate_greeks, calculate_vanna
+    from market_analysis.chain_arrays import max_gamma_wall
+    from market_analysis.greeks import calculate_vanna
     from services import market_data_service
 
     expiries = await market_data_service.get_all_option_expiries(symbol)
@@ -130,21 +135,7 @@ async def _estimate_options_wall_metrics(
     if puts.empty:
         return None, None
 
-    max_wall_score = -1.0
-    max_wall_strike = current_price
-    for _, row in puts.iterrows():
-        greeks = calculate_greeks(
-            "put",
-            current_price,
-            float(row["strike"]),
-            t_years,
-            float(row["impliedVolatility"]),
-            dividend_yield,
-        )
-        gamma_score = abs(float(greeks["gamma"])) * float(row["openInterest"]) * 100.0
-        if gamma_score > max_wall_score:
-            max_wall_score = gamma_score
-            max_wall_strike = float(row["strike"])
+    max_wall_strike = max_gamma_wall(puts, current_price, t_years, dividend_yield)
 
     call_vanna = 0.0
     put_vanna = 0.0
@@ -293,7 +284,9 @@ async def build_enhanced_watchlist_metrics(
     # Restore essential indicators for pricing engine (AGENTS.md)
     from market_analysis.strategy import _calculate_technical_indicators
 
-    indicators = await asyncio.to_thread(_calculate_technical_indicators, df_stock)
+    indicators = await asyncio.to_thread(
+        _calculate_technical_indicators, df_stock, symbol
+    )
     rsi_14 = indicators.get("rsi", 50.0) if indicators else 50.0
     atr_14 = 0.01
     ma20 = indicators.get("sma20", current_price) if indicators else current_price
@@ -353,7 +346,7 @@ async def build_enhanced_watchlist_metrics(
         squeeze_momentum = squeeze_cache.get("momentum", 0.0)
         squeeze_direction = squeeze_cache.get("direction", "⚪")
     else:
-        psq_obj = analyze_psq(df_stock, vix_spot=18.0)
+        psq_obj = analyze_psq(df_stock, vix_spot=18.0, symbol=symbol)
         if psq_obj:
             squeeze_status = psq_obj.is_squeezing
             squeeze_momentum = psq_obj.momentum_value
@@ -645,6 +638,17 @@ async def evaluate_watchlist_symbol(
             elif spot < put_wall:
                 tactical.action_guideline += f"\n⚠️ 【流動性枯竭預警】現價 ({spot:.2f}) 跌破 Put Wall ({put_wall:.2f})，期權造市商支撐消失，存在嚴重賣壓與流動性真空風險。"
 
+        # Put Wall 遷移：由 edge 本地 GEX 歷史比較 24 小時前的牆位，不觸發重新抓取
+        if put_wall > 0:
+            from services import edge_cache_client
+
+            migration = await edge_cache_client.get_gex_history_diff(
+                symbol, edge_cache_client.lookback_start(24.0)
+            )
+            if migration and float(migration.get("put_wall_shift") or 0.0) < 0:
+                walls = migration["put_wall"]
+                tactical.action_guideline += f"\n📉 【支撐下移】Put Wall 近 24 小時由 {float(walls['from']):.2f} 下移至 {float(walls['to']):.2f}，期權造市商防守位正在撤退。"
+
         if put_wall > 0 and spot > 0:
             distance = (spot - put_wall) / spot
             if distance <= 0.02 and net_gex < 0:
@@ -1005,6 +1009,54 @@ def evaluate_advanced_filters(
     return True, tags
 
 
+# 每個循環同時計算的標的數上限 (每個標的內部仍會再併發多個 API 請求)
+_SYMBOL_FANOUT_CONCURRENCY = 8
+_CYCLE_HISTORY_SIZE = 48
+STAGE_INTRADAY_CYCLE = "intraday_cycle"
+STAGE_INTRADAY_SYMBOLS = "intraday_symbols"
+
+
+@dataclass
+class PipelineCycleStats:
+    """單次盤中心跳循環的耗時統計。"""
+
+    started_at: datetime
+    phase: str
+    subscribers: int
+    subscriptions: int
+    unique_symbols: int
+    failed_symbols: int
+    notifications: int
+    symbol_seconds: float
+    duration_seconds: float
+
+    def summary(self) -> str:
+        return (
+            f"{self.phase} {self.unique_symbols} 個標的 / {self.subscribers} 位訂閱者 "
+            f"(失敗 {self.failed_symbols}，推播 {self.notifications})，"
+            f"耗時 {self.duration_seconds:.1f}s (標的計算 {self.symbol_seconds:.1f}s)"
+        )
+
+
+@dataclass
+class _WatchlistSubscriber:
+    user_id: int
+    context: Any
+    account_state: TraderAccountState
+    holdings: List[OptionHolding]
+    portfolio_greeks: Dict[str, float]
+    tickers: List[str]
+    heartbeat_enabled: bool
+    notif_settings: Dict[str, bool]
+
+
+@dataclass
+class _SymbolCycleResult:
+    evaluation: Optional[WatchlistEvaluation] = None
+    market_data: Optional[TickerMarketData] = None
+    error: Optional[Exception] = None
+
+
 class IntradayScanPipeline:
     """
     盤中量化掃描與對沖背景處理管道。
@@ -1017,6 +1069,14 @@ class IntradayScanPipeline:
         self.is_running = False
         self._task: Optional[asyncio.Task] = None
         self.scan_interval_seconds = 30 * 60  # 30 minutes
+        self.symbol_concurrency = _SYMBOL_FANOUT_CONCURRENCY
+        self.cycle_history: deque[PipelineCycleStats] = deque(
+            maxlen=_CYCLE_HISTORY_SIZE
+        )
+
+    @property
+    def last_cycle_stats(self) -> Optional[PipelineCycleStats]:
+        return self.cycle_history[-1] if self.cycle_history else None
 
     def start(self) -> None:
         """啟動異步監控管道"""
@@ -1238,34 +1298,26 @@ class IntradayScanPipeline:
 
                 # 計算當前 Phase
                 phase = "Closed"
-                if market_active:
-                    # 獲取今日開收盤時間
-                    import pandas_market_calendars as mcal
+                session = (
+                    session_calendar.session_on(now_ny.date())
+                    if market_active
+                    else None
+                )
+                if session is not None:
                     from datetime import timedelta
 
-                    nyse_calendar = mcal.get_calendar("NYSE")
-                    schedule = nyse_calendar.schedule(
-                        start_date=now_ny.date(), end_date=now_ny.date()
-                    )
-
-                    if not schedule.empty:
-                        row = schedule.iloc[0]
-                        market_open = (
-                            row["market_open"].tz_convert(ny_tz).to_pydatetime()
-                        )
-                        market_close = (
-                            row["market_close"].tz_convert(ny_tz).to_pydatetime()
-                        )
+                    market_open = session.market_open
+                    market_close = session.market_close
 
-                        phase_a_end = market_open + timedelta(hours=1)
-                        phase_c_start = market_close - timedelta(hours=1)
+                    phase_a_end = market_open + timedelta(hours=1)
+                    phase_c_start = market_close - timedelta(hours=1)
 
-                        if market_open <= now_ny < phase_a_end:
-                            phase = "Phase A"
-                        elif phase_a_end <= now_ny < phase_c_start:
-                            phase = "Phase B"
-                        elif phase_c_start <= now_ny <= market_close:
-                            phase = "Phase C"
+                    if market_open <= now_ny < phase_a_end:
+                        phase = "Phase A"
+                    elif phase_a_end <= now_ny < phase_c_start:
+                        phase = "Phase B"
+                    elif phase_c_start <= now_ny <= market_close:
+                        phase = "Phase C"
 
                 if phase == "Closed":
                     # 休市時，每 10 分鐘檢查一次
@@ -1279,84 +1331,8 @@ class IntradayScanPipeline:
                     f"🤖 [Intraday Pipeline] 開盤心跳監測觸發。當前時段: {phase}"
                 )
 
-                # 2. 獲取所有使用者資訊，執行量化分析
-                import database
-
-                user_ids = database.get_all_user_ids()
-
-                for uid in user_ids:
-                    ctx = database.get_full_user_context(uid)
-                    if not ctx.enable_analyst_agent:
-                        continue
-
-                    # 3. 取得帳戶狀態、持倉期權、Greeks 等
-                    account_state = TraderAccountState(
-                        capital=ctx.total_capital
-                        if hasattr(ctx, "total_capital")
-                        else 100000.0,
-                        cash_reserve=ctx.cash_reserve
-                        if hasattr(ctx, "cash_reserve")
-                        else 20000.0,
-                        monthly_burn_rate=ctx.monthly_burn_rate
-                        if hasattr(ctx, "monthly_burn_rate")
-                        else 5000.0,
-                        current_vix=await self._fetch_current_vix(),
-                    )
-
-                    # 讀取期權持倉
-                    holdings = await self._fetch_user_options_holdings(uid)
-                    portfolio_greeks = await self._fetch_portfolio_greeks(uid)
-
-                    # 掃描 watchlist 中的標的
-                    watchlist = database.get_user_watchlist(uid)
-                    for ticker, _ in watchlist:
-                        try:
-                            watchlist_eval = await self.evaluate_watchlist_symbol(
-                                ticker
-                            )
-                            if (
-                                watchlist_eval is not None
-                                and watchlist_eval.tactical.alert_level != "green"
-                            ):
-                                hb_enabled = database.is_notification_enabled(
-                                    uid, "heartbeat_watchlist"
-                                )
-                                notif_settings = (
-                                    database.get_user_notification_settings(uid)
-                                )
-
-                                if hb_enabled:
-                                    embed = await self._build_watchlist_heartbeat_embed(
-                                        watchlist_eval, ctx, notif_settings
-                                    )
-                                    if embed is not None:
-                                        await self.bot.queue_dm(
-                                            uid,
-                                            embed=embed,
-                                        )
-                                else:
-                                    logger.info(
-                                        f"使用者 {uid} 已關閉所有心跳模組訂閱，略過心跳推送。"
-                                    )
-                            market_data = await self._fetch_ticker_market_data(ticker)
-                            if not market_data:
-                                continue
-
-                            # 執行核心量化引擎
-                            _ = self.engine.analyze_ticker(
-                                data=market_data,
-                                account_state=account_state,
-                                options_holdings=holdings,
-                                portfolio_greeks=portfolio_greeks,
-                                market_phase=phase,
-                                current_time=now_ny,
-                            )
-
-                        except Exception as ticker_err:
-                            logger.error(
-                                f"❌ IntradayScanPipeline 處理標的 {ticker} 時發生錯誤: {ticker_err}",
-                                exc_info=True,
-                            )
+                # 2. 依「不重複標的」扇出計算，再投影到每位訂閱者
+                await self.run_cycle(phase, now_ny)
 
                 # 4. 睡眠 30 分鐘
                 await asyncio.sleep(self.scan_interval_seconds)
@@ -1367,6 +1343,157 @@ class IntradayScanPipeline:
                 logger.error(f"❌ IntradayScanPipeline 發生錯誤: {e}", exc_info=True)
                 await asyncio.sleep(60)
 
+    async def _load_subscribers(self, current_vix: float) -> List[_WatchlistSubscriber]:
+        """讀取啟用分析代理的使用者及其觀察清單、帳戶狀態與通知設定 (每位使用者一次)。"""
+        import database
+
+        subscribers: List[_WatchlistSubscriber] = []
+        for uid in database.get_all_user_ids():
+            ctx = database.get_full_user_context(uid)
+            if not ctx.enable_analyst_agent:
+                continue
+
+            account_state = TraderAccountState(
+                capital=ctx.total_capital
+                if hasattr(ctx, "total_capital")
+                else 100000.0,
+                cash_reserve=ctx.cash_reserve
+                if hasattr(ctx, "cash_reserve")
+                else 20000.0,
+                monthly_burn_rate=ctx.monthly_burn_rate
+                if hasattr(ctx, "monthly_burn_rate")
+                else 5000.0,
+                current_vix=current_vix,
+            )
+            subscribers.append(
+                _WatchlistSubscriber(
+                    user_id=uid,
+                    context=ctx,
+                    account_state=account_state,
+                    holdings=await self._fetch_user_options_holdings(uid),
+                    portfolio_greeks=await self._fetch_portfolio_greeks(uid),
+                    tickers=[ticker for ticker, _ in database.get_user_watchlist(uid)],
+                    heartbeat_enabled=database.is_notification_enabled(
+                        uid, "heartbeat_watchlist"
+                    ),
+                    notif_settings=database.get_user_notification_settings(uid),
+                )
+            )
+        return subscribers
+
+    async def _evaluate_symbols(
+        self, symbols: List[str]
+    ) -> Dict[str, _SymbolCycleResult]:
+        """每個不重複標的只計算一次，以 Semaphore 限制同時進行的標的數量。"""
+        sem = asyncio.Semaphore(max(1, self.symbol_concurrency))
+
+        async def _one(symbol: str) -> _SymbolCycleResult:
+            async with sem:
+                result = _SymbolCycleResult()
+                try:
+                    result.evaluation = await self.evaluate_watchlist_symbol(symbol)
+                except Exception as ticker_err:
+                    result.error = ticker_err
+                    logger.error(
+                        f"❌ IntradayScanPipeline 處理標的 {symbol} 時發生錯誤: {ticker_err}",
+                        exc_info=True,
+                    )
+                    return result
+                # 市場數據失敗只略過量化引擎投影，已完成的評估仍照常推送心跳
+                try:
+                    result.market_data = await self._fetch_ticker_market_data(symbol)
+                except Exception as fetch_err:
+                    logger.error(
+                        f"❌ IntradayScanPipeline 取得標的 {symbol} 市場數據失敗: {fetch_err}",
+                        exc_info=True,
+                    )
+                return result
+
+        results = await asyncio.gather(*(_one(sym) for sym in symbols))
+        return dict(zip(symbols, results))
+
+    async def run_cycle(self, phase: str, now_ny: datetime) -> PipelineCycleStats:
+        """
+        執行一次盤中心跳循環：先依不重複標的扇出計算 (watchlist 評估 + 市場數據)，
+        再於記憶體中投影到每位訂閱者的通知設定與帳戶狀態。循環耗時隨標的數
+        而非「使用者 × 標的」成長；每次循環的統計保存在 `cycle_history`。
+        """
+        started = time.perf_counter()
+        subscribers = await self._load_subscribers(await self._fetch_current_vix())
+
+        unique_symbols: Dict[str, None] = {}
+        for sub in subscribers:
+            for ticker in sub.tickers:
+                unique_symbols.setdefault(ticker.upper(), None)
+        symbols = list(unique_symbols)
+
+        fanout_started = time.perf_counter()
+        results = await self._evaluate_symbols(symbols)
+        symbol_seconds = time.perf_counter() - fanout_started
+
+        notifications = 0
+        for sub in subscribers:
+            for ticker in sub.tickers:
+                result = results.get(ticker.upper())
+                if result is None:
+                    continue
+                try:
+                    evaluation = result.evaluation
+                    if (
+                        evaluation is not None
+                        and evaluation.tactical.alert_level != "green"
+                    ):
+                        if sub.heartbeat_enabled:
+                            embed = await self._build_watchlist_heartbeat_embed(
+                                evaluation, sub.context, sub.notif_settings
+                            )
+                            if embed is not None:
+                                await self.bot.queue_dm(sub.user_id, embed=embed)
+                                notifications += 1
+                        else:
+                            logger.info(
+                                f"使用者 {sub.user_id} 已關閉所有心跳模組訂閱，略過心跳推送。"
+                            )
+
+                    if not result.market_data:
+                        continue
+
+                    # 執行核心量化引擎 (純記憶體計算，依使用者帳戶狀態投影)
+                    _ = self.engine.analyze_ticker(
+                        data=result.market_data,
+                        account_state=sub.account_state,
+                        options_holdings=sub.holdings,
+                        portfolio_greeks=sub.portfolio_greeks,
+                        market_phase=phase,
+                        current_time=now_ny,
+                    )
+                except Exception as ticker_err:
+                    logger.error(
+                        f"❌ IntradayScanPipeline 投影標的 {ticker} 至使用者 {sub.user_id} 時發生錯誤: {ticker_err}",
+                        exc_info=True,
+                    )
+
+        stats = PipelineCycleStats(
+            started_at=now_ny,
+            phase=phase,
+            subscribers=len(subscribers),
+            subscriptions=sum(len(sub.tickers) for sub in subscribers),
+            unique_symbols=len(symbols),
+            failed_symbols=sum(1 for r in results.values() if r.error is not None),
+            notifications=notifications,
+            symbol_seconds=symbol_seconds,
+            duration_seconds=time.perf_counter() - started,
+        )
+        self.cycle_history.append(stats)
+        latency_registry.record(STAGE_INTRADAY_CYCLE, stats.duration_seconds * 1000.0)
+        latency_registry.record(STAGE_INTRADAY_SYMBOLS, stats.symbol_seconds * 1000.0)
+        logger.info(
+            f"🤖 [Intraday Pipeline] 循環完成：{stats.unique_symbols} 個標的 / "
+            f"{stats.subscribers} 位訂閱者 ({stats.subscriptions} 筆訂閱)，"
+            f"耗時 {stats.duration_seconds:.2f}s (標的計算 {stats.symbol_seconds:.2f}s)"
+        )
+        return stats
+
     # 模擬/輔助獲取資料方法
     async def _fetch_current_vix(self) -> float:
         """獲取 VIX 即時數據，預設為 18.0"""
@@ -1,9 +1,10 @@
 import numpy as np
 import pandas as pd
-from numpy.lib.stride_tricks import sliding_window_view
 from dataclasses import dataclass
 from typing import Optional
 
+from .rolling_regression import rolling_linreg_endpoint
+
 
 @dataclass
 class PSQResult:
@@ -41,27 +42,92 @@ def _fast_ema(series: pd.Series, length: int) -> pd.Series:
 
 
 def _fast_rolling_linreg(series: pd.Series, length: int = 20) -> pd.Series:
-    """TA-Lib 相容之滑動線性回歸終點值 (Vectorized sliding window linear regression)。"""
-    vals = series.to_numpy(dtype=np.float64)
-    n = len(vals)
-    if n < length:
-        return pd.Series(np.full(n, np.nan), index=series.index)
-
-    x = np.arange(1, length + 1, dtype=np.float64)
-    x_sum = 0.5 * length * (length + 1)
-    x2_sum = x_sum * (2 * length + 1) / 3.0
-    divisor = length * x2_sum - x_sum * x_sum
-
-    windows = sliding_window_view(vals, length)
-    y_sum = np.sum(windows, axis=1)
-    xy_sum = np.sum(windows * x, axis=1)
-    m = (length * xy_sum - x_sum * y_sum) / divisor
-    b = (y_sum * x2_sum - x_sum * xy_sum) / divisor
-    endpoints = m * length + b
-
-    out = np.full(n, np.nan, dtype=np.float64)
-    out[length - 1 :] = endpoints
-    return pd.Series(out, index=series.index)
+    """TA-Lib 相容之滑動線性回歸終點值，委派給共用的 `rolling_regression` 核心。"""
+    return rolling_linreg_endpoint(series, length)
+
+
+def _build_psq_result(
+    curr_mom: float,
+    prev_mom: float,
+    sqz_high: bool,
+    sqz_mid: bool,
+    sqz_normal: bool,
+    prev_sqz_high: bool,
+    sma_distance_pct: float,
+    sma_20: float,
+    near_pct: float,
+    vix_spot: float | None,
+) -> PSQResult:
+    """由最後兩根 K 線的動能與擠壓狀態組出 PSQResult。
+
+    供 `analyze_psq` 的完整向量化計算與 `indicator_engine` 的增量狀態共用，
+    確保兩條路徑的判定規則完全一致。"""
+    curr_diff = curr_mom - prev_mom
+    is_near_support = abs(sma_distance_pct) <= near_pct
+
+    # 判斷動能柱體顏色 (Momentum Histogram)
+    if curr_mom > 0:
+        mom_color = "LightBlue" if curr_diff > 0 else "DarkBlue"
+    elif curr_mom < 0:
+        mom_color = "Red" if curr_diff < 0 else "Golden"
+    else:
+        mom_color = "Neutral"
+
+    # 判斷當前擠壓層級 (Squeeze Level)
+    if sqz_high:
+        squeeze_level = "High"
+    elif sqz_mid:
+        squeeze_level = "Mid"
+    elif sqz_normal:
+        squeeze_level = "Normal"
+    else:
+        squeeze_level = "Release"
+
+    # 判斷基本訊號 (轉強/轉弱)
+    if curr_mom > 0 and curr_mom > prev_mom:
+        signal = "Long"
+    elif curr_mom < 0 and curr_mom < prev_mom:
+        signal = "Short"
+    else:
+        signal = "Neutral"
+
+    # 判斷是否為「擠壓突破」(Breakout)
+    # 前段期間處於「高強度擠壓(Red)」，當前 K 線完全解除擠壓 (Release)
+    is_breakout_long = bool(prev_sqz_high and (not sqz_normal) and (curr_mom > 0))
+    is_breakout_short = bool(prev_sqz_high and (not sqz_normal) and (curr_mom < 0))
+
+    # ---------- VIX 動能標記 (VIX Momentum Labeling) ----------
+    vix_momentum_label = "NORMAL"
+
+    if vix_spot is not None:
+        # 匯入分位數邊界
+        from config import VIX_QUANTILE_BOUNDS
+
+        upper_3 = VIX_QUANTILE_BOUNDS.get("upper_3", 24.6)
+
+        # 休兵期間的多頭訊號 → 過度延伸風險
+        if vix_spot < 15.0 and signal == "Long":
+            vix_momentum_label = "OVEREXTENDED_RISK"
+
+        # 高波動期間的 Golden 柱體（空頭減速）→ 高確信反彈
+        elif vix_spot > upper_3 and mom_color == "Golden":
+            vix_momentum_label = "HIGH_CONVICTION_RECOVERY"
+
+    # -----------------------------------------------------------
+
+    return PSQResult(
+        squeeze_level=squeeze_level,
+        is_squeezing=bool(sqz_normal),
+        momentum_value=float(curr_mom),
+        momentum_color=mom_color,
+        signal_direction=signal,
+        is_near_support=bool(is_near_support),
+        is_breakout_long=is_breakout_long,
+        is_breakout_short=is_breakout_short,
+        sma_distance_pct=float(sma_distance_pct),
+        sma_20=float(sma_20),
+        vix_momentum_label=vix_momentum_label,
+    )
 
 
 def analyze_psq(
@@ -71,6 +137,8 @@ def analyze_psq(
     kc_mults: list = [1.0, 1.5, 2.0],
     near_pct: float = 1.5,
     vix_spot: float | None = None,
+    symbol: Optional[str] = None,
+    interval: str = "1d",
 ) -> Optional[PSQResult]:
     """
     計算 PowerSqueeze (PSQ) 量化指標 (Ultimate Edition v2 - Vectorized High Performance)。
@@ -79,10 +147,34 @@ def analyze_psq(
     Args:
         vix_spot: VIX 即時價格。用於動能標記（OVEREXTENDED_RISK / HIGH_CONVICTION_RECOVERY）
                   以及低波環境時間框架建議。
+        symbol: 提供時改走 `indicator_engine` 的 (symbol, interval) 增量狀態，
+                只推進新 K 線而不重算整段框架。
     """
     if df is None or df.empty or len(df) < length * 2:
         return None
 
+    if symbol:
+        from market_analysis.indicator_engine import indicator_engine
+
+        if indicator_engine.supports(df):
+            try:
+                return indicator_engine.psq(
+                    symbol,
+                    interval,
+                    df,
+                    length=length,
+                    bb_mult=bb_mult,
+                    kc_mults=tuple(kc_mults),
+                    near_pct=near_pct,
+                    vix_spot=vix_spot,
+                )
+            except Exception as e:
+                import logging
+
+                logging.getLogger(__name__).warning(
+                    f"[{symbol}] PSQ 增量計算失敗，改用完整計算: {e}"
+                )
+
     try:
         close = df["Close"]
         high = df["High"]
@@ -130,85 +222,21 @@ def analyze_psq(
         if momentum_value is None or momentum_value.isna().all():
             return None
 
-        mom_diff = momentum_value.diff()
-
         # 4. 回調支撐判定
         # 價格與 20 SMA 的百分比距離
         sma_distance_pct = ((df["Close"] - basis) / basis) * 100
-        is_near_support = sma_distance_pct.abs() <= near_pct
-
-        # 取得最後一筆與前一筆狀態作判斷
-        curr_mom = momentum_value.iloc[-1]
-        prev_mom = momentum_value.iloc[-2] if len(momentum_value) > 1 else 0
-        curr_diff = mom_diff.iloc[-1]
-
-        # 判斷動能柱體顏色 (Momentum Histogram)
-        if curr_mom > 0:
-            mom_color = "LightBlue" if curr_diff > 0 else "DarkBlue"
-        elif curr_mom < 0:
-            mom_color = "Red" if curr_diff < 0 else "Golden"
-        else:
-            mom_color = "Neutral"
-
-        # 判斷當前擠壓層級 (Squeeze Level)
-        if sqz_high.iloc[-1]:
-            squeeze_level = "High"
-        elif sqz_mid.iloc[-1]:
-            squeeze_level = "Mid"
-        elif sqz_normal.iloc[-1]:
-            squeeze_level = "Normal"
-        else:
-            squeeze_level = "Release"
-
-        # 判斷基本訊號 (轉強/轉弱)
-        if curr_mom > 0 and curr_mom > prev_mom:
-            signal = "Long"
-        elif curr_mom < 0 and curr_mom < prev_mom:
-            signal = "Short"
-        else:
-            signal = "Neutral"
-
-        # 判斷是否為「擠壓突破」(Breakout)
-        # 前段期間處於「高強度擠壓(Red)」，當前 K 線完全解除擠壓 (Release)
-        prev_sqz_high = sqz_high.iloc[-2] if len(sqz_high) > 1 else False
-        curr_sqz_any = is_squeezing.iloc[-1]
-
-        is_breakout_long = bool(prev_sqz_high and (not curr_sqz_any) and (curr_mom > 0))
-        is_breakout_short = bool(
-            prev_sqz_high and (not curr_sqz_any) and (curr_mom < 0)
-        )
-
-        # ---------- VIX 動能標記 (VIX Momentum Labeling) ----------
-        vix_momentum_label = "NORMAL"
-
-        if vix_spot is not None:
-            # 匯入分位數邊界
-            from config import VIX_QUANTILE_BOUNDS
-
-            upper_3 = VIX_QUANTILE_BOUNDS.get("upper_3", 24.6)
-
-            # 休兵期間的多頭訊號 → 過度延伸風險
-            if vix_spot < 15.0 and signal == "Long":
-                vix_momentum_label = "OVEREXTENDED_RISK"
-
-            # 高波動期間的 Golden 柱體（空頭減速）→ 高確信反彈
-            elif vix_spot > upper_3 and mom_color == "Golden":
-                vix_momentum_label = "HIGH_CONVICTION_RECOVERY"
-
-        # -----------------------------------------------------------
 
-        return PSQResult(
-            squeeze_level=squeeze_level,
-            is_squeezing=bool(curr_sqz_any),
-            momentum_value=float(curr_mom),
-            momentum_color=mom_color,
-            signal_direction=signal,
-            is_near_support=bool(is_near_support.iloc[-1]),
-            is_breakout_long=is_breakout_long,
-            is_breakout_short=is_breakout_short,
+        return _build_psq_result(
+            curr_mom=float(momentum_value.iloc[-1]),
+            prev_mom=float(momentum_value.iloc[-2]) if len(momentum_value) > 1 else 0.0,
+            sqz_high=bool(sqz_high.iloc[-1]),
+            sqz_mid=bool(sqz_mid.iloc[-1]),
+            sqz_normal=bool(is_squeezing.iloc[-1]),
+            prev_sqz_high=bool(sqz_high.iloc[-2]) if len(sqz_high) > 1 else False,
             sma_distance_pct=float(sma_distance_pct.iloc[-1]),
             sma_20=float(basis.iloc[-1]),
-            vix_momentum_label=vix_momentum_label,
+            near_pct=near_pct,
+            vix_spot=vix_spot,
         )
     except Exception as e:
         import logging
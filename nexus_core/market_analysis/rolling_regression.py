@@ -0,0 +1,91 @@
+"""
+market_analysis/rolling_regression.py
+
+共用的滑動視窗線性迴歸核心 (closed-form Σy / Σxy + `sliding_window_view`)。
+
+取代逐根 K 線呼叫 `np.polyfit` 的 `rolling().apply()` 寫法：x 固定為
+1..length，因此 Σx、Σx² 與分母皆為常數，每個視窗只需兩個向量化的和即可
+求出斜率與截距。輸入可為 1-D (單一標的) 或 2-D (多個標的依列堆疊，
+最後一軸為時間)，後者讓心跳重新驗證時可一次計算整批標的。
+
+含 NaN 的視窗輸出 NaN，與 pandas `rolling(window).apply(...)` 的預設
+`min_periods=window` 行為一致。
+"""
+
+from typing import Mapping, Sequence
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def rolling_linreg(values: np.ndarray, length: int) -> tuple[np.ndarray, np.ndarray]:
+    """回傳 (slope, endpoint)，形狀與 `values` 相同，前 length-1 個位置為 NaN。
+
+    `endpoint` 為迴歸線在視窗最後一點的值 (TA-Lib LINEARREG)，`slope` 與
+    `np.polyfit(range(length), window, 1)[0]` 一致。"""
+    vals = np.asarray(values, dtype=np.float64)
+    slope = np.full(vals.shape, np.nan, dtype=np.float64)
+    endpoint = np.full(vals.shape, np.nan, dtype=np.float64)
+    n = vals.shape[-1]
+    if length < 2 or n < length:
+        return slope, endpoint
+
+    x = np.arange(1, length + 1, dtype=np.float64)
+    x_sum = 0.5 * length * (length + 1)
+    x2_sum = x_sum * (2 * length + 1) / 3.0
+    divisor = length * x2_sum - x_sum * x_sum
+
+    windows = sliding_window_view(vals, length, axis=-1)
+    y_sum = windows.sum(axis=-1)
+    xy_sum = windows @ x
+    m = (length * xy_sum - x_sum * y_sum) / divisor
+    b = (y_sum * x2_sum - x_sum * xy_sum) / divisor
+
+    slope[..., length - 1 :] = m
+    endpoint[..., length - 1 :] = m * length + b
+    return slope, endpoint
+
+
+def rolling_linreg_slope(series: pd.Series, length: int) -> pd.Series:
+    """`series.rolling(length).apply(polyfit slope)` 的向量化版本。"""
+    slope, _ = rolling_linreg(series.to_numpy(dtype=np.float64), length)
+    return pd.Series(slope, index=series.index)
+
+
+def rolling_linreg_endpoint(series: pd.Series, length: int) -> pd.Series:
+    """TA-Lib 相容之滑動線性迴歸終點值 (LINEARREG)。"""
+    _, endpoint = rolling_linreg(series.to_numpy(dtype=np.float64), length)
+    return pd.Series(endpoint, index=series.index)
+
+
+def stack_right_aligned(series_list: Sequence[np.ndarray]) -> np.ndarray:
+    """把長度不一的序列依「最新一筆對齊」堆疊成 2-D 陣列，左側以 NaN 補齊。"""
+    width = max((len(s) for s in series_list), default=0)
+    out = np.full((len(series_list), width), np.nan, dtype=np.float64)
+    for row, values in enumerate(series_list):
+        if len(values):
+            out[row, width - len(values) :] = np.asarray(values, dtype=np.float64)
+    return out
+
+
+def latest_linreg_batch(
+    series_by_symbol: Mapping[str, pd.Series], length: int
+) -> dict[str, tuple[float, float]]:
+    """批次模式：一次計算多個標的最後一個視窗的 (slope, endpoint)。
+
+    只取每個序列的最後 `length` 筆堆疊成 (symbols × length) 陣列，整批
+    只做一次向量化運算；序列不足或最後視窗含 NaN 的標的回傳 NaN。"""
+    symbols = list(series_by_symbol)
+    if not symbols:
+        return {}
+    tails = [
+        series_by_symbol[sym].to_numpy(dtype=np.float64)[-length:] for sym in symbols
+    ]
+    matrix = stack_right_aligned(tails)
+    if matrix.shape[1] < length:
+        return {sym: (float("nan"), float("nan")) for sym in symbols}
+    slope, endpoint = rolling_linreg(matrix, length)
+    return {
+        sym: (float(slope[row, -1]), float(endpoint[row, -1]))
+        for row, sym in enumerate(symbols)
+    }
@@ -1,11 +1,12 @@
 from typing import Any
 import logging
-import sqlite3  # noqa: F401
+import sqlite3
 import asyncio
 from typing import Optional
 
 
 from .cache import _iv_cache
+from .rolling_stats import HISTORICAL_IV, SENTIMENT_WINDOW, indicator_stats
 
 logger = logging.getLogger(__name__)
 
@@ -103,6 +104,7 @@ async def save_sentiment_history(symbol: str, indicator: str, value: float) -> A
         """,
             (symbol, indicator, value),
         )
+        indicator_stats.record(symbol, indicator, value)
     except Exception as e:
         logger.error(f"儲存情緒歷史失敗: {e}")
 
@@ -110,30 +112,110 @@ async def save_sentiment_history(symbol: str, indicator: str, value: float) -> A
 def get_indicator_percentile(
     symbol: str, indicator: str, current_value: float
 ) -> float:
-    """計算目前值在歷史數據中的百分位數。"""
+    """
+    計算目前值在最近 100 筆歷史數據中的百分位數。
+
+    第一次查詢時從 sentiment_history 建立滑動統計表，之後由
+    `save_sentiment_history` 增量維護，查詢為 O(log n)。
+    """
     try:
+        cached = indicator_stats.lookup(symbol, indicator, current_value)
+        if cached is not None:
+            return cached[1]
+
         from database.connection import get_read_connection
 
+        # (symbol, indicator, timestamp, value) 覆蓋索引：倒序走索引即可，免排序也免回表
         conn = get_read_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT value FROM sentiment_history
+                WHERE symbol = ? AND indicator = ?
+                ORDER BY timestamp DESC LIMIT ?
+            """,
+                (symbol, indicator, SENTIMENT_WINDOW),
+            )
+            values = [row[0] for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+        stats = indicator_stats.seed_sequence(
+            symbol, indicator, reversed(values), max_size=SENTIMENT_WINDOW
+        )
+        return stats.percentile(current_value)
+    except Exception:
+        return 50.0
+
+
+def prune_sentiment_history(
+    retention_days: Optional[int] = None,
+    downsample_after_days: Optional[int] = None,
+) -> int:
+    """
+    清理 sentiment_history：刪除超過保存天數的資料，並將超過降採樣天數的資料
+    壓縮為每個 (symbol, indicator) 每日最後一筆。回傳刪除筆數。
+
+    受影響的滑動統計表會被作廢，下次查詢時依新內容重新建表。
+    """
+    import config
+
+    retention = (
+        config.SENTIMENT_HISTORY_RETENTION_DAYS
+        if retention_days is None
+        else retention_days
+    )
+    downsample = (
+        config.SENTIMENT_HISTORY_DOWNSAMPLE_DAYS
+        if downsample_after_days is None
+        else downsample_after_days
+    )
+    retention_cutoff = f"-{max(retention, 0)} days"
+    downsample_cutoff = f"-{max(min(downsample, retention), 0)} days"
+
+    conn = None
+    try:
+        conn = sqlite3.connect(config.DB_NAME)
         cursor = conn.cursor()
         cursor.execute(
             """
-            SELECT value FROM sentiment_history
-            WHERE symbol = ? AND indicator = ?
-            ORDER BY timestamp DESC LIMIT 100
-        """,
-            (symbol, indicator),
+            SELECT DISTINCT symbol, indicator FROM sentiment_history
+            WHERE timestamp < datetime('now', ?)
+            """,
+            (downsample_cutoff,),
         )
-        values = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        affected = cursor.fetchall()
+        if not affected:
+            return 0
 
-        if not values:
-            return 50.0  # 預設中值
+        cursor.execute(
+            "DELETE FROM sentiment_history WHERE timestamp < datetime('now', ?)",
+            (retention_cutoff,),
+        )
+        deleted = max(cursor.rowcount, 0)
+        cursor.execute(
+            """
+            DELETE FROM sentiment_history
+            WHERE timestamp < datetime('now', :cutoff)
+              AND id NOT IN (
+                SELECT MAX(id) FROM sentiment_history
+                WHERE timestamp < datetime('now', :cutoff)
+                GROUP BY symbol, indicator, date(timestamp)
+              )
+            """,
+            {"cutoff": downsample_cutoff},
+        )
+        deleted += max(cursor.rowcount, 0)
+        conn.commit()
+    finally:
+        if conn:
+            conn.close()
 
-        count = sum(1 for v in values if v < current_value)
-        return (count / len(values)) * 100
-    except Exception:
-        return 50.0
+    if deleted:
+        for symbol, indicator in affected:
+            indicator_stats.invalidate(symbol, indicator)
+    return deleted
 
 
 def get_last_stored_iv(symbol: str) -> Optional[float]:
@@ -195,5 +277,6 @@ async def save_historical_iv(symbol: str, iv: float, date_str: str) -> Any:
             await DatabaseWriteQueue.put_task(
                 "save_historical_iv", (symbol, iv, date_str)
             )
+        indicator_stats.record(symbol, HISTORICAL_IV, iv, key=date_str)
     except Exception as e:
         logger.error(f"儲存歷史 IV 失敗: {e}")
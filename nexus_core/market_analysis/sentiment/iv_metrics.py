@@ -1,8 +1,8 @@
 from typing import Any
 from .history_storage import get_last_stored_iv, save_historical_iv
 import logging
-import pandas as pd
 import numpy as np
+import pandas as pd
 import sqlite3  # noqa: F401
 import time
 import math
@@ -13,9 +13,11 @@ from typing import Literal
 from services import market_data_service
 from models.quant import IVMetrics
 from market_time import is_market_open
+from market_analysis.chain_arrays import weighted_atm_iv
 
 
 from .cache import _iv_cache, _IV_CACHE_TTL
+from .rolling_stats import HISTORICAL_IV, indicator_stats
 
 
 logger = logging.getLogger(__name__)
@@ -287,6 +289,43 @@ async def _calculate_iv_term_structure(
         return None, None
 
 
+async def _load_hv20_series(symbol: str) -> pd.Series:
+    """1y 日線的 20 日歷史波動率 (年化)，已去除 NaN。"""
+    df_hist = await market_data_service.get_history_df(symbol, period="1y")
+    if df_hist.empty:
+        return pd.Series(dtype=float)
+    log_ret = np.log(df_hist["Close"] / df_hist["Close"].shift(1))
+    return (log_ret.rolling(window=20).std() * np.sqrt(252)).dropna()
+
+
+async def _load_iv_history_map(symbol: str) -> dict[str, float]:
+    """IV 排名視窗的原始資料：1y HV_20 代理值，再以 DB 最近 252 筆實際 IV 覆蓋同日數值。"""
+    db_ivs = {}
+    try:
+        from database.connection import get_read_connection
+
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT date, iv FROM historical_iv WHERE symbol = ? ORDER BY date DESC LIMIT 252",
+            (symbol,),
+        )
+        db_rows = cursor.fetchall()
+        conn.close()
+        db_ivs = {row[0]: row[1] for row in db_rows}
+    except Exception as e:
+        logger.error(f"讀取資料庫歷史 IV 失敗: {e}")
+
+    history_map: dict[str, float] = {}
+    hv_20 = await _load_hv20_series(symbol)
+    if not hv_20.empty:
+        history_map = dict(
+            zip(hv_20.index.strftime("%Y-%m-%d"), hv_20.to_numpy(dtype=float).tolist())
+        )
+    history_map.update(db_ivs)
+    return history_map
+
+
 async def fetch_and_calculate_iv_metrics(symbol: str) -> IVMetrics:
     """
     獲取並計算隱含波動率 (IV) 相關指標，包括 IV Rank, IV Percentile, 週預期震盪區間。
@@ -333,7 +372,7 @@ async def fetch_and_calculate_iv_metrics(symbol: str) -> IVMetrics:
                     return cached_val  # type: ignore
 
     # Check SQLite kv_cache next for same-day warm cache
-    from database.cache import get_kv_cache, save_kv_cache
+    from database.cache import DAILY_MARKER_TTL_SEC, get_kv_cache, save_kv_cache
     from datetime import datetime
 
     today_str = datetime.now().strftime("%Y-%m-%d")
@@ -398,31 +437,11 @@ async def fetch_and_calculate_iv_metrics(symbol: str) -> IVMetrics:
                             symbol, expirations[0]
                         )
                         if chain:
-                            all_options = []
-                            for df in [chain.calls, chain.puts]:
-                                if df is not None and not df.empty:
-                                    for _, row in df.iterrows():
-                                        iv_val = float(
-                                            row.get("impliedVolatility", 0.0)
-                                        )
-                                        strike_val = float(row.get("strike", 0.0))
-                                        oi = float(row.get("openInterest", 0.0))
-                                        vol = float(row.get("volume", 0.0))
-                                        if iv_val > 0.01 and strike_val > 0.0:
-                                            distance_pct = (
-                                                abs(strike_val - spot_price)
-                                                / spot_price
-                                            )
-                                            if distance_pct <= 0.20:
-                                                weight = (oi + vol + 1.0) / (
-                                                    distance_pct * 100.0 + 1.0
-                                                )
-                                                all_options.append((iv_val, weight))
-                            if all_options:
-                                total_weight = sum(w for _, w in all_options)
-                                current_iv = (
-                                    sum(iv * w for iv, w in all_options) / total_weight
-                                )
+                            weighted_iv = weighted_atm_iv(
+                                [chain.calls, chain.puts], spot_price
+                            )
+                            if weighted_iv is not None:
+                                current_iv = weighted_iv
                                 iv_source = "LIVE_IV"
                 except Exception as opt_err:
                     logger.warning(
@@ -502,58 +521,19 @@ async def fetch_and_calculate_iv_metrics(symbol: str) -> IVMetrics:
                     f"[{symbol}] Real-time IV missing. Applied 1.4x Event Loading Factor to {iv_source}: {orig:.4f} -> {current_iv:.4f}"
                 )
 
-        # 4. 取得 DB 歷史 IV
-        db_ivs = {}
-        try:
-            from database.connection import get_read_connection
-
-            conn = get_read_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT date, iv FROM historical_iv WHERE symbol = ? ORDER BY date DESC LIMIT 252",
-                (symbol,),
+        # 4~8. IV Rank / IV Percentile：查詢預先維護的滑動統計表。每日第一次呼叫時
+        #      以 DB 實際 IV + 1y HV_20 代理值建表，之後由 save_historical_iv 增量更新
+        if indicator_stats.get(symbol, HISTORICAL_IV, tag=today_str) is None:
+            history_map = await _load_iv_history_map(symbol)
+            indicator_stats.seed(
+                symbol, HISTORICAL_IV, sorted(history_map.items()), tag=today_str
             )
-            db_rows = cursor.fetchall()
-            conn.close()
-            db_ivs = {row[0]: row[1] for row in db_rows}
-        except Exception as e:
-            logger.error(f"讀取資料庫歷史 IV 失敗: {e}")
-
-        # 5. 取得 1y K-line history 做 HV 代理
-        df_hist = await market_data_service.get_history_df(symbol, period="1y")
-        history_map = {}
-        if not df_hist.empty:
-            df_hist["Log_Ret"] = np.log(df_hist["Close"] / df_hist["Close"].shift(1))
-            df_hist["HV_20"] = df_hist["Log_Ret"].rolling(window=20).std() * np.sqrt(
-                252
-            )
-            for dt, row in df_hist.iterrows():
-                date_str = dt.strftime("%Y-%m-%d")
-                if not pd.isna(row["HV_20"]):
-                    history_map[date_str] = float(row["HV_20"])
-
-        # 6. 合併 DB 實際 IV 至 history_map
-        for date_str, db_iv in db_ivs.items():
-            history_map[date_str] = db_iv
-
-        # 確保今天的值存在
-        history_map[today_str] = current_iv
-
-        history_values = list(history_map.values())
-        if not history_values:
-            history_values = [current_iv]
-
-        # 7. 計算 IV Rank
-        low_iv = min(history_values)
-        high_iv = max(history_values)
-        if high_iv > low_iv:
-            iv_rank = ((current_iv - low_iv) / (high_iv - low_iv)) * 100.0
-        else:
-            iv_rank = 50.0
 
-        # 8. 計算 IV Percentile
-        lower_count = sum(1 for iv in history_values if iv < current_iv)
-        iv_percentile = (lower_count / len(history_values)) * 100.0
+        # 確保今天的值存在 (可能已套用事件負載因子，與存入 DB 的原始 IV 不同)
+        indicator_stats.record(symbol, HISTORICAL_IV, current_iv, key=today_str)
+        iv_rank, iv_percentile = indicator_stats.lookup(
+            symbol, HISTORICAL_IV, current_iv, tag=today_str
+        ) or (50.0, 0.0)
 
         # 9. 限制範圍 0.0 - 100.0
         iv_rank = max(0.0, min(100.0, iv_rank))
@@ -585,10 +565,9 @@ async def fetch_and_calculate_iv_metrics(symbol: str) -> IVMetrics:
             expected_move_weekly = em_from_iv
         else:
             hv_proxy = 0.0
-            if not df_hist.empty and "HV_20" in df_hist.columns:
-                last_hv = df_hist["HV_20"].dropna()
-                if not last_hv.empty:
-                    hv_proxy = float(last_hv.iloc[-1])
+            last_hv = await _load_hv20_series(symbol)
+            if not last_hv.empty:
+                hv_proxy = float(last_hv.iloc[-1])
             expected_move_weekly = (
                 spot_price * max(hv_proxy, 0.15) * math.sqrt(7.0 / 365.0)
             )
@@ -630,7 +609,12 @@ async def fetch_and_calculate_iv_metrics(symbol: str) -> IVMetrics:
         # 12. 寫入快取
         _iv_cache[symbol] = (metrics, current_time + _IV_CACHE_TTL)
         try:
-            await save_kv_cache(cache_key, metrics.model_dump())
+            await save_kv_cache(
+                cache_key,
+                metrics.model_dump(),
+                ttl_sec=DAILY_MARKER_TTL_SEC,
+                compact=True,
+            )
         except Exception as e:
             logger.warning(f"[{symbol}] Failed to save IVMetrics to kv_cache: {e}")
         return metrics
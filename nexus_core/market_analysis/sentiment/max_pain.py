@@ -2,6 +2,7 @@ from typing import Any
 from .iv_metrics import IVContext, fetch_and_calculate_iv_metrics
 from .history_storage import _trigger_background_cache_clear
 import logging
+import numpy as np
 import pandas as pd
 import sqlite3  # noqa: F401
 import asyncio
@@ -10,6 +11,11 @@ from typing import Dict, Optional
 from services import market_data_service
 from services.market_data_service import BoundedCache
 from market_time import ny_tz
+from market_analysis.chain_arrays import (
+    chain_column,
+    max_pain_strike,
+    split_adjust_chain,
+)
 
 
 _iv_cache = BoundedCache(max_size=500)
@@ -36,10 +42,9 @@ def _current_week_friday() -> date:
     friday = today + timedelta(days=days_ahead)
 
     try:
-        from market_time import nyse_calendar
+        from market_time import session_calendar
 
-        schedule = nyse_calendar.schedule(start_date=friday, end_date=friday)
-        if schedule.empty:
+        if not session_calendar.is_trading_day(friday):
             return friday - timedelta(days=1)
     except Exception as e:
         logger.warning(f"Failed to check NYSE calendar for Friday holiday: {e}")
@@ -113,28 +118,7 @@ def _calculate_max_pain_with_weights(  # type: ignore
         if not strikes:
             strikes = sorted(list(set(calls["strike"]) | set(puts["strike"])))
 
-    # Calculate pains
-    pains = []
-    for s in strikes:
-        call_sub = calls[calls["strike"] < s]
-        call_pain = (
-            (call_sub[weight_key] * (s - call_sub["strike"])).sum()
-            if not call_sub.empty
-            else 0.0
-        )
-
-        put_sub = puts[puts["strike"] > s]
-        put_pain = (
-            (put_sub[weight_key] * (put_sub["strike"] - s)).sum()
-            if not put_sub.empty
-            else 0.0
-        )
-
-        pains.append(call_pain + put_pain)
-
-    if not pains:
-        return 0.0
-    return strikes[pains.index(min(pains))]
+    return max_pain_strike(calls, puts, np.asarray(strikes), weight_key)
 
 
 async def get_unified_max_pain(
@@ -350,7 +334,7 @@ async def _calculate_max_pain_raw(
     計算最大痛點 (Max Pain) 原生邏輯。
     邏輯：尋找讓所有期權買家總價值最小化的標的價格。
     """
-    from database.cache import get_kv_cache, save_kv_cache
+    from database.cache import DAILY_MARKER_TTL_SEC, get_kv_cache, save_kv_cache
     from datetime import datetime
 
     # 0. 預先取得現價，用於快取失效判定
@@ -516,31 +500,13 @@ async def _calculate_max_pain_raw(
                 for df in [calls, puts]:
                     if df.empty:
                         continue
-                    new_strikes = []
-                    new_oi = []
-                    new_vol = []
-                    for _, row in df.iterrows():
-                        k = row["strike"]
-                        oi = row["openInterest"]
-                        vol = row["volume"]
-                        # 若 Strike 明顯偏離現價（超過 2 倍），嘗試以累積因子校準
-                        if k > spot_price * 2.0:
-                            adjusted_k = k / cumulative_factor
-                            # 驗證調整後 Strike 落在合理區間內 (現價 ±100%)
-                            if 0.5 * spot_price <= adjusted_k <= 2.0 * spot_price:
-                                logger.info(
-                                    f"[{symbol}] Split-adj: Strike ${k:.2f} → "
-                                    f"${adjusted_k:.2f} (factor={cumulative_factor:.1f})"
-                                )
-                                k = adjusted_k
-                                oi = oi * cumulative_factor
-                                vol = vol * cumulative_factor
-                        new_strikes.append(k)
-                        new_oi.append(oi)
-                        new_vol.append(vol)
-                    df["strike"] = new_strikes
-                    df["openInterest"] = new_oi
-                    df["volume"] = new_vol
+                    original_strikes = chain_column(df, "strike")
+                    adjusted = split_adjust_chain(df, spot_price, cumulative_factor)
+                    for k in original_strikes[adjusted]:
+                        logger.info(
+                            f"[{symbol}] Split-adj: Strike ${k:.2f} → "
+                            f"${k / cumulative_factor:.2f} (factor={cumulative_factor:.1f})"
+                        )
 
         # 過濾掉 OI 為 0 且 Volume 為 0 的死合約
         calls = calls[(calls["openInterest"] > 0) | (calls["volume"] > 0)]
@@ -701,7 +667,9 @@ async def _calculate_max_pain_raw(
             "is_degraded": is_degraded,
             "circuit_breaker_triggered": 0,
         }
-        await save_kv_cache(cache_key, result)
+        await save_kv_cache(
+            cache_key, result, ttl_sec=DAILY_MARKER_TTL_SEC, compact=True
+        )
         return result
     except Exception as e:
         logger.error(f"[{symbol}] Max Pain 計算失敗: {e}")
@@ -0,0 +1,174 @@
+"""
+market_analysis/sentiment/rolling_stats.py
+
+每個 (symbol, indicator) 的滑動視窗統計表。
+
+IV Rank / IV Percentile 與情緒指標百分位原本每次查詢都重新讀取整段歷史並
+線性掃描。此模組在記憶體中為每個鍵維護「依鍵保存的值 + 排序後的值陣列」：
+寫入路徑 (`save_historical_iv` / `save_sentiment_history`) 以 `bisect.insort`
+增量更新，查詢端的 min / max / rank / percentile 皆為 O(1) 或 O(log n)。
+
+統計表在第一次查詢時由 SQLite 惰性建立 (一次讀取)，之後只靠寫入路徑增量
+維護；`tag` 用來標記建表時的資料版本 (例如 IV 代理值所屬的交易日)，
+版本不符時視同未建立，由呼叫端重新建表。
+"""
+
+import threading
+from bisect import bisect_left, insort
+from itertools import count
+from typing import Hashable, Iterable, Optional
+
+# iv_metrics 的 IV 歷史 (DB 實際 IV + HV_20 代理值) 所使用的指標名稱
+HISTORICAL_IV = "HISTORICAL_IV"
+
+# get_indicator_percentile 原本只取最近 100 筆 sentiment_history
+SENTIMENT_WINDOW = 100
+
+
+class RollingWindowStats:
+    """
+    依鍵 (日期或寫入序號) 保存值的滑動視窗，並同步維護排序後的值陣列。
+
+    同一個鍵再次寫入時覆蓋舊值 (對應 `INSERT OR REPLACE`)；設定 `max_size`
+    時，新鍵超出容量會淘汰最早寫入的鍵。
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size
+        self._values: dict[Hashable, float] = {}
+        self._sorted: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def _discard(self, value: float) -> None:
+        idx = bisect_left(self._sorted, value)
+        if idx < len(self._sorted) and self._sorted[idx] == value:
+            del self._sorted[idx]
+
+    def upsert(self, key: Hashable, value: float) -> None:
+        value = float(value)
+        if value != value:  # NaN 無法排序，直接略過
+            return
+        if key in self._values:
+            self._discard(self._values.pop(key))
+        elif self.max_size is not None and len(self._values) >= self.max_size:
+            oldest = next(iter(self._values))
+            self._discard(self._values.pop(oldest))
+        self._values[key] = value
+        insort(self._sorted, value)
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._sorted[0] if self._sorted else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._sorted[-1] if self._sorted else None
+
+    def rank(self, value: float) -> float:
+        """(value - min) / (max - min) × 100；視窗為空或沒有波動時回傳 50.0。"""
+        if not self._sorted or self._sorted[-1] <= self._sorted[0]:
+            return 50.0
+        low, high = self._sorted[0], self._sorted[-1]
+        return ((value - low) / (high - low)) * 100.0
+
+    def percentile(self, value: float) -> float:
+        """視窗中嚴格小於 value 的比例 × 100；視窗為空時回傳 50.0。"""
+        if not self._sorted:
+            return 50.0
+        return (bisect_left(self._sorted, value) / len(self._sorted)) * 100.0
+
+
+class IndicatorStatsTable:
+    """(symbol, indicator) → RollingWindowStats 的執行緒安全登錄表。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._tables: dict[
+            tuple[str, str], tuple[RollingWindowStats, Optional[str]]
+        ] = {}
+        self._seq = count()
+
+    @staticmethod
+    def _key(symbol: str, indicator: str) -> tuple[str, str]:
+        return symbol.upper(), indicator.upper()
+
+    def get(
+        self, symbol: str, indicator: str, tag: Optional[str] = None
+    ) -> Optional[RollingWindowStats]:
+        """取得已建立的統計表；`tag` 不符 (資料版本過期) 時回傳 None。"""
+        with self._lock:
+            entry = self._tables.get(self._key(symbol, indicator))
+        if entry is None or entry[1] != tag:
+            return None
+        return entry[0]
+
+    def seed(
+        self,
+        symbol: str,
+        indicator: str,
+        items: Iterable[tuple[Hashable, float]],
+        max_size: Optional[int] = None,
+        tag: Optional[str] = None,
+    ) -> RollingWindowStats:
+        """以既有歷史 (由舊到新) 建立統計表，取代同鍵的舊表。"""
+        stats = RollingWindowStats(max_size=max_size)
+        for key, value in items:
+            stats.upsert(key, value)
+        with self._lock:
+            self._tables[self._key(symbol, indicator)] = (stats, tag)
+        return stats
+
+    def seed_sequence(
+        self,
+        symbol: str,
+        indicator: str,
+        values: Iterable[float],
+        max_size: Optional[int] = None,
+    ) -> RollingWindowStats:
+        """以寫入序號為鍵建立統計表 (適用沒有自然鍵、只依時間先後的序列)。"""
+        return self.seed(
+            symbol,
+            indicator,
+            ((next(self._seq), v) for v in values),
+            max_size=max_size,
+        )
+
+    def record(
+        self, symbol: str, indicator: str, value: float, key: Optional[Hashable] = None
+    ) -> None:
+        """
+        寫入路徑的增量更新；統計表尚未建立時不做任何事 (下次查詢時會從 DB 建表，
+        自然包含這筆資料)。未提供 `key` 時以寫入序號附加到視窗尾端。
+        """
+        with self._lock:
+            entry = self._tables.get(self._key(symbol, indicator))
+            if entry is None:
+                return
+            entry[0].upsert(next(self._seq) if key is None else key, value)
+
+    def lookup(
+        self, symbol: str, indicator: str, value: float, tag: Optional[str] = None
+    ) -> Optional[tuple[float, float]]:
+        """回傳 (rank, percentile)；統計表不存在或 `tag` 不符時回傳 None。"""
+        with self._lock:
+            entry = self._tables.get(self._key(symbol, indicator))
+            if entry is None or entry[1] != tag:
+                return None
+            return entry[0].rank(value), entry[0].percentile(value)
+
+    def invalidate(self, symbol: str, indicator: Optional[str] = None) -> None:
+        with self._lock:
+            for key in list(self._tables):
+                if key[0] == symbol.upper() and (
+                    indicator is None or key[1] == indicator.upper()
+                ):
+                    del self._tables[key]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tables.clear()
+
+
+indicator_stats = IndicatorStatsTable()
@@ -5,7 +5,7 @@ import sqlite3  # noqa: F401
 import asyncio
 from datetime import datetime
 from typing import Dict, Any, List
-from services import market_data_service
+from services import edge_cache_client, market_data_service
 from market_analysis.uoa_telemetry import UOATradeInput, classify_uoa_trade
 from market_analysis.greeks import calculate_greeks
 
@@ -13,6 +13,20 @@ from market_analysis.greeks import calculate_greeks
 logger = logging.getLogger(__name__)
 
 
+def _history_oi_changes(diff: Dict[str, Any] | None) -> Dict[tuple[str, float], int]:
+    """將 edge 期權鏈歷史差異整理為 {(CALL/PUT, 履約價): 24 小時 OI 淨變化}。"""
+    changes: Dict[tuple[str, float], int] = {}
+    if not diff:
+        return changes
+    for side, opt_type in (("calls", "CALL"), ("puts", "PUT")):
+        for row in diff.get(side) or []:
+            try:
+                changes[(opt_type, float(row["strike"]))] = int(row["oi_change"])
+            except (KeyError, TypeError, ValueError):
+                continue
+    return changes
+
+
 async def detect_uoa(
     symbol: str,
     max_expiries: int = 4,
@@ -51,17 +65,27 @@ async def detect_uoa(
         tasks = [
             market_data_service.get_option_chain(symbol, exp) for exp in target_expiries
         ]
-        chains = await asyncio.gather(*tasks, return_exceptions=True)
+        # 同時向 edge 本地期權鏈歷史查詢近 24 小時各履約價的真實 OI 變化 (不觸發抓取)
+        since = edge_cache_client.lookback_start(24.0)
+        diff_tasks = [
+            edge_cache_client.get_option_chain_history_diff(symbol, exp, since)
+            for exp in target_expiries
+        ]
+        chains, oi_diffs = await asyncio.gather(
+            asyncio.gather(*tasks, return_exceptions=True), asyncio.gather(*diff_tasks)
+        )
 
         today_dt = datetime.now().date()
 
         # 3. 處理每個到期日的期權鏈
-        for exp, chain in zip(target_expiries, chains):
+        for exp, chain, oi_diff in zip(target_expiries, chains, oi_diffs):
             if isinstance(chain, BaseException) or not chain:
                 if isinstance(chain, BaseException):
                     logger.error(f"[{symbol}] 獲取到期日 {exp} 期權鏈失敗: {chain}")
                 continue
 
+            oi_changes = _history_oi_changes(oi_diff)
+
             # 效能優化：預先打上標籤，消除內層迴圈中的 O(N) 重複查找
             dfs = []
             total_chain_volume = 0.0
@@ -202,11 +226,11 @@ async def detect_uoa(
                         "BLOCK" if (vol > 1500 and int(vol) % 100 == 0) else "SWEEP"
                     )
 
-                oi_change_net = (
-                    int(row.get("oi_change_net"))
-                    if pd.notna(row.get("oi_change_net"))
-                    else int(vol - oi)
-                )
+                # 優先採用資料源欄位，其次為 edge 歷史的 24 小時 OI 變化，最後以量減倉估算
+                if pd.notna(row.get("oi_change_net")):
+                    oi_change_net = int(row.get("oi_change_net"))
+                else:
+                    oi_change_net = oi_changes.get((opt_type, strike), int(vol - oi))
 
                 trade_input = UOATradeInput(
                     expiry=exp,
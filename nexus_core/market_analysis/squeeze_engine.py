@@ -1,17 +1,41 @@
-from typing import Any, Dict
+from typing import Any, Dict, Mapping, Optional
 import numpy as np
 import pandas as pd
 import logging
+from numpy.lib.stride_tricks import sliding_window_view
+from market_analysis.rolling_regression import rolling_linreg, rolling_linreg_slope
 from services.llm_service import is_memory_safe
 
 logger = logging.getLogger(__name__)
 
 
-def calculate_power_squeeze(df: pd.DataFrame) -> Dict[str, Any]:
+# 批次模式下最後一根 K 線的結果只依賴最後 24 根：SMA/ATR 20 + 動能 4 期回溯，
+# 再加上第一根 True Range 所需的前收盤價
+_BATCH_TAIL = 24
+
+
+def _squeeze_result(is_squeezing: bool, momentum: float) -> Dict[str, Any]:
+    if momentum > 0:
+        direction = "🟢"
+    elif momentum < 0:
+        direction = "🔴"
+    else:
+        direction = "⚪"
+    return {
+        "is_squeezing": is_squeezing,
+        "momentum": momentum,
+        "direction": direction,
+    }
+
+
+def calculate_power_squeeze(
+    df: pd.DataFrame, symbol: Optional[str] = None, interval: str = "1d"
+) -> Dict[str, Any]:
     """
     計算 PowerSqueeze 指標 (PSQ)。
     包含 Bollinger Bands (20, 2.0) 和 Keltner Channels (20, 1.5)。
     is_squeezing: BB 在 KC 內部 (BB Upper < KC Upper 且 BB Lower > KC Lower)。
+    提供 `symbol` 時改走 `indicator_engine` 的增量狀態。
     """
     fallback = {"is_squeezing": False, "momentum": 0.0, "direction": "⚪"}
 
@@ -25,6 +49,17 @@ def calculate_power_squeeze(df: pd.DataFrame) -> Dict[str, Any]:
     if df is None or df.empty or len(df) < 24:
         return fallback
 
+    if symbol:
+        from market_analysis.indicator_engine import indicator_engine
+
+        if indicator_engine.supports(df):
+            try:
+                return indicator_engine.power_squeeze(symbol, interval, df)
+            except Exception as e:
+                logger.warning(
+                    f"[PowerSqueeze] {symbol} 增量計算失敗，改用完整計算: {e}"
+                )
+
     try:
         # Bollinger Bands (20, 2.0)
         sma_20 = df["Close"].rolling(window=20).mean()
@@ -48,15 +83,8 @@ def calculate_power_squeeze(df: pd.DataFrame) -> Dict[str, Any]:
         # 動能 (線性迴歸斜率)
         diff = df["Close"] - sma_20
 
-        # 計算近 4 期的線性迴歸斜率
-        def linreg_slope(y: Any):  # type: ignore
-            if len(y) < 4:
-                return 0.0
-            x = np.arange(len(y))
-            slope, _ = np.polyfit(x, y, 1)
-            return slope
-
-        momentum_series = diff.rolling(window=4).apply(linreg_slope, raw=True)
+        # 計算近 4 期的線性迴歸斜率 (closed-form，與 np.polyfit 結果一致)
+        momentum_series = rolling_linreg_slope(diff, 4)
 
         is_squeezing = bool(is_squeezing_series.iloc[-1])
         momentum = (
@@ -64,20 +92,79 @@ def calculate_power_squeeze(df: pd.DataFrame) -> Dict[str, Any]:
             if not pd.isna(momentum_series.iloc[-1])
             else 0.0
         )
+        return _squeeze_result(is_squeezing, momentum)
+
+    except Exception as e:
+        logger.error(f"[PowerSqueeze] 計算時發生錯誤: {e}")
+        return fallback
+
+
+def calculate_power_squeeze_batch(
+    frames: Mapping[str, pd.DataFrame],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    一次計算多個標的最新一根 K 線的 PowerSqueeze，結果與逐檔呼叫
+    `calculate_power_squeeze(df)` 相同。
+
+    每個標的只取最後 24 根 K 線堆疊成 (symbols × 24) 陣列，布林/肯特納通道
+    與動能迴歸皆以向量化方式整批完成，適合心跳或掃描時大量重新驗證。
+    """
+    fallback = {"is_squeezing": False, "momentum": 0.0, "direction": "⚪"}
+    if not frames:
+        return {}
+
+    if not is_memory_safe():
+        logger.warning(
+            "[PowerSqueeze] 系統記憶體過載 (RAM+Swap >= 85%)，略過批次 PSQ 計算，返回預設值。"
+        )
+        return {sym: dict(fallback) for sym in frames}
 
-        if momentum > 0:
-            direction = "🟢"
-        elif momentum < 0:
-            direction = "🔴"
+    results: Dict[str, Dict[str, Any]] = {}
+    symbols = []
+    for sym, df in frames.items():
+        if df is None or df.empty or len(df) < _BATCH_TAIL:
+            results[sym] = dict(fallback)
         else:
-            direction = "⚪"
+            symbols.append(sym)
+    if not symbols:
+        return results
 
-        return {
-            "is_squeezing": is_squeezing,
-            "momentum": momentum,
-            "direction": direction,
-        }
+    try:
+        tails = [frames[sym].iloc[-_BATCH_TAIL:] for sym in symbols]
+        high = np.vstack([t["High"].to_numpy(dtype=np.float64) for t in tails])
+        low = np.vstack([t["Low"].to_numpy(dtype=np.float64) for t in tails])
+        close = np.vstack([t["Close"].to_numpy(dtype=np.float64) for t in tails])
+
+        # 最後 5 個 20 期視窗 (第 19..23 欄)；diff 只需要最後 4 個
+        close_windows = sliding_window_view(close, 20, axis=1)
+        sma_20 = close_windows.mean(axis=2)
+        std_20 = close_windows.std(axis=2, ddof=1)
+
+        prev_close = close[:, :-1]
+        tr = np.fmax(
+            np.abs(high[:, 1:] - low[:, 1:]),
+            np.fmax(np.abs(high[:, 1:] - prev_close), np.abs(low[:, 1:] - prev_close)),
+        )
+        atr_20 = tr[:, -20:].mean(axis=1)
+
+        sma_last = sma_20[:, -1]
+        std_last = std_20[:, -1]
+        is_squeezing = (sma_last + 2.0 * std_last < sma_last + 1.5 * atr_20) & (
+            sma_last - 2.0 * std_last > sma_last - 1.5 * atr_20
+        )
 
+        diff = close[:, -4:] - sma_20[:, -4:]
+        slope, _ = rolling_linreg(diff, 4)
+        momentum = slope[:, -1]
     except Exception as e:
-        logger.error(f"[PowerSqueeze] 計算時發生錯誤: {e}")
-        return fallback
+        logger.error(f"[PowerSqueeze] 批次計算時發生錯誤: {e}")
+        for sym in symbols:
+            results[sym] = dict(fallback)
+        return results
+
+    for row, sym in enumerate(symbols):
+        m = float(momentum[row])
+        results[sym] = _squeeze_result(
+            bool(is_squeezing[row]), m if not np.isnan(m) else 0.0
+        )
+    return results
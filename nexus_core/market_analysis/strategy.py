@@ -2,10 +2,10 @@ from typing import Any
 import math
 from typing import Optional, Dict
 import pandas as pd
-import pandas_ta as ta  # noqa: F401
 import numpy as np
 import yfinance as yf  # 僅保留用於 option_chain() / options
 from services import market_data_service
+from services.latency_monitor import STAGE_INDICATOR_CALC, timed
 from datetime import datetime
 from config import TARGET_DELTAS, get_vix_tier, VixTier
 from .greeks import calculate_contract_delta, calculate_greeks
@@ -20,12 +20,25 @@ import asyncio
 logger = logging.getLogger(__name__)
 
 
-def _calculate_technical_indicators(df: Any):  # type: ignore
-    """計算技術指標與波動率位階"""
+@timed(STAGE_INDICATOR_CALC)
+def _calculate_technical_indicators(  # type: ignore
+    df: Any, symbol: Optional[str] = None, interval: str = "1d"
+):
+    """計算技術指標與波動率位階。提供 `symbol` 時改走 `indicator_engine`
+    的 (symbol, interval) 增量狀態，只推進新 K 線。"""
     try:
         if df.empty or len(df) < 50:
             return None
 
+        if symbol:
+            from .indicator_engine import indicator_engine
+
+            if indicator_engine.supports(df):
+                try:
+                    return indicator_engine.technical_indicators(symbol, interval, df)
+                except Exception as e:
+                    logger.warning(f"[{symbol}] 指標增量計算失敗，改用完整計算: {e}")
+
         df["Log_Ret"] = np.log(df["Close"] / df["Close"].shift(1))
         df["HV_20"] = df["Log_Ret"].rolling(window=20).std() * np.sqrt(252)
         hv_min = df["HV_20"].min()
@@ -39,6 +52,9 @@ def _calculate_technical_indicators(df: Any):  # type: ignore
             else 0.0
         )
 
+        # pandas_ta 匯入時會連帶載入 numba (~0.4 秒)，只在完整計算路徑才註冊 df.ta
+        import pandas_ta  # noqa: F401
+
         df.ta.rsi(length=14, append=True)
         df.ta.sma(length=20, append=True)
         df.ta.macd(fast=12, slow=26, signal=9, append=True)
@@ -606,11 +622,26 @@ async def evaluate_ema_trend(symbol: str, current_price: float) -> dict:
 
 
 def detect_ema_signals(
-    df: pd.DataFrame, window: int = 21, threshold: float = 0.005
+    df: pd.DataFrame,
+    window: int = 21,
+    threshold: float = 0.005,
+    symbol: Optional[str] = None,
+    interval: str = "1d",
 ) -> Optional[Dict[str, Any]]:
-    """偵測價格對 EMA 的穿透與支撐/壓力測試。"""
+    """偵測價格對 EMA 的穿透與支撐/壓力測試。提供 `symbol` 時改走
+    `indicator_engine` 的增量 EMA 狀態。"""
     if df.empty or len(df) < window + 2:
         return None
+    if symbol:
+        from .indicator_engine import indicator_engine
+
+        if indicator_engine.supports(df):
+            try:
+                return indicator_engine.ema_signal(
+                    symbol, interval, df, window=window, threshold=threshold
+                )
+            except Exception as e:
+                logger.warning(f"[{symbol}] EMA 訊號增量計算失敗，改用完整計算: {e}")
     ema_series = df["Close"].ewm(span=window, adjust=False).mean()
     p_curr, p_prev = df["Close"].iloc[-1], df["Close"].iloc[-2]
     ema_curr, ema_prev = ema_series.iloc[-1], ema_series.iloc[-2]
@@ -717,7 +748,7 @@ async def analyze_symbol(
             _as_awaitable(0.015)
             if is_etf
             else market_data_service.get_dividend_yield(symbol),
-            asyncio.to_thread(_calculate_technical_indicators, df),
+            asyncio.to_thread(_calculate_technical_indicators, df, symbol),
         )
         if indicators is None:
             return None
@@ -5,8 +5,8 @@ import yfinance as yf
 import pandas as pd
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-from py_vollib.black_scholes_merton.greeks.analytical import delta
 from config import RISK_FREE_RATE
+from market_analysis.bsm import delta
 from database.holdings import get_user_holdings
 from database.orders import get_user_active_orders
 from market_analysis.sentiment_engine import SentimentEngine
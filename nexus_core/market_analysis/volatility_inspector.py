@@ -6,13 +6,17 @@ import numpy as np
 import yfinance as yf
 from typing import Dict, Optional, List
 
+from config import INSPECTOR_SCAN_CONCURRENCY
 from services import market_data_service
+from .inspector_scan import InspectorScanStats, scan_symbols
 from .psq_engine import analyze_psq
 from .strategy import evaluate_ema_trend
 from database.user_settings import get_full_user_context
 
 logger = logging.getLogger(__name__)
 
+STAGE_VOL_SCAN = "vol_inspector_scan"
+
 
 class VolatilityInspector:
     """
@@ -22,24 +26,31 @@ class VolatilityInspector:
 
     def __init__(self, bot: Any = None):
         self.bot = bot
+        self.last_scan_stats = InspectorScanStats()
 
     async def run_scan(self, symbols: List[str], user_id: int) -> List[Dict[str, Any]]:
-        """執行波動率優勢掃描"""
-        results = []
+        """執行波動率優勢掃描 (有界併發，順序與輸入一致)"""
         # 使用 to_thread 因為 get_full_user_context 是同步資料庫讀取
         user_ctx = await asyncio.to_thread(get_full_user_context, user_id)
 
-        for sym in symbols:
-            try:
-                report = await self.inspect_symbol(sym, user_ctx)
-                if report and (
-                    report.get("is_opportunity") or report.get("is_high_risk_vol")
-                ):
-                    results.append(report)
-            except Exception as e:
-                logger.error(f"IV 掃描標的 {sym} 失敗: {e}")
-            await asyncio.sleep(0.5)
-        return results
+        async def _inspect(sym: str) -> Optional[Dict[str, Any]]:
+            return await self.inspect_symbol(sym, user_ctx)
+
+        stats = InspectorScanStats()
+        reports = await scan_symbols(
+            symbols,
+            _inspect,
+            INSPECTOR_SCAN_CONCURRENCY,
+            STAGE_VOL_SCAN,
+            "IV",
+            stats,
+        )
+        self.last_scan_stats = stats
+        return [
+            r
+            for r in reports
+            if r and (r.get("is_opportunity") or r.get("is_high_risk_vol"))
+        ]
 
     async def inspect_symbol(
         self, symbol: str, user_ctx: Any
@@ -113,7 +124,7 @@ class VolatilityInspector:
         # 6. Momentum Alignment (EMA / PSQ)
         price = info.get("currentPrice") or df["Close"].iloc[-1]
         ema_eval = await evaluate_ema_trend(symbol, price)
-        psq_res = analyze_psq(df)
+        psq_res = analyze_psq(df, symbol=symbol)
 
         has_momentum = (ema_eval["trend"] == "BULLISH_STRONG") or (
             psq_res and psq_res.signal_direction == "Long"
@@ -1,6 +1,9 @@
-from typing import Any
+from typing import Any, Optional
 import pandas_market_calendars as mcal
-from datetime import datetime, timedelta, timezone
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
 from zoneinfo import ZoneInfo
 import logging
 
@@ -9,6 +12,164 @@ logger = logging.getLogger(__name__)
 ny_tz = ZoneInfo("America/New_York")
 nyse_calendar = mcal.get_calendar("NYSE")
 
+# 延長交易時段：盤前 04:00 開始，盤後持續至收盤後 4 小時 (提前收市日為 17:00)
+PRE_MARKET_START = time(4, 0)
+POST_MARKET_HOURS = 4
+REGULAR_CLOSE = time(16, 0)
+
+
+@dataclass(frozen=True)
+class MarketSession:
+    """單一交易日的常規時段 (美東時區)。"""
+
+    day: date
+    market_open: datetime
+    market_close: datetime
+
+    @property
+    def is_early_close(self) -> bool:
+        return self.market_close.time() < REGULAR_CLOSE
+
+    @property
+    def pre_market_open(self) -> datetime:
+        return datetime.combine(self.day, PRE_MARKET_START, tzinfo=ny_tz)
+
+    @property
+    def post_market_close(self) -> datetime:
+        return self.market_close + timedelta(hours=POST_MARKET_HOURS)
+
+
+class SessionCalendar:
+    """
+    預先展開的 NYSE 交易日表。
+
+    每天第一次查詢時以一次 `nyse_calendar.schedule()` 展開「過去 7 天 ~ 未來
+    120 天」的交易時段，轉成純 Python 的日期/時間列表；之後的開盤判斷、
+    時段 (phase) 與下一次開收盤查詢都只做 dict 查詢或 bisect，不經過 pandas。
+    """
+
+    PAST_DAYS = 7
+    FUTURE_DAYS = 120
+
+    def __init__(self, calendar: Any = None) -> None:
+        self._calendar = calendar if calendar is not None else nyse_calendar
+        self._lock = threading.Lock()
+        self._built_for: Optional[date] = None
+        # (視窗起日, 視窗迄日, 交易日列表, 時段列表, 日期索引)，整組替換以免讀到半套資料
+        self._table: tuple[
+            date, date, list[date], list[MarketSession], dict[date, MarketSession]
+        ] = (date.min, date.min, [], [], {})
+
+    def _load(self, start: date, end: date) -> list[MarketSession]:
+        schedule = self._calendar.schedule(start_date=start, end_date=end)
+        return [
+            MarketSession(
+                day=day.date(),
+                market_open=opened.tz_convert(ny_tz).to_pydatetime(),
+                market_close=closed.tz_convert(ny_tz).to_pydatetime(),
+            )
+            for day, opened, closed in zip(
+                schedule.index, schedule["market_open"], schedule["market_close"]
+            )
+        ]
+
+    def _build(self, today: date) -> None:
+        start = today - timedelta(days=self.PAST_DAYS)
+        end = today + timedelta(days=self.FUTURE_DAYS)
+        sessions = self._load(start, end)
+        self._table = (
+            start,
+            end,
+            [s.day for s in sessions],
+            sessions,
+            {s.day: s for s in sessions},
+        )
+        self._built_for = today
+        logger.debug(
+            f"[SessionCalendar] 已展開 {len(sessions)} 個交易日 ({today} 起算)"
+        )
+
+    def _ensure(self, today: date) -> None:
+        if self._built_for == today:
+            return
+        with self._lock:
+            if self._built_for != today:
+                self._build(today)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._built_for = None
+
+    def session_on(self, day: date) -> Optional[MarketSession]:
+        """指定日期的交易時段；休市日回傳 None。"""
+        sessions = self.sessions_between(day, day)
+        return sessions[0] if sessions else None
+
+    def is_trading_day(self, day: Optional[date] = None) -> bool:
+        return self.session_on(day or datetime.now(ny_tz).date()) is not None
+
+    def is_early_close(self, day: Optional[date] = None) -> bool:
+        session = self.session_on(day or datetime.now(ny_tz).date())
+        return session is not None and session.is_early_close
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        now_ny = now.astimezone(ny_tz) if now else datetime.now(ny_tz)
+        session = self.session_on(now_ny.date())
+        return (
+            session is not None
+            and session.market_open <= now_ny <= session.market_close
+        )
+
+    def phase(self, now: Optional[datetime] = None) -> str:
+        """目前交易時段："pre" / "regular" / "post" / "closed"。"""
+        now_ny = now.astimezone(ny_tz) if now else datetime.now(ny_tz)
+        session = self.session_on(now_ny.date())
+        if session is None:
+            return "closed"
+        if session.market_open <= now_ny <= session.market_close:
+            return "regular"
+        if session.pre_market_open <= now_ny < session.market_open:
+            return "pre"
+        if session.market_close < now_ny < session.post_market_close:
+            return "post"
+        return "closed"
+
+    def sessions_between(self, start: date, end: date) -> list[MarketSession]:
+        """[start, end] 區間內的交易時段 (依日期排序)；超出預展開視窗時直接查詢行事曆。"""
+        self._ensure(datetime.now(ny_tz).date())
+        window_start, window_end, days, sessions, by_day = self._table
+        if start < window_start or end > window_end:
+            return self._load(start, end)
+        if start == end:
+            session = by_day.get(start)
+            return [session] if session else []
+        lo = bisect_left(days, start)
+        hi = bisect_left(days, end + timedelta(days=1))
+        return sessions[lo:hi]
+
+    def next_open(self, now: Optional[datetime] = None) -> Optional[datetime]:
+        """下一次 (或正在進行中的今天之後的) 開盤時間。"""
+        now_ny = now.astimezone(ny_tz) if now else datetime.now(ny_tz)
+        for session in self.sessions_between(
+            now_ny.date(), now_ny.date() + timedelta(days=14)
+        ):
+            if session.market_open > now_ny:
+                return session.market_open
+        return None
+
+    def next_close(self, now: Optional[datetime] = None) -> Optional[datetime]:
+        """下一次收盤時間 (盤中即為今天的收盤)。"""
+        now_ny = now.astimezone(ny_tz) if now else datetime.now(ny_tz)
+        for session in self.sessions_between(
+            now_ny.date(), now_ny.date() + timedelta(days=14)
+        ):
+            if session.market_close > now_ny:
+                return session.market_close
+        return None
+
+
+session_calendar = SessionCalendar()
+
 
 def get_next_market_target_time(
     reference: str = "open", offset_minutes: int = 0, skip_today: bool = False
@@ -19,25 +180,12 @@ def get_next_market_target_time(
     # 如果指定跳過今天，則從明天開始找
     start_search = now.date() + timedelta(days=1) if skip_today else now.date()
     end_date = now.date() + timedelta(days=14)
-    schedule = nyse_calendar.schedule(start_date=start_search, end_date=end_date)
 
-    if schedule.empty:
-        return None
-
-    for index, row in schedule.iterrows():
-        if reference == "open":
-            raw_target = row["market_open"].to_pydatetime()
-        else:
-            raw_target = row["market_close"].to_pydatetime()
-
-        target_utc: datetime = raw_target
-        # Ensure target_utc is timezone-aware (UTC)
-        if target_utc.tzinfo is None:
-            target_utc = target_utc.replace(tzinfo=timezone.utc)
-
-        target_ny: datetime = target_utc.astimezone(ny_tz) + timedelta(
-            minutes=offset_minutes
+    for session in session_calendar.sessions_between(start_search, end_date):
+        raw_target = (
+            session.market_open if reference == "open" else session.market_close
         )
+        target_ny = raw_target + timedelta(minutes=offset_minutes)
 
         if target_ny > (now - timedelta(seconds=1)):
             logger.info(f"Next market {reference} target: {target_ny}")
@@ -59,20 +207,4 @@ def is_market_open() -> Any:
     判斷當下這一秒，美股是否正在常規交易時間內。
     (精準避開週末、國定假日，以及如感恩節前夕的提前收市)
     """
-    # 1. 取得當下的美東時間
-    now_ny = datetime.now(ny_tz)
-
-    # 2. 查詢「今天」的紐交所行事曆
-    schedule = nyse_calendar.schedule(start_date=now_ny.date(), end_date=now_ny.date())
-
-    # 3. 如果回傳為空，代表今天是週末或國定假日休市
-    if schedule.empty:
-        return False
-
-    # 4. 取得今天的確切開盤與收盤時間，並強制轉換為美東時區
-    row = schedule.iloc[0]
-    market_open = row["market_open"].tz_convert(ny_tz).to_pydatetime()
-    market_close = row["market_close"].tz_convert(ny_tz).to_pydatetime()
-
-    # 5. 判斷當下時間是否落在開盤與收盤之間
-    return market_open <= now_ny <= market_close
+    return session_calendar.is_open()
@@ -2,12 +2,17 @@
 AlertFilter — 條件式訊號降噪引擎 (Async)。
 """
 
+import asyncio
 import time
 import logging
 from dataclasses import dataclass
+from datetime import datetime
 from enum import Enum
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, Iterable, List, Tuple, Optional
 
+import pandas as pd
+
+from market_time import ny_tz, session_calendar
 from services import market_data_service
 
 logger = logging.getLogger(__name__)
@@ -60,32 +65,131 @@ def is_whipsaw_noise(
     return False
 
 
-async def validate_mtf_trend(symbol: str, trigger_sig: Dict[str, Any]) -> MTFResult:
-    """執行多週期趨勢確認邏輯 (Trend Resonance)。"""
-    df_daily = await market_data_service.get_history_df(
-        symbol, interval="1d", period="60d"
+ANCHOR_EMA_SPAN = 21
+ANCHOR_MIN_BARS = 22
+ANCHOR_PERIOD = "60d"
+
+# 日線錨定趨勢快取：symbol -> (趨勢；資料不足為 None, 到期 epoch 秒 = 下一根日 K 收盤)
+_anchor_cache: Dict[str, Tuple[Optional[TrendState], float]] = {}
+
+
+def clear_anchor_cache() -> None:
+    _anchor_cache.clear()
+
+
+def _next_daily_close_ts(now: float) -> float:
+    close = session_calendar.next_close(datetime.fromtimestamp(now, ny_tz))
+    return close.timestamp() if close is not None else now + 6 * 3600
+
+
+def compute_anchor_trends(closes: pd.DataFrame) -> Dict[str, Optional[TrendState]]:
+    """
+    以共用價格矩陣 (列 = 日期、欄 = 標的) 一次計算所有標的的日線 EMA21 錨定趨勢。
+    `ignore_na=True` 讓各欄跳過彼此日期不對齊的缺值，結果與逐檔計算一致；
+    有效 K 棒不足 ANCHOR_MIN_BARS 的標的回傳 None。
+    """
+    if closes.empty:
+        return {}
+    ema = closes.ewm(span=ANCHOR_EMA_SPAN, adjust=False, ignore_na=True).mean()
+    last_price = closes.ffill().iloc[-1]
+    last_ema = ema.ffill().iloc[-1]
+    enough = closes.notna().sum() >= ANCHOR_MIN_BARS
+    bullish = last_price > last_ema
+    return {
+        str(sym): (
+            (TrendState.BULLISH if bullish[sym] else TrendState.BEARISH)
+            if enough[sym]
+            else None
+        )
+        for sym in closes.columns
+    }
+
+
+async def _load_anchor_trends(
+    symbols: Iterable[str], now: float
+) -> Dict[str, Optional[TrendState]]:
+    """回傳各標的錨定趨勢；未命中快取者每檔只抓一次日線，合併成矩陣後一次計算。"""
+    trends: Dict[str, Optional[TrendState]] = {}
+    missing: List[str] = []
+    for sym in dict.fromkeys(symbols):
+        cached = _anchor_cache.get(sym)
+        if cached is not None and now < cached[1]:
+            trends[sym] = cached[0]
+        else:
+            missing.append(sym)
+    if not missing:
+        return trends
+
+    frames = await asyncio.gather(
+        *(
+            market_data_service.get_history_df(sym, interval="1d", period=ANCHOR_PERIOD)
+            for sym in missing
+        )
     )
-    if df_daily.empty or len(df_daily) < 22:
-        return MTFResult(False, TrendState.NEUTRAL, "NONE", TrendState.NEUTRAL)
-    ema21_daily = df_daily["Close"].ewm(span=21, adjust=False).mean().iloc[-1]
-    price_daily = df_daily["Close"].iloc[-1]
-    anchor_trend = (
-        TrendState.BULLISH if price_daily > ema21_daily else TrendState.BEARISH
+    series = {
+        sym: df["Close"]
+        for sym, df in zip(missing, frames)
+        if not df.empty and "Close" in df
+    }
+    computed = (
+        compute_anchor_trends(pd.DataFrame(series).sort_index()) if series else {}
     )
+    expires_at = _next_daily_close_ts(now)
+    for sym in missing:
+        trend = computed.get(sym)
+        trends[sym] = trend
+        # 抓取失敗 (空資料) 不快取，下一次請求再重試
+        if sym in series:
+            _anchor_cache[sym] = (trend, expires_at)
+    return trends
+
+
+def _mtf_result(anchor: Optional[TrendState], trigger_sig: Dict[str, Any]) -> MTFResult:
+    if anchor is None:
+        return MTFResult(False, TrendState.NEUTRAL, "NONE", TrendState.NEUTRAL)
     trigger_dir = (
         TrendState.BULLISH
         if trigger_sig.get("direction") == "BULLISH"
         else TrendState.BEARISH
     )
-    is_aligned = anchor_trend == trigger_dir
+    is_aligned = anchor == trigger_dir
     return MTFResult(
         is_aligned=is_aligned,
-        anchor_trend=anchor_trend,
+        anchor_trend=anchor,
         trigger_signal=trigger_sig.get("type", "UNKNOWN"),
         confirmed_direction=trigger_dir if is_aligned else TrendState.NEUTRAL,
     )
 
 
+async def confirm_mtf_trends(
+    signals: List[Tuple[str, Dict[str, Any]]],
+) -> List[MTFResult]:
+    """
+    批次多週期趨勢確認：一個週期內所有待確認的 (標的, 觸發訊號) 一次處理，
+    重疊標的只載入一次日線；錨定趨勢快取至下一根日 K 收盤。
+    """
+    anchors = await _load_anchor_trends((sym for sym, _ in signals), time.time())
+    return [_mtf_result(anchors.get(sym), sig) for sym, sig in signals]
+
+
+async def validate_mtf_trend(symbol: str, trigger_sig: Dict[str, Any]) -> MTFResult:
+    """執行多週期趨勢確認邏輯 (Trend Resonance)。"""
+    return (await confirm_mtf_trends([(symbol, trigger_sig)]))[0]
+
+
+def pending_crossover_signals(
+    results: Iterable[Dict[str, Any]],
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """收集掃描結果中所有 CROSSOVER 訊號，供 `confirm_mtf_trends` 一次預先確認。"""
+    return [
+        (result["symbol"], sig)
+        for result in results
+        if result.get("symbol")
+        for sig in result.get("ema_signals", [])
+        if sig.get("type") == "CROSSOVER"
+    ]
+
+
 async def should_send_priority_alert(
     result: Dict[str, Any],
     prev_macro: Optional[Dict[str, Any]] = None,
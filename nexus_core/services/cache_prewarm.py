@@ -0,0 +1,472 @@
+"""
+行情快取存取統計與盤前預熱 (Access-Statistics-Driven Cache Prewarming)。
+
+`market_data_service` 的快取讀取點會回報每個 (標的, 資料種類, 參數) 的存取，
+本模組以指數衰減分數同時反映頻率與新近度，並在盤前依分數排出預熱計畫：
+- 只預熱 TTL 撐得到開盤的資料種類 (歷史 K 線 / SMA / EMA)；15 秒 TTL 的報價不預熱
+- 依記憶體預算貪婪挑選，技術指標隱含的歷史 K 線依賴一併計入預算
+- 長 TTL 的歷史 K 線排在前面，短 TTL 的指標排在後面，整體平均分散到盤前視窗
+- 另外統計每個 key 在開盤後第一次被請求時是否命中快取，用來量化預熱效果
+"""
+
+import asyncio
+import contextvars
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, time as dt_time, timedelta
+from typing import Any, Iterator, Optional
+
+from database.cache_access import (
+    AccessRow,
+    load_cache_access_stats,
+    save_cache_access_stats,
+)
+from market_time import ny_tz
+
+logger = logging.getLogger(__name__)
+
+KIND_QUOTE = "quote"
+KIND_HISTORY = "history"
+KIND_SMA = "sma"
+KIND_EMA = "ema"
+
+# TTL 低於此值的資料種類不預熱 (撐不到開盤)
+MIN_WARMABLE_TTL_SEC = 600
+# 排程順序：TTL 長的先預熱，指標放在視窗尾端以確保開盤時仍新鮮
+_KIND_ORDER = {KIND_HISTORY: 0, KIND_SMA: 1, KIND_EMA: 1}
+
+SCORE_HALF_LIFE_SEC = 3 * 86400
+STATS_RETENTION_SEC = 30 * 86400
+OPENING_WINDOW = (dt_time(9, 30), dt_time(10, 0))
+
+# 每根 K 棒於 DataFrame 中約佔 48 bytes (5 欄 float64 + DatetimeIndex)，另加物件開銷
+_BYTES_PER_BAR = 48
+_FRAME_OVERHEAD_KIB = 2.0
+_SCALAR_ENTRY_KIB = 0.2
+_PERIOD_TRADING_DAYS = {
+    "1d": 1,
+    "2d": 2,
+    "5d": 5,
+    "1mo": 22,
+    "3mo": 63,
+    "6mo": 126,
+    "ytd": 252,
+    "1y": 252,
+    "2y": 504,
+    "5y": 1260,
+    "10y": 2520,
+    "max": 5000,
+}
+_BARS_PER_DAY = {
+    "1m": 390,
+    "2m": 195,
+    "5m": 78,
+    "15m": 26,
+    "30m": 13,
+    "60m": 7,
+    "90m": 5,
+    "1h": 7,
+    "1d": 1,
+    "5d": 0.2,
+    "1wk": 0.2,
+    "1mo": 0.05,
+    "3mo": 0.016,
+}
+
+_tracking_suppressed: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "cache_access_tracking_suppressed", default=False
+)
+
+
+@contextmanager
+def suppress_access_tracking() -> Iterator[None]:
+    """預熱本身觸發的讀取不計入存取統計，避免自我強化。"""
+    token = _tracking_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _tracking_suppressed.reset(token)
+
+
+def history_param(period: str, interval: str) -> str:
+    return f"{period}|{interval}"
+
+
+def estimate_history_kib(period: str, interval: str) -> float:
+    days = _PERIOD_TRADING_DAYS.get(period, 252)
+    bars = days * _BARS_PER_DAY.get(interval, 1)
+    return _FRAME_OVERHEAD_KIB + bars * _BYTES_PER_BAR / 1024
+
+
+def _decayed(score: float, last_access: float, now: float) -> float:
+    return score * math.pow(0.5, max(0.0, now - last_access) / SCORE_HALF_LIFE_SEC)
+
+
+@dataclass
+class OpeningStats:
+    """開盤視窗內每個 key 的首次請求命中情況 (每個交易日重置)。"""
+
+    session_date: str = ""
+    first_hits: int = 0
+    first_misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.first_hits + self.first_misses
+        return self.first_hits / total if total else 0.0
+
+
+class CacheAccessTracker:
+    """執行緒安全的存取統計；讀取點每次呼叫 `record`，定期 `flush` 至 SQLite。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str, str], list[float]] = {}
+        self._dirty: set[tuple[str, str, str]] = set()
+        self._loaded = False
+        self.opening = OpeningStats()
+        self._opening_seen: set[tuple[str, str, str]] = set()
+        # (當日 00:00, 隔日 00:00, 開盤視窗起, 開盤視窗迄)，皆為紐約時間的 epoch 秒
+        self._day_bounds: tuple[float, float, float, float] = (0.0, 0.0, 0.0, 0.0)
+
+    def _opening_window(self, now: float) -> tuple[float, float]:
+        day_start, day_end, open_ts, open_end = self._day_bounds
+        if not day_start <= now < day_end:
+            day = datetime.fromtimestamp(now, ny_tz).date()
+
+            def at(d: Any, t: dt_time) -> float:
+                return datetime.combine(d, t, tzinfo=ny_tz).timestamp()
+
+            self._day_bounds = (
+                at(day, dt_time(0, 0)),
+                at(day + timedelta(days=1), dt_time(0, 0)),
+                at(day, OPENING_WINDOW[0]),
+                at(day, OPENING_WINDOW[1]),
+            )
+            if self.opening.session_date != day.isoformat():
+                self.opening = OpeningStats(session_date=day.isoformat())
+                self._opening_seen.clear()
+        return self._day_bounds[2], self._day_bounds[3]
+
+    def record(
+        self,
+        symbol: str,
+        kind: str,
+        param: str = "",
+        hit: bool = False,
+        now: Optional[float] = None,
+    ) -> None:
+        if _tracking_suppressed.get():
+            return
+        now = time.time() if now is None else now
+        key = (symbol, kind, param)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = [1.0, now]
+            else:
+                entry[0] = _decayed(entry[0], entry[1], now) + 1.0
+                entry[1] = now
+            self._dirty.add(key)
+
+            open_ts, open_end = self._opening_window(now)
+            if open_ts <= now < open_end and key not in self._opening_seen:
+                self._opening_seen.add(key)
+                if hit:
+                    self.opening.first_hits += 1
+                else:
+                    self.opening.first_misses += 1
+
+    def rows(self, now: Optional[float] = None) -> list[AccessRow]:
+        """回傳以 `now` 衰減後的 (symbol, kind, param, score, last_access)。"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return [
+                (sym, kind, param, _decayed(score, last, now), last)
+                for (sym, kind, param), (score, last) in self._entries.items()
+            ]
+
+    def load(self) -> int:
+        """啟動時自 SQLite 載入歷史統計；已在記憶體中的 key 會把歷史分數衰減後併入。"""
+        rows = load_cache_access_stats()
+        with self._lock:
+            for sym, kind, param, score, last in rows:
+                key = (sym, kind, param)
+                current = self._entries.get(key)
+                if current is None:
+                    self._entries[key] = [score, last]
+                else:
+                    current[0] += _decayed(score, last, current[1])
+            self._loaded = True
+        return len(rows)
+
+    async def ensure_loaded(self) -> None:
+        if not self._loaded:
+            await asyncio.to_thread(self.load)
+
+    async def flush(self, now: Optional[float] = None) -> int:
+        # 先載入既有統計再寫回，避免以啟動後的局部分數覆蓋歷史資料
+        await self.ensure_loaded()
+        now = time.time() if now is None else now
+        with self._lock:
+            rows: list[AccessRow] = [
+                (sym, kind, param, score, last)
+                for sym, kind, param in self._dirty
+                for score, last in [self._entries[(sym, kind, param)]]
+            ]
+            self._dirty.clear()
+            for key in [
+                k
+                for k, (_, last) in self._entries.items()
+                if last < now - STATS_RETENTION_SEC
+            ]:
+                del self._entries[key]
+        ok = await asyncio.to_thread(
+            save_cache_access_stats, rows, now - STATS_RETENTION_SEC
+        )
+        if not ok:
+            with self._lock:
+                self._dirty.update((r[0], r[1], r[2]) for r in rows)
+            return 0
+        return len(rows)
+
+
+access_tracker = CacheAccessTracker()
+
+
+# ---------------------------------------------------------------------------
+# 預熱計畫
+# ---------------------------------------------------------------------------
+@dataclass(frozen=True)
+class WarmupItem:
+    symbol: str
+    kind: str
+    param: str
+    score: float
+    size_kib: float
+
+
+@dataclass
+class WarmupPlan:
+    items: list[WarmupItem]
+    candidate_score: float
+    skipped_budget: int = 0
+
+    @property
+    def size_kib(self) -> float:
+        return sum(i.size_kib for i in self.items)
+
+
+@dataclass
+class WarmupReport:
+    planned: int
+    warmed: int
+    failed: int
+    skipped_budget: int
+    size_kib: float
+    score_coverage: float
+    duration_sec: float
+    failures: list[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (
+            f"{self.warmed}/{self.planned} 項完成 (失敗 {self.failed}，預算外 {self.skipped_budget})，"
+            f"估計 {self.size_kib / 1024:.1f} MiB，存取分數覆蓋率 {self.score_coverage:.0%}，"
+            f"耗時 {self.duration_sec:.1f}s"
+        )
+
+
+def kind_ttl_sec() -> dict[str, int]:
+    """各資料種類在 market_data_service 中的快取 TTL (秒)，直接引用該模組常數以免兩邊不同步。"""
+    from services.market_data_service import (
+        _EMA_CACHE_TTL,
+        _HISTORY_CACHE_TTL,
+        _QUOTE_CACHE_TTL,
+        _SMA_CACHE_TTL,
+    )
+
+    return {
+        KIND_QUOTE: _QUOTE_CACHE_TTL,
+        KIND_HISTORY: _HISTORY_CACHE_TTL,
+        KIND_SMA: _SMA_CACHE_TTL,
+        KIND_EMA: _EMA_CACHE_TTL,
+    }
+
+
+def _history_dependency(kind: str, param: str) -> Optional[tuple[str, str]]:
+    from services.market_data_service import ema_history_period, sma_history_period
+
+    try:
+        window = int(param)
+    except ValueError:
+        return None
+    if kind == KIND_SMA:
+        return sma_history_period(window), "1d"
+    if kind == KIND_EMA:
+        return ema_history_period(window), "1d"
+    return None
+
+
+def build_warmup_plan(
+    rows: list[AccessRow],
+    budget_kib: float,
+    max_items: int,
+    min_score: float = 0.05,
+) -> WarmupPlan:
+    """
+    依衰減分數由高到低貪婪挑選，直到記憶體預算或項目上限用盡。
+    指標項目若其歷史 K 線尚未入選，會連同依賴一起計入預算 (依賴本身分數為 0)。
+    """
+    ttl_by_kind = kind_ttl_sec()
+    candidates = sorted(
+        (
+            r
+            for r in rows
+            if ttl_by_kind.get(r[1], 0) >= MIN_WARMABLE_TTL_SEC and r[3] >= min_score
+        ),
+        key=lambda r: r[3],
+        reverse=True,
+    )
+    chosen: dict[tuple[str, str, str], WarmupItem] = {}
+    used_kib = 0.0
+    skipped = 0
+
+    for symbol, kind, param, score, _ in candidates:
+        key = (symbol, kind, param)
+        if kind == KIND_HISTORY:
+            period, _, interval = param.partition("|")
+            new = [
+                WarmupItem(
+                    symbol,
+                    kind,
+                    param,
+                    score,
+                    estimate_history_kib(period, interval or "1d"),
+                )
+            ]
+            if key in chosen:
+                # 先前以依賴身分入選，補上它自己的分數
+                chosen[key] = new[0]
+                continue
+        else:
+            new = [WarmupItem(symbol, kind, param, score, _SCALAR_ENTRY_KIB)]
+            dep = _history_dependency(kind, param)
+            if dep is not None:
+                dep_key = (symbol, KIND_HISTORY, history_param(*dep))
+                if dep_key not in chosen:
+                    new.insert(
+                        0,
+                        WarmupItem(
+                            symbol,
+                            KIND_HISTORY,
+                            dep_key[2],
+                            0.0,
+                            estimate_history_kib(*dep),
+                        ),
+                    )
+
+        cost = sum(i.size_kib for i in new)
+        if used_kib + cost > budget_kib or len(chosen) + len(new) > max_items:
+            skipped += 1
+            continue
+        used_kib += cost
+        for item in new:
+            chosen[(item.symbol, item.kind, item.param)] = item
+
+    items = sorted(
+        chosen.values(), key=lambda i: (_KIND_ORDER.get(i.kind, 9), -i.score)
+    )
+    return WarmupPlan(
+        items=items,
+        candidate_score=sum(r[3] for r in candidates),
+        skipped_budget=skipped,
+    )
+
+
+async def _warm_item(item: WarmupItem) -> None:
+    from services import market_data_service as mds
+
+    if item.kind == KIND_HISTORY:
+        period, _, interval = item.param.partition("|")
+        df = await mds.get_history_df(
+            item.symbol, period=period, interval=interval or "1d"
+        )
+        if df.empty:
+            raise ValueError("empty history")
+    elif item.kind == KIND_SMA:
+        if await mds.get_sma(item.symbol, int(item.param)) is None:
+            raise ValueError("no SMA value")
+    elif item.kind == KIND_EMA:
+        if await mds.get_ema(item.symbol, int(item.param)) is None:
+            raise ValueError("no EMA value")
+
+
+async def execute_warmup_plan(
+    plan: WarmupPlan, spread_sec: float, concurrency: int
+) -> WarmupReport:
+    """
+    依計畫順序在 `spread_sec` 內平均排程各項目的啟動時間，並以 `concurrency`
+    限制同時進行中的抓取數量；預熱期間的讀取不計入存取統計。
+    """
+    started = time.monotonic()
+    items = plan.items
+    pace = spread_sec / len(items) if items else 0.0
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    failures: list[str] = []
+    warmed_score = 0.0
+    warmed = 0
+
+    async def run(idx: int, item: WarmupItem) -> None:
+        nonlocal warmed, warmed_score
+        delay = started + idx * pace - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with semaphore:
+            try:
+                with suppress_access_tracking():
+                    await _warm_item(item)
+            except Exception as e:
+                failures.append(f"{item.symbol}:{item.kind}:{item.param} ({e})")
+                return
+        warmed += 1
+        warmed_score += item.score
+
+    await asyncio.gather(*(run(i, item) for i, item in enumerate(items)))
+
+    return WarmupReport(
+        planned=len(items),
+        warmed=warmed,
+        failed=len(failures),
+        skipped_budget=plan.skipped_budget,
+        size_kib=plan.size_kib,
+        score_coverage=(
+            warmed_score / plan.candidate_score if plan.candidate_score else 0.0
+        ),
+        duration_sec=time.monotonic() - started,
+        failures=failures,
+    )
+
+
+def seed_rows(symbols: list[str], now: float) -> list[AccessRow]:
+    """冷啟動 (尚無統計) 時沿用舊有預熱組合：SMA200 與 EMA8/21。"""
+    rows: list[AccessRow] = []
+    for rank, sym in enumerate(symbols):
+        weight = 1.0 / (rank + 1)
+        rows.append((sym, KIND_SMA, "200", weight, now))
+        rows.append((sym, KIND_EMA, "8", weight, now))
+        rows.append((sym, KIND_EMA, "21", weight, now))
+    return rows
+
+
+def warmup_status() -> dict[str, Any]:
+    opening = access_tracker.opening
+    return {
+        "session_date": opening.session_date,
+        "opening_first_hits": opening.first_hits,
+        "opening_first_misses": opening.first_misses,
+        "opening_hit_rate": opening.hit_rate,
+    }
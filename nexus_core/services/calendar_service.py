@@ -1,12 +1,16 @@
 import asyncio
+import bisect
 import logging
-from datetime import date, datetime, timedelta
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
 from typing import List, Optional, Union, Tuple, Any
 from zoneinfo import ZoneInfo
 
 from pydantic import BaseModel, field_validator
 from database.calendar_cache import (
     get_cached_earnings,
+    get_cached_earnings_batch,
     get_macro_events_between,
     get_macro_month_status,
     replace_macro_month_events,
@@ -14,6 +18,7 @@ from database.calendar_cache import (
 )
 from services import market_data_service
 from services.market_data_service import BoundedCache
+from services.single_flight import SingleFlightManager
 
 
 ny_tz = ZoneInfo("America/New_York")
@@ -84,6 +89,35 @@ class EconomicEventList(list):
     is_fallback: bool = False
 
 
+# 記憶體內月份分片的存活時間：到期後重新確認 SQLite 月份快取狀態並重建索引；
+# 來源 API 失敗 (沿用舊快取) 的分片較快重試
+_MACRO_SHARD_TTL_SEC = 3600.0
+_MACRO_FALLBACK_RETRY_SEC = 900.0
+
+
+@dataclass
+class _MacroMonthShard:
+    """單一月份已解析的宏觀事件，`times` (UTC epoch) 遞增排序並與 `rows` 平行對應。"""
+
+    times: list[float]
+    rows: list[dict[str, Any]]
+    is_fallback: bool
+    expires_at: float  # time.monotonic()
+
+    def between(self, start_ts: float, end_ts: float) -> list[dict[str, Any]]:
+        """時間落在 [start_ts, end_ts) 的事件列 (二分搜尋區間)。"""
+        lo = bisect.bisect_left(self.times, start_ts)
+        hi = bisect.bisect_left(self.times, end_ts)
+        return self.rows[lo:hi]
+
+
+def _event_epoch(raw_time: str) -> float:
+    parsed = datetime.fromisoformat(raw_time.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return float(parsed.timestamp())
+
+
 class CalendarService:
     """
     Service for monitoring major economic events (CPI, FOMC) and equity earnings.
@@ -91,8 +125,8 @@ class CalendarService:
     """
 
     def __init__(self) -> None:
-        # LRU Bounded Cache with 500 entries
-        self._economic_cache = BoundedCache(max_size=500)
+        # 宏觀事件以月份分片保存已解析、依時間排序的索引；財報日為 LRU Bounded Cache
+        self._macro_shards: dict[str, _MacroMonthShard] = {}
         self._earnings_cache = BoundedCache(max_size=500)
         self._macro_cache_hours = 24
         self._earnings_cache_hours = 24
@@ -105,6 +139,11 @@ class CalendarService:
             "Employment Situation",
         ]
 
+    def clear(self) -> None:
+        """清除記憶體內的月份分片索引與財報日快取 (SQLite 內容保留)。"""
+        self._macro_shards.clear()
+        self._earnings_cache.clear()
+
     def _is_timestamp_fresh(self, raw_ts: Optional[str], max_age_hours: int) -> bool:
         if not raw_ts:
             return False
@@ -167,7 +206,21 @@ class CalendarService:
         Returns a tuple: (success: bool, is_fallback: bool)
         - success: True if fetch succeeded or if existing cache was fresh.
         - is_fallback: True if fetch failed but we fell back to existing cache.
+
+        同一月份 (相同刷新條件) 的並行請求以 SingleFlight 合併為一次載入。
         """
+        result: Tuple[bool, bool] = await SingleFlightManager.run(
+            f"calendar:macro:{month_key}:{int(force_fresh)}:{int(force_fetch)}",
+            self._load_macro_month,
+            month_key,
+            force_fresh,
+            force_fetch,
+        )
+        return result
+
+    async def _load_macro_month(
+        self, month_key: str, force_fresh: bool, force_fetch: bool
+    ) -> Tuple[bool, bool]:
         status = get_macro_month_status(month_key)
         if status and not force_fetch:
             if not force_fresh or self._is_timestamp_fresh(
@@ -242,6 +295,7 @@ class CalendarService:
         # SWR: Only replace cache if scraper explicitly returned a valid non-empty list of events
         if api_success and len(high_impact) > 0:
             replace_macro_month_events(month_key, high_impact)
+            self._macro_shards.pop(month_key, None)
             return True, False
         else:
             # Fallback to existing SQLite cached events (if they exist)
@@ -274,7 +328,7 @@ class CalendarService:
             month_keys.append(cursor.strftime("%Y-%m"))
 
         if force_fetch:
-            self._economic_cache.clear()
+            self._macro_shards.clear()
 
         await asyncio.gather(
             *(
@@ -283,6 +337,74 @@ class CalendarService:
             )
         )
 
+    async def _build_macro_shard(
+        self, month_key: str, force_fresh: bool
+    ) -> _MacroMonthShard:
+        _, is_fallback = await self._ensure_macro_month_cached(
+            month_key, force_fresh=force_fresh
+        )
+        indexed: list[tuple[float, dict[str, Any]]] = []
+        for row in get_macro_events_between(*self._month_bounds(month_key)):
+            try:
+                indexed.append((_event_epoch(str(row.get("event_time", ""))), row))
+            except ValueError:
+                logger.warning(f"Skipping malformed economic event time: {row}")
+        indexed.sort(key=lambda item: item[0])
+        ttl = _MACRO_FALLBACK_RETRY_SEC if is_fallback else _MACRO_SHARD_TTL_SEC
+        return _MacroMonthShard(
+            times=[ts for ts, _ in indexed],
+            rows=[row for _, row in indexed],
+            is_fallback=is_fallback,
+            expires_at=time.monotonic() + ttl,
+        )
+
+    async def _macro_month_shard(self, month_key: str) -> _MacroMonthShard:
+        shard = self._macro_shards.get(month_key)
+        if shard is not None and time.monotonic() < shard.expires_at:
+            return shard
+        # 冷啟動：SQLite 已有該月份快取時直接沿用，不等待逾期檢查
+        force_fresh = self._cold_start_complete
+        built: _MacroMonthShard = await SingleFlightManager.run(
+            f"calendar:macro_shard:{month_key}:{int(force_fresh)}",
+            self._build_macro_shard,
+            month_key,
+            force_fresh,
+        )
+        self._macro_shards[month_key] = built
+        return built
+
+    async def _macro_events_between(
+        self, start_ts: float, end_ts: float, month_keys: list[str]
+    ) -> EconomicEventList:
+        """以月份分片索引取出 [start_ts, end_ts) 內的事件，並依當下時間計算 tte。"""
+        shards = await asyncio.gather(
+            *(self._macro_month_shard(key) for key in month_keys)
+        )
+        self._cold_start_complete = True
+
+        now_ts = datetime.now(timezone.utc).timestamp()
+        events = EconomicEventList()
+        events.is_fallback = any(shard.is_fallback for shard in shards)
+        for shard in shards:
+            for event in shard.between(start_ts, end_ts):
+                event_time_str = str(event["event_time"])
+                tte_hours = (_event_epoch(event_time_str) - now_ts) / 3600
+                try:
+                    events.append(
+                        EconomicEvent(
+                            event=str(event.get("event", "")),
+                            time=event_time_str,
+                            impact=str(event.get("impact", "high")),
+                            country=str(event.get("country", "US")),
+                            tte_hours=round(tte_hours, 1),
+                            consensus_value=event.get("consensus_value"),
+                            fedwatch_probability=event.get("fedwatch_probability"),
+                        )
+                    )
+                except Exception as ve:
+                    logger.warning(f"Skipping malformed economic event: {ve}")
+        return events
+
     async def get_high_impact_events(self, days: int = 7) -> List[EconomicEvent]:
         """
         Fetch high-impact economic events from Finnhub within a rolling window.
@@ -290,110 +412,76 @@ class CalendarService:
         now = datetime.now()
         start_day = now.date()
         end_day = (now + timedelta(days=days)).date()
-        start_date = start_day.strftime("%Y-%m-%d")
-        end_date = end_day.strftime("%Y-%m-%d")
-
-        cache_key = f"economic_{start_date}_{end_date}"
-        if cache_key in self._economic_cache:
-            return self._economic_cache[cache_key]  # type: ignore
 
         try:
-            month_keys = self._iter_month_keys(start_day, end_day)
-
-            tasks = []
-            for key in month_keys:
-                force_fresh = True
-                if not self._cold_start_complete:
-                    if get_macro_month_status(key) is not None:
-                        force_fresh = False
-                tasks.append(
-                    self._ensure_macro_month_cached(key, force_fresh=force_fresh)
-                )
-
-            if not self._cold_start_complete:
-                self._cold_start_complete = True
-
-            results = await asyncio.gather(*tasks)
-            any_fallback = any(r[1] for r in results if r is not None)
-
-            raw_events = get_macro_events_between(start_date, end_date)
-
-            high_impact = EconomicEventList()
-            high_impact.is_fallback = any_fallback
-
-            for event in raw_events:
-                event_time_str = str(event.get("event_time", ""))
-                if not event_time_str:
-                    continue
-                event_dt = datetime.fromisoformat(event_time_str.replace("Z", "+00:00"))
-                now_aware = datetime.now(event_dt.tzinfo)
-                tte_hours = (event_dt - now_aware).total_seconds() / 3600
-
-                try:
-                    ev = EconomicEvent(
-                        event=str(event.get("event", "")),
-                        time=event_time_str,
-                        impact=str(event.get("impact", "high")),
-                        country=str(event.get("country", "US")),
-                        tte_hours=round(tte_hours, 1),
-                        consensus_value=event.get("consensus_value"),
-                        fedwatch_probability=event.get("fedwatch_probability"),
-                    )
-                    high_impact.append(ev)
-                except Exception as ve:
-                    logger.warning(f"Skipping malformed economic event: {ve}")
-
-            # Sort all events chronologically
-            high_impact.sort(
-                key=lambda x: datetime.fromisoformat(x.time.replace("Z", "+00:00"))
+            start_ts = _event_epoch(f"{start_day.isoformat()}T00:00:00Z")
+            end_ts = _event_epoch(
+                f"{(end_day + timedelta(days=1)).isoformat()}T00:00:00Z"
+            )
+            return await self._macro_events_between(
+                start_ts, end_ts, self._iter_month_keys(start_day, end_day)
             )
-
-            self._economic_cache[cache_key] = high_impact
-            return high_impact
-
         except Exception as e:
             logger.error(f"Failed to fetch economic calendar: {e}")
             return []
 
-    async def get_symbol_earnings(self, symbol: str) -> Optional[EarningsEvent]:
+    async def get_events_within_hours(self, hours: float) -> List[EconomicEvent]:
         """
-        Get the next earnings date for a specific symbol.
+        未來 `hours` 小時內的高影響宏觀事件，依時間排序；只對涵蓋的月份分片做
+        二分搜尋區間查詢，不掃描整段日期視窗。
         """
-        symbol = symbol.upper()
-        if symbol in self._earnings_cache:
-            return self._earnings_cache[symbol]  # type: ignore
+        now = datetime.now(timezone.utc)
+        horizon = now + timedelta(hours=hours)
+        try:
+            return await self._macro_events_between(
+                now.timestamp(),
+                horizon.timestamp(),
+                self._iter_month_keys(now.date(), horizon.date()),
+            )
+        except Exception as e:
+            logger.error(f"Failed to fetch economic calendar: {e}")
+            return []
 
+    def _earnings_from_cache_row(
+        self, symbol: str, cached: Optional[dict[str, Any]]
+    ) -> Tuple[bool, Optional[EarningsEvent]]:
+        """
+        以 SQLite 財報快取列解析下一次財報日。回傳 (是否可直接採用, 事件)；
+        快取過期或財報日已過時回傳 (False, None)，由呼叫端改向遠端查詢。
+        """
+        if not cached or not (
+            self._is_timestamp_fresh(
+                cached.get("checked_at"), self._earnings_cache_hours
+            )
+            or not self._cold_start_complete
+        ):
+            return False, None
+        cached_date = cached.get("earnings_date")
+        if not cached_date:
+            self._earnings_cache[symbol] = None
+            return True, None
         try:
-            cached = get_cached_earnings(symbol)
-            today = datetime.now(ny_tz).date()
-            if cached and (
-                self._is_timestamp_fresh(
-                    cached.get("checked_at"), self._earnings_cache_hours
-                )
-                or not self._cold_start_complete
-            ):
-                cached_date = cached.get("earnings_date")
-                if not cached_date:
-                    self._earnings_cache[symbol] = None
-                    return None
-                try:
-                    parsed_cached = datetime.strptime(cached_date, "%Y-%m-%d").date()
-                except ValueError:
-                    parsed_cached = None
-
-                if parsed_cached is not None and parsed_cached >= today:
-                    next_dt = datetime.combine(
-                        parsed_cached, datetime.min.time()
-                    ).replace(tzinfo=ny_tz)
-                    tte_hours = (next_dt - datetime.now(ny_tz)).total_seconds() / 3600
-                    earnings_info = EarningsEvent(
-                        symbol=symbol,
-                        date=parsed_cached.strftime("%Y-%m-%d"),
-                        tte_hours=round(tte_hours, 1),
-                    )
-                    self._earnings_cache[symbol] = earnings_info
-                    return earnings_info
+            parsed_cached = datetime.strptime(cached_date, "%Y-%m-%d").date()
+        except ValueError:
+            return False, None
+
+        if parsed_cached < datetime.now(ny_tz).date():
+            return False, None
+        next_dt = datetime.combine(parsed_cached, datetime.min.time()).replace(
+            tzinfo=ny_tz
+        )
+        tte_hours = (next_dt - datetime.now(ny_tz)).total_seconds() / 3600
+        earnings_info = EarningsEvent(
+            symbol=symbol,
+            date=parsed_cached.strftime("%Y-%m-%d"),
+            tte_hours=round(tte_hours, 1),
+        )
+        self._earnings_cache[symbol] = earnings_info
+        return True, earnings_info
 
+    async def _load_symbol_earnings(self, symbol: str) -> Optional[EarningsEvent]:
+        """向遠端查詢下一次財報日並寫回 SQLite 快取 (同一標的的並行請求已合併)。"""
+        try:
             raw_entries = await market_data_service.get_earnings_calendar(symbol)
             next_date = self._extract_next_earnings_date(raw_entries)
             save_earnings_cache(
@@ -427,25 +515,105 @@ class CalendarService:
 
         return None
 
+    async def _fetch_symbol_earnings(self, symbol: str) -> Optional[EarningsEvent]:
+        # shield：批次查詢逾時取消個別等待者時，不連帶取消其他人共用的那次查詢
+        result: Optional[EarningsEvent] = await asyncio.shield(
+            SingleFlightManager.run(
+                f"calendar:earnings:{symbol}", self._load_symbol_earnings, symbol
+            )
+        )
+        return result
+
+    async def get_symbol_earnings(self, symbol: str) -> Optional[EarningsEvent]:
+        """
+        Get the next earnings date for a specific symbol.
+        """
+        symbol = symbol.upper()
+        if symbol in self._earnings_cache:
+            return self._earnings_cache[symbol]  # type: ignore
+
+        try:
+            hit, event = self._earnings_from_cache_row(
+                symbol, get_cached_earnings(symbol)
+            )
+        except Exception as e:
+            logger.error(f"Failed to fetch earnings for {symbol}: {e}")
+            return None
+        if hit:
+            return event
+        return await self._fetch_symbol_earnings(symbol)
+
     async def get_symbol_earnings_batch(
-        self, symbols: List[str]
+        self,
+        symbols: List[str],
+        *,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
     ) -> dict[str, Optional[EarningsEvent]]:
+        """
+        批次查詢財報日。記憶體未命中的標的以單一查詢批次讀取 SQLite 快取，
+        只有快取過期或缺漏者才逐檔向遠端查詢。`concurrency` 限制同時查詢數；
+        `timeout` 到期仍未完成的標的會從結果中省略 (查詢在背景完成後寫回快取，
+        下一輪直接命中)，讓大量標的的掃描有固定時間上限。
+        """
         unique_symbols = sorted({symbol.upper() for symbol in symbols if symbol})
-        results = await asyncio.gather(
-            *(self.get_symbol_earnings(symbol) for symbol in unique_symbols)
-        )
-        return dict(zip(unique_symbols, results))
+        resolved: dict[str, Optional[EarningsEvent]] = {}
+        missing = [s for s in unique_symbols if s not in self._earnings_cache]
+        rows = get_cached_earnings_batch(missing) if missing else {}
+        remote: list[str] = []
+        for symbol in unique_symbols:
+            if symbol in self._earnings_cache:
+                resolved[symbol] = self._earnings_cache[symbol]
+                continue
+            try:
+                hit, event = self._earnings_from_cache_row(symbol, rows.get(symbol))
+            except Exception as e:
+                logger.error(f"Failed to fetch earnings for {symbol}: {e}")
+                hit, event = True, None
+            if hit:
+                resolved[symbol] = event
+            else:
+                remote.append(symbol)
+
+        if concurrency is None and timeout is None:
+            results = await asyncio.gather(
+                *(self.get_symbol_earnings(symbol) for symbol in remote)
+            )
+            resolved.update(zip(remote, results))
+            return {s: resolved[s] for s in unique_symbols}
+
+        semaphore = asyncio.Semaphore(concurrency or len(remote) or 1)
+
+        async def fetch(symbol: str) -> Optional[EarningsEvent]:
+            async with semaphore:
+                return await self.get_symbol_earnings(symbol)
+
+        tasks = {symbol: asyncio.create_task(fetch(symbol)) for symbol in remote}
+        if tasks:
+            _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                logger.warning(
+                    f"財報批次查詢逾時：{len(pending)}/{len(tasks)} 檔標的延至下一輪"
+                )
+            resolved.update(
+                (symbol, task.result())
+                for symbol, task in tasks.items()
+                if task not in pending and task.exception() is None
+            )
+        return {s: resolved[s] for s in unique_symbols if s in resolved}
 
     async def get_next_high_impact_event(
         self, *, days: int = 7, max_tte_hours: Optional[float] = None
     ) -> Optional[EconomicEvent]:
-        events = await self.get_high_impact_events(days=days)
-        for event in sorted(events, key=lambda item: item.tte_hours):
-            if event.tte_hours <= 0:
-                continue
-            if max_tte_hours is not None and event.tte_hours > max_tte_hours:
-                continue
-            return event
+        horizon = days * 24.0
+        if max_tte_hours is not None:
+            horizon = min(horizon, max_tte_hours)
+        for event in await self.get_events_within_hours(horizon):
+            if event.tte_hours > 0:
+                return event
         return None
 
     async def get_symbol_catalysts(
@@ -3,7 +3,8 @@ services/edge_cache_client.py
 
 集中封裝 nexus_core 對 nexus_edge_scraper 新增的「讀快取」端點呼叫
 (`POST /api/v1/watchlist/sync`、`GET /api/v1/cache/gex/{symbol}`、
-`GET /api/v1/cache/options/{symbol}/chain`)。
+`GET /api/v1/cache/options/{symbol}/chain`，以及歷史差異端點
+`.../gex/{symbol}/diff`、`.../options/{symbol}/chain/diff`)。
 
 這些呼叫全部是**純附加的快速路徑**：edge 目前部署不穩定，任何一次呼叫
 逾時、連不上、或回傳非 success 狀態，一律回傳 None（或就地吞掉錯誤），
@@ -14,6 +15,7 @@ services/edge_cache_client.py
 timeout，比既有的即時 scrape 呼叫（15-30 秒）短得多。
 """
 
+from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 import logging
 
@@ -100,3 +102,53 @@ async def get_cached_option_chain(
             f"[{symbol}] 讀取 edge Option Chain 快取失敗（將 fallback 至即時抓取): {e}"
         )
     return None
+
+
+def lookback_start(hours: float = 24.0) -> str:
+    """歷史差異查詢的起點：距今 `hours` 小時前的 UTC ISO-8601 時間。"""
+    start = datetime.now(timezone.utc) - timedelta(hours=hours)
+    return start.isoformat(timespec="seconds")
+
+
+async def _get_history_diff(
+    symbol: str, path: str, params: dict[str, str]
+) -> Optional[dict[str, Any]]:
+    base_url = _base_url()
+    if not base_url:
+        return None
+    try:
+        async with httpx.AsyncClient(timeout=_READ_TIMEOUT_SECONDS) as client:
+            res = await client.get(f"{base_url}{path}", params=params)
+            if res.status_code == 200:
+                data = res.json()
+                if data.get("status") == "success" and isinstance(
+                    data.get("data"), dict
+                ):
+                    return dict(data["data"])
+    except Exception as e:
+        logger.info(f"[{symbol}] 讀取 edge 歷史差異失敗: {e}")
+    return None
+
+
+async def get_gex_history_diff(
+    symbol: str, start: str, end: Optional[str] = None
+) -> Optional[dict[str, Any]]:
+    """向 edge 本地 GEX 歷史查詢兩個時間點 (ISO-8601) 之間的 Call/Put Wall
+    遷移與 net GEX 變化，不觸發任何即時抓取。miss / edge 離線回傳 None。"""
+    params = {"start": start}
+    if end:
+        params["end"] = end
+    return await _get_history_diff(symbol, f"/api/v1/cache/gex/{symbol}/diff", params)
+
+
+async def get_option_chain_history_diff(
+    symbol: str, expiry: str, start: str, end: Optional[str] = None
+) -> Optional[dict[str, Any]]:
+    """向 edge 本地期權鏈歷史查詢指定到期日兩個時間點之間各履約價的 OI
+    變化。miss / edge 離線回傳 None。"""
+    params = {"expiry": expiry, "start": start}
+    if end:
+        params["end"] = end
+    return await _get_history_diff(
+        symbol, f"/api/v1/cache/options/{symbol}/chain/diff", params
+    )
@@ -1,21 +1,89 @@
 from typing import Any
 import asyncio
 import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from typing import List
+from typing import List, Optional
 
 from cogs.embed_builder import create_proactive_event_alert_embed
 from database import get_full_user_context
-from services.calendar_service import calendar_service
+from database.event_alerts import load_active_event_alert_keys, save_event_alert_keys
+from database.holdings import get_all_holdings
+from services.calendar_service import _event_epoch, calendar_service
 from database.user_settings import get_all_user_ids
 import market_time
 
-from services.market_data_service import BoundedCache, get_quote
+from services.market_data_service import get_quote
 
 logger = logging.getLogger(__name__)
 ny_tz = ZoneInfo("America/New_York")
 
+ALERT_HORIZON_HOURS = 48.0
+# 去重鍵在事件發生後再保留一天，確保事件前後的重啟都不會重複推播
+DEDUPE_GRACE_SEC = 86400
+EARNINGS_LOOKUP_CONCURRENCY = 8
+EARNINGS_LOOKUP_TIMEOUT_SEC = 120.0
+
+
+@dataclass
+class EventCycleStats:
+    users: int
+    symbols: int
+    macro_events: int
+    earnings_events: int
+    unresolved_symbols: int
+    alerts_sent: int
+    duration_sec: float
+
+
+def _event_timestamp(event: Any) -> Optional[float]:
+    """事件發生時點 (epoch 秒)：經濟數據取 ISO 時間 (無時區視為 UTC，與日曆索引一致)，財報取當日 00:00 ET。"""
+    try:
+        if getattr(event, "type", "") == "ECONOMIC":
+            return _event_epoch(str(event.time))
+        day = datetime.strptime(str(event.date), "%Y-%m-%d")
+        return day.replace(tzinfo=ny_tz).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+def _with_current_tte(event: Any, now: float) -> Any:
+    """日曆快取內的 tte_hours 為抓取當下的值，每輪依事件時點重新計算。"""
+    ts = _event_timestamp(event)
+    if ts is None:
+        return event
+    return event.model_copy(update={"tte_hours": round((ts - now) / 3600, 1)})
+
+
+def _alert_key(user_id: int, event: Any) -> str:
+    if event.type == "ECONOMIC":
+        # For economic events, use event name and ISO time
+        event_id = getattr(event, "event", "unknown")
+        event_date = getattr(event, "time", "unknown")
+    else:
+        # For earnings, use symbol and date
+        event_id = getattr(event, "symbol", "unknown")
+        event_date = getattr(event, "date", "unknown")
+    return f"{user_id}_{event.type}_{event_id}_{event_date}"
+
+
+def _load_alert_contexts(user_ids: list[int]) -> dict[int, Any]:
+    """在單一工作執行緒中檢查通知開關並建立使用者上下文；關閉者不列入。"""
+    import database
+
+    contexts: dict[int, Any] = {}
+    for uid in user_ids:
+        if not database.is_notification_enabled(uid, "defense_macro_tail_risk"):
+            logger.info(
+                f"使用者 {uid} 已關閉 defense_macro_tail_risk，略過經濟/財報事件警報。"
+            )
+            continue
+        contexts[uid] = get_full_user_context(uid)
+    return contexts
+
 
 def _extract_quote_price(quote: dict[str, Any], fallback: float = 500.0) -> float:
     for key in ("c", "current_price", "price"):
@@ -174,72 +242,133 @@ class EventMonitor:
 
     def __init__(self, bot: Any):
         self.bot = bot
-        # Cache to track alerted events to prevent spam
-        # Key: (user_id, event_type, event_id, event_date)
-        # Max 2000 entries should be enough for many users and events
-        self._alerted_cache = BoundedCache(max_size=2000)
+        self.last_cycle_stats: Optional[EventCycleStats] = None
 
     async def check_upcoming_events(self) -> None:
         """
-        Scan all users' portfolios for upcoming high-impact events.
+        單輪全站事件曝險掃描：高影響經濟數據與所有持倉標的聯集的財報日只解析一次，
+        再與全站持倉快照合併出每位使用者的待推播事件。去重鍵持久化於 SQLite。
         """
         if not market_time.is_market_open():
             # Still check even if closed, as we want proactive alerts
             pass
 
-        user_ids = await asyncio.to_thread(get_all_user_ids)
+        started = time.monotonic()
+        now = time.time()
+        user_ids, holdings, active_keys = await asyncio.gather(
+            asyncio.to_thread(get_all_user_ids),
+            asyncio.to_thread(get_all_holdings),
+            asyncio.to_thread(load_active_event_alert_keys, now),
+        )
 
-        for uid in user_ids:
-            try:
-                # 1. Fetch events affecting this user
-                events = await calendar_service.get_portfolio_events(uid, days=3)
-
-                # 2. Filter for events within the next 48 hours that haven't been alerted
-                critical_events = []
-                for e in events:
-                    if not (0 < e.tte_hours < 48.0):
-                        continue
-
-                    # Create a unique key for deduplication
-                    if e.type == "ECONOMIC":
-                        # For economic events, use event name and ISO time
-                        event_id = getattr(e, "event", "unknown")
-                        event_date = getattr(e, "time", "unknown")
-                    else:
-                        # For earnings, use symbol and date
-                        event_id = getattr(e, "symbol", "unknown")
-                        event_date = getattr(e, "date", "unknown")
-
-                    alert_key = f"{uid}_{e.type}_{event_id}_{event_date}"
-
-                    if alert_key not in self._alerted_cache:
-                        critical_events.append(e)
-                        self._alerted_cache[alert_key] = datetime.now()
-
-                if critical_events:
-                    await self._send_event_alert(uid, critical_events)
-
-            except Exception as e:
-                logger.error(f"Error checking events for user {uid}: {e}")
-
-    async def _send_event_alert(self, user_id: int, events: List[Any]) -> Any:
-        """
-        Send a proactive hedging alert based on upcoming events.
-        """
-        import database
+        symbols_by_user: dict[int, set[str]] = defaultdict(set)
+        for h in holdings:
+            symbols_by_user[int(h["user_id"])].add(str(h["symbol"]).upper())
+        all_symbols = sorted({sym for syms in symbols_by_user.values() for sym in syms})
+
+        economic, earnings_map = await asyncio.gather(
+            calendar_service.get_high_impact_events(days=3),
+            calendar_service.get_symbol_earnings_batch(
+                all_symbols,
+                concurrency=EARNINGS_LOOKUP_CONCURRENCY,
+                timeout=EARNINGS_LOOKUP_TIMEOUT_SEC,
+            ),
+        )
 
-        if not database.is_notification_enabled(user_id, "defense_macro_tail_risk"):
-            logger.info(
-                f"使用者 {user_id} 已關閉 defense_macro_tail_risk，略過經濟/財報事件警報。"
+        def in_window(event: Any) -> bool:
+            return bool(0 < event.tte_hours < ALERT_HORIZON_HOURS)
+
+        macro_events = [
+            e for e in (_with_current_tte(ev, now) for ev in economic) if in_window(e)
+        ]
+        earnings_by_symbol = {
+            sym: e
+            for sym, e in (
+                (sym, _with_current_tte(ev, now))
+                for sym, ev in earnings_map.items()
+                if ev is not None
             )
-            return
-        user_context = await asyncio.to_thread(get_full_user_context, user_id)
+            if in_window(e)
+        }
+
+        pending: dict[int, list[Any]] = {}
+        new_keys: list[tuple[str, float]] = []
+        for uid in user_ids:
+            candidates = macro_events + [
+                earnings_by_symbol[sym]
+                for sym in symbols_by_user.get(uid, ())
+                if sym in earnings_by_symbol
+            ]
+            fresh = []
+            for e in sorted(candidates, key=lambda x: x.tte_hours):
+                key = _alert_key(uid, e)
+                if key in active_keys:
+                    continue
+                active_keys.add(key)
+                fresh.append(e)
+                expires_at = (_event_timestamp(e) or now) + DEDUPE_GRACE_SEC
+                new_keys.append((key, expires_at))
+            if fresh:
+                pending[uid] = fresh
+
+        alerts_sent = 0
+        if new_keys:
+            await asyncio.to_thread(save_event_alert_keys, new_keys, now)
+        if pending:
+            contexts = await asyncio.to_thread(_load_alert_contexts, list(pending))
+            spy_price = await self._get_spy_price()
+            for uid, events in pending.items():
+                if uid not in contexts:
+                    continue
+                try:
+                    await self._send_event_alert(
+                        uid, events, spy_price=spy_price, user_context=contexts[uid]
+                    )
+                    alerts_sent += 1
+                except Exception as e:
+                    logger.error(f"Error sending event alert for user {uid}: {e}")
+
+        self.last_cycle_stats = EventCycleStats(
+            users=len(user_ids),
+            symbols=len(all_symbols),
+            macro_events=len(macro_events),
+            earnings_events=len(earnings_by_symbol),
+            unresolved_symbols=len(all_symbols) - len(earnings_map),
+            alerts_sent=alerts_sent,
+            duration_sec=time.monotonic() - started,
+        )
+        logger.info(f"📅 [EventMonitor] 事件曝險掃描完成：{self.last_cycle_stats}")
+
+    async def _get_spy_price(self) -> float:
         try:
             spy_quote = await get_quote("SPY")
-            spy_price = _extract_quote_price(spy_quote)
+            return _extract_quote_price(spy_quote)
         except Exception as e:
             logger.warning(f"取得 SPY 報價失敗，事件預警改用預設價格: {e}")
-            spy_price = 500.0
+            return 500.0
+
+    async def _send_event_alert(
+        self,
+        user_id: int,
+        events: List[Any],
+        *,
+        spy_price: Optional[float] = None,
+        user_context: Any = None,
+    ) -> Any:
+        """
+        Send a proactive hedging alert based on upcoming events.
+        """
+        if user_context is None:
+            import database
+
+            if not database.is_notification_enabled(user_id, "defense_macro_tail_risk"):
+                logger.info(
+                    f"使用者 {user_id} 已關閉 defense_macro_tail_risk，略過經濟/財報事件警報。"
+                )
+                return
+            user_context = await asyncio.to_thread(get_full_user_context, user_id)
+        if spy_price is None:
+            spy_price = await self._get_spy_price()
 
         risk_snapshot = _build_portfolio_risk_snapshot(
             user_context,
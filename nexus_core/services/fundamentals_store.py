@@ -0,0 +1,252 @@
+"""
+季度財報與公司基本資料的持久化快取。
+
+DDP 巡檢每次掃描都需要季度損益表、現金流量表與少量公司資料 (產業、EPS、
+本益比)，這些資料一季才變動一次，卻是 yfinance 最昂貴的請求。本模組以
+(標的, 會計期間) 為 key 存入 `fundamentals_store` 資料表，並在行程內保留一份
+記憶體副本：
+
+- 最新期間結束後約一季加申報緩衝期之前，一律直接使用已存資料，不發出任何請求。
+- 到期後每日最多重新檢查一次；若仍是同一期間只更新檢查時間，出現新期間才寫入新列。
+- 查無財報的標的每週重新檢查一次。
+
+下載透過 `market_data_service.call_yf` 節流，並以 SingleFlight 合併同一標的的
+並行請求。
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from database.fundamentals import (
+    FundamentalsRow,
+    load_latest_fundamentals,
+    save_fundamentals,
+    touch_fundamentals,
+)
+from services import market_data_service
+from services.single_flight import SingleFlightManager
+
+logger = logging.getLogger(__name__)
+
+# 只保存巡檢用得到、且一季內大致不變的欄位
+INFO_FIELDS = (
+    "sector",
+    "industry",
+    "longName",
+    "trailingEps",
+    "forwardEps",
+    "fiveYearAvgPE",
+    "trailingPE",
+    "forwardPE",
+    "currentPrice",
+)
+
+QUARTER_DAYS = 91
+# 季度結束到財報公布的緩衝 (大型申報公司 10-Q 期限為 40 天，多數更早公布)
+FILING_LAG_DAYS = 20
+RECHECK_INTERVAL_SEC = 86400.0
+EMPTY_RECHECK_INTERVAL_SEC = 7 * 86400.0
+
+
+def _period_end(fiscal_period: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(fiscal_period)
+    except ValueError:
+        return None
+
+
+@dataclass
+class Fundamentals:
+    symbol: str
+    fiscal_period: str
+    info: dict[str, Any]
+    income: pd.DataFrame = field(repr=False)
+    cashflow: pd.DataFrame = field(repr=False)
+    fetched_at: float
+    checked_at: float
+
+    def is_due(self, now: float) -> bool:
+        """是否該向 yfinance 重新檢查 (新一季財報可能已公布)。"""
+        if now < self.checked_at + RECHECK_INTERVAL_SEC:
+            return False
+        end = _period_end(self.fiscal_period)
+        if end is None:
+            return now >= self.checked_at + EMPTY_RECHECK_INTERVAL_SEC
+        expected = end + timedelta(days=QUARTER_DAYS + FILING_LAG_DAYS)
+        return now >= datetime.combine(expected, datetime.min.time()).timestamp()
+
+
+def fiscal_period_of(frame: pd.DataFrame) -> str:
+    """財報最新一期的期間結束日 (ISO 格式)；無資料時為空字串。"""
+    if frame.empty:
+        return ""
+    if pd.api.types.is_datetime64_any_dtype(frame.columns):
+        return str(pd.Timestamp(frame.columns.max()).date().isoformat())
+    # 非日期欄位：沿用 yfinance 由新到舊的欄位順序
+    return str(frame.columns[0])
+
+
+def _encode_frame(frame: pd.DataFrame) -> Optional[str]:
+    if frame.empty:
+        return None
+    dated = pd.api.types.is_datetime64_any_dtype(frame.columns)
+    columns = [
+        pd.Timestamp(c).isoformat()
+        if dated
+        else (c.item() if isinstance(c, np.generic) else c)
+        for c in frame.columns
+    ]
+    values = frame.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    return json.dumps(
+        {
+            "index": [str(i) for i in frame.index],
+            "columns": columns,
+            "dated": dated,
+            "data": values.tolist(),
+        }
+    )
+
+
+def _decode_frame(payload: Optional[str]) -> pd.DataFrame:
+    if not payload:
+        return pd.DataFrame()
+    raw = json.loads(payload)
+    columns = pd.to_datetime(raw["columns"]) if raw["dated"] else raw["columns"]
+    return pd.DataFrame(raw["data"], index=raw["index"], columns=columns)
+
+
+def _as_frame(value: Any) -> pd.DataFrame:
+    return value if isinstance(value, pd.DataFrame) else pd.DataFrame()
+
+
+def _pick_info(info: Any) -> dict[str, Any]:
+    if not isinstance(info, dict):
+        return {}
+    return {k: info[k] for k in INFO_FIELDS if info.get(k) is not None}
+
+
+def to_row(record: Fundamentals) -> FundamentalsRow:
+    return (
+        record.symbol,
+        record.fiscal_period,
+        json.dumps(record.info, default=str),
+        _encode_frame(record.income),
+        _encode_frame(record.cashflow),
+        record.fetched_at,
+        record.checked_at,
+    )
+
+
+def _from_row(row: FundamentalsRow) -> Fundamentals:
+    symbol, period, info, income, cashflow, fetched_at, checked_at = row
+    return Fundamentals(
+        symbol=symbol,
+        fiscal_period=period,
+        info=json.loads(info),
+        income=_decode_frame(income),
+        cashflow=_decode_frame(cashflow),
+        fetched_at=float(fetched_at),
+        checked_at=float(checked_at),
+    )
+
+
+def _download_info_and_income(symbol: str) -> tuple[Any, Any]:
+    t = yf.Ticker(symbol)
+    return t.info, t.quarterly_income_stmt
+
+
+def _download_cashflow(symbol: str) -> Any:
+    return yf.Ticker(symbol).quarterly_cashflow
+
+
+class FundamentalsStore:
+    """以會計期間為 key 的基本面快取 (記憶體 + SQLite)。"""
+
+    def __init__(self) -> None:
+        self._memo: dict[str, Fundamentals] = {}
+        self.network_fetches = 0
+
+    def clear(self) -> None:
+        """清除記憶體副本 (資料庫內容保留)。"""
+        self._memo.clear()
+
+    async def prime(self, symbols: Iterable[str]) -> int:
+        """一次從資料庫載入多檔標的的已存資料，回傳新載入筆數。"""
+        missing = [s.upper() for s in symbols if s.upper() not in self._memo]
+        if not missing:
+            return 0
+        rows = await asyncio.to_thread(load_latest_fundamentals, missing)
+        for symbol, row in rows.items():
+            self._memo[symbol] = _from_row(row)
+        return len(rows)
+
+    async def get(self, symbol: str, now: Optional[float] = None) -> Fundamentals:
+        """取得標的的基本面；只有在新一季可能已公布時才向 yfinance 重新下載。"""
+        symbol = symbol.upper()
+        now = time.time() if now is None else now
+        if symbol not in self._memo:
+            await self.prime([symbol])
+        record = self._memo.get(symbol)
+        if record is not None and not record.is_due(now):
+            return record
+        result: Fundamentals = await SingleFlightManager.run(
+            f"fundamentals:{symbol}", self._refresh, symbol, record, now
+        )
+        return result
+
+    async def _refresh(
+        self, symbol: str, record: Optional[Fundamentals], now: float
+    ) -> Fundamentals:
+        try:
+            self.network_fetches += 1
+            info, income = await market_data_service.call_yf(
+                _download_info_and_income, symbol
+            )
+            cashflow = await market_data_service.call_yf(_download_cashflow, symbol)
+        except Exception as e:
+            if record is None:
+                raise
+            logger.warning(f"[{symbol}] 基本面重新檢查失敗，沿用已存資料: {e}")
+            return record
+
+        income = _as_frame(income)
+        if record is not None and income.empty:
+            # yfinance 偶爾對已有財報的標的回傳空表：視同重新檢查失敗，
+            # 保留已存資料，只更新檢查時間 (避免空列取代完好的紀錄)
+            logger.warning(f"[{symbol}] 基本面重新檢查回傳空損益表，沿用已存資料")
+            record.checked_at = now
+            await asyncio.to_thread(
+                touch_fundamentals, symbol, record.fiscal_period, now
+            )
+            return record
+
+        period = fiscal_period_of(income)
+        if record is not None and period == record.fiscal_period:
+            record.checked_at = now
+            await asyncio.to_thread(touch_fundamentals, symbol, period, now)
+            return record
+
+        fresh = Fundamentals(
+            symbol=symbol,
+            fiscal_period=period,
+            info=_pick_info(info),
+            income=income,
+            cashflow=_as_frame(cashflow),
+            fetched_at=now,
+            checked_at=now,
+        )
+        await asyncio.to_thread(save_fundamentals, to_row(fresh))
+        self._memo[symbol] = fresh
+        return fresh
+
+
+fundamentals_store = FundamentalsStore()
@@ -1,22 +1,96 @@
-from typing import Any
 import asyncio
+import json
 import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
 
 import database
 from cogs.embed_builder import create_hedge_alert_embed
 from database.user_settings import get_full_user_context
 from services import market_data_service
 from config import get_vix_tier, VIX_LADDER_CONFIG
-from market_analysis.risk_engine import (
-    get_macro_risk_metrics,
-    calculate_vega_adjusted_delta,
-    calculate_hedge_instruction,
-)
+from market_analysis.risk_engine import get_macro_risk_metrics
 import sqlite3
 import config
+from database.connection import get_read_connection
+from services.latency_monitor import latency_registry
 
 logger = logging.getLogger(__name__)
 
+STAGE_HEDGE_TIME_TO_LAST_ALERT = "hedge_time_to_last_alert"
+
+# 急升情境假設的波動率變動 (Delta_Vol = +10%)，以及低於此口數的對沖建議不推播
+SPIKE_VOL_CHANGE = 0.10
+MIN_HEDGE_QTY = 5
+GREEK_COLUMNS = ("delta", "vega", "vanna", "theta", "gamma")
+
+
+@dataclass
+class HedgeAssessmentStats:
+    users_total: int
+    users_with_positions: int
+    users_alerted: int
+    users_failed: int
+    refresh_sec: float
+    time_to_last_alert_sec: float
+
+
+def _load_user_greek_rows() -> list[tuple[int, str, str]]:
+    conn = get_read_connection()
+    try:
+        return conn.execute(
+            "SELECT user_id, context_type, metadata FROM assets "
+            "WHERE context_type IN ('TRADE', 'HOLDING')"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def aggregate_user_greeks(rows: list[tuple[int, str, str]]) -> pd.DataFrame:
+    """
+    將 assets 列彙總為每位使用者一列的 Greeks 總和 (index = user_id)。
+    TRADE 計入 weighted_delta / vega / vanna / theta / gamma；HOLDING 只有 weighted_delta。
+    """
+    if not rows:
+        return pd.DataFrame(columns=list(GREEK_COLUMNS), dtype=float)
+
+    values = np.zeros((len(rows), len(GREEK_COLUMNS)))
+    user_ids = np.empty(len(rows), dtype=np.int64)
+    for i, (uid, c_type, meta_str) in enumerate(rows):
+        user_ids[i] = uid
+        meta = json.loads(meta_str) if meta_str else {}
+        values[i, 0] = float(meta.get("weighted_delta") or 0.0)
+        if c_type == "TRADE":
+            for j, key in enumerate(("vega", "vanna", "theta", "gamma"), start=1):
+                values[i, j] = float(meta.get(key) or 0.0)
+
+    frame = pd.DataFrame(values, columns=list(GREEK_COLUMNS))
+    frame["user_id"] = user_ids
+    return frame.groupby("user_id").sum()
+
+
+def build_hedge_plan(
+    totals: pd.DataFrame,
+    vol_change: float = SPIKE_VOL_CHANGE,
+    hedge_instrument_delta: float = -1.0,
+    min_qty: int = MIN_HEDGE_QTY,
+) -> pd.DataFrame:
+    """
+    向量化版的 calculate_vega_adjusted_delta + calculate_hedge_instruction：
+    Delta_adj = Delta + Vanna × Delta_Vol；N = round(-Delta_adj / 對沖標的 Delta)，
+    只保留 |N| >= min_qty 的使用者。
+    """
+    plan = totals.copy()
+    plan["adj_delta"] = plan["delta"] + plan["vanna"] * vol_change
+    plan["hedge_qty"] = np.rint(-plan["adj_delta"] / hedge_instrument_delta).astype(
+        np.int64
+    )
+    return plan.loc[plan["hedge_qty"].abs() >= min_qty]
+
 
 class HedgeMonitorService:
     """
@@ -31,6 +105,7 @@ class HedgeMonitorService:
         self._last_vix_level = None
         self._last_vix_stage = None
         self._check_interval = 300  # 5 minutes
+        self.last_assessment_stats: Optional[HedgeAssessmentStats] = None
 
     def start(self) -> None:
         if self.running:
@@ -93,103 +168,120 @@ class HedgeMonitorService:
 
     async def _trigger_global_hedge_assessment(
         self, vix_level: float, stage_move: int
-    ) -> Any:
+    ) -> HedgeAssessmentStats:
+        """
+        全站對沖評估：一次刷新所有使用者的 Greeks (每個標的只抓一次行情)，
+        以向量化方式算出每位使用者的調整後 Delta 與對沖口數，再併發推播警報。
+        """
+        from market_analysis.portfolio import refresh_portfolio_greeks
+
+        started = time.perf_counter()
         user_ids = database.get_all_user_ids()
-        for uid in user_ids:
-            try:
-                await self._assess_and_alert_user(uid, vix_level, stage_move)
-            except Exception as e:
-                logger.error(f"Failed to assess hedge for user {uid}: {e}")
 
-    async def _assess_and_alert_user(
-        self, user_id: int, vix_level: float, stage_move: int
-    ) -> Any:
-        # 1. Refresh Greeks to get latest Vega/Vanna
-        from market_analysis.portfolio import refresh_portfolio_greeks
+        # 1. user_id=None：單次掃描全站資產，行情 / 股息 / Beta 依標的去重
+        await refresh_portfolio_greeks()
+        refreshed_at = time.perf_counter()
+
+        # 2. 彙總每位使用者的 Greeks 並產生對沖計畫
+        rows = await asyncio.to_thread(_load_user_greek_rows)
+        totals = aggregate_user_greeks(rows)
+        plan = build_hedge_plan(totals.loc[totals.index.isin(user_ids)])
+
+        stats = HedgeAssessmentStats(
+            users_total=len(user_ids),
+            users_with_positions=int(totals.index.isin(user_ids).sum()),
+            users_alerted=0,
+            users_failed=0,
+            refresh_sec=refreshed_at - started,
+            time_to_last_alert_sec=0.0,
+        )
+        if plan.empty:
+            stats.time_to_last_alert_sec = time.perf_counter() - started
+            self.last_assessment_stats = stats
+            return stats
+
+        # 3. 全站共用的市場資料只取一次
+        spy_df, poly_snapshot = await asyncio.gather(
+            market_data_service.get_history_df("SPY", "2d"),
+            self._capture_poly_snapshot(),
+        )
+        spy_price = float(spy_df["Close"].iloc[-1]) if not spy_df.empty else 670.0
+
+        # 4. 併發推播 (LLM 旁白由 llm_service 的併發閘門節流)
+        results = await asyncio.gather(
+            *(
+                self._alert_user(
+                    int(uid),
+                    row,
+                    vix_level,
+                    stage_move,
+                    spy_price,
+                    poly_snapshot,
+                )
+                for uid, row in plan.iterrows()
+            ),
+            return_exceptions=True,
+        )
+        for uid, result in zip(plan.index, results):
+            if isinstance(result, BaseException):
+                stats.users_failed += 1
+                logger.error(f"Failed to assess hedge for user {uid}: {result}")
+            else:
+                stats.users_alerted += 1
+
+        stats.time_to_last_alert_sec = time.perf_counter() - started
+        latency_registry.record(
+            STAGE_HEDGE_TIME_TO_LAST_ALERT, stats.time_to_last_alert_sec * 1000.0
+        )
+        self.last_assessment_stats = stats
+        logger.warning(
+            f"🛡️ 全站對沖評估完成：{stats.users_alerted}/{len(plan)} 位使用者已推播，"
+            f"Greeks 刷新 {stats.refresh_sec:.2f}s，最後一則警報 {stats.time_to_last_alert_sec:.2f}s"
+        )
+        return stats
 
-        await refresh_portfolio_greeks(user_id)
-
-        # 2. Calculate Portfolio Risk from Assets table
-        user_context = get_full_user_context(user_id)
-        from services.asset_manager import AssetManager
-        from models.asset import ContextType, TradeMetadata, HoldingMetadata
-        import json
-
-        manager = AssetManager()
-        total_delta = 0.0
-        total_vega = 0.0
-        total_vanna = 0.0
-        total_theta = 0.0
-        total_gamma = 0.0
-
-        spy_df = await market_data_service.get_history_df("SPY", "2d")
-        spy_price = spy_df["Close"].iloc[-1] if not spy_df.empty else 670.0
-
-        with manager._get_conn() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT context_type, metadata FROM assets WHERE user_id = ? AND context_type IN ('TRADE', 'HOLDING')",
-                (user_id,),
-            )
-            for row in cursor.fetchall():
-                c_type, meta_str = row
-                meta = json.loads(meta_str)
-
-                if c_type == ContextType.TRADE:
-                    t_meta = TradeMetadata(**meta)
-                    total_delta += t_meta.weighted_delta
-                    total_vega += t_meta.vega
-                    total_vanna += t_meta.vanna
-                    total_theta += t_meta.theta
-                    total_gamma += t_meta.gamma
-                    # Margin is not in metadata yet, but we can approximate or ignore for spike alert
-                elif c_type == ContextType.HOLDING:
-                    h_meta = HoldingMetadata(**meta)
-                    total_delta += h_meta.weighted_delta
+    async def _capture_poly_snapshot(self) -> Any:
+        try:
+            if hasattr(self.bot, "polymarket_service"):
+                # [Snapshot Mechanism] 獲取目前活躍市場的即時快照
+                return await self.bot.polymarket_service.get_market_snapshot(limit=3)
+        except Exception as e:
+            logger.debug(f"Failed to capture poly snapshot: {e}")
+        return None
 
+    async def _alert_user(
+        self,
+        user_id: int,
+        row: pd.Series,
+        vix_level: float,
+        stage_move: int,
+        spy_price: float,
+        poly_snapshot: Any,
+    ) -> Any:
+        user_context = await asyncio.to_thread(get_full_user_context, user_id)
         metrics = get_macro_risk_metrics(
-            total_delta,
-            total_theta,
+            float(row["delta"]),
+            float(row["theta"]),
             0.0,  # Margin used 0.0 for now
-            total_gamma,
+            float(row["gamma"]),
             user_context.capital,
             spy_price,
             vix_spot=vix_level,
-            total_vega=total_vega,
-            total_vanna=total_vanna,
+            total_vega=float(row["vega"]),
+            total_vanna=float(row["vanna"]),
         )
-
-        # 3. Calculate Hedge Instruction
-        # Account for Hidden Delta: Delta_adj = Delta + Vanna * Delta_Vol
-        # Assume Delta_Vol is 10% (0.10) for the spike
-        adj_delta = calculate_vega_adjusted_delta(total_delta, total_vanna, 0.10)
-
-        # Hedge using SPY shorting (Delta -1.0)
-        hedge_qty = calculate_hedge_instruction(adj_delta, -1.0)
-        if abs(hedge_qty) < 5:
-            return  # Ignore small hedges
+        adj_delta = float(row["adj_delta"])
+        hedge_qty = int(row["hedge_qty"])
 
         instr_text = f"建議對沖：{'賣出' if hedge_qty > 0 else '買入'} {abs(hedge_qty)} 股 SPY 以中和當前 {adj_delta:+.1f} 的調整後 Delta 曝險。"
         if abs(adj_delta) > 50:
             instr_text = "⚠️ [緊急對沖指令] " + instr_text
 
-        # 4. LLM Narration
         narration = await self._generate_narration(
             user_id, metrics.model_dump(), adj_delta, vix_level
         )
 
-        # 5. Polymarket Snapshot mechanism
-        poly_snapshot = None
-        try:
-            if hasattr(self.bot, "polymarket_service"):
-                # [Snapshot Mechanism] 獲取目前活躍市場的即時快照
-                poly_snapshot = await self.bot.polymarket_service.get_market_snapshot(
-                    limit=3
-                )
-        except Exception as e:
-            logger.debug(f"Failed to capture poly snapshot: {e}")
-
-        # 6. VTR Logging & Real Persistence
+        # VTR Logging & Real Persistence
         from market_analysis.attribution import AttributionEngine
 
         pre_hedge_greeks = {
@@ -203,18 +295,18 @@ class HedgeMonitorService:
             user_id, "VIX_SPIKE_HEDGE", pre_hedge_greeks, poly_snapshot
         )
 
-        alert_id = self._save_alert(
+        alert_id = await asyncio.to_thread(
+            self._save_alert,
             user_id,
             vix_level,
             stage_move,
-            total_delta,
-            total_vega,
+            float(row["delta"]),
+            float(row["vega"]),
             hedge_qty,
             instr_text,
             narration,
         )
 
-        # 7. Discord Alert
         await self._send_discord_alert(
             user_id,
             vix_level,
@@ -245,19 +337,25 @@ class HedgeMonitorService:
         """
         # We can use a simplified call to llm_service
         try:
-            from services.llm_service import client, LLM_MODEL_NAME
-
-            response = await client.chat.completions.create(
-                model=LLM_MODEL_NAME,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a Quant Risk Manager. You must answer in 100% fluent Traditional Chinese (繁體中文) using Taiwanese market terminology.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=200,
+            from services.llm_service import (
+                client,
+                LLM_MODEL_NAME,
+                PRIORITY_INTERACTIVE,
+                inference_slot,
             )
+
+            async with inference_slot(PRIORITY_INTERACTIVE):
+                response = await client.chat.completions.create(
+                    model=LLM_MODEL_NAME,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a Quant Risk Manager. You must answer in 100% fluent Traditional Chinese (繁體中文) using Taiwanese market terminology.",
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    max_tokens=200,
+                )
             content = response.choices[0].message.content
             return str(content.strip()) if content else "市場波動劇烈，建議執行對沖。"
         except Exception:
@@ -0,0 +1,373 @@
+"""
+services/latency_monitor.py
+
+延遲觀測：各階段 (資料抓取、限流等待、指標計算、DB 讀寫、Embed 渲染、Discord 發送)
+的滾動延遲直方圖，加上事件迴圈延遲取樣與阻塞回呼偵測。
+
+- `span(stage)` / `timed(stage)`：量測一段程式或一個函式並寫入該階段的直方圖。
+- `LoopLagMonitor`：背景協程量測 `asyncio.sleep` 的超時量 (loop lag)；另由看門狗
+  執行緒定期向事件迴圈投遞 ping，超過門檻未被處理即視為迴圈被阻塞，當下擷取事件
+  迴圈執行緒的呼叫堆疊寫入日誌 (此時堆疊正停在阻塞的程式碼上)。
+- `start_metrics_server()`：本機 Prometheus 文字格式端點 (`GET /metrics`)。
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional, TypeVar, cast
+
+import config
+
+logger = logging.getLogger(__name__)
+
+STAGE_DATA_FETCH = "data_fetch"
+STAGE_LIMITER_WAIT = "limiter_wait"
+STAGE_INDICATOR_CALC = "indicator_calc"
+STAGE_DB_READ = "db_read"
+STAGE_DB_WRITE = "db_write"
+STAGE_EMBED_RENDER = "embed_render"
+STAGE_DISCORD_SEND = "discord_send"
+STAGE_LOOP_LAG = "loop_lag"
+
+STAGES = (
+    STAGE_LOOP_LAG,
+    STAGE_LIMITER_WAIT,
+    STAGE_DATA_FETCH,
+    STAGE_INDICATOR_CALC,
+    STAGE_DB_READ,
+    STAGE_DB_WRITE,
+    STAGE_EMBED_RENDER,
+    STAGE_DISCORD_SEND,
+)
+
+# 直方圖桶上界 (毫秒)；最後隱含 +Inf 桶
+BUCKET_BOUNDS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# 滾動視窗：只保留最近 15 分鐘、每階段最多 4096 筆樣本
+DEFAULT_WINDOW_SEC = 900.0
+DEFAULT_MAX_SAMPLES = 4096
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass(frozen=True)
+class StageSnapshot:
+    stage: str
+    count: int
+    total_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    # 各桶的累積次數 (與 BUCKET_BOUNDS_MS 對齊，不含 +Inf；+Inf 即 count)
+    buckets: tuple[int, ...]
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class RollingHistogram:
+    """以時間視窗滾動的延遲樣本；讀取時才排序與分桶，寫入只做 append。"""
+
+    def __init__(
+        self,
+        window_sec: float = DEFAULT_WINDOW_SEC,
+        max_samples: int = DEFAULT_MAX_SAMPLES,
+    ) -> None:
+        self.window_sec = window_sec
+        self._samples: deque[tuple[float, float]] = deque(maxlen=max_samples)
+        # span 也會在 to_thread 的工作執行緒中結束，寫入需加鎖
+        self._lock = threading.Lock()
+
+    def record(self, value_ms: float, now: Optional[float] = None) -> None:
+        with self._lock:
+            self._samples.append(
+                (time.monotonic() if now is None else now, max(value_ms, 0.0))
+            )
+
+    def values(self, now: Optional[float] = None) -> list[float]:
+        cutoff = (time.monotonic() if now is None else now) - self.window_sec
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            return [value for _, value in self._samples]
+
+    def snapshot(self, stage: str, now: Optional[float] = None) -> StageSnapshot:
+        ordered = sorted(self.values(now))
+        buckets = []
+        idx = 0
+        for bound in BUCKET_BOUNDS_MS:
+            while idx < len(ordered) and ordered[idx] <= bound:
+                idx += 1
+            buckets.append(idx)
+        return StageSnapshot(
+            stage=stage,
+            count=len(ordered),
+            total_ms=sum(ordered),
+            p50_ms=_percentile(ordered, 50),
+            p95_ms=_percentile(ordered, 95),
+            p99_ms=_percentile(ordered, 99),
+            max_ms=ordered[-1] if ordered else 0.0,
+            buckets=tuple(buckets),
+        )
+
+
+class LatencyRegistry:
+    """各階段延遲直方圖的集中登錄處。"""
+
+    def __init__(
+        self,
+        window_sec: float = DEFAULT_WINDOW_SEC,
+        max_samples: int = DEFAULT_MAX_SAMPLES,
+    ) -> None:
+        self.window_sec = window_sec
+        self.max_samples = max_samples
+        self._histograms: dict[str, RollingHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, stage: str) -> RollingHistogram:
+        hist = self._histograms.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(
+                    stage, RollingHistogram(self.window_sec, self.max_samples)
+                )
+        return hist
+
+    def record(self, stage: str, value_ms: float) -> None:
+        self._histogram(stage).record(value_ms)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """量測 with 區塊的牆鐘時間；例外照常拋出，耗時仍會記錄。"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - started) * 1000.0)
+
+    def timed(self, stage: str) -> Callable[[F], F]:
+        """函式裝飾器版本的 `span`，同時支援同步與 async 函式。"""
+
+        def decorator(fn: F) -> F:
+            if inspect.iscoroutinefunction(fn):
+
+                @functools.wraps(fn)
+                async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                    with self.span(stage):
+                        return await fn(*args, **kwargs)
+
+                return cast(F, async_wrapper)
+
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.span(stage):
+                    return fn(*args, **kwargs)
+
+            return cast(F, wrapper)
+
+        return decorator
+
+    def snapshot(self) -> list[StageSnapshot]:
+        """依 STAGES 順序回傳，其餘自訂階段依名稱排在後面；無樣本的階段也會列出。"""
+        names = list(STAGES) + sorted(set(self._histograms) - set(STAGES))
+        now = time.monotonic()
+        return [
+            self._histogram(name).snapshot(name, now)
+            if name in self._histograms
+            else StageSnapshot(
+                name, 0, 0.0, 0.0, 0.0, 0.0, 0.0, (0,) * len(BUCKET_BOUNDS_MS)
+            )
+            for name in names
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        """Prometheus 文字格式 (histogram + 分位數 gauge)。"""
+        lines = [
+            "# HELP nexus_stage_latency_ms Rolling per-stage latency in milliseconds.",
+            "# TYPE nexus_stage_latency_ms histogram",
+        ]
+        snapshots = self.snapshot()
+        for snap in snapshots:
+            label = f'stage="{snap.stage}"'
+            for bound, cumulative in zip(BUCKET_BOUNDS_MS, snap.buckets):
+                lines.append(
+                    f'nexus_stage_latency_ms_bucket{{{label},le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'nexus_stage_latency_ms_bucket{{{label},le="+Inf"}} {snap.count}'
+            )
+            lines.append(f"nexus_stage_latency_ms_sum{{{label}}} {snap.total_ms:.3f}")
+            lines.append(f"nexus_stage_latency_ms_count{{{label}}} {snap.count}")
+        lines.append("# TYPE nexus_stage_latency_quantile_ms gauge")
+        for snap in snapshots:
+            for q, value in (
+                ("0.5", snap.p50_ms),
+                ("0.95", snap.p95_ms),
+                ("0.99", snap.p99_ms),
+            ):
+                lines.append(
+                    f'nexus_stage_latency_quantile_ms{{stage="{snap.stage}",quantile="{q}"}} {value:.3f}'
+                )
+        return "\n".join(lines) + "\n"
+
+    def format_table(self) -> str:
+        """供 Discord code block 顯示的固定寬度表格。"""
+        header = f"{'stage':<15}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+        rows = [header, "-" * len(header)]
+        for snap in self.snapshot():
+            rows.append(
+                f"{snap.stage:<15}{snap.count:>6}"
+                f"{snap.p50_ms:>9.1f}{snap.p95_ms:>9.1f}"
+                f"{snap.p99_ms:>9.1f}{snap.max_ms:>9.1f}"
+            )
+        return "\n".join(rows)
+
+
+latency_registry = LatencyRegistry()
+span = latency_registry.span
+timed = latency_registry.timed
+
+
+class LoopLagMonitor:
+    """事件迴圈延遲取樣器 + 阻塞看門狗。須在事件迴圈執行緒內呼叫 `start()`。"""
+
+    def __init__(
+        self,
+        registry: LatencyRegistry = latency_registry,
+        interval_sec: Optional[float] = None,
+        block_threshold_ms: Optional[float] = None,
+    ) -> None:
+        self.registry = registry
+        self.interval_sec = (
+            config.LOOP_LAG_SAMPLE_INTERVAL_SEC
+            if interval_sec is None
+            else interval_sec
+        )
+        self.block_threshold_ms = (
+            config.LOOP_BLOCK_THRESHOLD_MS
+            if block_threshold_ms is None
+            else block_threshold_ms
+        )
+        self.blocked_events = 0
+        self.last_blocked_ms = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._sample_lag())
+        if self.block_threshold_ms > 0:
+            self._watchdog = threading.Thread(
+                target=self._watch, name="loop-block-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._watchdog = None
+
+    async def _sample_lag(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval_sec)
+            lag = time.perf_counter() - started - self.interval_sec
+            self.registry.record(STAGE_LOOP_LAG, lag * 1000.0)
+
+    def _loop_stack(self) -> str:
+        frame = sys._current_frames().get(self._loop_thread_id or 0)
+        if frame is None:
+            return "(無法取得事件迴圈執行緒堆疊)"
+        return "".join(traceback.format_stack(frame))
+
+    def _watch(self) -> None:
+        loop = self._loop
+        threshold_sec = self.block_threshold_ms / 1000.0
+        while loop is not None and not self._stop.is_set():
+            served = threading.Event()
+            posted = time.perf_counter()
+            try:
+                loop.call_soon_threadsafe(served.set)
+            except RuntimeError:
+                return  # 事件迴圈已關閉
+            if not served.wait(threshold_sec):
+                self.blocked_events += 1
+                logger.warning(
+                    f"⚠️ 事件迴圈阻塞超過 {self.block_threshold_ms:.0f} ms，"
+                    f"阻塞中的呼叫堆疊：\n{self._loop_stack()}"
+                )
+                while not served.wait(0.5):
+                    if self._stop.is_set():
+                        return
+                self.last_blocked_ms = (time.perf_counter() - posted) * 1000.0
+                logger.warning(f"事件迴圈阻塞解除，共 {self.last_blocked_ms:.0f} ms")
+            self._stop.wait(self.interval_sec)
+
+
+async def start_metrics_server(
+    host: str, port: int, registry: LatencyRegistry = latency_registry
+) -> asyncio.Server:
+    """本機文字指標端點：`GET /metrics` 回傳 Prometheus 文字格式，其餘路徑 404。"""
+
+    async def handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?", 1)[0] if len(parts) > 1 else ""
+            if path == "/metrics":
+                status, body = "200 OK", registry.render_prometheus()
+            else:
+                status, body = "404 Not Found", "not found\n"
+            payload = body.encode("utf-8")
+            writer.write(
+                (
+                    f"HTTP/1.1 {status}\r\n"
+                    "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode("latin-1")
+                + payload
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"延遲指標端點已啟動：http://{host}:{port}/metrics")
+    return server
@@ -1,11 +1,30 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
 import json
 import logging
+import time
+import weakref
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 import psutil
-from openai import AsyncOpenAI
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Literal, cast, Any
-
-from config import LLM_API_BASE, LLM_MODEL_NAME, API_KEY
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
+from typing import TYPE_CHECKING, AsyncIterator, Literal, Optional, TypeVar, cast, Any
+
+from config import (
+    LLM_API_BASE,
+    LLM_MODEL_NAME,
+    API_KEY,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_QUEUE,
+)
+from database.llm_cache import get_llm_cache, save_llm_cache
+from services.single_flight import SingleFlightManager
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +56,31 @@ if API_KEY:
     client_args["api_key"] = API_KEY
 if LLM_API_BASE:
     client_args["base_url"] = LLM_API_BASE
-client = AsyncOpenAI(**client_args)
+
+
+class _LazyAsyncOpenAI:
+    """
+    第一次存取屬性時才匯入 openai 並建立 AsyncOpenAI。
+
+    openai SDK 匯入約需 0.6 秒，而多數 Cog 只在實際推論時才需要它；
+    代理物件讓 `from services.llm_service import client` 維持原本用法。
+    """
+
+    def __init__(self) -> None:
+        self._client: Optional["AsyncOpenAI"] = None
+
+    def _resolve(self) -> "AsyncOpenAI":
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(**client_args)
+        return self._client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+
+client = _LazyAsyncOpenAI()
 
 
 # ==========================================
@@ -101,27 +144,278 @@ class RedditSentimentAnalysis(BaseModel):
     )
 
 
+# ==========================================
+# 🧠 推論快取 / 同鍵合併 / 優先權併發閘門
+# ==========================================
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+# 優先權：數字越小越先取得推論名額；只有 PRIORITY_LOW 會在佇列滿時被直接降級
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# 各 Schema 的快取存活秒數 (同一標的/情境在此時間內重複詢問直接回傳快取)
+LLM_CACHE_TTL_SEC: dict[str, float] = {
+    "RiskAssessment": 15 * 60,
+    "UOAIntentMapping": 30 * 60,
+    "RedditSentimentAnalysis": 30 * 60,
+    "AnalystReport": 20 * 60,
+    "PolymarketAnalysis": 6 * 60 * 60,
+}
+DEFAULT_LLM_CACHE_TTL_SEC = 10 * 60
+
+
+class LLMOverloadedError(RuntimeError):
+    """低優先權推論在佇列已滿時被直接拒絕 (由呼叫端走既有降級路徑)。"""
+
+
+@dataclass
+class LLMCacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    shed: int = 0
+    # 命中快取時省下的原始推論耗時，與實際送出推論的累計耗時
+    saved_ms: float = 0.0
+    inference_ms: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        served = self.hits + self.coalesced
+        total = served + self.misses
+        return served / total if total else 0.0
+
+
+llm_cache_stats = LLMCacheStats()
+
+
+def get_llm_cache_stats() -> dict[str, float]:
+    stats = asdict(llm_cache_stats)
+    stats["hit_rate"] = llm_cache_stats.hit_rate
+    return stats
+
+
+class _PriorityGate:
+    """
+    依優先權分配的併發閘門：名額釋放時交給佇列中優先權最高 (數字最小、先到先得)
+    的等待者；低優先權請求遇到佇列已滿直接拋出 LLMOverloadedError。
+    """
+
+    def __init__(self, limit: int, max_queue: int) -> None:
+        self.limit = max(limit, 1)
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self, priority: int) -> AsyncIterator[None]:
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if priority >= PRIORITY_LOW and len(self._waiters) >= self.max_queue:
+            raise LLMOverloadedError(
+                f"LLM 推論佇列已滿 ({len(self._waiters)}/{self.max_queue})，低優先權請求降級"
+            )
+        entry = (priority, next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, entry)
+        try:
+            await entry[2]
+        except asyncio.CancelledError:
+            if entry[2].done() and not entry[2].cancelled():
+                # 名額已轉交但呼叫端被取消：原樣交給下一位
+                self._release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)  # 名額直接轉交，active 不變
+                return
+        self.active -= 1
+
+
+# 閘門內含 Future，需以 event loop 為單位維護 (同 market_data_service 的限流器)
+_gates_by_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _PriorityGate]" = weakref.WeakKeyDictionary()
+
+
+def _llm_gate() -> _PriorityGate:
+    loop = asyncio.get_running_loop()
+    gate = _gates_by_loop.get(loop)
+    if gate is None:
+        gate = _PriorityGate(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE)
+        _gates_by_loop[loop] = gate
+    return gate
+
+
+def inference_slot(
+    priority: int = PRIORITY_NORMAL,
+) -> AbstractAsyncContextManager[None]:
+    """讓自由文字推論 (chat.completions.create) 也共用同一個優先權併發閘門。"""
+    return _llm_gate().slot(priority)
+
+
+def _normalize_prompt(text: str) -> str:
+    """去除三引號 Prompt 的縮排與空白行差異，讓語意相同的 Prompt 得到相同雜湊。"""
+    return "\n".join(
+        " ".join(line.split()) for line in text.strip().splitlines() if line.strip()
+    )
+
+
+@lru_cache(maxsize=None)
+def _schema_fingerprint(schema: type[BaseModel]) -> str:
+    # Schema 欄位或描述變更時自動讓舊快取失效
+    raw = json.dumps(schema.model_json_schema(), sort_keys=True, ensure_ascii=False)
+    return f"{schema.__name__}:{hashlib.sha256(raw.encode()).hexdigest()[:12]}"
+
+
+def llm_cache_key(
+    schema: type[BaseModel],
+    messages: list[dict[str, str]],
+    params: dict[str, Any],
+    model: Optional[str] = None,
+) -> str:
+    payload = {
+        "model": model if model is not None else LLM_MODEL_NAME,
+        "schema": _schema_fingerprint(schema),
+        "messages": [
+            {"role": m["role"], "content": _normalize_prompt(m["content"])}
+            for m in messages
+        ],
+        "params": params,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+_inflight_keys: set[str] = set()
+
+
+async def _infer_and_store(
+    key: str,
+    schema: type[SchemaT],
+    messages: list[dict[str, str]],
+    priority: int,
+    ttl_sec: float,
+    params: dict[str, Any],
+) -> Optional[SchemaT]:
+    try:
+        async with _llm_gate().slot(priority):
+            started = time.perf_counter()
+            response = await client.beta.chat.completions.parse(
+                model=LLM_MODEL_NAME,
+                messages=messages,
+                response_format=schema,
+                **params,
+            )
+            latency_ms = (time.perf_counter() - started) * 1000.0
+    except LLMOverloadedError:
+        llm_cache_stats.shed += 1
+        raise
+    llm_cache_stats.misses += 1
+    llm_cache_stats.inference_ms += latency_ms
+
+    parsed = cast(Optional[SchemaT], response.choices[0].message.parsed)
+    if isinstance(parsed, BaseModel):
+        await save_llm_cache(
+            key,
+            schema.__name__,
+            LLM_MODEL_NAME,
+            parsed.model_dump_json(),
+            latency_ms,
+            ttl_sec,
+        )
+    return parsed
+
+
+async def parse_structured(
+    schema: type[SchemaT],
+    messages: list[dict[str, str]],
+    priority: int = PRIORITY_NORMAL,
+    ttl_sec: Optional[float] = None,
+    **params: Any,
+) -> Optional[SchemaT]:
+    """
+    結構化輸出推論的統一入口：持久化快取 → 同鍵在途請求合併 → 優先權併發閘門。
+
+    快取鍵為 (模型, Schema 指紋, 正規化後的 messages, 其餘推論參數) 的 SHA-256；
+    解析失敗 (parsed 為 None) 不寫入快取。例外照常拋出，由呼叫端沿用既有降級邏輯。
+    """
+    key = llm_cache_key(schema, messages, params)
+    cached = await asyncio.to_thread(get_llm_cache, key)
+    if cached is not None:
+        response_json, latency_ms = cached
+        try:
+            result = schema.model_validate_json(response_json)
+        except ValidationError:
+            result = None
+        if result is not None:
+            llm_cache_stats.hits += 1
+            llm_cache_stats.saved_ms += latency_ms
+            return result
+
+    # 在途鍵由第一位呼叫者登記，後到者經 SingleFlightManager 共用同一次推論
+    leader = key not in _inflight_keys
+    if leader:
+        _inflight_keys.add(key)
+    else:
+        llm_cache_stats.coalesced += 1
+    ttl = LLM_CACHE_TTL_SEC.get(schema.__name__, DEFAULT_LLM_CACHE_TTL_SEC)
+    try:
+        return cast(
+            Optional[SchemaT],
+            await SingleFlightManager.run(
+                f"llm:{key}",
+                _infer_and_store,
+                key,
+                schema,
+                messages,
+                priority,
+                ttl if ttl_sec is None else ttl_sec,
+                params,
+            ),
+        )
+    finally:
+        if leader:
+            _inflight_keys.discard(key)
+
+
 async def evaluate_reddit_sentiment(symbol: str, raw_text: str) -> str:
     """利用 LLM 分析 Reddit 原始文字情緒。"""
     if not is_memory_safe() or not raw_text or "過去 24 小時內無相關討論" in raw_text:
         return "⚖️ 中性"
 
     try:
-        completion = await client.beta.chat.completions.parse(
-            model=LLM_MODEL_NAME,
-            messages=[
+        parsed = await parse_structured(
+            RedditSentimentAnalysis,
+            [
                 {
                     "role": "system",
                     "content": "你是一個高頻交易情緒分析員。你的任務是判讀散戶在 Reddit 上的貼文標題。若內容包含像是 'Calls', 'YOLO', 'moon', 'betting 50k on' 等賭博性做多行為，代表極度看多。若有 'Puts', 'Crash', 'Bear' 代表看空。若沒有明顯方向性則為中性。請嚴格輸出 JSON。",
                 },
                 {"role": "user", "content": f"標的: {symbol}\n近期貼文:\n{raw_text}"},
             ],
-            response_format=RedditSentimentAnalysis,
+            priority=PRIORITY_INTERACTIVE,
             temperature=0.0,
             max_tokens=50,
         )
-        if completion.choices[0].message.parsed:
-            return str(completion.choices[0].message.parsed.sentiment)
+        if parsed:
+            return str(parsed.sentiment)
         return "⚖️ 中性"
     except Exception as e:
         logger.warning(f"[{symbol}] 判讀 Reddit 情緒失敗: {e}")
@@ -151,15 +445,14 @@ async def classify_uoa_intent(
     user_prompt = f"標的: {symbol}\nUOA 數據: {json.dumps(uoa_data, ensure_ascii=False)}\n巨鯨意圖: {whale_intent or '無'}"
 
     try:
-        response = await client.beta.chat.completions.parse(
-            model=LLM_MODEL_NAME,
-            messages=[
+        parsed = await parse_structured(
+            UOAIntentMapping,
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            response_format=UOAIntentMapping,
+            priority=PRIORITY_LOW,
         )
-        parsed = response.choices[0].message.parsed
         if parsed is None:
             raise ValueError("Parsed result is None")
         return cast(dict[Any, Any], parsed.model_dump())
@@ -222,16 +515,14 @@ async def evaluate_trade_risk(
     """
 
     try:
-        response = await client.beta.chat.completions.parse(
-            model=LLM_MODEL_NAME,
-            messages=[
+        result = await parse_structured(
+            RiskAssessment,
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            response_format=RiskAssessment,
+            priority=PRIORITY_INTERACTIVE,
         )
-
-        result = response.choices[0].message.parsed
         if result is None:
             raise ValueError("Parsed result is None")
         tags_str = " ".join([f"[{tag}]" for tag in result.tags])
@@ -308,15 +599,13 @@ async def generate_analyst_report(report_type: str, raw_data: dict) -> str:
     user_prompt = f"Report Type: {report_type}\nRaw Data: {json.dumps(raw_data, ensure_ascii=False)}\nGenerate the report."
 
     try:
-        response = await client.beta.chat.completions.parse(
-            model=LLM_MODEL_NAME,
-            messages=[
+        result = await parse_structured(
+            AnalystReport,
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            response_format=AnalystReport,
         )
-        result = response.choices[0].message.parsed
         if result is None:
             raise ValueError("Parsed result is None")
         return str(result.report_content)
@@ -422,17 +711,16 @@ async def generate_polymarket_summary(
     """
 
     try:
-        response = await client.beta.chat.completions.parse(
-            model=LLM_MODEL_NAME,
-            messages=[
+        res = await parse_structured(
+            PolymarketAnalysis,
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            response_format=PolymarketAnalysis,
+            priority=PRIORITY_LOW,
         )
 
         # 使用 Markdown 優化輸出格式
-        res = response.choices[0].message.parsed
         if res is None:
             return "⚠️ 無法解析 AI 結構化總結，請參考原始交易數據。"
 
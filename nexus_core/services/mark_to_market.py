@@ -0,0 +1,104 @@
+"""
+選擇權部位批次估值 (Mark-to-Market)。
+
+呼叫端給一串任意的選擇權腳 (標的 / 到期日 / 履約價 / 買賣權)，本模組依
+(標的, 到期日) 分組，每條期權鏈只經由快取資料層 `get_option_chain` 讀取一次
+(不裁切履約價)，再以向量化查表一次取回所有腳的 Mid 與 IV。
+
+查不到報價的腳回傳 (0.0, 0.0)，與舊的 `get_option_chain_mid_iv` 相同，
+呼叫端沿用 `mid > 0` 判斷即可。
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping, Optional
+
+import numpy as np
+
+from market_analysis.chain_arrays import contract_marks
+from services import market_data_service
+
+logger = logging.getLogger(__name__)
+
+CHAIN_FETCH_CONCURRENCY = 6
+# 與 get_option_chain_mid_iv 相同的履約價比對容差 (吸收浮點誤差)
+STRIKE_TOLERANCE = 0.01
+
+
+@dataclass(frozen=True)
+class OptionLeg:
+    symbol: str
+    expiry: str
+    strike: float
+    opt_type: str
+
+
+@dataclass
+class MarkStats:
+    legs: int = 0
+    chains: int = 0
+    unpriced: int = 0
+
+
+def as_leg(row: Mapping[str, Any]) -> OptionLeg:
+    """由含 symbol / expiry / strike / opt_type 的字典建立 OptionLeg。"""
+    return OptionLeg(
+        symbol=str(row["symbol"]).upper(),
+        expiry=str(row["expiry"]),
+        strike=float(row["strike"]),
+        opt_type=str(row["opt_type"]).lower(),
+    )
+
+
+async def mark_option_legs(
+    legs: Iterable[OptionLeg],
+    concurrency: int = CHAIN_FETCH_CONCURRENCY,
+    stats: Optional[MarkStats] = None,
+) -> list[tuple[float, float]]:
+    """
+    批次估值：依輸入順序回傳每隻腳的 (mid, iv)。
+
+    同一 (標的, 到期日) 的期權鏈只讀取一次，讀取失敗或履約價不在鏈上時該腳為 (0.0, 0.0)。
+    """
+    legs = list(legs)
+    stats = stats if stats is not None else MarkStats()
+    stats.legs = len(legs)
+    results = [(0.0, 0.0)] * len(legs)
+    if not legs:
+        return results
+
+    groups: dict[tuple[str, str], dict[str, list[int]]] = {}
+    for i, leg in enumerate(legs):
+        side = "call" if leg.opt_type == "call" else "put"
+        groups.setdefault((leg.symbol, leg.expiry), {}).setdefault(side, []).append(i)
+    stats.chains = len(groups)
+
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def _load(symbol: str, expiry: str) -> Optional[Any]:
+        async with semaphore:
+            try:
+                return await market_data_service.get_option_chain(
+                    symbol, expiry, prune_pct=None
+                )
+            except Exception as e:
+                logger.warning(f"[{symbol}] 估值讀取期權鏈失敗 (expiry={expiry}): {e}")
+                return None
+
+    keys = list(groups)
+    chains = await asyncio.gather(*(_load(symbol, expiry) for symbol, expiry in keys))
+
+    for key, chain in zip(keys, chains):
+        if chain is None:
+            continue
+        for side, indices in groups[key].items():
+            opts = chain.calls if side == "call" else chain.puts
+            strikes = np.array([legs[i].strike for i in indices], dtype=np.float64)
+            mids, ivs = contract_marks(opts, strikes, tolerance=STRIKE_TOLERANCE)
+            for i, mid, iv in zip(indices, mids, ivs):
+                if np.isfinite(mid):
+                    results[i] = (float(mid), float(iv) if np.isfinite(iv) else 0.0)
+
+    stats.unpriced = sum(1 for mid, _ in results if mid <= 0)
+    return results
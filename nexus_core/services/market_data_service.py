@@ -32,6 +32,19 @@ from aiolimiter import AsyncLimiter
 from config import FINNHUB_API_KEY
 from market_time import ny_tz
 import database.financials as db_financials
+from services.cache_prewarm import (
+    KIND_EMA,
+    KIND_HISTORY,
+    KIND_QUOTE,
+    KIND_SMA,
+    access_tracker,
+    history_param,
+)
+from services.latency_monitor import (
+    STAGE_DATA_FETCH,
+    STAGE_LIMITER_WAIT,
+    latency_registry,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -203,9 +216,14 @@ async def call_yf(func: Any, *args: Any, **kwargs: Any) -> Any:
         limiter, sem = controls["limiter_interactive"], controls["sem_interactive"]
     else:
         limiter, sem = controls["limiter_background"], controls["sem_background"]
+    queued = time.perf_counter()
     async with limiter:
         async with sem:
-            return await asyncio.to_thread(func, *args, **kwargs)
+            latency_registry.record(
+                STAGE_LIMITER_WAIT, (time.perf_counter() - queued) * 1000.0
+            )
+            with latency_registry.span(STAGE_DATA_FETCH):
+                return await asyncio.to_thread(func, *args, **kwargs)
 
 
 def _get_client() -> finnhub.Client:
@@ -261,6 +279,7 @@ async def _execute_api_call(func: Any, *args, **kwargs) -> Any:  # type: ignore
         await asyncio.sleep(random.uniform(0.1, 0.3))
 
     for attempt in range(max_retries + 1):
+        queued = time.perf_counter()
         # 0) 全局冷卻（先快檢一次，不要讓所有 task 進 limiter 排隊後又卡住）
         now = time.time()
         rate_limit_until = _rate_limit_until
@@ -281,10 +300,14 @@ async def _execute_api_call(func: Any, *args, **kwargs) -> Any:  # type: ignore
                             f"⏳ 限流鎖內確認全局頻率限制，主動等待 {wait_time:.1f} 秒..."
                         )
                         await asyncio.sleep(wait_time)
+                    latency_registry.record(
+                        STAGE_LIMITER_WAIT, (time.perf_counter() - queued) * 1000.0
+                    )
 
                     try:
                         # Finnhub SDK 為同步阻塞 I/O，必須在獨立線程中執行
-                        return await asyncio.to_thread(func, *args, **kwargs)
+                        with latency_registry.span(STAGE_DATA_FETCH):
+                            return await asyncio.to_thread(func, *args, **kwargs)
                     except Exception as e:
                         error_msg = str(e).lower()
                         is_rate_limit = (
@@ -518,7 +541,9 @@ async def get_quote(symbol: str) -> Dict[str, Any]:
     if symbol in _quote_cache:
         val, expiry = _quote_cache[symbol]
         if now < expiry:
+            access_tracker.record(symbol, KIND_QUOTE, hit=True, now=now)
             return val  # type: ignore
+    access_tracker.record(symbol, KIND_QUOTE, hit=False, now=now)
 
     async def _fetch() -> Any:
         if symbol.startswith("^") or symbol == "VIX" or symbol.endswith("=F"):
@@ -717,7 +742,13 @@ async def get_history_df(
     if not force_refresh and cache_key in _history_cache:
         cached_df, expiry = _history_cache[cache_key]
         if now < expiry:
+            access_tracker.record(
+                symbol, KIND_HISTORY, history_param(period, interval), True, now
+            )
             return cached_df.copy()
+    access_tracker.record(
+        symbol, KIND_HISTORY, history_param(period, interval), False, now
+    )
 
     try:
         ticker = yf.Ticker(symbol)
@@ -962,7 +993,7 @@ async def get_option_chain(
         calls_copy = cached_val.calls.copy() if cached_val.calls is not None else None
         puts_copy = cached_val.puts.copy() if cached_val.puts is not None else None
 
-        spot_price = await _get_spot()
+        spot_price = await _get_spot() if prune_pct is not None else 0.0
         calls_copy, puts_copy = _prune(calls_copy, puts_copy, spot_price, prune_pct)
 
         underlying_copy = (
@@ -1062,6 +1093,16 @@ def clear_options_cache() -> None:
     logger.info("Clarified options cache")
 
 
+def sma_history_period(window: int) -> str:
+    """計算 SMA{window} 所需抓取的歷史 K 線區間。"""
+    return "1y" if window <= 200 else "2y"
+
+
+def ema_history_period(window: int) -> str:
+    """計算 EMA{window} 所需抓取的歷史 K 線區間。"""
+    return "1mo" if window <= 21 else "1y"
+
+
 async def get_sma(symbol: str, window: int = 200) -> Optional[float]:
     """計算簡單移動平均線 (SMA)。"""
     current_time = time.time()
@@ -1070,11 +1111,12 @@ async def get_sma(symbol: str, window: int = 200) -> Optional[float]:
     if cache_key in _sma_cache:
         cached_val, expiry = _sma_cache[cache_key]
         if current_time < expiry:
+            access_tracker.record(symbol, KIND_SMA, str(window), True, current_time)
             return cached_val  # type: ignore
+    access_tracker.record(symbol, KIND_SMA, str(window), False, current_time)
 
     try:
-        period = "1y" if window <= 200 else "2y"
-        df = await get_history_df(symbol, period=period)
+        df = await get_history_df(symbol, period=sma_history_period(window))
 
         if df.empty or len(df) < window:
             return None
@@ -1111,11 +1153,12 @@ async def get_ema(symbol: str, window: int = 21) -> Optional[float]:
     if cache_key in _ema_cache:
         val, expiry = _ema_cache[cache_key]
         if now < expiry:
+            access_tracker.record(symbol, KIND_EMA, str(window), True, now)
             return val  # type: ignore
+    access_tracker.record(symbol, KIND_EMA, str(window), False, now)
 
     try:
-        period = "1mo" if window <= 21 else "1y"
-        df = await get_history_df(symbol, period=period)
+        df = await get_history_df(symbol, period=ema_history_period(window))
 
         if df.empty or len(df) < window:
             return None
@@ -1,12 +1,23 @@
-from typing import Any
+from typing import Any, Optional
 import asyncio
 import psutil
 import logging
 import gc
 import os
+import time
+from collections import Counter
 from datetime import datetime, timezone
 
+import config
 from cogs.embed_builder import create_memory_alert_embed
+from services.cache_prewarm import (
+    WarmupPlan,
+    WarmupReport,
+    access_tracker,
+    build_warmup_plan,
+    execute_warmup_plan,
+    seed_rows,
+)
 from services.llm_service import is_memory_safe
 
 logger = logging.getLogger(__name__)
@@ -28,6 +39,8 @@ class MemoryManager:
         self._last_alert_at = 0
         self._last_power_alert_level = 100
         self._last_warmup_date = None
+        self._warmup_running = False
+        self.last_warmup_report: Optional[WarmupReport] = None
 
     def start(self) -> None:
         if self.running:
@@ -51,6 +64,10 @@ class MemoryManager:
                 await self._perform_health_check()
             except Exception as e:
                 logger.error(f"Health check error: {e}")
+            try:
+                await access_tracker.flush()
+            except Exception as e:
+                logger.error(f"Cache access stats flush error: {e}")
             await asyncio.sleep(self._check_interval)
 
     async def _warmup_loop(self) -> None:
@@ -73,9 +90,9 @@ class MemoryManager:
             await asyncio.sleep(600)  # 每 10 分鐘檢查一次
 
     async def proactive_warmup(self) -> None:
-        """執行快取預熱，具備冪等性與記憶體保護門檻。"""
+        """依存取統計執行快取預熱，具備冪等性與記憶體保護門檻。"""
         today_str = datetime.now().strftime("%Y-%m-%d")
-        if self._last_warmup_date == today_str:
+        if self._last_warmup_date == today_str or self._warmup_running:
             return
 
         if not is_memory_safe():
@@ -85,37 +102,53 @@ class MemoryManager:
             return
 
         logger.info("🔥 [Warmup] 啟動盤前快取預熱 (Cache Warmup)...")
+        self._warmup_running = True
         try:
-            from database.watchlist import get_all_watchlist
-            from services.market_data_service import get_sma, get_ema, get_quote
-
-            watchlist = get_all_watchlist()
-            symbols: list[str] = list(set([row[1] for row in watchlist]))
-            # 確保 SPY 優先預熱
-            if "SPY" not in symbols:
-                symbols.insert(0, "SPY")
-            else:
-                symbols.remove("SPY")
-                symbols.insert(0, "SPY")
-
-            for sym in symbols[:20]:  # 限制數量以防 OOM
-                # 平行預熱常用指標
-                await asyncio.gather(
-                    get_quote(sym),
-                    get_sma(sym, 200),
-                    get_ema(sym, 8),
-                    get_ema(sym, 21),
-                    return_exceptions=True,
-                )
-                # 每個標的間隔一下，避免 CPU 瞬間飆升
-                await asyncio.sleep(0.5)
+            from market_time import ny_tz
 
-            self._last_warmup_date = today_str  # type: ignore
-            logger.info(
-                f"✅ [Warmup] 快取預熱完成。共處理 {len(symbols[:20])} 檔標的。"
+            plan = await self._build_warmup_plan()
+            report = await execute_warmup_plan(
+                plan,
+                self._warmup_spread_sec(datetime.now(ny_tz)),
+                config.CACHE_WARMUP_CONCURRENCY,
             )
+            self.last_warmup_report = report
+            self._last_warmup_date = today_str  # type: ignore
+            logger.info(f"✅ [Warmup] 快取預熱完成：{report.summary()}")
         except Exception as e:
             logger.error(f"Cache warmup failed: {e}")
+        finally:
+            self._warmup_running = False
+
+    async def _build_warmup_plan(self) -> WarmupPlan:
+        await access_tracker.ensure_loaded()
+        now = time.time()
+        rows = access_tracker.rows(now)
+        plan = build_warmup_plan(
+            rows, config.CACHE_WARMUP_BUDGET_MB * 1024, config.CACHE_WARMUP_MAX_ITEMS
+        )
+        if plan.items:
+            return plan
+
+        # 冷啟動：尚無存取統計時，依關注人數排序觀察清單 (SPY 優先)
+        from database.watchlist import get_all_watchlist
+
+        watchlist = await asyncio.to_thread(get_all_watchlist)
+        counts = Counter(row[1] for row in watchlist)
+        symbols = ["SPY"] + [s for s, _ in counts.most_common() if s != "SPY"]
+        return build_warmup_plan(
+            seed_rows(symbols[:20], now),
+            config.CACHE_WARMUP_BUDGET_MB * 1024,
+            config.CACHE_WARMUP_MAX_ITEMS,
+        )
+
+    @staticmethod
+    def _warmup_spread_sec(now_ny: datetime) -> float:
+        """盤前視窗內把預熱平均分散到 09:25 ET 前完成；視窗外 (指令觸發) 則立即執行。"""
+        deadline = now_ny.replace(hour=9, minute=25, second=0, microsecond=0)
+        if now_ny.hour < 8 or now_ny >= deadline:
+            return 0.0
+        return (deadline - now_ny).total_seconds()
 
     async def _perform_health_check(self) -> None:
         mem = psutil.virtual_memory()
@@ -23,11 +23,13 @@ class SingleFlightManager:
         awaits it instead of starting a new one.
         """
         async with cls._lock:
-            if key in cls._active_tasks:
+            # 已完成但尚未被清理的任務 (清理為非同步排程) 不再合併，避免拿到上一輪的舊結果
+            existing = cls._active_tasks.get(key)
+            if existing is not None and not existing.done():
                 logger.info(
                     f"SingleFlightManager: Coalescing concurrent task for key: {key}"
                 )
-                task = cls._active_tasks[key]
+                task = existing
             else:
                 logger.info(f"SingleFlightManager: Creating new task for key: {key}")
                 # Create a task for the coroutine function
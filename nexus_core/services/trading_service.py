@@ -12,7 +12,7 @@ from config import get_vix_tier
 from market_analysis import portfolio, hedging
 from market_analysis.gap_analysis import GapAnalyzer
 from market_analysis.pro_management import simulate_cc_transition
-from market_analysis.ghost_trader import GhostTrader
+from market_analysis.ghost_trader import ChainSnapshot, GhostTrader
 from market_analysis.risk_engine import optimize_position_risk
 from services import market_data_service, news_service
 from market_analysis.ddp_inspector import DDPInspector
@@ -452,8 +452,12 @@ class TradingService:
                     sym, period="60d", interval="1h"
                 )
                 if not df_hist_1h.empty:
-                    ema_8_sig = market_math.detect_ema_signals(df_hist_1h, window=8)
-                    ema_21_sig = market_math.detect_ema_signals(df_hist_1h, window=21)
+                    ema_8_sig = market_math.detect_ema_signals(
+                        df_hist_1h, window=8, symbol=sym, interval="1h"
+                    )
+                    ema_21_sig = market_math.detect_ema_signals(
+                        df_hist_1h, window=21, symbol=sym, interval="1h"
+                    )
 
                     # 整合訊號至結果字典
                     res["ema_signals"] = [sig for sig in [ema_8_sig, ema_21_sig] if sig]
@@ -468,7 +472,7 @@ class TradingService:
                 )
                 from market_analysis.psq_engine import analyze_psq
 
-                psq_result = analyze_psq(df_hist_1d, vix_spot=vix_spot)
+                psq_result = analyze_psq(df_hist_1d, vix_spot=vix_spot, symbol=sym)
                 if psq_result:
                     res["psq_result"] = psq_result
                     # Ensure price is available for PSQ reports
@@ -874,9 +878,10 @@ class TradingService:
             before_trades = await asyncio.to_thread(get_all_open_virtual_trades)
             before_ids = {t["id"] for t in before_trades}
 
-            # 執行管理與轉倉
-            await self.vtr_engine.manage_virtual_positions()
-            await self.vtr_engine.execute_virtual_roll()
+            # 執行管理與轉倉 (三個階段共用同一份期權鏈 / 報價快照)
+            snapshot = ChainSnapshot()
+            await self.vtr_engine.manage_virtual_positions(snapshot)
+            await self.vtr_engine.execute_virtual_roll(snapshot)
 
             # 重新檢查交易列表
             after_trades = await asyncio.to_thread(get_all_open_virtual_trades)
@@ -884,7 +889,9 @@ class TradingService:
             closed_ids = before_ids - after_ids
 
             # 3. 找出演進候選部位 (Synthetic -> Core Equity)
-            transition_candidates = await self.vtr_engine.get_transition_candidates()
+            transition_candidates = await self.vtr_engine.get_transition_candidates(
+                snapshot
+            )
             for cand in transition_candidates:
                 trade = cand["trade"]
                 uid = trade["user_id"]
@@ -1124,14 +1131,16 @@ class TradingService:
 
             # STHE 自動優化屬於加值資訊，失敗不應中斷報告。
             try:
-                await hedging.calculate_daily_effectiveness(uid)
+                await hedging.calculate_daily_effectiveness(
+                    uid, perf=hedge_analysis or None, u_ctx=user_ctx
+                )
             except Exception:
                 logger.exception(
                     f"盤後報告警告：calculate_daily_effectiveness 失敗，uid={uid}"
                 )
 
             try:
-                new_tau = await hedging.calculate_dynamic_tau(uid)
+                new_tau = await hedging.calculate_dynamic_tau(uid, u_ctx=user_ctx)
                 hedge_analysis["dynamic_tau"] = new_tau
             except Exception:
                 logger.exception(f"盤後報告警告：calculate_dynamic_tau 失敗，uid={uid}")
@@ -94,6 +94,34 @@ def clean_db(db_conn: Any):  # type: ignore
     except Exception:
         pass
 
+    try:
+        from market_analysis.indicator_engine import indicator_engine
+
+        indicator_engine.reset()
+    except Exception:
+        pass
+
+    try:
+        from market_analysis.sentiment.rolling_stats import indicator_stats
+
+        indicator_stats.reset()
+    except Exception:
+        pass
+
+    try:
+        from services.fundamentals_store import fundamentals_store
+
+        fundamentals_store.clear()
+    except Exception:
+        pass
+
+    try:
+        from services.calendar_service import calendar_service
+
+        calendar_service.clear()
+    except Exception:
+        pass
+
     # Clear tables before each test if needed
     cursor = db_conn.cursor()
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
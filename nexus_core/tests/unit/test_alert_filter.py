@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from typing import Any, Iterator
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_time import ny_tz
+from services import alert_filter
+from services.alert_filter import (
+    TrendState,
+    compute_anchor_trends,
+    confirm_mtf_trends,
+    pending_crossover_signals,
+    validate_mtf_trend,
+)
+
+
+def _closes(start: float, drift: float, n: int = 40) -> pd.Series:
+    rng = np.random.default_rng(int(start))
+    values = start * np.exp(np.cumsum(rng.normal(drift, 0.01, n)))
+    return pd.Series(values, index=pd.bdate_range("2026-01-05", periods=n))
+
+
+@pytest.fixture(autouse=True)
+def _fresh_anchor_cache() -> Iterator[None]:
+    alert_filter.clear_anchor_cache()
+    yield
+    alert_filter.clear_anchor_cache()
+
+
+def test_matrix_anchor_matches_per_symbol_ema() -> None:
+    up, down = _closes(100, 0.01), _closes(50, -0.01)
+    # 不同標的缺漏日期不一致，且 SHORT 的 K 棒數不足
+    gappy = up.drop(up.index[[5, 17, 30]])
+    matrix = pd.DataFrame({"UP": gappy, "DOWN": down, "SHORT": down.iloc[-10:]})
+
+    trends = compute_anchor_trends(matrix)
+
+    for sym, series in (("UP", gappy), ("DOWN", down)):
+        ema = series.ewm(span=21, adjust=False).mean().iloc[-1]
+        expected = TrendState.BULLISH if series.iloc[-1] > ema else TrendState.BEARISH
+        assert trends[sym] == expected
+    assert trends["UP"] == TrendState.BULLISH
+    assert trends["DOWN"] == TrendState.BEARISH
+    assert trends["SHORT"] is None
+
+
+async def test_batch_loads_each_symbol_once_and_memoizes_until_close() -> None:
+    frames = {
+        "NVDA": pd.DataFrame({"Close": _closes(100, 0.01)}),
+        "AMD": pd.DataFrame({"Close": _closes(80, -0.01)}),
+        "DEAD": pd.DataFrame(),
+    }
+    calls: list[str] = []
+
+    async def fake_history(symbol: str, **_: Any) -> pd.DataFrame:
+        calls.append(symbol)
+        return frames[symbol]
+
+    bull = {"type": "CROSSOVER", "direction": "BULLISH"}
+    bear = {"type": "CROSSOVER", "direction": "BEARISH"}
+    close_at = datetime.now(ny_tz) + timedelta(hours=2)
+
+    with (
+        patch("services.market_data_service.get_history_df", side_effect=fake_history),
+        patch(
+            "services.alert_filter.session_calendar.next_close", return_value=close_at
+        ),
+    ):
+        results = await confirm_mtf_trends(
+            [("NVDA", bull), ("AMD", bull), ("NVDA", bear), ("DEAD", bull)]
+        )
+        single = await validate_mtf_trend("AMD", bear)
+
+        assert sorted(calls) == ["AMD", "DEAD", "NVDA"]
+        assert [r.is_aligned for r in results] == [True, False, False, False]
+        assert results[2].anchor_trend == TrendState.BULLISH
+        assert results[3].anchor_trend == TrendState.NEUTRAL
+        assert single.is_aligned and single.confirmed_direction == TrendState.BEARISH
+
+        # 空資料不快取；下一根日 K 收盤後重新計算
+        calls.clear()
+        await confirm_mtf_trends([("NVDA", bull), ("DEAD", bull)])
+        assert calls == ["DEAD"]
+        with patch(
+            "services.alert_filter.time.time",
+            return_value=close_at.timestamp() + 60,
+        ):
+            calls.clear()
+            await confirm_mtf_trends([("NVDA", bull)])
+        assert calls == ["NVDA"]
+
+
+def test_pending_crossover_signals_collects_only_crossovers() -> None:
+    cross = {"type": "CROSSOVER", "direction": "BULLISH"}
+    results: list[dict[str, Any]] = [
+        {"symbol": "NVDA", "ema_signals": [cross, {"type": "TOUCH"}]},
+        {"symbol": "AMD"},
+        {"ema_signals": [cross]},
+    ]
+    assert pending_crossover_signals(results) == [("NVDA", cross)]
@@ -0,0 +1,106 @@
+import asyncio
+import socket
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable
+
+import pytest
+
+from benchmarks.cases import CASES
+from benchmarks.fixtures import NetworkBlockedError, block_network
+from benchmarks.harness import (
+    BenchmarkCase,
+    BenchmarkReport,
+    BenchmarkResult,
+    compare,
+    measure,
+    percentile,
+)
+
+
+def _result(name: str = "case", **overrides: float) -> BenchmarkResult:
+    values: dict[str, Any] = {
+        "name": name,
+        "iterations": 10,
+        "ops_per_sec": 100.0,
+        "mean_ms": 10.0,
+        "p50_ms": 10.0,
+        "p99_ms": 12.0,
+        "peak_memory_kib": 512.0,
+    }
+    values.update(overrides)
+    return BenchmarkResult(**values)
+
+
+def test_percentile_interpolates_like_numpy() -> None:
+    ordered = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(ordered, 0) == 1.0
+    assert percentile(ordered, 50) == pytest.approx(2.5)
+    assert percentile(ordered, 100) == 4.0
+    assert percentile([], 50) == 0.0
+
+
+def test_compare_flags_regressions_by_direction() -> None:
+    baseline = {"case": _result()}
+    current = {"case": _result(p50_ms=13.0, ops_per_sec=70.0, peak_memory_kib=520.0)}
+    flagged = {r.metric for r in compare(current, baseline, threshold=0.25)}
+    # 延遲 +30%、吞吐 -30% 皆為退步；記憶體只增加 1.5%
+    assert flagged == {"p50_ms", "ops_per_sec"}
+
+    improved = {"case": _result(p50_ms=5.0, ops_per_sec=200.0)}
+    assert compare(improved, baseline) == []
+
+
+def test_compare_ignores_noise_floor_and_unknown_cases() -> None:
+    baseline = {"tiny": _result("tiny", p50_ms=0.01, peak_memory_kib=1.0)}
+    current = {
+        "tiny": _result("tiny", p50_ms=0.03, peak_memory_kib=20.0),
+        "new_case": _result("new_case"),
+    }
+    assert compare(current, baseline) == []
+
+
+def test_report_round_trip(tmp_path: Path) -> None:
+    report = BenchmarkReport({"case": _result()}, meta={"python": "3.12"})
+    path = tmp_path / "baseline.json"
+    report.save(path)
+    loaded = BenchmarkReport.load(path)
+    assert loaded.results == report.results
+    assert loaded.meta == report.meta
+
+
+@pytest.mark.parametrize("is_async", [False, True])
+def test_measure_supports_sync_and_async_callables(is_async: bool) -> None:
+    calls: list[int] = []
+
+    @asynccontextmanager
+    async def factory() -> AsyncIterator[Callable[[], Any]]:
+        async def run_async() -> None:
+            await asyncio.sleep(0)
+            calls.append(1)
+
+        def run_sync() -> None:
+            calls.append(1)
+
+        yield run_async if is_async else run_sync
+
+    case = BenchmarkCase("demo", factory, iterations=5, warmup=1, ops_per_iteration=4)
+    result = measure(case)
+    # 暖機 1 + 計時 5 + 記憶體 3
+    assert len(calls) == 9
+    assert result.iterations == 5
+    assert result.ops_per_sec > 0
+    assert result.p99_ms >= result.p50_ms
+
+
+def test_block_network_rejects_connections() -> None:
+    with block_network():
+        with pytest.raises(NetworkBlockedError):
+            socket.create_connection(("example.com", 443), timeout=1)
+
+
+@pytest.mark.parametrize("name", ["max_pain", "gex_walls"])
+def test_cheap_cases_run_offline(name: str) -> None:
+    result = measure(CASES[name], iterations=1)
+    assert result.iterations == 1
+    assert result.ops_per_sec > 0
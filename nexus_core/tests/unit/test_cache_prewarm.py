@@ -0,0 +1,146 @@
+import asyncio
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from database import core
+from market_time import ny_tz
+from services.cache_prewarm import (
+    KIND_EMA,
+    KIND_HISTORY,
+    KIND_QUOTE,
+    KIND_SMA,
+    SCORE_HALF_LIFE_SEC,
+    CacheAccessTracker,
+    WarmupItem,
+    WarmupPlan,
+    access_tracker,
+    build_warmup_plan,
+    estimate_history_kib,
+    execute_warmup_plan,
+    kind_ttl_sec,
+)
+
+
+def _ny(hour: int, minute: int) -> float:
+    return datetime(2026, 3, 2, hour, minute, tzinfo=ny_tz).timestamp()
+
+
+def test_tracker_decays_scores_and_measures_opening_first_hits() -> None:
+    tracker = CacheAccessTracker()
+    t0 = _ny(8, 0)
+    tracker.record("NVDA", KIND_SMA, "200", now=t0)
+    tracker.record("NVDA", KIND_SMA, "200", now=t0)
+    tracker.record("AAPL", KIND_SMA, "200", now=t0 - SCORE_HALF_LIFE_SEC)
+
+    scores = {r[0]: r[3] for r in tracker.rows(now=t0)}
+    assert scores["NVDA"] == pytest.approx(2.0)
+    assert scores["AAPL"] == pytest.approx(0.5)
+
+    # 開盤視窗內只計每個 key 的第一次請求
+    tracker.record("NVDA", KIND_SMA, "200", hit=True, now=_ny(9, 31))
+    tracker.record("NVDA", KIND_SMA, "200", hit=False, now=_ny(9, 32))
+    tracker.record("AAPL", KIND_QUOTE, hit=False, now=_ny(9, 33))
+    tracker.record("MSFT", KIND_QUOTE, hit=False, now=_ny(10, 30))
+    assert tracker.opening.session_date == "2026-03-02"
+    assert (tracker.opening.first_hits, tracker.opening.first_misses) == (1, 1)
+    assert tracker.opening.hit_rate == pytest.approx(0.5)
+
+
+def test_plan_ranks_by_score_within_budget_and_skips_quotes() -> None:
+    now = time.time()
+    sma_cost = estimate_history_kib("1y", "1d") + 0.2
+    rows = [
+        ("SPY", KIND_QUOTE, "", 50.0, now),
+        ("NVDA", KIND_SMA, "200", 9.0, now),
+        ("NVDA", KIND_HISTORY, "1y|1d", 4.0, now),
+        ("AAPL", KIND_EMA, "21", 3.0, now),
+        ("TSLA", KIND_SMA, "200", 2.0, now),
+        ("COLD", KIND_SMA, "50", 0.01, now),
+    ]
+    plan = build_warmup_plan(rows, budget_kib=sma_cost + 4.0, max_items=50)
+
+    keys = [(i.symbol, i.kind, i.param) for i in plan.items]
+    # 報價 TTL 太短不預熱；TSLA 超出預算；長 TTL 的歷史 K 線排在指標前面
+    assert keys == [
+        ("NVDA", KIND_HISTORY, "1y|1d"),
+        ("AAPL", KIND_HISTORY, "1mo|1d"),
+        ("NVDA", KIND_SMA, "200"),
+        ("AAPL", KIND_EMA, "21"),
+    ]
+    assert plan.items[0].score == 4.0  # 依賴項補上自身分數
+    assert plan.skipped_budget == 1
+    assert plan.size_kib <= sma_cost + 4.0
+    assert plan.candidate_score == pytest.approx(18.0)
+
+
+async def test_execute_plan_paces_bounds_concurrency_and_reports_coverage() -> None:
+    items = [WarmupItem(f"S{i}", KIND_HISTORY, "1y|1d", 1.0, 10.0) for i in range(6)]
+    items.append(WarmupItem("BAD", KIND_SMA, "200", 2.0, 0.2))
+    plan = WarmupPlan(items, candidate_score=10.0, skipped_budget=2)
+    in_flight = 0
+    peak = 0
+    recorded_before = len(access_tracker.rows())
+
+    async def fake_history(symbol: str, period: str, interval: str) -> pd.DataFrame:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        access_tracker.record(symbol, KIND_HISTORY, "1y|1d")
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return pd.DataFrame({"Close": [1.0]})
+
+    async def fake_sma(symbol: str, window: int) -> None:
+        return None
+
+    with (
+        patch("services.market_data_service.get_history_df", side_effect=fake_history),
+        patch("services.market_data_service.get_sma", side_effect=fake_sma),
+    ):
+        report = await execute_warmup_plan(plan, spread_sec=0.07, concurrency=2)
+
+    assert peak <= 2
+    assert report.duration_sec >= 0.06
+    assert (report.planned, report.warmed, report.failed) == (7, 6, 1)
+    assert report.score_coverage == pytest.approx(0.6)
+    assert report.skipped_budget == 2
+    # 預熱自身的讀取不回灌存取統計
+    assert len(access_tracker.rows()) == recorded_before
+
+
+async def test_flush_and_load_round_trip(tmp_path: Path) -> None:
+    with patch("config.DB_NAME", str(tmp_path / "access.db")):
+        core.run_migrations()
+        writer = CacheAccessTracker()
+        now = time.time()
+        writer.record("NVDA", KIND_SMA, "200", now=now)
+        writer.record("NVDA", KIND_SMA, "200", now=now)
+        assert await writer.flush(now=now) == 1
+
+        reader = CacheAccessTracker()
+        reader.record("NVDA", KIND_SMA, "200", now=now)
+        assert reader.load() == 1
+        assert reader.rows(now=now)[0][3] == pytest.approx(3.0)
+
+
+def test_kind_ttl_follows_market_data_service_constants() -> None:
+    import services.market_data_service as mds
+
+    with patch.object(mds, "_SMA_CACHE_TTL", 300):
+        ttl = kind_ttl_sec()
+        plan = build_warmup_plan(
+            [("SPY", KIND_SMA, "200", 5.0, time.time())],
+            budget_kib=1024.0,
+            max_items=10,
+        )
+
+    assert ttl[KIND_QUOTE] == mds._QUOTE_CACHE_TTL
+    assert ttl[KIND_HISTORY] == mds._HISTORY_CACHE_TTL
+    assert ttl[KIND_SMA] == 300
+    # SMA TTL 縮短到撐不到開盤時即不再預熱
+    assert plan.items == []
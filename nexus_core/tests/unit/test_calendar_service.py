@@ -368,3 +368,86 @@ async def test_calendar_service_unset_tunnel_url_degradation(db_conn: Any) -> No
     assert len(events) == 1
     assert events[0].event == "Cached Non-Farm Payrolls"
     assert getattr(events, "is_fallback", False) is True
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calendar_reads_share_one_load(db_conn: Any) -> None:
+    """同月份、同標的的並行查詢各只載入一次；之後的區間查詢直接走記憶體索引。"""
+    import asyncio
+    from unittest.mock import MagicMock
+
+    from database.calendar_cache import get_cached_earnings_batch
+
+    fixed_now = datetime(2026, 5, 12, 12, 0, 0)
+    api_events = [
+        {"event_name": "CPI Report", "date": "2026-05-13", "time": "08:30"},
+        {"event_name": "FOMC Rate Decision", "date": "2026-05-12", "time": "14:00"},
+        {"event_name": "Nonfarm Payrolls", "date": "2026-05-08", "time": "08:30"},
+    ]
+
+    async def slow_get(*_: Any, **__: Any) -> Any:
+        await asyncio.sleep(0.02)
+        response = MagicMock(status_code=200)
+        response.json.return_value = api_events
+        return response
+
+    async def slow_calendar(symbol: str) -> Any:
+        await asyncio.sleep(0.02)
+        return [{"date": "2026-05-20"}]
+
+    with patch("services.calendar_service.datetime") as mock_datetime:
+        mock_datetime.now.side_effect = (
+            lambda tz=None: fixed_now if tz is None else fixed_now.replace(tzinfo=tz)
+        )
+        mock_datetime.fromisoformat = datetime.fromisoformat
+        mock_datetime.strptime = datetime.strptime
+        mock_datetime.combine = datetime.combine
+        mock_datetime.min = datetime.min
+
+        with patch("config.TUNNEL_URL", "http://edge.local"), patch(
+            "httpx.AsyncClient.get", side_effect=slow_get
+        ) as mock_get, patch(
+            "services.market_data_service.get_earnings_calendar",
+            side_effect=slow_calendar,
+        ) as mock_calendar:
+            service = CalendarService()
+            service._cold_start_complete = True
+            weekly, next_half_day, single, batch = await asyncio.gather(
+                service.get_high_impact_events(days=7),
+                service.get_events_within_hours(12),
+                service.get_symbol_earnings("AAPL"),
+                service.get_symbol_earnings_batch(["aapl", "MSFT"]),
+            )
+
+            with patch(
+                "services.calendar_service.get_macro_events_between"
+            ) as mock_between, patch(
+                "services.calendar_service.get_macro_month_status"
+            ) as mock_status:
+                upcoming = await service.get_next_high_impact_event(days=7)
+            mock_between.assert_not_called()
+            mock_status.assert_not_called()
+
+            reloaded = CalendarService()
+            with patch(
+                "services.calendar_service.get_cached_earnings"
+            ) as mock_single, patch(
+                "services.calendar_service.get_cached_earnings_batch",
+                wraps=get_cached_earnings_batch,
+            ) as mock_batch:
+                reloaded_batch = await reloaded.get_symbol_earnings_batch(
+                    ["AAPL", "MSFT"]
+                )
+            mock_single.assert_not_called()
+            mock_batch.assert_called_once()
+
+    assert mock_get.await_count == 1
+    assert mock_calendar.await_count == 2
+    assert [e.event for e in weekly] == ["FOMC Rate Decision", "CPI Report"]
+    assert [e.event for e in next_half_day] == ["FOMC Rate Decision"]
+    assert upcoming is not None and upcoming.tte_hours == 6.0
+    assert single == batch["AAPL"]
+    assert {s: e.date for s, e in reloaded_batch.items() if e} == {
+        "AAPL": "2026-05-20",
+        "MSFT": "2026-05-20",
+    }
@@ -0,0 +1,219 @@
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_analysis.chain_arrays import (
+    max_gamma_wall,
+    max_pain_strike,
+    split_adjust_chain,
+    weighted_atm_iv,
+)
+from market_analysis.greeks import calculate_greeks
+
+
+def _recorded_chain(
+    seed: int, spot: float = 100.0
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """模擬 yfinance 鏈的形狀：0.5/1/5 級距履約價、零星 NaN、零 OI 與極端 IV。"""
+    rng = np.random.default_rng(seed)
+    strikes = np.concatenate(
+        [
+            np.arange(spot * 0.5, spot * 0.9, 5.0),
+            np.arange(spot * 0.9, spot * 1.1, 0.5),
+            np.arange(spot * 1.1, spot * 1.6, 5.0),
+        ]
+    )
+
+    def side() -> pd.DataFrame:
+        n = len(strikes)
+        df = pd.DataFrame(
+            {
+                "strike": strikes,
+                "impliedVolatility": rng.uniform(0.0, 0.9, n),
+                "openInterest": rng.integers(0, 5000, n).astype(float),
+                "volume": rng.integers(0, 800, n).astype(float),
+            }
+        )
+        df.loc[rng.choice(n, 3, replace=False), "volume"] = np.nan
+        df.loc[rng.choice(n, 2, replace=False), "impliedVolatility"] = np.nan
+        df.loc[rng.choice(n, 4, replace=False), "impliedVolatility"] = 0.0
+        return df
+
+    return side(), side()
+
+
+# ---- 舊版逐列實作 (iterrows)，作為回歸基準 ----
+
+
+def _legacy_weighted_iv(frames: Any, spot_price: float) -> Any:
+    all_options = []
+    for df in frames:
+        if df is not None and not df.empty:
+            for _, row in df.iterrows():
+                iv_val = float(row.get("impliedVolatility", 0.0))
+                strike_val = float(row.get("strike", 0.0))
+                oi = float(row.get("openInterest", 0.0))
+                vol = float(row.get("volume", 0.0))
+                if iv_val > 0.01 and strike_val > 0.0:
+                    distance_pct = abs(strike_val - spot_price) / spot_price
+                    if distance_pct <= 0.20:
+                        weight = (oi + vol + 1.0) / (distance_pct * 100.0 + 1.0)
+                        all_options.append((iv_val, weight))
+    if not all_options:
+        return None
+    total_weight = sum(w for _, w in all_options)
+    return sum(iv * w for iv, w in all_options) / total_weight
+
+
+def _legacy_gamma_wall(puts: pd.DataFrame, price: float, t: float, q: float) -> float:
+    max_wall_score = -1.0
+    max_wall_strike = price
+    for _, row in puts.iterrows():
+        greeks = calculate_greeks(
+            "put", price, float(row["strike"]), t, float(row["impliedVolatility"]), q
+        )
+        gamma_score = abs(float(greeks["gamma"])) * float(row["openInterest"]) * 100.0
+        if gamma_score > max_wall_score:
+            max_wall_score = gamma_score
+            max_wall_strike = float(row["strike"])
+    return max_wall_strike
+
+
+def _legacy_split_adjust(df: pd.DataFrame, spot_price: float, factor: float) -> None:
+    new_strikes, new_oi, new_vol = [], [], []
+    for _, row in df.iterrows():
+        k, oi, vol = row["strike"], row["openInterest"], row["volume"]
+        if k > spot_price * 2.0:
+            adjusted_k = k / factor
+            if 0.5 * spot_price <= adjusted_k <= 2.0 * spot_price:
+                k, oi, vol = adjusted_k, oi * factor, vol * factor
+        new_strikes.append(k)
+        new_oi.append(oi)
+        new_vol.append(vol)
+    df["strike"] = new_strikes
+    df["openInterest"] = new_oi
+    df["volume"] = new_vol
+
+
+def _legacy_max_pain(
+    calls: pd.DataFrame, puts: pd.DataFrame, strikes: list, weight_key: str
+) -> float:
+    pains = []
+    for s in strikes:
+        call_sub = calls[calls["strike"] < s]
+        call_pain = (
+            (call_sub[weight_key] * (s - call_sub["strike"])).sum()
+            if not call_sub.empty
+            else 0.0
+        )
+        put_sub = puts[puts["strike"] > s]
+        put_pain = (
+            (put_sub[weight_key] * (put_sub["strike"] - s)).sum()
+            if not put_sub.empty
+            else 0.0
+        )
+        pains.append(call_pain + put_pain)
+    return float(strikes[pains.index(min(pains))])
+
+
+SEEDS = range(12)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_weighted_atm_iv_matches_legacy(seed: int) -> None:
+    calls, puts = _recorded_chain(seed)
+    # NaN volume 會讓原本的加權和成為 NaN；另外驗證欄位完整的鏈
+    for c, p in ((calls, puts), (calls.fillna(0.0), puts.fillna(0.0))):
+        expected = _legacy_weighted_iv([c, p], 100.0)
+        actual = weighted_atm_iv([c, p], 100.0)
+        if expected is None or np.isnan(expected):
+            assert actual is None or np.isnan(actual)
+        else:
+            assert actual == pytest.approx(expected, rel=1e-12)
+
+
+def test_weighted_atm_iv_without_candidates_and_missing_columns() -> None:
+    far = pd.DataFrame({"strike": [10.0, 500.0], "impliedVolatility": [0.3, 0.3]})
+    assert weighted_atm_iv([far, None, pd.DataFrame()], 100.0) is None
+
+    near = pd.DataFrame({"strike": [100.0, 105.0], "impliedVolatility": [0.2, 0.4]})
+    assert weighted_atm_iv([near], 100.0) == pytest.approx(
+        _legacy_weighted_iv([near], 100.0)
+    )
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_max_gamma_wall_matches_legacy(seed: int) -> None:
+    _, puts = _recorded_chain(seed)
+    puts = puts.dropna(subset=["strike", "openInterest", "impliedVolatility"])
+    for t_years in (7.0 / 365.0, 0.25):
+        assert max_gamma_wall(puts, 100.0, t_years, 0.012) == _legacy_gamma_wall(
+            puts, 100.0, t_years, 0.012
+        )
+
+
+def test_max_gamma_wall_falls_back_to_spot_and_keeps_first_tie() -> None:
+    dead = pd.DataFrame(
+        {
+            "strike": [95.0, 100.0],
+            "openInterest": [0.0, 0.0],
+            "impliedVolatility": [0.0, 0.0],
+        }
+    )
+    assert max_gamma_wall(dead, 101.0, 0.1, 0.0) == _legacy_gamma_wall(
+        dead, 101.0, 0.1, 0.0
+    )
+    assert max_gamma_wall(dead.iloc[0:0], 101.0, 0.1, 0.0) == 101.0
+
+
+@pytest.mark.parametrize("t_years", [0.0, -1.0 / 365.0])
+def test_max_gamma_wall_at_expiry_falls_back_to_spot(t_years: float) -> None:
+    # 到期當下整條鏈的 Gamma 皆為 NaN：沒有 Gamma 牆可言，維持原本回傳現價
+    puts = pd.DataFrame(
+        {
+            "strike": [95.0, 100.0, 105.0],
+            "openInterest": [1_000.0, 5_000.0, 2_000.0],
+            "impliedVolatility": [0.3, 0.25, 0.35],
+        }
+    )
+    assert max_gamma_wall(puts, 101.0, t_years, 0.0) == 101.0
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_split_adjust_matches_legacy(seed: int) -> None:
+    calls, _ = _recorded_chain(seed, spot=50.0)
+    calls = calls.fillna(0.0)
+    # 未調整的舊合約：履約價仍是拆股前的 4 倍
+    stale = calls.sample(5, random_state=seed).assign(strike=lambda d: d["strike"] * 4)
+    chain = pd.concat([calls, stale], ignore_index=True)
+
+    expected = chain.copy()
+    _legacy_split_adjust(expected, 50.0, 4.0)
+    actual = chain.copy()
+    mask = split_adjust_chain(actual, 50.0, 4.0)
+
+    assert mask.sum() > 0
+    for col in ("strike", "openInterest", "volume"):
+        np.testing.assert_allclose(
+            actual[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float)
+        )
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("weight_key", ["openInterest", "volume"])
+def test_max_pain_strike_matches_legacy(seed: int, weight_key: str) -> None:
+    calls, puts = _recorded_chain(seed)
+    calls, puts = calls.fillna(0.0), puts.fillna(0.0)
+    strikes = sorted(set(calls["strike"]) | set(puts["strike"]))
+    assert max_pain_strike(calls, puts, np.asarray(strikes), weight_key) == (
+        _legacy_max_pain(calls, puts, strikes, weight_key)
+    )
+
+
+def test_max_pain_strike_with_one_sided_chain() -> None:
+    calls = pd.DataFrame({"strike": [90.0, 100.0, 110.0], "openInterest": [5, 1, 9]})
+    puts = pd.DataFrame(columns=["strike", "openInterest"])
+    strikes = [90.0, 100.0, 110.0]
+    assert max_pain_strike(calls, puts, np.asarray(strikes), "openInterest") == 90.0
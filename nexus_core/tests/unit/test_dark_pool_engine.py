@@ -0,0 +1,119 @@
+"""market_analysis.dark_pool_engine — 欄位式暗池分析：過濾、偏斜度、POC 與增量記憶。"""
+
+from typing import Any
+
+import numpy as np
+import pytest
+
+from market_analysis.dark_pool_engine import (
+    DarkPoolTapeCache,
+    TapeOffset,
+    calculate_dark_pool_skew,
+    calculate_dp_poc,
+    sanitize_darkpool_prints,
+)
+
+
+def _prints(n: int, seed: int = 7, spot: float = 200.0) -> list[dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    rows: list[dict[str, Any]] = []
+    for i in range(n):
+        price = round(spot * (1 + rng.normal(0, 0.02)), 2)
+        volume = int(rng.integers(10_000, 500_000))
+        rows.append({"price": price, "volume": volume, "premium": price * volume})
+    # 髒數據：錯置標的的價格、零價與字串欄位
+    rows[3]["price"] = spot * 0.4
+    rows[5]["price"] = 0
+    rows[8]["premium"] = str(rows[8]["premium"])
+    return rows
+
+
+def test_vectorized_pass_matches_reference_loops() -> None:
+    prints = _prints(40)
+    spot = 200.0
+
+    valid = sanitize_darkpool_prints("NVDA", prints, spot, 0.05)
+    expected = [
+        p
+        for p in prints
+        if float(p["price"]) > 0 and abs(float(p["price"]) - spot) / spot <= 0.05
+    ]
+    assert valid == expected
+    assert all(a is b for a, b in zip(valid, expected))
+    assert sanitize_darkpool_prints("NVDA", prints, 0.0) is prints
+
+    # 偏斜度：以 VWAP 區分買賣盤的淨金額比
+    px = np.array([float(p["price"]) for p in valid])
+    vol = np.array([float(p["volume"]) for p in valid])
+    prem = np.array([float(p["premium"]) for p in valid])
+    vwap = (px * vol).sum() / vol.sum()
+    net = prem[px >= vwap].sum() - prem[px < vwap].sum()
+    assert calculate_dark_pool_skew(valid) == round(net / prem.sum(), 4)
+
+    # 無成交量欄位時退回平均價分界 (與舊版一致)
+    bare = [{"price": 10.0, "premium": 5.0}, {"price": 12.0, "premium": 1.0}]
+    assert calculate_dark_pool_skew(bare) == round((1.0 - 5.0) / 6.0, 4)
+
+    # POC：相鄰價位的成交合併成同一個價位箱，勝過單筆最大成交
+    cluster = [
+        {"price": 100.00, "premium": 4e6},
+        {"price": 100.05, "premium": 4e6},
+        {"price": 103.00, "premium": 6e6},
+    ]
+    assert calculate_dp_poc(cluster) == pytest.approx(100.025)
+    assert calculate_dp_poc([{"price": 101.5, "premium": 9e6}]) == 101.5
+    assert calculate_dp_poc([]) == 0.0
+
+
+def test_watermarked_batches_only_process_new_prints() -> None:
+    cache = DarkPoolTapeCache()
+    tape = _prints(500, seed=11)
+
+    first = cache.analyze("amd", tape[:300], 200.0, watermark=TapeOffset("d1", 300))
+    assert cache.rows_ingested == 300
+    again = cache.analyze("AMD", tape[:300], 200.0, watermark=TapeOffset("d1", 300))
+    assert again is first
+
+    grown = cache.analyze("AMD", tape, 200.0, watermark=TapeOffset("d1", 500))
+    assert cache.rows_ingested == 500
+    fresh = DarkPoolTapeCache().analyze("AMD", tape, 200.0, watermark=1)
+    assert grown.skew == fresh.skew and grown.poc == fresh.poc
+    assert np.array_equal(grown.top_order, fresh.top_order)
+    assert (
+        grown.top_prints(tape, 3)
+        == sorted(
+            grown.valid_prints(tape), key=lambda p: float(p["premium"]), reverse=True
+        )[:3]
+    )
+
+    # Top-N 視窗整批換新：接點不一致時重建欄位
+    replaced = _prints(200, seed=99)
+    cache.analyze("AMD", replaced, 200.0, watermark=3)
+    assert cache.rows_ingested == 700
+    # 現價變動只重算向量化步驟，不重新轉換欄位
+    moved = cache.analyze("AMD", replaced, 190.0, watermark=3)
+    assert cache.rows_ingested == 700
+    assert moved.dropped >= cache.analyze("AMD", replaced, 200.0, watermark=3).dropped
+
+
+def test_replaced_window_sharing_boundary_row_is_rebuilt() -> None:
+    cache = DarkPoolTapeCache()
+    window = _prints(20, seed=1)
+    cache.analyze("AVGO", window, 200.0, watermark=1001)
+
+    # 新的 Top-N 視窗：前段整批換新、只有接點那一筆與舊視窗相同
+    replaced = _prints(30, seed=2)
+    replaced[19] = dict(window[19])
+    result = cache.analyze("AVGO", replaced, 200.0, watermark=1002)
+    expected = DarkPoolTapeCache().analyze("AVGO", replaced, 200.0, watermark=1)
+    assert (result.skew, result.poc, result.vwap) == (
+        expected.skew,
+        expected.poc,
+        expected.vwap,
+    )
+    assert cache.rows_ingested == 20 + 30
+
+    # 同一條成交帶但前一批標記的筆數對不上：同樣重建
+    cache.analyze("AVGO", replaced[:25], 200.0, watermark=TapeOffset("d2", 25))
+    cache.analyze("AVGO", replaced, 200.0, watermark=TapeOffset("d2", 26))
+    assert cache.rows_ingested == 20 + 30 + 25 + 30
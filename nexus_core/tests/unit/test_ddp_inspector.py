@@ -104,3 +104,37 @@ async def test_ddp_inspector_dispatches_yfinance_via_call_yf() -> None:
         await inspector.inspect_symbol(symbol)
 
         assert m_call_yf.await_count >= 2
+
+
+@pytest.mark.asyncio
+async def test_ddp_run_scan_bounds_concurrency_and_keeps_order() -> None:
+    import asyncio
+
+    inspector = DDPInspector()
+    symbols = [f"S{i}" for i in range(9)]
+    in_flight = 0
+    peak = 0
+
+    async def fake_inspect(symbol: str) -> Any:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # 前面的標的較慢完成，驗證輸出仍依輸入順序
+        await asyncio.sleep(0.001 * (len(symbols) - int(symbol[1:])))
+        in_flight -= 1
+        if symbol == "S4":
+            raise RuntimeError("boom")
+        return {"symbol": symbol, "is_ddp": symbol != "S2"}
+
+    with patch.object(inspector, "inspect_symbol", side_effect=fake_inspect), patch(
+        "market_analysis.ddp_inspector.INSPECTOR_SCAN_CONCURRENCY", 3
+    ):
+        results = await inspector.run_scan(symbols)
+
+    assert peak == 3
+    assert [r["symbol"] for r in results] == [
+        s for s in symbols if s not in ("S2", "S4")
+    ]
+    stats = inspector.last_scan_stats
+    assert (stats.symbols, stats.reports, stats.errors) == (9, 8, 1)
+    assert stats.peak_in_flight == 3
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
@@ -227,7 +228,7 @@ async def test_satellite_rebalancing_breakdown_confirmed(
 
 @pytest.mark.asyncio
 @patch("market_analysis.dynamic_rollover.is_memory_safe", return_value=True)
-@patch("market_analysis.dynamic_rollover.client")
+@patch("services.llm_service.client")
 @patch("database.market_cache.save_fundamental_cache")
 async def test_evaluate_fundamental_thesis(
     mock_save_cache: MagicMock,
@@ -274,6 +275,56 @@ async def test_evaluate_fundamental_thesis_memory_unsafe(
     assert res is None
 
 
+@pytest.mark.asyncio
+@patch("services.llm_service.client")
+@patch("database.market_cache.save_fundamental_cache")
+async def test_thesis_verdict_cached_by_filing_content(
+    mock_save_cache: MagicMock,
+    mock_client: MagicMock,
+    engine: DynamicRolloverEngine,
+) -> None:
+    _mock_llm_client_for_thesis(mock_client)
+    parse = mock_client.beta.chat.completions.parse
+    sections = {"quarterly_financials": "Q3 rev $1B"}
+
+    with patch(
+        "market_analysis.dynamic_rollover.is_memory_safe", return_value=True
+    ) as mem:
+        # 同一份財報的並行檢查只送出一次 LLM 請求
+        first, second = await asyncio.gather(
+            engine.evaluate_fundamental_thesis("AMD", "10-Q body", "10-Q", sections),
+            engine.evaluate_fundamental_thesis("AMD", "10-Q body", "10-Q", sections),
+        )
+        assert first == second and first is not None
+        assert parse.await_count == 1
+        mem_checks = mem.call_count
+
+    # 快取命中：不呼叫 LLM，也不經記憶體水位閘門，但仍刷新全域防禦閘門
+    with patch(
+        "market_analysis.dynamic_rollover.is_memory_safe", return_value=False
+    ) as mem:
+        hit = await engine.evaluate_fundamental_thesis(
+            "AMD", "10-Q body", "10-Q", sections
+        )
+        assert hit == first
+        mem.assert_not_called()
+    assert parse.await_count == 1 and mem_checks == 1
+    assert mock_save_cache.call_count == 2
+
+    with patch("market_analysis.dynamic_rollover.is_memory_safe", return_value=True):
+        # 財報內容或 Prompt 模板變動皆視為未命中
+        await engine.evaluate_fundamental_thesis("AMD", "10-Q amended", "10-Q")
+        assert parse.await_count == 2
+        with patch(
+            "market_analysis.dynamic_rollover.fundamental_thesis._SYSTEM_PROMPT_BASE",
+            "revised prompt",
+        ):
+            await engine.evaluate_fundamental_thesis(
+                "AMD", "10-Q body", "10-Q", sections
+            )
+        assert parse.await_count == 3
+
+
 def _mock_llm_client_for_thesis(mock_client: MagicMock) -> None:
     mock_parsed = FundamentalThesisResult(
         is_broken=False, confidence=0.5, reasoning="ok"
@@ -289,7 +340,7 @@ def _mock_llm_client_for_thesis(mock_client: MagicMock) -> None:
 
 @pytest.mark.asyncio
 @patch("market_analysis.dynamic_rollover.is_memory_safe", return_value=True)
-@patch("market_analysis.dynamic_rollover.client")
+@patch("services.llm_service.client")
 @patch("database.market_cache.save_fundamental_cache")
 async def test_evaluate_fundamental_thesis_with_form_type_10q(
     mock_save_cache: MagicMock,
@@ -318,7 +369,7 @@ async def test_evaluate_fundamental_thesis_with_form_type_10q(
 
 @pytest.mark.asyncio
 @patch("market_analysis.dynamic_rollover.is_memory_safe", return_value=True)
-@patch("market_analysis.dynamic_rollover.client")
+@patch("services.llm_service.client")
 @patch("database.market_cache.save_fundamental_cache")
 async def test_evaluate_fundamental_thesis_with_form_type_8k(
     mock_save_cache: MagicMock,
@@ -347,7 +398,7 @@ async def test_evaluate_fundamental_thesis_with_form_type_8k(
 
 @pytest.mark.asyncio
 @patch("market_analysis.dynamic_rollover.is_memory_safe", return_value=True)
-@patch("market_analysis.dynamic_rollover.client")
+@patch("services.llm_service.client")
 @patch("database.market_cache.save_fundamental_cache")
 async def test_evaluate_fundamental_thesis_empty_sections_no_appendix(
     mock_save_cache: MagicMock,
@@ -2942,3 +2993,66 @@ def test_create_dynamic_rollover_embed_hold_and_liquidate_headers() -> None:
     assert "執行轉倉指令" in str(embed_liq.description)
     assert "100%" in str(embed_liq.fields[0].value)
     assert "$43,524" in str(embed_liq.fields[2].value)
+
+
+def test_cycle_ranking_matches_per_user_scan(
+    tmp_path: Any, engine: DynamicRolloverEngine
+) -> None:
+    """每輪共用的排名表：與逐使用者掃描挑出相同候選，且 market_cache / skew 只批次讀一次。"""
+    from database import core
+    from database.cache import get_kv_cache_many
+    from database.calendar_cache import save_earnings_cache
+    from database.market_cache import save_market_cache
+    from database.watchlist import add_watchlist_symbol
+
+    soon = (datetime.now() + timedelta(days=2)).strftime("%Y-%m-%d")
+    later = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
+    uppers = {"AAA": 112.0, "BBB": 109.0, "CCC": 120.0, "DDD": 103.0, "EEE": 109.0}
+    watchlists = {
+        1: ["AAA", "BBB", "CCC"],
+        2: ["EEE", "BBB", "DDD"],
+        3: ["DDD", "SPY"],
+        4: ["AAA", "BBB"],
+    }
+    radar = {"AAA": {"psq_result": {"squeeze_level": "High", "is_breakout_long": True}}}
+
+    with patch("config.DB_NAME", str(tmp_path / "rank.db")):
+        core.run_migrations()
+        for sym, upper in uppers.items():
+            save_market_cache(sym, 95.0, 95.0, upper, reference_spot_price=100.0)
+        save_market_cache("SPY", 95.0, 95.0, 150.0, reference_spot_price=100.0)
+        save_earnings_cache("CCC", soon)  # 財報黑名單
+        save_earnings_cache("BBB", later)
+        for uid, syms in watchlists.items():
+            for sym in syms:
+                add_watchlist_symbol(uid, sym)
+
+        expected = {
+            uid: engine._find_best_rollover_target(uid, exclude_symbols={"AAA"})
+            for uid in watchlists
+        }
+        with (
+            patch("database.market_cache.get_market_cache") as m_single,
+            patch("database.cache.get_kv_cache") as m_kv,
+            patch(
+                "database.cache.get_kv_cache_many", wraps=get_kv_cache_many
+            ) as m_kv_many,
+        ):
+            ranking = engine.build_rollover_ranking({"ZZZ"}, radar)
+            got = {
+                uid: engine._find_best_rollover_target(
+                    uid, exclude_symbols={"AAA"}, ranking=ranking
+                )
+                for uid in watchlists
+            }
+        m_single.assert_not_called()
+        m_kv.assert_not_called()
+        m_kv_many.assert_called_once()  # 所有去重標的的 skew 以單一查詢讀出
+
+    assert got == expected == {1: "BBB", 2: "EEE", 3: "VOO", 4: "BBB"}
+    assert ranking.candidates["CCC"].earnings_blackout
+    assert ranking.candidates["ZZZ"].ev == 0.0
+    assert ranking.candidates["AAA"].power_squeeze == 95.0
+    assert ranking.ev("bbb") == pytest.approx(0.09)
+    top = ranking.top_candidates(["DDD", "BBB", "EEE", "AAA"], k=2)
+    assert [c.symbol for c in top] == ["AAA", "BBB"]
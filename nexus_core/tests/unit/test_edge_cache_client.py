@@ -170,3 +170,43 @@ async def test_get_cached_option_chain_omits_expiry_param_when_none() -> None:
     assert result is None
     call_args = mock_client.get.await_args
     assert call_args.kwargs["params"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_gex_history_diff_returns_data_on_success() -> None:
+    diff = {"symbol": "AAPL", "call_wall_shift": 5.0, "put_wall_shift": 0.0}
+    resp = _mock_response(200, {"status": "success", "data": diff})
+    mock_client = _mock_httpx_client(resp)
+
+    with patch("config.TUNNEL_URL", "http://mock-tunnel"), patch(
+        "httpx.AsyncClient", return_value=mock_client
+    ):
+        result = await edge_cache_client.get_gex_history_diff(
+            "AAPL", "2026-09-01T09:30:00-04:00"
+        )
+
+    assert result == diff
+    call_args = mock_client.get.await_args
+    assert call_args.args[0] == "http://mock-tunnel/api/v1/cache/gex/AAPL/diff"
+    assert call_args.kwargs["params"] == {"start": "2026-09-01T09:30:00-04:00"}
+
+
+@pytest.mark.asyncio
+async def test_get_option_chain_history_diff_returns_none_on_miss() -> None:
+    resp = _mock_response(200, {"status": "error", "message": "not_found"})
+    mock_client = _mock_httpx_client(resp)
+
+    with patch("config.TUNNEL_URL", "http://mock-tunnel"), patch(
+        "httpx.AsyncClient", return_value=mock_client
+    ):
+        result = await edge_cache_client.get_option_chain_history_diff(
+            "AAPL", "2026-09-18", "2026-09-01", "2026-09-02"
+        )
+
+    assert result is None
+    call_args = mock_client.get.await_args
+    assert call_args.kwargs["params"] == {
+        "expiry": "2026-09-18",
+        "start": "2026-09-01",
+        "end": "2026-09-02",
+    }
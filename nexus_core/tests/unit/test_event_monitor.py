@@ -1,9 +1,15 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from services.event_monitor import EventMonitor
+from database import core
+from market_time import ny_tz
+from services.calendar_service import CalendarService, EarningsEvent, EconomicEvent
+from services.event_monitor import EventMonitor, _event_timestamp
 
 
 @pytest.mark.asyncio
@@ -42,26 +48,113 @@ async def test_send_event_alert_uses_embed_builder() -> None:
 
 
 @pytest.mark.asyncio
-async def test_check_upcoming_events_deduplicates_alerts() -> None:
-    bot = MagicMock()
-    bot.queue_dm = AsyncMock()
-    monitor = EventMonitor(bot)
-    event = SimpleNamespace(
-        type="ECONOMIC",
+async def test_check_upcoming_events_single_pass_with_persisted_dedupe(
+    tmp_path: Path,
+) -> None:
+    now = datetime.now(ny_tz)
+    cpi = EconomicEvent(
         event="CPI",
-        time="2026-05-21T20:30:00",
-        tte_hours=6,
+        time=(now + timedelta(hours=6)).isoformat(),
+        impact="high",
+        tte_hours=999.0,  # 快取中的舊值，應依事件時點重新計算
     )
+    soon = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+    later = (now + timedelta(days=20)).strftime("%Y-%m-%d")
+    earnings = {
+        "NVDA": EarningsEvent(symbol="NVDA", date=soon, tte_hours=30.0),
+        "AAPL": EarningsEvent(symbol="AAPL", date=later, tte_hours=480.0),
+    }
+    holdings = [
+        {"user_id": 1, "symbol": "NVDA"},
+        {"user_id": 1, "symbol": "AAPL"},
+        {"user_id": 2, "symbol": "AAPL"},
+        {"user_id": 2, "symbol": "nvda"},
+    ]
+    lookups: list[str] = []
+
+    async def fake_earnings(symbol: str) -> EarningsEvent:
+        lookups.append(symbol)
+        return earnings[symbol]
+
+    sent: dict[int, list[str]] = {}
 
     with (
-        patch("services.event_monitor.get_all_user_ids", return_value=[123]),
+        patch("config.DB_NAME", str(tmp_path / "events.db")),
+        patch("services.event_monitor.get_all_user_ids", return_value=[1, 2, 3]),
+        patch("services.event_monitor.get_all_holdings", return_value=holdings),
+        patch(
+            "services.event_monitor.calendar_service.get_high_impact_events",
+            new=AsyncMock(return_value=[cpi]),
+        ),
         patch(
-            "services.event_monitor.calendar_service.get_portfolio_events",
-            new=AsyncMock(return_value=[event]),
+            "services.event_monitor.calendar_service.get_symbol_earnings",
+            side_effect=fake_earnings,
         ),
-        patch.object(monitor, "_send_event_alert", new_callable=AsyncMock) as mock_send,
+        patch(
+            "services.event_monitor._load_alert_contexts",
+            side_effect=lambda uids: {uid: SimpleNamespace() for uid in uids},
+        ),
+        patch(
+            "services.event_monitor.get_quote",
+            new=AsyncMock(return_value={"c": 500.0}),
+        ) as mock_quote,
     ):
-        await monitor.check_upcoming_events()
-        await monitor.check_upcoming_events()
+        core.run_migrations()
+
+        async def record(uid: int, events: list, **kwargs: object) -> None:
+            sent[uid] = [getattr(e, "symbol", getattr(e, "event", "")) for e in events]
+            assert kwargs["spy_price"] == 500.0
+            assert 5.0 < events[0].tte_hours <= 6.0
+
+        monitor = EventMonitor(MagicMock())
+        with patch.object(monitor, "_send_event_alert", side_effect=record):
+            await monitor.check_upcoming_events()
+        first_cycle_lookups = sorted(lookups)
+
+        # 模擬重啟：新的實例不應重送
+        restarted = EventMonitor(MagicMock())
+        with patch.object(
+            restarted, "_send_event_alert", new_callable=AsyncMock
+        ) as mock_send:
+            await restarted.check_upcoming_events()
 
-    mock_send.assert_awaited_once_with(123, [event])
+    assert first_cycle_lookups == ["AAPL", "NVDA"]  # 聯集內每檔只查一次
+    assert sent == {1: ["CPI", "NVDA"], 2: ["CPI", "NVDA"], 3: ["CPI"]}
+    assert mock_quote.await_count == 1
+    assert monitor.last_cycle_stats is not None
+    assert monitor.last_cycle_stats.alerts_sent == 3
+    mock_send.assert_not_awaited()
+    assert restarted.last_cycle_stats is not None
+    assert restarted.last_cycle_stats.alerts_sent == 0
+
+
+@pytest.mark.asyncio
+async def test_earnings_batch_timeout_defers_slow_symbols() -> None:
+    service = CalendarService()
+
+    async def lookup(symbol: str) -> None:
+        if symbol == "SLOW":
+            await asyncio.sleep(5)
+        return None
+
+    with patch.object(service, "get_symbol_earnings", side_effect=lookup):
+        result = await service.get_symbol_earnings_batch(
+            ["fast", "SLOW", "OTHER"], concurrency=2, timeout=0.05
+        )
+
+    assert result == {"FAST": None, "OTHER": None}
+
+
+def test_naive_economic_event_time_is_treated_as_utc() -> None:
+    naive = EconomicEvent(
+        event="CPI", time="2026-03-11T12:30:00", impact="high", tte_hours=0.0
+    )
+    aware = EconomicEvent(
+        event="CPI", time="2026-03-11T12:30:00Z", impact="high", tte_hours=0.0
+    )
+
+    assert _event_timestamp(naive) == _event_timestamp(aware)
+    assert (
+        _event_timestamp(naive)
+        == datetime(2026, 3, 11, 12, 30, tzinfo=timezone.utc).timestamp()
+    )
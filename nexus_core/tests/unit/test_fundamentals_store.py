@@ -0,0 +1,147 @@
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import quarterly_fundamentals
+from database import core
+from services.fundamentals_store import (
+    FILING_LAG_DAYS,
+    QUARTER_DAYS,
+    RECHECK_INTERVAL_SEC,
+    FundamentalsStore,
+    fiscal_period_of,
+)
+
+DAY = 86400.0
+
+
+def _shifted(income: pd.DataFrame) -> pd.DataFrame:
+    """下一季公布後的損益表：多出一個較新的季末欄位。"""
+    newest = income.columns.max() + pd.offsets.QuarterEnd()
+    frame = income.copy()
+    frame.insert(0, newest, income.iloc[:, 0] * 1.1)
+    return frame
+
+
+async def test_repeat_reads_stay_offline_until_next_quarter_is_due(
+    tmp_path: Path,
+) -> None:
+    info, income, cashflow = quarterly_fundamentals("NVDA")
+    ticker = MagicMock(
+        info={**info, "impliedVolatility": 0.4},
+        quarterly_income_stmt=income,
+        quarterly_cashflow=cashflow,
+    )
+    period = fiscal_period_of(income)
+    end = pd.Timestamp(period).timestamp()
+    t0 = end + 30 * DAY
+
+    with (
+        patch("config.DB_NAME", str(tmp_path / "fund.db")),
+        patch("yfinance.Ticker", return_value=ticker) as m_ticker,
+    ):
+        core.run_migrations()
+        store = FundamentalsStore()
+        first = await store.get("nvda", now=t0)
+        assert first.fiscal_period == period
+        assert "impliedVolatility" not in first.info
+        pd.testing.assert_frame_equal(first.income, income, check_names=False)
+
+        # 新一季可能公布之前：記憶體或資料庫命中都不發出請求
+        await store.get("NVDA", now=t0 + 40 * DAY)
+        reloaded = FundamentalsStore()
+        await reloaded.prime(["NVDA", "AMD"])
+        again = await reloaded.get("NVDA", now=t0 + 60 * DAY)
+        assert again.info == first.info
+        pd.testing.assert_frame_equal(
+            again.cashflow, first.cashflow, check_names=False, check_column_type=False
+        )
+        assert (store.network_fetches, reloaded.network_fetches) == (1, 0)
+        calls_before = m_ticker.call_count
+
+        # 到期但仍是同一期間：只更新檢查時間，一天內不再重查
+        due = end + (QUARTER_DAYS + FILING_LAG_DAYS) * DAY + 3600
+        same = await reloaded.get("NVDA", now=due)
+        assert same.fiscal_period == period and same.checked_at == due
+        await reloaded.get("NVDA", now=due + RECHECK_INTERVAL_SEC / 2)
+        assert reloaded.network_fetches == 1
+        assert m_ticker.call_count > calls_before
+
+        # 新期間公布：以新的 key 寫入，舊期間保留
+        ticker.quarterly_income_stmt = _shifted(income)
+        await asyncio.sleep(0.01)  # 讓 SingleFlight 清掉上一次已完成的任務
+        fresh = await reloaded.get("NVDA", now=due + RECHECK_INTERVAL_SEC)
+        assert fresh.fiscal_period > period
+        with sqlite3.connect(str(tmp_path / "fund.db")) as conn:
+            rows = conn.execute(
+                "SELECT fiscal_period, checked_at FROM fundamentals_store "
+                "WHERE symbol = 'NVDA' ORDER BY fiscal_period"
+            ).fetchall()
+        assert rows == [(period, due), (fresh.fiscal_period, fresh.checked_at)]
+
+
+async def test_failed_recheck_keeps_stored_record(tmp_path: Path) -> None:
+    info, income, cashflow = quarterly_fundamentals("AMD")
+    ticker = MagicMock(
+        info=info, quarterly_income_stmt=income, quarterly_cashflow=cashflow
+    )
+    now = time.time()
+    with (
+        patch("config.DB_NAME", str(tmp_path / "fund.db")),
+        patch("yfinance.Ticker", return_value=ticker),
+    ):
+        core.run_migrations()
+        store = FundamentalsStore()
+        stored = await store.get("AMD", now=now)
+
+        async def failing(*_: Any) -> Any:
+            raise RuntimeError("rate limited")
+
+        with patch("services.market_data_service.call_yf", side_effect=failing):
+            later = now + 200 * DAY
+            assert await store.get("AMD", now=later) is stored
+            with pytest.raises(RuntimeError):
+                await store.get("MSFT", now=later)
+
+
+async def test_transient_empty_income_keeps_stored_record(tmp_path: Path) -> None:
+    info, income, cashflow = quarterly_fundamentals("MSFT")
+    ticker = MagicMock(
+        info=info, quarterly_income_stmt=income, quarterly_cashflow=cashflow
+    )
+    period = fiscal_period_of(income)
+    due = (
+        pd.Timestamp(period).timestamp() + (QUARTER_DAYS + FILING_LAG_DAYS) * DAY + 3600
+    )
+    db = str(tmp_path / "fund.db")
+    with (
+        patch("config.DB_NAME", db),
+        patch("yfinance.Ticker", return_value=ticker),
+    ):
+        core.run_migrations()
+        store = FundamentalsStore()
+        stored = await store.get("MSFT", now=due - 30 * DAY)
+
+        # 到期重查時 yfinance 暫時回傳空損益表：保留原紀錄，只更新檢查時間
+        ticker.quarterly_income_stmt = pd.DataFrame()
+        kept = await store.get("MSFT", now=due)
+        assert kept is stored and kept.fiscal_period == period
+        assert kept.checked_at == due and not kept.income.empty
+
+        with sqlite3.connect(db) as conn:
+            rows = conn.execute(
+                "SELECT fiscal_period, checked_at FROM fundamentals_store "
+                "WHERE symbol = 'MSFT'"
+            ).fetchall()
+        assert rows == [(period, due)]
+
+        # 重新啟動後仍載入完好的紀錄
+        reloaded = FundamentalsStore()
+        again = await reloaded.get("MSFT", now=due + 60)
+        assert again.fiscal_period == period and reloaded.network_fetches == 0
@@ -0,0 +1,170 @@
+import datetime
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from database import core
+from database.virtual_trading import add_virtual_trade, get_virtual_trades
+from market_analysis.bsm import delta
+from market_analysis.chain_arrays import contract_marks, nearest_delta_strike
+from market_analysis.ghost_trader import ChainSnapshot, GhostTrader
+from services.market_data_service import OptionChainData
+
+RATE = 0.042
+
+
+def _expiry(days: int) -> str:
+    return (datetime.date.today() + datetime.timedelta(days=days)).isoformat()
+
+
+def _chain(strikes: list[float], mid: float, iv: float = 0.3) -> OptionChainData:
+    frame = pd.DataFrame(
+        {
+            "strike": strikes,
+            "bid": [mid - 0.05] * len(strikes),
+            "ask": [mid + 0.05] * len(strikes),
+            "lastPrice": [mid] * len(strikes),
+            "impliedVolatility": [iv] * len(strikes),
+        }
+    )
+    return OptionChainData(calls=frame, puts=frame.copy(), underlying={})
+
+
+def test_vectorized_selection_matches_row_scan() -> None:
+    rng = np.random.default_rng(3)
+    strikes = np.arange(60.0, 140.0, 2.5)
+    ivs = rng.uniform(0.15, 0.6, len(strikes))
+    ivs[[3, 9]] = [0.0, np.nan]
+    opts = pd.DataFrame(
+        {
+            "strike": strikes,
+            "impliedVolatility": ivs,
+            "bid": np.where(np.arange(len(strikes)) % 4 == 0, 0.0, 1.0),
+            "ask": 1.2,
+            "lastPrice": 0.9,
+        }
+    )
+
+    best, min_diff = None, 999.0
+    for strike, iv in zip(strikes, ivs):
+        if not iv > 0:
+            continue
+        diff = abs(abs(delta("p", 100.0, strike, 0.1, RATE, iv, 0.0)) - 0.2)
+        if diff < min_diff:
+            min_diff, best = diff, strike
+    assert nearest_delta_strike(opts, "p", 100.0, 0.1, 0.2) == best
+
+    mids, found_ivs = contract_marks(opts, np.array([60.0, 62.5, 61.0]))
+    assert mids[0] == pytest.approx(0.9)  # bid 為 0：改用最後成交價
+    assert mids[1] == pytest.approx(1.1)
+    assert np.isnan(mids[2]) and np.isnan(found_ivs[2])
+
+
+async def test_cycle_groups_chains_and_settles_in_one_batch(tmp_path: Path) -> None:
+    near, far = _expiry(10), _expiry(60)
+    chain_calls: list[tuple[str, str]] = []
+    settle_batches: list[int] = []
+
+    async def fake_chain(symbol: str, expiry: str, prune_pct: Any = 0.1) -> Any:
+        assert prune_pct is None
+        chain_calls.append((symbol, expiry))
+        return _chain([90.0, 95.0, 100.0, 105.0], mid=1.0)
+
+    async def fake_quotes(symbols: list[str]) -> dict[str, dict[str, float]]:
+        return {s: {"c": 100.0} for s in symbols}
+
+    async def fake_ema(symbol: str, window: int = 21) -> float:
+        return 90.0
+
+    from database import virtual_trading
+
+    real_settle = virtual_trading.settle_virtual_trades
+
+    def counting_settle(*args: Any) -> list[int]:
+        settle_batches.append(len(args[0]))
+        return real_settle(*args)
+
+    with (
+        patch("config.DB_NAME", str(tmp_path / "vtr.db")),
+        patch("services.market_data_service.get_option_chain", side_effect=fake_chain),
+        patch("services.market_data_service.batch_get_quotes", side_effect=fake_quotes),
+        patch("services.market_data_service.get_ema", side_effect=fake_ema),
+        patch(
+            "market_analysis.ghost_trader.settle_virtual_trades",
+            side_effect=counting_settle,
+        ),
+    ):
+        core.run_migrations()
+        # 40 筆賣方 (近月：DTE <= 21 強制平倉) + 40 筆買方 (遠月：持有)
+        for i in range(40):
+            add_virtual_trade(i, "NVDA", "put", 95.0, near, 2.0, -1)
+            add_virtual_trade(i, "NVDA", "call", 105.0, far, 1.0, 1)
+
+        trader = GhostTrader()
+        snapshot = ChainSnapshot()
+        await trader.manage_virtual_positions(snapshot)
+        await trader.get_transition_candidates(snapshot)
+
+        rows = get_virtual_trades()
+
+    assert sorted(chain_calls) == sorted([("NVDA", near), ("NVDA", far)])
+    assert settle_batches == [40]
+    closed = [r for r in rows if r["status"] == "CLOSED"]
+    assert len(closed) == 40 and all(r["expiry"] == near for r in closed)
+    assert closed[0]["exit_price"] == pytest.approx(1.01)
+    assert closed[0]["pnl"] == pytest.approx((1.01 - 2.0) * -1 * 100)
+    assert closed[0]["tags"] == ["exit_reason:DTE <= 21"]
+
+    stats = trader.last_pass_stats["manage"]
+    assert (stats.trades, stats.chain_groups, stats.chains_fetched) == (80, 2, 2)
+    assert stats.closed == 40 and stats.duration_ms > 0
+    assert trader.last_pass_stats["transition"].chains_fetched == 0
+
+
+async def test_roll_closes_and_opens_new_leg_together(tmp_path: Path) -> None:
+    current, target = _expiry(50), _expiry(38)
+    chains = {
+        current: _chain([95.0, 100.0], mid=4.0),
+        target: _chain([80.0, 85.0, 90.0, 95.0, 100.0], mid=1.5),
+    }
+
+    async def fake_chain(symbol: str, expiry: str, prune_pct: Any = 0.1) -> Any:
+        return chains.get(expiry)
+
+    async def fake_quotes(symbols: list[str]) -> dict[str, dict[str, float]]:
+        return {s: {"c": 97.0} for s in symbols}
+
+    async def fake_expiries(symbol: str) -> list[str]:
+        return [current, target, _expiry(120)]
+
+    with (
+        patch("config.DB_NAME", str(tmp_path / "vtr.db")),
+        patch("services.market_data_service.get_option_chain", side_effect=fake_chain),
+        patch("services.market_data_service.batch_get_quotes", side_effect=fake_quotes),
+        patch(
+            "services.market_data_service.get_all_option_expiries",
+            side_effect=fake_expiries,
+        ),
+    ):
+        core.run_migrations()
+        # 履約價 100 的賣出 Put：現價 97 時 |Delta| > 0.40 → 轉倉
+        rolled_id = add_virtual_trade(7, "AMD", "put", 100.0, current, 3.0, -2)
+        add_virtual_trade(7, "AMD", "put", 95.0, current, 3.0, -2)
+
+        trader = GhostTrader()
+        await trader.execute_virtual_roll(ChainSnapshot())
+        rows = {r["id"]: r for r in get_virtual_trades()}
+
+    assert rows[rolled_id]["status"] == "ROLLED"
+    new_legs = [r for r in rows.values() if r["parent_trade_id"] == rolled_id]
+    assert len(new_legs) == 1
+    leg = new_legs[0]
+    assert (leg["expiry"], leg["quantity"], leg["status"]) == (target, -2, "OPEN")
+    assert leg["tags"] == [f"rolled_from:{rolled_id}"]
+    assert leg["entry_price"] == pytest.approx(1.5 * 0.99)
+    assert abs(delta("p", 97.0, leg["strike"], 38 / 365.0, RATE, 0.3, 0.0)) < 0.3
+    assert trader.last_pass_stats["roll"].opened == 1
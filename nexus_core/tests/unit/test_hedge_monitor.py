@@ -99,3 +99,85 @@ async def test_send_discord_alert_uses_embed_builder() -> None:
     assert mock_create.call_args.kwargs["total_beta_delta"] == 75.0
     assert mock_create.call_args.kwargs["total_vega"] == -15.5
     bot.queue_dm.assert_awaited_once_with(123, embed=embed)
+
+
+def test_vectorized_hedge_plan_matches_scalar_formulas() -> None:
+    import json
+    from market_analysis.risk_engine import (
+        calculate_hedge_instruction,
+        calculate_vega_adjusted_delta,
+    )
+    from services.hedge_monitor_service import (
+        aggregate_user_greeks,
+        build_hedge_plan,
+    )
+
+    trade = {"weighted_delta": 30.0, "vega": 5.0, "vanna": 40.0, "theta": 2.0}
+    rows = [
+        (1, "TRADE", json.dumps(trade)),
+        (1, "HOLDING", json.dumps({"weighted_delta": 12.0, "vanna": 999.0})),
+        (2, "HOLDING", json.dumps({"weighted_delta": 3.0})),
+        (3, "TRADE", json.dumps({"weighted_delta": -80.0, "gamma": 0.5})),
+    ]
+    totals = aggregate_user_greeks(rows)
+    # HOLDING 只計入 Delta
+    assert totals.loc[1, "delta"] == 42.0 and totals.loc[1, "vanna"] == 40.0
+
+    plan = build_hedge_plan(totals)
+    assert list(plan.index) == [1, 3]  # 使用者 2 口數 < 5，不推播
+    for uid, row in plan.iterrows():
+        adj = calculate_vega_adjusted_delta(
+            totals.loc[uid, "delta"], totals.loc[uid, "vanna"], 0.10
+        )
+        assert row["adj_delta"] == pytest.approx(adj)
+        assert row["hedge_qty"] == calculate_hedge_instruction(adj, -1.0)
+
+
+@pytest.mark.asyncio
+async def test_global_assessment_refreshes_once_and_alerts_concurrently() -> None:
+    import asyncio
+    import json
+    import pandas as pd
+
+    service = HedgeMonitorService(MagicMock(spec=[]))
+    rows = [
+        (uid, "TRADE", json.dumps({"weighted_delta": 10.0 * uid, "vanna": 0.0}))
+        for uid in (1, 2, 3)
+    ]
+    in_flight = 0
+    peak = 0
+
+    async def fake_alert(*args: object) -> None:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if args[0] == 3:
+            raise RuntimeError("discord down")
+
+    with (
+        patch("database.get_all_user_ids", return_value=[1, 2, 3, 4]),
+        patch(
+            "market_analysis.portfolio.refresh_portfolio_greeks",
+            new_callable=AsyncMock,
+        ) as mock_refresh,
+        patch(
+            "services.hedge_monitor_service._load_user_greek_rows", return_value=rows
+        ),
+        patch(
+            "services.market_data_service.get_history_df",
+            new_callable=AsyncMock,
+            return_value=pd.DataFrame({"Close": [600.0]}),
+        ),
+        patch.object(service, "_alert_user", side_effect=fake_alert) as mock_alert,
+    ):
+        stats = await service._trigger_global_hedge_assessment(30.0, 2)
+
+    mock_refresh.assert_awaited_once_with()
+    assert mock_alert.call_count == 3
+    assert peak == 3
+    assert stats.users_total == 4 and stats.users_with_positions == 3
+    assert stats.users_alerted == 2 and stats.users_failed == 1
+    assert stats.time_to_last_alert_sec >= 0.01
+    assert service.last_assessment_stats is stats
@@ -0,0 +1,195 @@
+import math
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_analysis.indicator_engine import IndicatorEngine
+from market_analysis.psq_engine import analyze_psq
+from market_analysis.squeeze_engine import calculate_power_squeeze
+from market_analysis.strategy import _calculate_technical_indicators, detect_ema_signals
+
+
+def _ohlc_frame(n: int, seed: int = 7, freq: str = "B") -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    high = close * (1 + rng.uniform(0.0, 0.02, n))
+    low = close * (1 - rng.uniform(0.0, 0.02, n))
+    open_ = close * (1 + rng.normal(0, 0.005, n))
+    index = pd.date_range("2024-01-02", periods=n, freq=freq, tz="America/New_York")
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close}, index=index
+    )
+
+
+def _assert_close(
+    actual: Any, expected: Any, rel: float = 1e-7, abs_tol: float = 1e-9
+) -> None:
+    if expected is None or (isinstance(expected, float) and math.isnan(expected)):
+        assert actual is None or math.isnan(actual)
+        return
+    assert actual == pytest.approx(float(expected), rel=rel, abs=abs_tol)
+
+
+def test_technical_indicators_parity_over_sliding_frames() -> None:
+    engine = IndicatorEngine()
+    full = _ohlc_frame(320)
+    frame_len = 252
+
+    for end in range(frame_len, len(full) + 1):
+        frame = full.iloc[end - frame_len : end]
+        expected = _calculate_technical_indicators(frame.copy())
+        actual = engine.technical_indicators("AAPL", "1d", frame)
+        assert expected is not None and actual is not None
+        for key in ("price", "rsi", "sma20", "hv_current", "hv_rank"):
+            _assert_close(actual[key], expected[key], rel=1e-6)
+        # 完整重算每次都以「新框架起點」的 SMA 重新起始 EMA，增量狀態沿用最初
+        # 的起點；差異隨指數衰減，在 ~100 元的價格尺度下僅 1e-7 等級
+        _assert_close(actual["macd_hist"], expected["macd_hist"], abs_tol=1e-6)
+
+    # 第一次 reseed 之後每一根新 K 線都只走增量路徑
+    assert engine.full_recomputes == 1
+    assert engine.incremental_updates == len(full) - frame_len
+
+
+def test_technical_indicators_parity_with_growing_frame() -> None:
+    engine = IndicatorEngine()
+    full = _ohlc_frame(200, seed=11)
+    for end in range(60, len(full) + 1, 7):
+        frame = full.iloc[:end]
+        expected = _calculate_technical_indicators(frame.copy())
+        actual = engine.technical_indicators("MSFT", "1d", frame)
+        assert expected is not None and actual is not None
+        for key in ("rsi", "sma20", "macd_hist", "hv_current", "hv_rank"):
+            _assert_close(actual[key], expected[key])
+    assert engine.full_recomputes == 1
+
+
+def test_intraday_last_bar_changes_do_not_recompute() -> None:
+    engine = IndicatorEngine()
+    frame = _ohlc_frame(252)
+    engine.technical_indicators("AAPL", "1d", frame)
+
+    for bump in (1.01, 0.98, 1.03):
+        live = frame.copy()
+        live.iloc[-1, live.columns.get_loc("Close")] *= bump
+        live.iloc[-1, live.columns.get_loc("High")] = max(
+            live["High"].iloc[-1], live["Close"].iloc[-1]
+        )
+        expected = _calculate_technical_indicators(live.copy())
+        actual = engine.technical_indicators("AAPL", "1d", live)
+        assert actual is not None and expected is not None
+        for key in ("price", "rsi", "macd_hist", "hv_current", "hv_rank"):
+            _assert_close(actual[key], expected[key])
+
+    assert engine.full_recomputes == 1
+
+
+def test_split_adjustment_and_gap_trigger_full_recompute() -> None:
+    engine = IndicatorEngine()
+    full = _ohlc_frame(300)
+    engine.technical_indicators("NVDA", "1d", full.iloc[:252])
+
+    # auto_adjust 回溯調整（例如 1:2 分割）改寫了已提交的 K 線
+    adjusted = full.iloc[1:253].copy()
+    adjusted[["Open", "High", "Low", "Close"]] /= 2.0
+    expected = _calculate_technical_indicators(adjusted.copy())
+    actual = engine.technical_indicators("NVDA", "1d", adjusted)
+    assert actual is not None and expected is not None
+    _assert_close(actual["rsi"], expected["rsi"])
+    assert engine.full_recomputes == 2
+
+    # 上次提交的 K 線已不在框架中（資料缺口）
+    gapped = full.iloc[260:].copy()
+    gapped = pd.concat([full.iloc[:200], gapped])
+    engine.technical_indicators("NVDA", "1d", gapped)
+    assert engine.full_recomputes == 3
+
+
+def test_catchup_beyond_limit_reseeds() -> None:
+    engine = IndicatorEngine()
+    full = _ohlc_frame(400)
+    engine.technical_indicators("AMD", "1d", full.iloc[:252])
+    frame = full.iloc[100:352]
+    expected = _calculate_technical_indicators(frame.copy())
+    actual = engine.technical_indicators("AMD", "1d", frame)
+    assert actual is not None and expected is not None
+    _assert_close(actual["hv_rank"], expected["hv_rank"])
+    assert engine.full_recomputes == 2
+
+
+@pytest.mark.parametrize("window", [8, 21])
+def test_ema_signal_parity(window: int) -> None:
+    engine = IndicatorEngine()
+    full = _ohlc_frame(500, seed=3, freq="h")
+    for end in range(420, len(full) + 1):
+        frame = full.iloc[end - 420 : end]
+        expected = detect_ema_signals(frame, window=window, threshold=0.01)
+        actual = engine.ema_signal("SPY", "1h", frame, window=window, threshold=0.01)
+        if expected is None:
+            assert actual is None
+            continue
+        assert actual is not None
+        assert actual["type"] == expected["type"]
+        assert actual["direction"] == expected["direction"]
+        assert actual["ema_val"] == pytest.approx(expected["ema_val"], abs=0.011)
+    assert engine.full_recomputes == 1
+
+
+def test_power_squeeze_parity() -> None:
+    engine = IndicatorEngine()
+    full = _ohlc_frame(260, seed=5)
+    with patch("market_analysis.squeeze_engine.is_memory_safe", return_value=True):
+        for end in range(40, len(full) + 1):
+            frame = full.iloc[:end]
+            expected = calculate_power_squeeze(frame)
+            actual = engine.power_squeeze("QQQ", "1d", frame)
+            assert actual["is_squeezing"] == expected["is_squeezing"]
+            assert actual["direction"] == expected["direction"]
+            _assert_close(actual["momentum"], expected["momentum"])
+
+
+@pytest.mark.parametrize("vix_spot", [None, 12.0, 30.0])
+def test_psq_parity(vix_spot: Any) -> None:
+    engine = IndicatorEngine()
+    full = _ohlc_frame(330, seed=21)
+    frame_len = 252
+    for end in range(frame_len, len(full) + 1):
+        frame = full.iloc[end - frame_len : end]
+        expected = analyze_psq(frame, vix_spot=vix_spot)
+        actual = engine.psq("TSLA", "1d", frame, vix_spot=vix_spot)
+        assert expected is not None and actual is not None
+        assert actual.squeeze_level == expected.squeeze_level
+        assert actual.is_squeezing == expected.is_squeezing
+        assert actual.momentum_color == expected.momentum_color
+        assert actual.signal_direction == expected.signal_direction
+        assert actual.is_breakout_long == expected.is_breakout_long
+        assert actual.is_breakout_short == expected.is_breakout_short
+        assert actual.vix_momentum_label == expected.vix_momentum_label
+        _assert_close(actual.momentum_value, expected.momentum_value, rel=1e-6)
+        _assert_close(actual.sma_20, expected.sma_20)
+        _assert_close(actual.sma_distance_pct, expected.sma_distance_pct, rel=1e-6)
+    assert engine.full_recomputes == 1
+
+
+def test_public_entrypoints_route_through_engine_only_when_supported() -> None:
+    frame = _ohlc_frame(120)
+    with patch(
+        "market_analysis.indicator_engine.indicator_engine.psq",
+        wraps=lambda *a, **k: None,
+    ) as m_psq:
+        analyze_psq(frame, symbol="AAPL")
+        assert m_psq.call_count == 1
+
+        # RangeIndex (無時間軸) 的框架無法對齊，走原本的完整計算
+        res = analyze_psq(frame.reset_index(drop=True), symbol="AAPL")
+        assert m_psq.call_count == 1
+        assert res is not None
+
+        # NaN 框架同樣退回完整計算
+        dirty = frame.copy()
+        dirty.iloc[50, dirty.columns.get_loc("Close")] = np.nan
+        analyze_psq(dirty, symbol="AAPL")
+        assert m_psq.call_count == 1
@@ -2,7 +2,7 @@ from typing import Any
 import pytest
 from datetime import date
 from types import SimpleNamespace
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 from market_analysis.intraday_pipeline import (
     IntradayScanPipeline,
@@ -618,6 +618,178 @@ async def test_run_loop_exception_isolation(intraday_pipeline: Any):  # type: ig
     assert intraday_pipeline.is_running is False
 
 
+@pytest.mark.asyncio
+async def test_run_cycle_fans_out_once_per_unique_symbol(  # type: ignore
+    intraday_pipeline: Any, default_market_data: Any
+):
+    import asyncio
+    from datetime import datetime
+    from zoneinfo import ZoneInfo
+
+    universe = [f"SYM{i:02d}" for i in range(25)]
+    user_ids = list(range(1, 201))
+    # 合成 200 位使用者，每人訂閱 10 檔 (含大小寫不一致的重複代號)
+    watchlists = {
+        uid: [
+            (
+                universe[(uid + k) % len(universe)].lower()
+                if k == 0
+                else universe[(uid + k) % len(universe)],
+                1,
+            )
+            for k in range(10)
+        ]
+        for uid in user_ids
+    }
+
+    evaluated: list[str] = []
+    in_flight = 0
+    peak_in_flight = 0
+
+    async def mock_evaluate(ticker: str) -> Any:
+        nonlocal in_flight, peak_in_flight
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        evaluated.append(ticker)
+        if ticker == "SYM03":
+            raise ValueError("boom")
+        alert = "red" if ticker == "SYM01" else "green"
+        return SimpleNamespace(tactical=SimpleNamespace(alert_level=alert))
+
+    intraday_pipeline.evaluate_watchlist_symbol = mock_evaluate
+    intraday_pipeline.symbol_concurrency = 4
+    intraday_pipeline._fetch_ticker_market_data = AsyncMock(
+        return_value=default_market_data
+    )
+    intraday_pipeline._fetch_current_vix = AsyncMock(return_value=18.0)
+    intraday_pipeline._build_watchlist_heartbeat_embed = AsyncMock(
+        return_value=MagicMock()
+    )
+    intraday_pipeline.bot.queue_dm = AsyncMock()
+    intraday_pipeline.engine = MagicMock()
+
+    def _ctx(uid: int) -> Any:
+        return SimpleNamespace(
+            user_id=uid,
+            enable_analyst_agent=uid != 200,
+            total_capital=100000.0,
+            cash_reserve=20000.0,
+            monthly_burn_rate=5000.0,
+        )
+
+    with patch("database.get_all_user_ids", return_value=user_ids), patch(
+        "database.get_full_user_context", side_effect=_ctx
+    ), patch(
+        "database.get_user_watchlist", side_effect=lambda uid: watchlists[uid]
+    ), patch(
+        "database.is_notification_enabled", side_effect=lambda uid, key: uid % 2 == 0
+    ) as m_enabled, patch(
+        "database.get_user_notification_settings", return_value={}
+    ), patch(
+        "market_analysis.intraday_pipeline.IntradayScanPipeline._fetch_user_options_holdings",
+        new_callable=AsyncMock,
+        return_value=[],
+    ):
+        stats = await intraday_pipeline.run_cycle(
+            "Phase B", datetime(2026, 6, 5, 11, 0, tzinfo=ZoneInfo("America/New_York"))
+        )
+
+    # 每個不重複標的只評估一次，且同時進行的數量受限
+    assert sorted(evaluated) == sorted(universe)
+    assert peak_in_flight <= 4
+    assert intraday_pipeline._fetch_current_vix.await_count == 1
+    # 通知設定每位使用者只查一次，而不是每個標的一次
+    assert m_enabled.call_count == 199
+
+    subscribed_to_red = [
+        uid
+        for uid in range(1, 200)
+        if any(t.upper() == "SYM01" for t, _ in watchlists[uid])
+    ]
+    expected_dms = [uid for uid in subscribed_to_red if uid % 2 == 0]
+    assert intraday_pipeline.bot.queue_dm.await_count == len(expected_dms)
+
+    assert stats.subscribers == 199
+    assert stats.subscriptions == 1990
+    assert stats.unique_symbols == 25
+    assert stats.failed_symbols == 1
+    assert stats.notifications == len(expected_dms)
+    assert stats.duration_seconds >= stats.symbol_seconds >= 0.0
+    assert intraday_pipeline.last_cycle_stats is stats
+    # SYM03 評估失敗的訂閱不會進入量化引擎
+    sym03_subs = sum(
+        1 for uid in range(1, 200) for t, _ in watchlists[uid] if t.upper() == "SYM03"
+    )
+    assert intraday_pipeline.engine.analyze_ticker.call_count == 1990 - sym03_subs
+
+
+@pytest.mark.asyncio
+async def test_run_cycle_keeps_heartbeat_when_market_data_fails(  # type: ignore
+    intraday_pipeline: Any, default_market_data: Any
+):
+    from datetime import datetime
+    from zoneinfo import ZoneInfo
+
+    from market_analysis.intraday_pipeline import (
+        STAGE_INTRADAY_CYCLE,
+        STAGE_INTRADAY_SYMBOLS,
+    )
+    from services.latency_monitor import latency_registry
+
+    async def mock_fetch(ticker: str) -> Any:
+        if ticker == "AAPL":
+            raise ConnectionError("quote down")
+        return default_market_data
+
+    red = SimpleNamespace(tactical=SimpleNamespace(alert_level="red"))
+    intraday_pipeline.evaluate_watchlist_symbol = AsyncMock(return_value=red)
+    intraday_pipeline._fetch_ticker_market_data = mock_fetch
+    intraday_pipeline._fetch_current_vix = AsyncMock(return_value=18.0)
+    intraday_pipeline._build_watchlist_heartbeat_embed = AsyncMock(
+        return_value=MagicMock()
+    )
+    intraday_pipeline.bot.queue_dm = AsyncMock()
+    intraday_pipeline.engine = MagicMock()
+    ctx = SimpleNamespace(
+        user_id=7,
+        enable_analyst_agent=True,
+        total_capital=100000.0,
+        cash_reserve=20000.0,
+        monthly_burn_rate=5000.0,
+    )
+
+    def _count(stage: str) -> int:
+        return next(s.count for s in latency_registry.snapshot() if s.stage == stage)
+
+    before = (_count(STAGE_INTRADAY_CYCLE), _count(STAGE_INTRADAY_SYMBOLS))
+    with patch("database.get_all_user_ids", return_value=[7]), patch(
+        "database.get_full_user_context", return_value=ctx
+    ), patch(
+        "database.get_user_watchlist", return_value=[("AAPL", 1), ("MSFT", 1)]
+    ), patch("database.is_notification_enabled", return_value=True), patch(
+        "database.get_user_notification_settings", return_value={}
+    ), patch(
+        "market_analysis.intraday_pipeline.IntradayScanPipeline._fetch_user_options_holdings",
+        new_callable=AsyncMock,
+        return_value=[],
+    ):
+        stats = await intraday_pipeline.run_cycle(
+            "Phase B", datetime(2026, 6, 5, 11, 0, tzinfo=ZoneInfo("America/New_York"))
+        )
+
+    # AAPL 的市場數據失敗：心跳照常推送，只略過量化引擎投影
+    assert intraday_pipeline.bot.queue_dm.await_count == 2
+    assert intraday_pipeline.engine.analyze_ticker.call_count == 1
+    assert stats.failed_symbols == 0 and stats.notifications == 2
+    assert "2 個標的" in stats.summary()
+    assert (_count(STAGE_INTRADAY_CYCLE), _count(STAGE_INTRADAY_SYMBOLS)) == (
+        before[0] + 1,
+        before[1] + 1,
+    )
+
+
 @pytest.mark.asyncio
 async def test_evaluate_watchlist_symbol_iv_suppression() -> None:
     from market_analysis.intraday_pipeline import evaluate_watchlist_symbol
@@ -927,3 +1099,70 @@ async def test_global_defense_gate_blocks_bullish_signals(
     assert "LLM 護城河破滅警告" in res_broken.tactical.action_guideline
     assert "Deteriorating margins" in res_broken.tactical.action_guideline
     assert res_broken.tactical.alert_level == "red"
+
+
+@pytest.mark.asyncio
+@patch("database.market_cache.get_fundamental_cache", return_value=None)
+@patch("market_analysis.intraday_pipeline.build_enhanced_watchlist_metrics")
+@patch("market_analysis.index_microstructure.get_market_regime", return_value="NORMAL")
+@patch("market_analysis.index_microstructure.fetch_symbol_gex_metrics")
+async def test_put_wall_migration_from_edge_history(
+    mock_fetch_gex: AsyncMock,
+    mock_get_regime: AsyncMock,
+    mock_build_metrics: AsyncMock,
+    mock_get_fc: MagicMock,
+) -> None:
+    from market_analysis.intraday_pipeline import evaluate_watchlist_symbol
+    from models.schemas import EnhancedWatchlistMetrics
+
+    mock_fetch_gex.return_value = {
+        "net_gex": 1_000_000.0,
+        "call_wall": 220.0,
+        "put_wall": 180.0,
+    }
+    mock_build_metrics.return_value = EnhancedWatchlistMetrics(
+        symbol="TSLA",
+        exchange="NASDAQ",
+        current_price=200.0,
+        buy_zone_status="wait",
+        buy_price_phase1=195.0,
+        buy_price_phase2=190.0,
+        buy_price_phase3=185.0,
+        sell_zone_status="wait",
+        sell_price_phase1=210.0,
+        sell_price_phase2=220.0,
+        sell_price_phase3=230.0,
+        atr_14=5.0,
+        skew_percentile=50.0,
+        pcr=1.0,
+        beta=1.2,
+        option_skew_state="normal",
+        volume_poc=195.0,
+        relative_strength_spy=1.1,
+        gex_max_put_wall=180.0,
+        iv_rank=30.0,
+        is_premarket=False,
+    )
+
+    migration = {"put_wall": {"from": 190.0, "to": 180.0}, "put_wall_shift": -10.0}
+    with patch(
+        "services.edge_cache_client.get_gex_history_diff",
+        new=AsyncMock(return_value=migration),
+    ) as mock_diff:
+        res = await evaluate_watchlist_symbol("TSLA")
+    assert res is not None
+    assert "Put Wall 近 24 小時由 190.00 下移至 180.00" in res.tactical.action_guideline
+    mock_diff.assert_awaited_once_with("TSLA", ANY)
+
+    # 牆位上移或 edge 無歷史時不加註
+    for diff in (
+        {"put_wall": {"from": 170.0, "to": 180.0}, "put_wall_shift": 10.0},
+        None,
+    ):
+        with patch(
+            "services.edge_cache_client.get_gex_history_diff",
+            new=AsyncMock(return_value=diff),
+        ):
+            res = await evaluate_watchlist_symbol("TSLA")
+        assert res is not None
+        assert "支撐下移" not in res.tactical.action_guideline
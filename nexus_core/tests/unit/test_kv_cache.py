@@ -0,0 +1,63 @@
+"""database.cache — kv_cache 的 TTL、批次讀寫、新鮮度探測、精簡編碼與分批清理。"""
+
+import sqlite3
+import time
+from unittest.mock import patch
+
+import config
+from database.cache import (
+    get_kv_cache,
+    get_kv_cache_many,
+    is_kv_cache_fresh,
+    save_kv_cache,
+    save_kv_cache_many,
+    sweep_expired_kv_cache,
+)
+
+
+async def test_ttl_hides_expired_keys_until_swept() -> None:
+    await save_kv_cache("marker_live", 1, ttl_sec=3600)
+    await save_kv_cache("marker_dead", 1, ttl_sec=60)
+    await save_kv_cache("macro_vix", 18.5)
+
+    later = time.time() + 120
+    with patch("database.cache.time.time", return_value=later):
+        assert get_kv_cache("marker_dead") is None
+        assert not is_kv_cache_fresh("marker_dead")
+        assert is_kv_cache_fresh("marker_live")
+        assert get_kv_cache_many(["marker_live", "marker_dead", "macro_vix"]) == {
+            "marker_live": 1,
+            "macro_vix": 18.5,
+        }
+
+    # 不帶 TTL 覆寫會清除舊的到期時間
+    await save_kv_cache("marker_live", 2)
+    assert sweep_expired_kv_cache(now=later + 7200) == 1
+    with sqlite3.connect(config.DB_NAME) as conn:
+        keys = conn.execute("SELECT key FROM kv_cache ORDER BY key").fetchall()
+    assert keys == [("macro_vix",), ("marker_live",)]
+
+
+async def test_bulk_write_compact_rows_and_chunked_sweep() -> None:
+    snapshots = {
+        f"iv_metrics_S{i:03d}": {"iv": i / 100, "ok": True} for i in range(450)
+    }
+    assert await save_kv_cache_many(snapshots, ttl_sec=60, compact=True)
+    await save_kv_cache("legacy_json", {"a": [1, 2]})
+
+    with sqlite3.connect(config.DB_NAME) as conn:
+        kinds = dict(
+            conn.execute(
+                "SELECT typeof(value), COUNT(*) FROM kv_cache GROUP BY typeof(value)"
+            ).fetchall()
+        )
+    assert kinds == {"blob": 450, "text": 1}
+
+    loaded = get_kv_cache_many([*snapshots, "legacy_json", "missing"])
+    assert loaded == {**snapshots, "legacy_json": {"a": [1, 2]}}
+    assert get_kv_cache("iv_metrics_S007") == {"iv": 0.07, "ok": True}
+    assert is_kv_cache_fresh("legacy_json", max_age_sec=60)
+
+    assert sweep_expired_kv_cache(chunk_size=100, now=time.time() + 61) == 450
+    assert get_kv_cache_many(snapshots) == {}
+    assert get_kv_cache("legacy_json") == {"a": [1, 2]}
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from services.latency_monitor import (
+    BUCKET_BOUNDS_MS,
+    STAGE_DB_READ,
+    STAGE_LOOP_LAG,
+    LatencyRegistry,
+    LoopLagMonitor,
+    RollingHistogram,
+    start_metrics_server,
+)
+
+
+def _snap(registry: LatencyRegistry, stage: str):  # type: ignore
+    return next(s for s in registry.snapshot() if s.stage == stage)
+
+
+def test_histogram_percentiles_buckets_and_window() -> None:
+    hist = RollingHistogram(window_sec=60.0)
+    hist.record(7.0, now=900.0)  # 超出 60 秒視窗，讀取時剔除
+    for value in (1.0, 2.0, 3.0, 4.0, 100.0):
+        hist.record(value, now=1000.0)
+
+    snap = hist.snapshot("x", now=1000.0)
+    assert snap.count == 5
+    assert snap.p50_ms == 3.0
+    assert snap.max_ms == 100.0
+    bounds = dict(zip(BUCKET_BOUNDS_MS, snap.buckets))
+    assert bounds[1] == 1 and bounds[5] == 4 and bounds[100] == 5
+
+
+def test_span_and_timed_record_even_on_error() -> None:
+    registry = LatencyRegistry()
+
+    with pytest.raises(ValueError):
+        with registry.span("calc"):
+            raise ValueError("boom")
+
+    @registry.timed("calc")
+    def double(x: int) -> int:
+        return x * 2
+
+    assert double(2) == 4
+    assert _snap(registry, "calc").count == 2
+
+
+async def test_timed_wraps_coroutines() -> None:
+    registry = LatencyRegistry()
+
+    @registry.timed("fetch")
+    async def fetch() -> str:
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    assert await fetch() == "ok"
+    snap = _snap(registry, "fetch")
+    assert snap.count == 1 and snap.max_ms >= 5.0
+
+
+async def test_watchdog_logs_stack_of_blocking_callback(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    registry = LatencyRegistry()
+    monitor = LoopLagMonitor(registry, interval_sec=0.02, block_threshold_ms=50)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        with caplog.at_level(logging.WARNING, logger="services.latency_monitor"):
+            time.sleep(0.3)  # 故意在事件迴圈上阻塞
+            await asyncio.sleep(0.1)
+    finally:
+        monitor.stop()
+
+    assert monitor.blocked_events >= 1
+    assert monitor.last_blocked_ms >= 50
+    assert "test_watchdog_logs_stack_of_blocking_callback" in caplog.text
+    assert _snap(registry, STAGE_LOOP_LAG).max_ms >= 200
+
+
+async def test_metrics_endpoint_serves_prometheus_text() -> None:
+    registry = LatencyRegistry()
+    registry.record("data_fetch", 12.0)
+    server = await start_metrics_server("127.0.0.1", 0, registry)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        responses = []
+        for path in ("/metrics", "/other"):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            await writer.drain()
+            responses.append((await reader.read()).decode())
+            writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    ok, missing = responses
+    assert ok.startswith("HTTP/1.1 200 OK")
+    assert 'nexus_stage_latency_ms_bucket{stage="data_fetch",le="25"} 1' in ok
+    assert 'nexus_stage_latency_ms_count{stage="db_write"} 0' in ok
+    assert missing.startswith("HTTP/1.1 404")
+
+
+def test_read_connection_records_db_read(tmp_path: Path) -> None:
+    from database.connection import get_read_connection
+    from services.latency_monitor import latency_registry
+
+    before = _snap(latency_registry, STAGE_DB_READ).count
+    with patch("config.DB_NAME", str(tmp_path / "read.db")):
+        conn = get_read_connection()
+        conn.execute("SELECT 1").fetchone()
+        conn.close()
+        conn.close()
+    assert _snap(latency_registry, STAGE_DB_READ).count == before + 1
@@ -0,0 +1,180 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any, AsyncIterator
+from unittest.mock import patch
+
+import pytest
+
+from database import core
+from database.llm_cache import get_llm_cache, save_llm_cache
+from services import llm_service
+from services.llm_service import (
+    PRIORITY_INTERACTIVE,
+    PRIORITY_LOW,
+    LLMCacheStats,
+    LLMOverloadedError,
+    RiskAssessment,
+    _PriorityGate,
+    llm_cache_key,
+)
+
+STUB_DELAY_SEC = 0.05
+
+
+class _StubInferenceServer:
+    """最小 OpenAI 相容 /v1/chat/completions 端點：固定延遲後回傳 RiskAssessment JSON。"""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.server: Any = None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        length = 0
+        await reader.readline()
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip())
+        await reader.readexactly(length)
+        self.requests += 1
+        await asyncio.sleep(STUB_DELAY_SEC)
+
+        content = RiskAssessment(
+            decision="APPROVE", tags=["常規雜音"], reasoning="無重大風險"
+        )
+        body = json.dumps(
+            {
+                "id": f"chatcmpl-{self.requests}",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "stub",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {
+                            "role": "assistant",
+                            "content": content.model_dump_json(),
+                        },
+                    }
+                ],
+            }
+        ).encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+        writer.close()
+
+    async def __aenter__(self) -> "_StubInferenceServer":
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def base_url(self) -> str:
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+
+@pytest.fixture
+async def stub_llm(tmp_path: Path) -> AsyncIterator[_StubInferenceServer]:
+    from openai import AsyncOpenAI
+
+    with patch("config.DB_NAME", str(tmp_path / "llm.db")):
+        core.run_migrations()
+        async with _StubInferenceServer() as stub:
+            client = AsyncOpenAI(
+                base_url=stub.base_url, api_key="sk-test", max_retries=0
+            )
+            with (
+                patch.object(llm_service, "client", client),
+                patch.object(llm_service, "llm_cache_stats", LLMCacheStats()),
+                patch("services.llm_service.is_memory_safe", return_value=True),
+            ):
+                yield stub
+            await client.close()
+
+
+async def _risk() -> dict:
+    return await llm_service.evaluate_trade_risk(
+        "NVDA", "STO_PUT", "例行產品新聞", "暫無快取情緒資料。"
+    )
+
+
+async def test_repeat_prompt_is_served_from_cache(
+    stub_llm: _StubInferenceServer,
+) -> None:
+    first = await _risk()
+    second = await _risk()
+
+    assert first == second
+    assert first["decision"] == "APPROVE"
+    assert stub_llm.requests == 1
+    stats = llm_service.get_llm_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == pytest.approx(0.5)
+    assert stats["saved_ms"] >= STUB_DELAY_SEC * 1000 * 0.8
+
+
+async def test_concurrent_identical_prompts_coalesce(
+    stub_llm: _StubInferenceServer,
+) -> None:
+    results = await asyncio.gather(*(_risk() for _ in range(5)))
+
+    assert all(r == results[0] for r in results)
+    assert stub_llm.requests == 1
+    assert llm_service.llm_cache_stats.coalesced == 4
+
+
+def test_cache_key_ignores_prompt_indentation_only() -> None:
+    indented = [{"role": "user", "content": "\n    標的: NVDA\n\n    策略: STO_PUT\n"}]
+    flat = [{"role": "user", "content": "標的: NVDA\n策略: STO_PUT"}]
+    other = [{"role": "user", "content": "標的: AMD\n策略: STO_PUT"}]
+
+    key = llm_cache_key(RiskAssessment, flat, {}, model="m")
+    assert llm_cache_key(RiskAssessment, indented, {}, model="m") == key
+    assert llm_cache_key(RiskAssessment, other, {}, model="m") != key
+    assert llm_cache_key(RiskAssessment, flat, {}, model="other") != key
+    assert llm_cache_key(RiskAssessment, flat, {"temperature": 0.0}, model="m") != key
+
+
+async def test_expired_entries_are_not_returned(tmp_path: Path) -> None:
+    with patch("config.DB_NAME", str(tmp_path / "llm.db")):
+        core.run_migrations()
+        assert await save_llm_cache("fresh", "RiskAssessment", "m", "{}", 12.5, 60)
+        assert await save_llm_cache("stale", "RiskAssessment", "m", "{}", 12.5, -1)
+        assert get_llm_cache("fresh") == ("{}", 12.5)
+        assert get_llm_cache("stale") is None
+
+
+async def test_gate_prefers_interactive_and_sheds_low_priority() -> None:
+    gate = _PriorityGate(limit=1, max_queue=1)
+    order: list[str] = []
+
+    async def job(name: str, priority: int) -> None:
+        async with gate.slot(priority):
+            order.append(name)
+
+    async with gate.slot(PRIORITY_LOW):
+        low = asyncio.create_task(job("low", PRIORITY_LOW))
+        await asyncio.sleep(0)
+        with pytest.raises(LLMOverloadedError):
+            await job("shed", PRIORITY_LOW)
+        interactive = asyncio.create_task(job("interactive", PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+    await asyncio.gather(low, interactive)
+
+    assert order == ["interactive", "low"]
+    assert gate.active == 0 and gate.queued == 0
@@ -0,0 +1,103 @@
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from benchmarks.fixtures import FixtureMarketData, block_network, option_expiries
+from market_analysis import hedging
+from services.mark_to_market import MarkStats, OptionLeg, mark_option_legs
+
+
+async def _atm_strike(fixture: FixtureMarketData, symbol: str, expiry: str) -> float:
+    chain = await fixture.get_option_chain(symbol, expiry, prune_pct=None)
+    strikes = chain.calls["strike"]
+    return float(strikes.iloc[(strikes - fixture.spot(symbol)).abs().argmin()])
+
+
+def _recorded(fixture: FixtureMarketData, leg: OptionLeg) -> tuple[float, float]:
+    calls, puts = fixture._chains[(leg.symbol, leg.expiry)]
+    opts = calls if leg.opt_type == "call" else puts
+    row = opts[(opts["strike"] - leg.strike).abs() < 0.01].iloc[0]
+    bid, ask = row["bid"], row["ask"]
+    mid = (bid + ask) / 2 if bid > 0 and ask > 0 else row["lastPrice"]
+    return float(mid), float(row["impliedVolatility"])
+
+
+async def test_marks_every_leg_with_one_chain_read_per_expiry() -> None:
+    fixture = FixtureMarketData()
+    near, far = option_expiries()[1], option_expiries()[-1]
+    strike = await _atm_strike(fixture, "NVDA", near)
+    legs = [
+        OptionLeg("NVDA", near, strike, "call"),
+        OptionLeg("NVDA", near, strike, "put"),
+        OptionLeg("NVDA", near, strike + 0.02, "call"),  # 超出比對容差：查無此合約
+        OptionLeg("NVDA", far, await _atm_strike(fixture, "NVDA", far), "put"),
+        OptionLeg("AMD", near, await _atm_strike(fixture, "AMD", near), "call"),
+        OptionLeg("NVDA", near, strike, "call"),
+    ]
+    reads: list[tuple[str, str]] = []
+
+    async def counting_chain(symbol: str, expiry: str, prune_pct: Any = 0.1) -> Any:
+        assert prune_pct is None
+        reads.append((symbol, expiry))
+        return await fixture.get_option_chain(symbol, expiry, prune_pct)
+
+    stats = MarkStats()
+    with (
+        block_network(),
+        patch(
+            "services.market_data_service.get_option_chain", side_effect=counting_chain
+        ),
+    ):
+        marks = await mark_option_legs(legs, stats=stats)
+
+    assert sorted(reads) == sorted([("NVDA", near), ("NVDA", far), ("AMD", near)])
+    assert (stats.legs, stats.chains, stats.unpriced) == (6, 3, 1)
+    assert marks[2] == (0.0, 0.0)
+    assert marks[0] == marks[5]
+    for i in (0, 1, 3, 4):
+        assert marks[i] == pytest.approx(_recorded(fixture, legs[i]))
+
+
+async def test_hedge_analytics_reuse_marks_and_user_snapshot() -> None:
+    fixture = FixtureMarketData()
+    expiry = option_expiries()[2]
+    strike = await _atm_strike(fixture, "SPY", expiry)
+    real = [
+        (1, "SPY", "PUT", strike, expiry, 1.0, 2, 0.0, -40.0, 0.0, 0.0, "HEDGE"),
+    ]
+    virtual = [
+        {
+            "symbol": "SPY",
+            "opt_type": "call",
+            "strike": strike,
+            "expiry": expiry,
+            "entry_price": 1.0,
+            "quantity": 1,
+            "weighted_delta": 50.0,
+            "trade_category": "SPECULATIVE",
+        }
+    ]
+    u_ctx = MagicMock(dynamic_tau=1.0)
+    history = [{"effectiveness": 0.9, "alpha_pnl": 1.0, "hedge_pnl": 1.0}] * 3
+
+    with (
+        block_network(),
+        fixture.patched(),
+        patch("database.portfolio.get_user_portfolio", return_value=real),
+        patch("database.virtual_trading.get_open_virtual_trades", return_value=virtual),
+        patch("database.get_full_user_context") as m_ctx,
+        patch("database.add_hedge_history") as m_add,
+        patch("database.get_hedge_history", return_value=history),
+    ):
+        perf = await hedging.analyze_hedge_performance(1)
+        await hedging.calculate_daily_effectiveness(1, perf=perf, u_ctx=u_ctx)
+        tau = await hedging.calculate_dynamic_tau(1, u_ctx=u_ctx)
+
+    put_mid, _ = _recorded(fixture, OptionLeg("SPY", expiry, strike, "put"))
+    call_mid, _ = _recorded(fixture, OptionLeg("SPY", expiry, strike, "call"))
+    assert perf["hedge_contribution"] == pytest.approx((put_mid - 1.0) * 200, abs=0.01)
+    assert perf["alpha_contribution"] == pytest.approx((call_mid - 1.0) * 100, abs=0.01)
+    assert m_add.call_args.kwargs["alpha_pnl"] == perf["alpha_contribution"]
+    assert tau == 1.0
+    m_ctx.assert_not_called()
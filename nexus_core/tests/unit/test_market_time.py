@@ -0,0 +1,79 @@
+from datetime import date, datetime, timedelta
+from typing import Any
+from unittest.mock import MagicMock
+
+import market_time
+from market_time import SessionCalendar, ny_tz, nyse_calendar
+
+
+def _counting_calendar() -> MagicMock:
+    wrapped = MagicMock()
+    wrapped.schedule.side_effect = nyse_calendar.schedule
+    return wrapped
+
+
+def _at(day: date, hour: int, minute: int = 0) -> datetime:
+    return datetime(day.year, day.month, day.day, hour, minute, tzinfo=ny_tz)
+
+
+def test_session_table_matches_calendar_and_builds_once() -> None:
+    wrapped = _counting_calendar()
+    cal = SessionCalendar(calendar=wrapped)
+    today = datetime.now(ny_tz).date()
+    expected = nyse_calendar.schedule(
+        start_date=today, end_date=today + timedelta(days=60)
+    )
+    expected_days = {ts.date() for ts in expected.index}
+
+    for offset in range(61):
+        day = today + timedelta(days=offset)
+        assert cal.is_trading_day(day) == (day in expected_days)
+
+    row = expected.iloc[0]
+    session = cal.session_on(expected.index[0].date())
+    assert session is not None
+    assert session.market_open == row["market_open"].tz_convert(ny_tz)
+    assert session.market_close == row["market_close"].tz_convert(ny_tz)
+
+    # 整個視窗只展開一次
+    assert wrapped.schedule.call_count == 1
+
+
+def test_phase_and_early_close_on_day_after_thanksgiving() -> None:
+    cal = SessionCalendar()
+    black_friday = date(2025, 11, 28)  # 13:00 提前收市
+
+    assert cal.is_early_close(black_friday)
+    assert not cal.is_early_close(date(2025, 11, 26))
+    assert cal.phase(_at(black_friday, 3, 59)) == "closed"
+    assert cal.phase(_at(black_friday, 8)) == "pre"
+    assert cal.phase(_at(black_friday, 12, 59)) == "regular"
+    assert cal.phase(_at(black_friday, 14)) == "post"
+    assert cal.phase(_at(black_friday, 17, 30)) == "closed"
+    assert not cal.is_open(_at(black_friday, 14))
+    assert cal.phase(_at(date(2025, 11, 27), 11)) == "closed"  # 感恩節休市
+
+
+def test_next_open_and_close_skip_holidays() -> None:
+    cal = SessionCalendar()
+    wednesday_evening = _at(date(2025, 11, 26), 18)
+    assert cal.next_open(wednesday_evening) == _at(date(2025, 11, 28), 9, 30)
+    assert cal.next_close(wednesday_evening) == _at(date(2025, 11, 28), 13)
+    assert cal.next_close(_at(date(2025, 11, 28), 10)) == _at(date(2025, 11, 28), 13)
+
+
+def test_module_helpers_use_shared_table(monkeypatch: Any) -> None:
+    wrapped = _counting_calendar()
+    cal = SessionCalendar(calendar=wrapped)
+    monkeypatch.setattr(market_time, "session_calendar", cal)
+
+    for _ in range(50):
+        market_time.is_market_open()
+        market_time.get_next_market_target_time("close", offset_minutes=5)
+        market_time.get_next_market_target_time("open", skip_today=True)
+
+    assert wrapped.schedule.call_count == 1
+    target = market_time.get_next_market_target_time("open", skip_today=True)
+    assert target is not None
+    assert target.date() > datetime.now(ny_tz).date()
+    assert target.tzinfo is not None
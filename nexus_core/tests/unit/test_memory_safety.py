@@ -83,12 +83,16 @@ async def test_memory_manager_warmup_gate() -> None:
         mock_wl.assert_not_called()
 
     # When memory is safe
+    from services.cache_prewarm import CacheAccessTracker
+
+    tracker = CacheAccessTracker()
+    tracker._loaded = True
     with patch("services.memory_manager.is_memory_safe", return_value=True), patch(
         "database.watchlist.get_all_watchlist", return_value=[(1, "SPY")]
-    ), patch("services.market_data_service.get_quote", new_callable=AsyncMock), patch(
-        "services.market_data_service.get_sma", new_callable=AsyncMock
-    ), patch("services.market_data_service.get_ema", new_callable=AsyncMock), patch(
-        "asyncio.sleep", new_callable=AsyncMock
-    ):
+    ), patch("services.memory_manager.access_tracker", tracker), patch(
+        "services.market_data_service.get_history_df", new_callable=AsyncMock
+    ), patch("services.market_data_service.get_sma", new_callable=AsyncMock), patch(
+        "services.market_data_service.get_ema", new_callable=AsyncMock
+    ), patch("asyncio.sleep", new_callable=AsyncMock):
         await mm.proactive_warmup()
         assert mm._last_warmup_date is not None
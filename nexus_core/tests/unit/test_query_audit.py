@@ -0,0 +1,54 @@
+"""database.query_audit — EXPLAIN QUERY PLAN 稽核：整表掃描 / 暫存排序偵測與列數門檻。"""
+
+import sqlite3
+
+from database.query_audit import (
+    Statement,
+    audit_connection,
+    audit_seeded_database,
+    collect_statements,
+    seed_synthetic_rows,
+)
+
+
+def test_database_package_has_no_unindexed_hot_queries() -> None:
+    report = audit_seeded_database()
+    assert report.planned > 100
+    assert report.ok, "\n".join(f.describe() for f in report.findings)
+
+    # f-string 的 IN 佔位與多行字串都還原為可規劃的完整語句
+    batch = [
+        s
+        for s in collect_statements()
+        if s.module == "market_cache.py" and "symbol IN (?)" in s.sql
+    ]
+    assert batch and all(s.sql.lstrip().startswith("SELECT") for s in batch)
+
+
+def test_flags_scans_and_temp_sorts_only_above_row_threshold() -> None:
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE jobs (id INTEGER PRIMARY KEY, status TEXT, "
+        "kind TEXT CHECK (kind IN ('A', 'B')), created_at TIMESTAMP)"
+    )
+    assert seed_synthetic_rows(conn, rows=50) == {"jobs": 50}
+    assert conn.execute("SELECT COUNT(DISTINCT kind) FROM jobs").fetchone() == (2,)
+
+    statements = [
+        Statement("jobs.py", 1, "SELECT * FROM jobs WHERE status = 'OPEN'"),
+        Statement("jobs.py", 2, "SELECT * FROM jobs j ORDER BY j.created_at LIMIT ?"),
+        Statement("jobs.py", 3, "SELECT * FROM jobs"),
+        Statement("jobs.py", 4, "UPDATE {table} SET x = 1"),
+    ]
+    report = audit_connection(conn, statements, min_rows=10)
+    assert [(f.statement.lineno, f.table, f.detail) for f in report.findings] == [
+        (1, "jobs", "SCAN jobs"),
+        (2, "jobs", "USE TEMP B-TREE FOR ORDER BY"),
+    ]
+    assert [s.lineno for s, _ in report.skipped] == [4]
+
+    assert audit_connection(conn, statements, min_rows=100).ok
+
+    conn.execute("CREATE INDEX idx_jobs_status ON jobs (status)")
+    conn.execute("CREATE INDEX idx_jobs_created ON jobs (created_at)")
+    assert audit_connection(conn, statements, min_rows=10).ok
@@ -2,7 +2,7 @@ from typing import Any
 import asyncio
 import pytest
 import pandas as pd
-from unittest.mock import AsyncMock, patch, MagicMock
+from unittest.mock import ANY, AsyncMock, patch, MagicMock
 from datetime import datetime, timezone
 
 from database.squeeze_cache import save_squeeze_cache, get_squeeze_cache
@@ -93,6 +93,47 @@ async def test_detect_uoa_whale_blocks() -> None:
         assert uoa_res[1]["volume"] == 500.0
 
 
+@pytest.mark.asyncio
+async def test_detect_uoa_prefers_edge_history_oi_change() -> None:
+    """edge 期權鏈歷史有 24 小時 OI 變化時取代「量減倉」估算；沒有對應履約價時維持估算。"""
+    calls_df = pd.DataFrame(
+        [
+            {
+                "strike": strike,
+                "volume": 2000.0,
+                "openInterest": 400.0,
+                "lastPrice": 5.0,
+                "bid": 4.9,
+                "ask": 5.1,
+                "impliedVolatility": 0.35,
+            }
+            for strike in (205.0, 210.0)
+        ]
+    )
+    chain = MagicMock(calls=calls_df, puts=pd.DataFrame([]))
+    oi_diff = {
+        "calls": [{"strike": 210.0, "oi_change": 1250.0}],
+        "puts": [{"strike": 210.0, "oi_change": -80.0}],
+    }
+
+    with patch(
+        "services.market_data_service.get_all_option_expiries",
+        return_value=["2026-08-28"],
+    ), patch(
+        "services.market_data_service.get_option_chain", return_value=chain
+    ), patch(
+        "services.market_data_service.get_quote", return_value={"c": 200.0}
+    ), patch(
+        "services.edge_cache_client.get_option_chain_history_diff",
+        new=AsyncMock(return_value=oi_diff),
+    ) as mock_diff:
+        uoa_res = await detect_uoa("NVDA")
+
+    by_strike = {item["strike"]: item["oi_change_net"] for item in uoa_res}
+    assert by_strike == {210.0: 1250, 205.0: 1600}
+    mock_diff.assert_awaited_once_with("NVDA", "2026-08-28", ANY)
+
+
 @pytest.mark.asyncio
 async def test_fetch_sym_radar_data_fast_sqz_self_healing() -> None:
     """驗證 _fetch_sym_radar_data_fast_raw 在 Squeeze Cache 未命中時，即時返回預設/歷史值並在背景非同步執行自癒計算。"""
@@ -132,6 +173,41 @@ async def test_fetch_sym_radar_data_fast_sqz_self_healing() -> None:
         mock_save_sqz.assert_called()
 
 
+@pytest.mark.asyncio
+async def test_revalidate_sqz_batches_pending_symbols() -> None:
+    """等待中的標的合併成一次 `calculate_power_squeeze_batch` 呼叫，逐檔寫回快取。"""
+    from cogs.unified_terminal import cog as cog_module
+
+    df_hist = pd.DataFrame(
+        {
+            "High": [102.0 + i for i in range(30)],
+            "Low": [99.0 + i for i in range(30)],
+            "Close": [101.0 + i for i in range(30)],
+        }
+    )
+    batch_result = {
+        "AAA": {"is_squeezing": True, "momentum": 1.5, "direction": "🟢"},
+        "BBB": {"is_squeezing": False, "momentum": -0.5, "direction": "🔴"},
+    }
+    cog_module._pending_sqz_symbols.update({"AAA", "BBB"})
+    with patch(
+        "services.market_data_service.get_history_df",
+        new=AsyncMock(return_value=df_hist),
+    ), patch(
+        "market_analysis.squeeze_engine.calculate_power_squeeze_batch",
+        return_value=batch_result,
+    ) as mock_batch, patch("database.squeeze_cache.save_squeeze_cache") as mock_save:
+        await cog_module._revalidate_sqz()
+
+    mock_batch.assert_called_once()
+    assert sorted(mock_batch.call_args.args[0]) == ["AAA", "BBB"]
+    assert sorted(c.args for c in mock_save.call_args_list) == [
+        ("AAA", True, 1.5, "🟢"),
+        ("BBB", False, -0.5, "🔴"),
+    ]
+    assert not cog_module._pending_sqz_symbols
+
+
 @pytest.mark.asyncio
 async def test_fetch_sym_radar_data_fast_uoa_self_healing() -> None:
     """驗證 _fetch_sym_radar_data_fast_raw 在 UOA 快取未命中時，即時響應並啟動非同步 SWR 任務寫回快取。"""
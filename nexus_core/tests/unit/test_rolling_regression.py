@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_analysis.rolling_regression import (
+    latest_linreg_batch,
+    rolling_linreg,
+    rolling_linreg_endpoint,
+    rolling_linreg_slope,
+    stack_right_aligned,
+)
+from market_analysis.squeeze_engine import (
+    calculate_power_squeeze,
+    calculate_power_squeeze_batch,
+)
+
+
+def _polyfit_reference(
+    values: np.ndarray, length: int
+) -> tuple[np.ndarray, np.ndarray]:
+    slope = np.full(len(values), np.nan)
+    endpoint = np.full(len(values), np.nan)
+    x = np.arange(length)
+    for end in range(length, len(values) + 1):
+        window = values[end - length : end]
+        if np.isnan(window).any():
+            continue
+        m, b = np.polyfit(x, window, 1)
+        slope[end - 1] = m
+        endpoint[end - 1] = m * (length - 1) + b
+    return slope, endpoint
+
+
+def _ohlc_frame(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    high = close * (1 + rng.uniform(0.0, 0.02, n))
+    low = close * (1 - rng.uniform(0.0, 0.02, n))
+    index = pd.date_range("2024-01-02", periods=n, freq="B")
+    return pd.DataFrame({"High": high, "Low": low, "Close": close}, index=index)
+
+
+@pytest.mark.parametrize("length", [4, 20])
+def test_rolling_linreg_matches_polyfit(length: int) -> None:
+    values = np.random.default_rng(1).normal(0, 1, 120).cumsum()
+    values[40] = np.nan
+
+    slope, endpoint = rolling_linreg(values, length)
+    ref_slope, ref_endpoint = _polyfit_reference(values, length)
+
+    np.testing.assert_allclose(slope, ref_slope, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(endpoint, ref_endpoint, rtol=1e-9, atol=1e-12)
+    # 含 NaN 的視窗輸出 NaN，與 pandas rolling().apply() 預設行為一致
+    assert np.isnan(slope[40 : 40 + length]).all()
+
+
+def test_series_helpers_keep_index_and_short_input() -> None:
+    s = pd.Series([1.0, 2.0, 4.0], index=["a", "b", "c"])
+    assert list(rolling_linreg_slope(s, 4).index) == ["a", "b", "c"]
+    assert rolling_linreg_endpoint(s, 4).isna().all()
+    assert rolling_linreg_slope(s, 2).iloc[-1] == pytest.approx(2.0)
+
+
+def test_two_dimensional_input_equals_per_row() -> None:
+    rng = np.random.default_rng(2)
+    matrix = rng.normal(0, 1, (5, 60)).cumsum(axis=1)
+    slope, endpoint = rolling_linreg(matrix, 20)
+    for row in range(matrix.shape[0]):
+        row_slope, row_endpoint = rolling_linreg(matrix[row], 20)
+        np.testing.assert_allclose(slope[row], row_slope)
+        np.testing.assert_allclose(endpoint[row], row_endpoint)
+
+
+def test_latest_linreg_batch() -> None:
+    rng = np.random.default_rng(3)
+    series = {
+        "AAPL": pd.Series(rng.normal(0, 1, 80).cumsum()),
+        "MSFT": pd.Series(rng.normal(0, 1, 30).cumsum()),
+        "TINY": pd.Series([1.0, 2.0]),
+    }
+    out = latest_linreg_batch(series, 20)
+    for sym in ("AAPL", "MSFT"):
+        slope, endpoint = rolling_linreg(series[sym].to_numpy(), 20)
+        assert out[sym] == pytest.approx((slope[-1], endpoint[-1]))
+    assert all(np.isnan(v) for v in out["TINY"])
+    assert latest_linreg_batch({}, 20) == {}
+
+    stacked = stack_right_aligned([np.array([1.0, 2.0]), np.array([3.0])])
+    np.testing.assert_array_equal(stacked[1], [np.nan, 3.0])
+
+
+def test_power_squeeze_batch_matches_single_symbol() -> None:
+    frames = {f"S{i}": _ohlc_frame(30 + i * 17, seed=i) for i in range(8)}
+    frames["SHORT"] = _ohlc_frame(10, seed=99)
+    with patch("market_analysis.squeeze_engine.is_memory_safe", return_value=True):
+        batch = calculate_power_squeeze_batch(frames)
+        for sym, df in frames.items():
+            single = calculate_power_squeeze(df)
+            assert batch[sym]["is_squeezing"] == single["is_squeezing"]
+            assert batch[sym]["direction"] == single["direction"]
+            assert batch[sym]["momentum"] == pytest.approx(
+                single["momentum"], rel=1e-9, abs=1e-12
+            )
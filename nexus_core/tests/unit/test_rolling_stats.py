@@ -0,0 +1,214 @@
+import random
+import sqlite3
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from database import core
+from market_analysis.sentiment.history_storage import (
+    get_indicator_percentile,
+    prune_sentiment_history,
+    save_sentiment_history,
+)
+from market_analysis.sentiment.cache import _iv_cache
+from market_analysis.sentiment.iv_metrics import fetch_and_calculate_iv_metrics
+from market_analysis.sentiment.rolling_stats import (
+    HISTORICAL_IV,
+    IndicatorStatsTable,
+    RollingWindowStats,
+    indicator_stats,
+)
+
+
+def _linear_rank(values: list[float], current: float) -> float:
+    low, high = min(values), max(values)
+    return ((current - low) / (high - low)) * 100.0 if high > low else 50.0
+
+
+def _linear_percentile(values: list[float], current: float) -> float:
+    return sum(1 for v in values if v < current) / len(values) * 100.0
+
+
+def test_rolling_window_matches_linear_scan_with_upserts_and_eviction() -> None:
+    rng = random.Random(5)
+    stats = RollingWindowStats(max_size=30)
+    reference: dict[int, float] = {}
+
+    for step in range(400):
+        # 約三成寫入覆蓋既有鍵 (同日 INSERT OR REPLACE)
+        key = rng.choice(list(reference)) if reference and rng.random() < 0.3 else step
+        value = round(rng.uniform(0.1, 0.9), 2)  # 兩位小數，刻意製造重複值
+        if key not in reference and len(reference) >= 30:
+            del reference[next(iter(reference))]
+        reference.pop(key, None)
+        reference[key] = value
+        stats.upsert(key, value)
+
+        values = list(reference.values())
+        probe = rng.uniform(0.0, 1.0)
+        assert len(stats) == len(values)
+        assert stats.min == min(values) and stats.max == max(values)
+        assert stats.rank(probe) == pytest.approx(_linear_rank(values, probe))
+        assert stats.percentile(value) == pytest.approx(
+            _linear_percentile(values, value)
+        )
+
+
+def test_empty_and_nan_handling() -> None:
+    stats = RollingWindowStats()
+    assert stats.rank(0.3) == 50.0 and stats.percentile(0.3) == 50.0
+    stats.upsert("a", float("nan"))
+    assert len(stats) == 0
+
+    table = IndicatorStatsTable()
+    table.record("AAPL", "SKEW", 1.0)  # 尚未建表：忽略
+    assert table.lookup("AAPL", "SKEW", 1.0) is None
+    table.seed("AAPL", HISTORICAL_IV, [("2026-01-02", 0.2)], tag="2026-01-02")
+    assert table.get("aapl", HISTORICAL_IV, tag="2026-01-03") is None
+    table.invalidate("AAPL")
+    assert table.get("AAPL", HISTORICAL_IV, tag="2026-01-02") is None
+
+
+def _read_conn_returning(values: list[float]) -> MagicMock:
+    conn = MagicMock()
+    conn.cursor.return_value.fetchall.return_value = [(v,) for v in values]
+    return conn
+
+
+@pytest.mark.asyncio
+async def test_indicator_percentile_hydrates_once_and_tracks_writes() -> None:
+    # DB 依 timestamp DESC 回傳：最新的一筆在最前面
+    history = [float(v) for v in range(100, 0, -1)]
+    conn = _read_conn_returning(history)
+
+    with patch("database.connection.get_read_connection", return_value=conn) as m_read:
+        assert get_indicator_percentile("SPY", "SKEW", 50.5) == pytest.approx(50.0)
+        assert get_indicator_percentile("SPY", "SKEW", 200.0) == pytest.approx(100.0)
+        assert m_read.call_count == 1
+
+        with patch("database.connection.execute_write_async", new_callable=AsyncMock):
+            for _ in range(10):
+                await save_sentiment_history("SPY", "SKEW", 1000.0)
+
+        # 視窗維持 100 筆：最舊的 1..10 被淘汰，10 筆 1000.0 進入
+        window = list(range(11, 101)) + [1000.0] * 10
+        assert get_indicator_percentile("SPY", "SKEW", 50.5) == pytest.approx(
+            _linear_percentile(window, 50.5)
+        )
+        assert m_read.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_iv_metrics_reads_history_once_per_day() -> None:
+    symbol = "TEST_STATS"
+    index = pd.date_range("2025-01-01", periods=60, freq="B")
+    closes = pd.Series(range(100, 160), index=index, dtype=float)
+    hist_df = pd.DataFrame({"Close": closes * (1 + (closes % 3) / 100.0)})
+    ticker = MagicMock()
+
+    with patch(
+        "services.market_data_service.get_quote", new_callable=AsyncMock
+    ) as m_quote, patch("yfinance.Ticker", return_value=ticker), patch(
+        "services.market_data_service.get_history_df", new_callable=AsyncMock
+    ) as m_hist, patch(
+        "market_analysis.sentiment.iv_metrics.is_market_open", return_value=True
+    ), patch(
+        "market_analysis.sentiment.iv_metrics._calculate_straddle_implied_em",
+        new_callable=AsyncMock,
+        return_value=None,
+    ), patch(
+        "market_analysis.sentiment.iv_metrics._calculate_iv_term_structure",
+        new_callable=AsyncMock,
+        return_value=("Normal", 1.0),
+    ), patch("database.cache.get_kv_cache", return_value=None), patch(
+        "database.cache.save_kv_cache", new_callable=AsyncMock
+    ):
+        m_quote.return_value = {"c": 100.0}
+        m_hist.return_value = hist_df
+
+        results: list[Any] = []
+        for iv in (0.30, 0.10, 0.90):
+            ticker.info = {"impliedVolatility": iv}
+            _iv_cache.clear()
+            results.append(await fetch_and_calculate_iv_metrics(symbol))
+
+        # 只有每日第一次呼叫需要讀取 1y 歷史建表
+        assert m_hist.await_count == 1
+
+        log_ret = np.log(hist_df["Close"] / hist_df["Close"].shift(1))
+        hv = (log_ret.rolling(20).std() * np.sqrt(252)).dropna()
+        for iv, metrics in zip((0.30, 0.10, 0.90), results):
+            window = list(hv) + [iv]
+            expected_rank = max(0.0, min(100.0, _linear_rank(window, iv)))
+            assert metrics.iv_rank == pytest.approx(round(expected_rank, 2), abs=0.01)
+            assert metrics.iv_percentile == pytest.approx(
+                round(_linear_percentile(window, iv), 2), abs=0.01
+            )
+
+    indicator_stats.invalidate(symbol)
+
+
+def test_window_query_uses_covering_time_index(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "sentiment.db")
+    with patch("config.DB_NAME", db_path):
+        core.run_migrations()
+    conn = sqlite3.connect(db_path)
+    try:
+        plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT value FROM sentiment_history "
+                "WHERE symbol = ? AND indicator = ? ORDER BY timestamp DESC LIMIT 100",
+                ("SPY", "SKEW"),
+            )
+        )
+    finally:
+        conn.close()
+    assert "COVERING INDEX idx_sentiment_history_symbol_indicator_ts" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_prune_drops_expired_and_downsamples_to_daily_last(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "sentiment.db")
+    with patch("config.DB_NAME", db_path):
+        core.run_migrations()
+        conn = sqlite3.connect(db_path)
+        rows = [
+            ("SPY", "SKEW", 1.0, "-400 days"),
+            ("SPY", "SKEW", 2.0, "-60 days", "+1 hours"),
+            ("SPY", "SKEW", 3.0, "-60 days", "+2 hours"),
+            ("SPY", "SKEW", 4.0, "-5 days", "+1 hours"),
+            ("SPY", "SKEW", 5.0, "-5 days", "+2 hours"),
+            ("QQQ", "PCR", 6.0, "-1 days"),
+        ]
+        for symbol, indicator, value, *mods in rows:
+            conn.execute(
+                "INSERT INTO sentiment_history (symbol, indicator, value, timestamp) "
+                "VALUES (?, ?, ?, datetime(date('now'), "
+                + ", ".join("?" for _ in mods)
+                + "))",
+                (symbol, indicator, value, *mods),
+            )
+        conn.commit()
+
+        indicator_stats.seed_sequence("SPY", "SKEW", [1.0, 2.0, 3.0, 4.0, 5.0])
+        indicator_stats.seed_sequence("QQQ", "PCR", [6.0])
+
+        assert prune_sentiment_history(365, 30) == 2
+        remaining = [
+            row[0]
+            for row in conn.execute(
+                "SELECT value FROM sentiment_history ORDER BY timestamp, id"
+            )
+        ]
+        conn.close()
+
+        # 60 天前同日只留最後一筆；近期資料不動
+        assert remaining == [3.0, 4.0, 5.0, 6.0]
+        assert indicator_stats.get("SPY", "SKEW") is None
+        assert indicator_stats.get("QQQ", "PCR") is not None
+        assert prune_sentiment_history(365, 30) == 0
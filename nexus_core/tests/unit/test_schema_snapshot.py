@@ -0,0 +1,96 @@
+import sqlite3
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from database import core
+
+
+def _schema(conn: sqlite3.Connection) -> list[tuple[Any, ...]]:
+    return conn.execute(
+        "SELECT type, name, tbl_name, sql FROM sqlite_master "
+        "WHERE name NOT LIKE 'sqlite_%' ORDER BY type, name"
+    ).fetchall()
+
+
+def _versions(conn: sqlite3.Connection) -> list[int]:
+    return [
+        row[0]
+        for row in conn.execute("SELECT version FROM schema_versions ORDER BY version")
+    ]
+
+
+def test_latest_version_matches_registry_without_importing() -> None:
+    registry = core.get_migrations()
+    assert core.latest_version() == max(m["version"] for m in registry)
+
+
+def test_snapshot_matches_full_migration_chain() -> None:
+    chain = sqlite3.connect(":memory:")
+    core.apply_migrations(chain, use_snapshot=False)
+
+    snap = sqlite3.connect(":memory:")
+    core.apply_migrations(snap)
+
+    assert _schema(snap) == _schema(chain)
+    assert _versions(snap) == _versions(chain)
+    assert (
+        snap.execute("SELECT key, value FROM kv_cache ORDER BY key").fetchall()
+        == chain.execute("SELECT key, value FROM kv_cache ORDER BY key").fetchall()
+    )
+    for table, column in core._SNAPSHOT_TIMESTAMP_COLUMNS:
+        nulls = snap.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE {column} IS NULL"
+        ).fetchone()[0]
+        assert nulls == 0
+
+
+def test_snapshot_file_is_current(tmp_path: Path) -> None:
+    # 新增遷移後忘了重新產生快照時在此失敗：python cli.py admin schema-snapshot
+    fresh = core.write_schema_snapshot(tmp_path / "snapshot.sql")
+    assert fresh.read_text(encoding="utf-8") == core.SCHEMA_SNAPSHOT_PATH.read_text(
+        encoding="utf-8"
+    )
+
+
+def test_current_schema_short_circuits_without_loading_migrations(
+    tmp_path: Path,
+) -> None:
+    db_path = tmp_path / "nexus.db"
+    with patch("config.DB_NAME", str(db_path)):
+        core.run_migrations()
+        with patch.object(core, "_migration_registry") as registry:
+            core.run_migrations()
+    registry.assert_not_called()
+
+
+def test_snapshot_bootstrap_then_applies_newer_migrations(tmp_path: Path) -> None:
+    # 模擬快照落後一個版本：只載入到 V(latest-1)，剩下的由遷移鏈補上
+    chain = sqlite3.connect(":memory:")
+    core.apply_migrations(chain, use_snapshot=False)
+    latest = core.latest_version()
+
+    stale = tmp_path / "stale.sql"
+    core.write_schema_snapshot(stale)
+    text = stale.read_text(encoding="utf-8").replace(
+        f'INSERT INTO "schema_versions" VALUES({latest},NULL);\n', ""
+    )
+    stale.write_text(text, encoding="utf-8")
+
+    conn = sqlite3.connect(":memory:")
+    with patch.object(core, "SCHEMA_SNAPSHOT_PATH", stale):
+        core.apply_migrations(conn)
+    assert _versions(conn) == _versions(chain)
+    assert _schema(conn) == _schema(chain)
+
+
+@pytest.mark.parametrize("missing", [True, False])
+def test_bootstrap_skips_when_snapshot_missing(tmp_path: Path, missing: bool) -> None:
+    path = tmp_path / "snapshot.sql"
+    if not missing:
+        core.write_schema_snapshot(path)
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE schema_versions (version INTEGER PRIMARY KEY)")
+    assert core._bootstrap_from_snapshot(conn, path) is (not missing)
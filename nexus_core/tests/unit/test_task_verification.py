@@ -12,6 +12,7 @@ from market_analysis.risk_engine import (
     get_macro_risk_metrics,
     calculate_hedge_instruction,
 )
+from services.cache_prewarm import CacheAccessTracker
 from services.memory_manager import MemoryManager
 from models.quant import MacroRiskMetrics
 
@@ -58,23 +59,25 @@ async def test_task2_warmup_idempotency() -> None:
     bot = MagicMock()
     mm = MemoryManager(bot)
 
-    # Mock dependencies
+    # Mock dependencies (全新的存取統計 → 走冷啟動觀察清單路徑)
+    tracker = CacheAccessTracker()
+    tracker._loaded = True
     with patch("database.watchlist.get_all_watchlist") as mock_list, patch(
-        "services.market_data_service.get_quote", autospec=True
-    ) as mock_quote, patch(
+        "services.memory_manager.access_tracker", tracker
+    ), patch("services.market_data_service.get_history_df", autospec=True), patch(
         "services.market_data_service.get_sma", autospec=True
-    ), patch("services.market_data_service.get_ema", autospec=True):
+    ) as mock_sma, patch("services.market_data_service.get_ema", autospec=True):
         mock_list.return_value = [("user", "AAPL"), ("user", "MSFT")]
 
         # 第一次執行
         await mm.proactive_warmup()
         assert mm._last_warmup_date == datetime.now().strftime("%Y-%m-%d")
-        first_call_count = mock_quote.call_count
+        first_call_count = mock_sma.call_count
         assert first_call_count > 0
 
         # 第二次執行 (同日)
         await mm.proactive_warmup()
-        assert mock_quote.call_count == first_call_count  # 不應增加
+        assert mock_sma.call_count == first_call_count  # 不應增加
 
 
 @pytest.mark.asyncio
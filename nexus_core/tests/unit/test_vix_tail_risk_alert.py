@@ -150,7 +150,7 @@ async def test_dynamic_market_scanner_triggers_on_vix_surge(mock_bot: Any) -> No
     """
     saved_kv: Dict[str, Any] = {}
 
-    async def mock_save(k: str, v: Any) -> None:
+    async def mock_save(k: str, v: Any, **_: Any) -> None:
         saved_kv[k] = v
 
     def mock_get(k: str) -> Any:
@@ -8,6 +8,11 @@ nexus_core 的查詢，不必每次都重新即時抓取。
 
 刻意維持最單純的 sqlite3 + CREATE TABLE IF NOT EXISTS 寫法，不套用
 nexus_core 那套 migration engine —— 這是獨立服務，維持既有的輕量單檔風格。
+
+除了「每個 symbol/expiry 只留最新一筆」的 `*_snapshot` 表之外，每次寫入
+也會 append 一筆到 `*_snapshot_history`，並由 `apply_history_retention`
+做分層降採樣（近 1 日保留每輪輪詢、近 7 日每小時一筆、更早每日一筆），
+讓 nexus_core 能直接向本地歷史查詢 GEX 牆位遷移與 OI 變化，不必重新抓取。
 """
 
 from typing import Any, Optional
@@ -55,6 +60,34 @@ def init_db() -> None:
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 PRIMARY KEY (symbol, expiry)
             );
+
+            CREATE TABLE IF NOT EXISTS gex_snapshot_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL,
+                captured_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                spot REAL,
+                net_gex REAL,
+                call_wall REAL,
+                put_wall REAL,
+                gex_profile_json TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_gex_history_symbol_time
+                ON gex_snapshot_history (symbol, captured_at);
+            CREATE INDEX IF NOT EXISTS idx_gex_history_time
+                ON gex_snapshot_history (captured_at);
+
+            CREATE TABLE IF NOT EXISTS option_chain_snapshot_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL,
+                expiry TEXT NOT NULL,
+                captured_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                calls_json TEXT,
+                puts_json TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_chain_history_symbol_expiry_time
+                ON option_chain_snapshot_history (symbol, expiry, captured_at);
+            CREATE INDEX IF NOT EXISTS idx_chain_history_time
+                ON option_chain_snapshot_history (captured_at);
             """
         )
         conn.commit()
@@ -113,7 +146,11 @@ def save_gex_snapshot(
     call_wall: float,
     put_wall: float,
     gex_profile: dict[str, float],
+    captured_at: Optional[str] = None,
 ) -> None:
+    """覆寫最新快照，並同時 append 一筆到 gex_snapshot_history。
+    `captured_at` 僅供測試/回補指定時間 (UTC, `YYYY-MM-DD HH:MM:SS`)。"""
+    profile_json = json.dumps(gex_profile)
     conn = _get_connection()
     try:
         conn.execute(
@@ -134,7 +171,23 @@ def save_gex_snapshot(
                 net_gex,
                 call_wall,
                 put_wall,
-                json.dumps(gex_profile),
+                profile_json,
+            ),
+        )
+        conn.execute(
+            """
+            INSERT INTO gex_snapshot_history
+                (symbol, captured_at, spot, net_gex, call_wall, put_wall, gex_profile_json)
+            VALUES (?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?, ?, ?, ?)
+            """,
+            (
+                symbol.upper(),
+                captured_at,
+                spot,
+                net_gex,
+                call_wall,
+                put_wall,
+                profile_json,
             ),
         )
         conn.commit()
@@ -163,7 +216,11 @@ def save_option_chain_snapshot(
     expiry: str,
     calls: list[dict[str, Any]],
     puts: list[dict[str, Any]],
+    captured_at: Optional[str] = None,
 ) -> None:
+    """覆寫最新快照，並同時 append 一筆到 option_chain_snapshot_history。"""
+    calls_json = json.dumps(calls)
+    puts_json = json.dumps(puts)
     conn = _get_connection()
     try:
         conn.execute(
@@ -175,7 +232,15 @@ def save_option_chain_snapshot(
                 puts_json = excluded.puts_json,
                 updated_at = CURRENT_TIMESTAMP
             """,
-            (symbol.upper(), expiry, json.dumps(calls), json.dumps(puts)),
+            (symbol.upper(), expiry, calls_json, puts_json),
+        )
+        conn.execute(
+            """
+            INSERT INTO option_chain_snapshot_history
+                (symbol, expiry, captured_at, calls_json, puts_json)
+            VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?)
+            """,
+            (symbol.upper(), expiry, captured_at, calls_json, puts_json),
         )
         conn.commit()
     finally:
@@ -206,3 +271,240 @@ def get_option_chain_snapshot(
         return data
     finally:
         conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Snapshot history: retention + range diff
+# ---------------------------------------------------------------------------
+
+# (較舊邊界, 較新邊界, 分桶格式)：落在 [較舊, 較新) 區間的列，每個分桶只保留
+# 最後一筆。近 1 日內不降採樣 (保留每輪輪詢)。
+HISTORY_DOWNSAMPLE_TIERS: tuple[tuple[str, str, str], ...] = (
+    ("-7 days", "-1 day", "%Y-%m-%d %H"),
+    ("-3650 days", "-7 days", "%Y-%m-%d"),
+)
+HISTORY_MAX_AGE_DAYS = 180
+
+_HISTORY_TABLES: dict[str, tuple[str, ...]] = {
+    "gex_snapshot_history": ("symbol",),
+    "option_chain_snapshot_history": ("symbol", "expiry"),
+}
+
+
+def apply_history_retention(
+    now: str = "now", max_age_days: int = HISTORY_MAX_AGE_DAYS
+) -> int:
+    """依 HISTORY_DOWNSAMPLE_TIERS 對歷史快照表做分層降採樣，並刪除超過
+    `max_age_days` 的列。回傳刪除總列數。`now` 可傳入 UTC 時間字串供測試使用。"""
+    removed = 0
+    conn = _get_connection()
+    try:
+        for table, key_cols in _HISTORY_TABLES.items():
+            keys = ", ".join(key_cols)
+            for older, newer, bucket_fmt in HISTORY_DOWNSAMPLE_TIERS:
+                cursor = conn.execute(
+                    f"""
+                    DELETE FROM {table}
+                    WHERE captured_at >= datetime(?, ?) AND captured_at < datetime(?, ?)
+                      AND id NOT IN (
+                        SELECT MAX(id) FROM {table}
+                        WHERE captured_at >= datetime(?, ?) AND captured_at < datetime(?, ?)
+                        GROUP BY {keys}, strftime(?, captured_at)
+                      )
+                    """,
+                    (now, older, now, newer, now, older, now, newer, bucket_fmt),
+                )
+                removed += cursor.rowcount
+            cursor = conn.execute(
+                f"DELETE FROM {table} WHERE captured_at < datetime(?, ?)",
+                (now, f"-{max_age_days} days"),
+            )
+            removed += cursor.rowcount
+        conn.commit()
+        return removed
+    finally:
+        conn.close()
+
+
+def _history_row_at(
+    conn: sqlite3.Connection,
+    table: str,
+    where: str,
+    params: tuple[Any, ...],
+    ts: str,
+) -> Optional[sqlite3.Row]:
+    """取 `ts` 當下(含)之前最後一筆快照。"""
+    row: Optional[sqlite3.Row] = conn.execute(
+        f"SELECT * FROM {table} WHERE {where} AND captured_at <= ? "
+        "ORDER BY captured_at DESC, id DESC LIMIT 1",
+        (*params, ts),
+    ).fetchone()
+    return row
+
+
+def _history_range_endpoints(
+    conn: sqlite3.Connection,
+    table: str,
+    where: str,
+    params: tuple[Any, ...],
+    start: str,
+    end: str,
+) -> tuple[Optional[sqlite3.Row], Optional[sqlite3.Row]]:
+    """回傳 (start 時點快照, end 時點快照)。若 start 早於第一筆歷史，
+    起點退而取 [start, end] 區間內最早的一筆。"""
+    base = _history_row_at(conn, table, where, params, start)
+    if base is None:
+        base = conn.execute(
+            f"SELECT * FROM {table} WHERE {where} AND captured_at >= ? AND captured_at <= ? "
+            "ORDER BY captured_at ASC, id ASC LIMIT 1",
+            (*params, start, end),
+        ).fetchone()
+    return base, _history_row_at(conn, table, where, params, end)
+
+
+def get_gex_history(symbol: str, start: str, end: str) -> list[dict[str, Any]]:
+    """回傳 [start, end] 區間內的 GEX 歷史 (不含 profile，輕量時間序列)。"""
+    conn = _get_connection()
+    try:
+        cursor = conn.execute(
+            """
+            SELECT captured_at, spot, net_gex, call_wall, put_wall
+            FROM gex_snapshot_history
+            WHERE symbol = ? AND captured_at >= ? AND captured_at <= ?
+            ORDER BY captured_at ASC, id ASC
+            """,
+            (symbol.upper(), start, end),
+        )
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def _float_or_zero(value: Any) -> float:
+    try:
+        return float(value or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def diff_gex_snapshots(symbol: str, start: str, end: str) -> Optional[dict[str, Any]]:
+    """比較 `start` 與 `end` 兩個時間點的 GEX 快照，回傳精簡差異：
+    spot / net_gex 變化、Call/Put Wall 遷移，以及只包含有變動履約價的
+    gex_profile 差值。任一端沒有快照則回傳 None。"""
+    conn = _get_connection()
+    try:
+        base, target = _history_range_endpoints(
+            conn, "gex_snapshot_history", "symbol = ?", (symbol.upper(),), start, end
+        )
+        if base is None or target is None:
+            return None
+
+        base_profile: dict[str, float] = json.loads(base["gex_profile_json"] or "{}")
+        target_profile: dict[str, float] = json.loads(
+            target["gex_profile_json"] or "{}"
+        )
+        profile_delta: dict[str, float] = {}
+        for strike in set(base_profile) | set(target_profile):
+            delta = _float_or_zero(target_profile.get(strike)) - _float_or_zero(
+                base_profile.get(strike)
+            )
+            if delta:
+                profile_delta[strike] = delta
+
+        return {
+            "symbol": symbol.upper(),
+            "from": base["captured_at"],
+            "to": target["captured_at"],
+            "spot": {"from": base["spot"], "to": target["spot"]},
+            "spot_change": _float_or_zero(target["spot"])
+            - _float_or_zero(base["spot"]),
+            "net_gex_change": _float_or_zero(target["net_gex"])
+            - _float_or_zero(base["net_gex"]),
+            "call_wall": {"from": base["call_wall"], "to": target["call_wall"]},
+            "call_wall_shift": _float_or_zero(target["call_wall"])
+            - _float_or_zero(base["call_wall"]),
+            "put_wall": {"from": base["put_wall"], "to": target["put_wall"]},
+            "put_wall_shift": _float_or_zero(target["put_wall"])
+            - _float_or_zero(base["put_wall"]),
+            "gex_profile_delta": profile_delta,
+        }
+    finally:
+        conn.close()
+
+
+def _chain_side_diff(
+    base_rows: list[dict[str, Any]], target_rows: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """以 strike 對齊一側期權鏈，只輸出 OI 或成交量有變動的履約價。"""
+
+    def _index(rows: list[dict[str, Any]]) -> dict[float, dict[str, Any]]:
+        indexed: dict[float, dict[str, Any]] = {}
+        for row in rows:
+            strike = row.get("strike")
+            if strike is None:
+                continue
+            indexed[float(strike)] = row
+        return indexed
+
+    base_map = _index(base_rows)
+    target_map = _index(target_rows)
+    changes: list[dict[str, Any]] = []
+    for strike in sorted(set(base_map) | set(target_map)):
+        before = base_map.get(strike, {})
+        after = target_map.get(strike, {})
+        oi_before = _float_or_zero(before.get("openInterest"))
+        oi_after = _float_or_zero(after.get("openInterest"))
+        vol_before = _float_or_zero(before.get("volume"))
+        vol_after = _float_or_zero(after.get("volume"))
+        if oi_before == oi_after and vol_before == vol_after:
+            continue
+        changes.append(
+            {
+                "strike": strike,
+                "oi_from": oi_before,
+                "oi_to": oi_after,
+                "oi_change": oi_after - oi_before,
+                "volume_change": vol_after - vol_before,
+            }
+        )
+    return changes
+
+
+def diff_option_chain_snapshots(
+    symbol: str, expiry: str, start: str, end: str
+) -> Optional[dict[str, Any]]:
+    """比較同一到期日在 `start` 與 `end` 兩個時間點的期權鏈，回傳各履約價
+    的 OI / 成交量變化 (僅列出有變動者)。任一端沒有快照則回傳 None。"""
+    conn = _get_connection()
+    try:
+        base, target = _history_range_endpoints(
+            conn,
+            "option_chain_snapshot_history",
+            "symbol = ? AND expiry = ?",
+            (symbol.upper(), expiry),
+            start,
+            end,
+        )
+        if base is None or target is None:
+            return None
+
+        calls_diff = _chain_side_diff(
+            json.loads(base["calls_json"] or "[]"),
+            json.loads(target["calls_json"] or "[]"),
+        )
+        puts_diff = _chain_side_diff(
+            json.loads(base["puts_json"] or "[]"),
+            json.loads(target["puts_json"] or "[]"),
+        )
+        return {
+            "symbol": symbol.upper(),
+            "expiry": expiry,
+            "from": base["captured_at"],
+            "to": target["captured_at"],
+            "calls": calls_diff,
+            "puts": puts_diff,
+            "call_oi_change": sum(c["oi_change"] for c in calls_diff),
+            "put_oi_change": sum(p["oi_change"] for p in puts_diff),
+        }
+    finally:
+        conn.close()
@@ -2,7 +2,7 @@ import asyncio
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from typing import Any, AsyncIterator
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel
 from playwright.async_api import (
     async_playwright,
@@ -1254,6 +1254,71 @@ async def get_cached_option_chain(
         return {"status": "error", "message": str(e)}
 
 
+def _to_db_timestamp(value: str) -> str:
+    """將 ISO-8601 時間 (可含時區) 正規化為 SQLite CURRENT_TIMESTAMP 的
+    UTC `YYYY-MM-DD HH:MM:SS` 格式；無時區視為 UTC。"""
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _diff_window(start: str, end: str | None) -> tuple[str, str]:
+    """解析差異查詢的時間區間 (`end` 省略時為現在)；格式錯誤或 start >= end 回 400。"""
+    try:
+        start_ts = _to_db_timestamp(start)
+        end_ts = (
+            _to_db_timestamp(end)
+            if end
+            else datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"invalid timestamp: {e}")
+    if start_ts >= end_ts:
+        raise HTTPException(status_code=400, detail="start must be earlier than end")
+    return start_ts, end_ts
+
+
+@app.get("/api/v1/cache/gex/{symbol}/diff")
+async def get_cached_gex_diff(
+    symbol: str, start: str = Query(...), end: str | None = None
+) -> dict[str, Any]:
+    """從本地 GEX 歷史比較兩個時間點：Call/Put Wall 遷移、net GEX 與各履約價
+    gamma 曝險變化。`end` 省略時為現在。不觸發任何即時抓取。"""
+    start_ts, end_ts = _diff_window(start, end)
+    try:
+        diff = await asyncio.to_thread(
+            database.diff_gex_snapshots, symbol, start_ts, end_ts
+        )
+        if not diff:
+            return {"status": "error", "message": "not_found"}
+        return {"status": "success", "data": diff}
+    except Exception as e:
+        logger.warning(f"[{symbol}] 讀取 GEX 歷史差異失敗: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@app.get("/api/v1/cache/options/{symbol}/chain/diff")
+async def get_cached_option_chain_diff(
+    symbol: str,
+    expiry: str = Query(...),
+    start: str = Query(...),
+    end: str | None = None,
+) -> dict[str, Any]:
+    """從本地期權鏈歷史比較兩個時間點各履約價的 OI / 成交量變化。"""
+    start_ts, end_ts = _diff_window(start, end)
+    try:
+        diff = await asyncio.to_thread(
+            database.diff_option_chain_snapshots, symbol, expiry, start_ts, end_ts
+        )
+        if not diff:
+            return {"status": "error", "message": "not_found"}
+        return {"status": "success", "data": diff}
+    except Exception as e:
+        logger.warning(f"[{symbol}] 讀取 Option Chain 歷史差異失敗: {e}")
+        return {"status": "error", "message": str(e)}
+
+
 @app.get("/api/v1/macro/calendar")
 async def scrape_macro_calendar(
     year: int, month: int, high_impact_only: bool = False
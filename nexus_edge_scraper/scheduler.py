@@ -105,6 +105,10 @@ async def poll_once() -> None:
     if pruned:
         logger.info(f"已清除 {pruned} 個逾時未同步的追蹤標的")
 
+    downsampled = await asyncio.to_thread(database.apply_history_retention)
+    if downsampled:
+        logger.info(f"歷史快照降採樣已移除 {downsampled} 筆")
+
 
 async def _loop() -> None:
     await asyncio.to_thread(database.init_db)
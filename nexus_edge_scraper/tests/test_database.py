@@ -116,3 +116,166 @@ def test_option_chain_snapshot_latest_when_multiple_expiries() -> None:
     row = database.get_option_chain_snapshot("AAPL")
     assert row is not None
     assert row["expiry"] == "2026-09-25"
+
+
+def test_gex_snapshot_appends_history() -> None:
+    database.save_gex_snapshot(
+        "AAPL", 100.0, 1.0, 110.0, 90.0, {}, captured_at="2026-09-01 14:00:00"
+    )
+    database.save_gex_snapshot(
+        "AAPL", 105.0, 2.0, 115.0, 95.0, {}, captured_at="2026-09-01 14:30:00"
+    )
+    history = database.get_gex_history(
+        "aapl", "2026-09-01 00:00:00", "2026-09-02 00:00:00"
+    )
+    assert [h["spot"] for h in history] == [100.0, 105.0]
+    # 最新快照表仍維持單列覆寫語意
+    row = database.get_gex_snapshot("AAPL")
+    assert row is not None
+    assert row["spot"] == 105.0
+
+
+def test_diff_gex_snapshots_reports_wall_migration_and_profile_delta() -> None:
+    database.save_gex_snapshot(
+        "AAPL",
+        100.0,
+        1000.0,
+        110.0,
+        90.0,
+        {"90.0": 50.0, "110.0": -20.0},
+        captured_at="2026-09-01 14:00:00",
+    )
+    database.save_gex_snapshot(
+        "AAPL",
+        104.0,
+        1500.0,
+        115.0,
+        90.0,
+        {"90.0": 50.0, "110.0": -5.0, "115.0": 30.0},
+        captured_at="2026-09-01 16:00:00",
+    )
+
+    diff = database.diff_gex_snapshots(
+        "AAPL", "2026-09-01 14:10:00", "2026-09-01 16:00:00"
+    )
+    assert diff is not None
+    assert diff["from"] == "2026-09-01 14:00:00"
+    assert diff["to"] == "2026-09-01 16:00:00"
+    assert diff["spot_change"] == 4.0
+    assert diff["net_gex_change"] == 500.0
+    assert diff["call_wall_shift"] == 5.0
+    assert diff["put_wall_shift"] == 0.0
+    # 未變動的 90.0 履約價不應出現在精簡差異中
+    assert diff["gex_profile_delta"] == {"110.0": 15.0, "115.0": 30.0}
+
+    assert database.diff_gex_snapshots("MSFT", "2026-09-01", "2026-09-02") is None
+
+
+def test_diff_option_chain_snapshots_reports_oi_change() -> None:
+    database.save_option_chain_snapshot(
+        "AAPL",
+        "2026-09-18",
+        [{"strike": 230.0, "openInterest": 100, "volume": 10}],
+        [{"strike": 220.0, "openInterest": 50, "volume": 5}],
+        captured_at="2026-09-01 14:00:00",
+    )
+    database.save_option_chain_snapshot(
+        "AAPL",
+        "2026-09-18",
+        [
+            {"strike": 230.0, "openInterest": 180, "volume": 40},
+            {"strike": 240.0, "openInterest": 25, "volume": 25},
+        ],
+        [{"strike": 220.0, "openInterest": 50, "volume": 5}],
+        captured_at="2026-09-02 14:00:00",
+    )
+
+    diff = database.diff_option_chain_snapshots(
+        "AAPL", "2026-09-18", "2026-09-01 15:00:00", "2026-09-02 15:00:00"
+    )
+    assert diff is not None
+    assert diff["calls"] == [
+        {
+            "strike": 230.0,
+            "oi_from": 100.0,
+            "oi_to": 180.0,
+            "oi_change": 80.0,
+            "volume_change": 30.0,
+        },
+        {
+            "strike": 240.0,
+            "oi_from": 0.0,
+            "oi_to": 25.0,
+            "oi_change": 25.0,
+            "volume_change": 25.0,
+        },
+    ]
+    assert diff["puts"] == []
+    assert diff["call_oi_change"] == 105.0
+    assert diff["put_oi_change"] == 0.0
+
+
+def test_apply_history_retention_downsamples_by_tier() -> None:
+    now = "2026-09-30 12:00:00"
+    # 近 1 日：每輪皆保留
+    for ts in ("2026-09-30 10:00:00", "2026-09-30 10:30:00"):
+        database.save_gex_snapshot("AAPL", 1.0, 1.0, 1.0, 1.0, {}, captured_at=ts)
+    # 1-7 日：同一小時只留最後一筆
+    for ts in ("2026-09-27 10:00:00", "2026-09-27 10:30:00", "2026-09-27 11:00:00"):
+        database.save_gex_snapshot("AAPL", 2.0, 1.0, 1.0, 1.0, {}, captured_at=ts)
+    # 7 日以上：同一天只留最後一筆
+    for ts in ("2026-09-10 10:00:00", "2026-09-10 15:00:00"):
+        database.save_gex_snapshot("AAPL", 3.0, 1.0, 1.0, 1.0, {}, captured_at=ts)
+    # 超過保留上限：整筆刪除
+    database.save_gex_snapshot(
+        "AAPL", 4.0, 1.0, 1.0, 1.0, {}, captured_at="2026-01-01 10:00:00"
+    )
+    database.save_option_chain_snapshot(
+        "AAPL", "2026-10-16", [], [], captured_at="2026-09-27 10:00:00"
+    )
+    database.save_option_chain_snapshot(
+        "AAPL", "2026-10-16", [], [], captured_at="2026-09-27 10:45:00"
+    )
+
+    removed = database.apply_history_retention(now=now)
+    assert removed == 4
+
+    history = database.get_gex_history(
+        "AAPL", "2025-01-01 00:00:00", "2026-12-31 00:00:00"
+    )
+    assert [h["captured_at"] for h in history] == [
+        "2026-09-10 15:00:00",
+        "2026-09-27 10:30:00",
+        "2026-09-27 11:00:00",
+        "2026-09-30 10:00:00",
+        "2026-09-30 10:30:00",
+    ]
+
+
+def test_diff_gex_snapshots_start_before_first_row_uses_earliest_in_range() -> None:
+    database.save_gex_snapshot(
+        "AAPL", 100.0, 1.0, 110.0, 90.0, {}, captured_at="2026-09-01 14:00:00"
+    )
+    database.save_gex_snapshot(
+        "AAPL", 101.0, 1.0, 120.0, 90.0, {}, captured_at="2026-09-01 15:00:00"
+    )
+    diff = database.diff_gex_snapshots(
+        "AAPL", "2026-09-01 00:00:00", "2026-09-01 23:00:00"
+    )
+    assert diff is not None
+    assert diff["from"] == "2026-09-01 14:00:00"
+    assert diff["call_wall_shift"] == 10.0
+
+
+def test_history_retention_cutoff_uses_captured_at_index() -> None:
+    conn = database._get_connection()
+    try:
+        for table in ("gex_snapshot_history", "option_chain_snapshot_history"):
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN DELETE FROM {table} "
+                "WHERE captured_at < datetime(?, ?)",
+                ("now", "-180 days"),
+            ).fetchall()
+            assert any("USING INDEX" in str(row[-1]) for row in plan), plan
+    finally:
+        conn.close()
@@ -142,3 +142,69 @@ def test_scrape_symbol_gex_endpoint_still_delegates_to_core(
     data = response.json()
     assert data["status"] == "success"
     assert data["data"]["spot"] == 100.0
+
+
+def test_get_cached_gex_diff_returns_wall_migration() -> None:
+    database.save_gex_snapshot(
+        "AAPL", 100.0, 1.0, 110.0, 90.0, {}, captured_at="2026-09-01 14:00:00"
+    )
+    database.save_gex_snapshot(
+        "AAPL", 101.0, 1.0, 112.0, 88.0, {}, captured_at="2026-09-01 15:00:00"
+    )
+
+    response = client.get(
+        "/api/v1/cache/gex/aapl/diff",
+        params={"start": "2026-09-01T10:00:00-04:00", "end": "2026-09-01T15:00:00Z"},
+    )
+    data = response.json()
+    assert data["status"] == "success"
+    assert data["data"]["call_wall_shift"] == 2.0
+    assert data["data"]["put_wall_shift"] == -2.0
+
+    miss = client.get("/api/v1/cache/gex/MSFT/diff", params={"start": "2026-09-01"})
+    assert miss.json()["status"] == "error"
+
+    reversed_window = client.get(
+        "/api/v1/cache/gex/aapl/diff",
+        params={"start": "2026-09-01T15:00:00Z", "end": "2026-09-01T11:00:00-04:00"},
+    )
+    assert reversed_window.status_code == 400
+
+
+def test_get_cached_option_chain_diff_returns_oi_change() -> None:
+    database.save_option_chain_snapshot(
+        "AAPL",
+        "2026-09-18",
+        [{"strike": 230.0, "openInterest": 100}],
+        [],
+        captured_at="2026-09-01 14:00:00",
+    )
+    database.save_option_chain_snapshot(
+        "AAPL",
+        "2026-09-18",
+        [{"strike": 230.0, "openInterest": 150}],
+        [],
+        captured_at="2026-09-02 14:00:00",
+    )
+
+    response = client.get(
+        "/api/v1/cache/options/aapl/chain/diff",
+        params={
+            "expiry": "2026-09-18",
+            "start": "2026-09-01 14:00:00",
+            "end": "2026-09-02 14:00:00",
+        },
+    )
+    data = response.json()
+    assert data["status"] == "success"
+    assert data["data"]["call_oi_change"] == 50.0
+
+    reversed_window = client.get(
+        "/api/v1/cache/options/aapl/chain/diff",
+        params={
+            "expiry": "2026-09-18",
+            "start": "2026-09-02 14:00:00",
+            "end": "2026-09-01 14:00:00",
+        },
+    )
+    assert reversed_window.status_code == 400